@@ -0,0 +1,11 @@
+"""Headless benchmark suite.
+
+Runs the real game stack (Game / PlayState / Map / Entity) with the SDL dummy
+video driver for a fixed number of frames at a fixed dt, feeding scripted
+action streams into the InputManager instead of pygame events.
+
+Usage:
+    python -m benchmarks                 # run every benchmark
+    python -m benchmarks idle walk_map0  # run a subset
+    python -m benchmarks --update-baseline
+"""
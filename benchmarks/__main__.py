@@ -0,0 +1,97 @@
+"""Command line entry point: `python -m benchmarks`."""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.harness import (
+    BASELINE_PATH,
+    BENCHMARKS,
+    BenchConfig,
+    compare,
+    load_baseline,
+    save_baseline,
+)
+# Importing the scenario modules registers their benchmarks
+import benchmarks.scenarios  # noqa: F401
+import benchmarks.bench_maps  # noqa: F401
+import benchmarks.bench_world  # noqa: F401
+import benchmarks.bench_collision  # noqa: F401
+import benchmarks.bench_spatial  # noqa: F401
+import benchmarks.bench_entities  # noqa: F401
+import benchmarks.bench_assets  # noqa: F401
+import benchmarks.bench_render  # noqa: F401
+import benchmarks.bench_profiler  # noqa: F401
+import benchmarks.bench_replay  # noqa: F401
+import benchmarks.bench_navigation  # noqa: F401
+import benchmarks.bench_save  # noqa: F401
+import benchmarks.bench_inventory  # noqa: F401
+import benchmarks.bench_startup  # noqa: F401
+import benchmarks.bench_animation  # noqa: F401
+import benchmarks.bench_input  # noqa: F401
+import benchmarks.bench_sim_thread  # noqa: F401
+import benchmarks.bench_particles  # noqa: F401
+import benchmarks.bench_minimap  # noqa: F401
+import benchmarks.bench_pacing  # noqa: F401
+import benchmarks.bench_states  # noqa: F401
+import benchmarks.bench_objects  # noqa: F401
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    parser.add_argument("--frames", type=int, default=BenchConfig.frames)
+    parser.add_argument("--dt", type=float, default=BenchConfig.dt)
+    parser.add_argument("--warmup", type=int, default=BenchConfig.warmup)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.35,
+                        help="allowed relative regression (default: 0.35)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, fn in BENCHMARKS.items():
+            summary = (fn.__doc__ or "").strip().splitlines()
+            print(f"{name:24} {summary[0] if summary else ''}")
+        return 0
+
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    config = BenchConfig(frames=args.frames, dt=args.dt, warmup=args.warmup)
+    results = {}
+    for name in names:
+        print(f"== {name}", flush=True)
+        metrics = BENCHMARKS[name](config)
+        results[name] = metrics
+        for metric, value in metrics.items():
+            print(f"   {metric:28} {value:12.3f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print("No baseline found; run with --update-baseline to create one.")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nREGRESSIONS (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
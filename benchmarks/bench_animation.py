@@ -0,0 +1,82 @@
+"""Sprite animation: vectorized clip cursors vs. per-sprite frame lookups."""
+import time
+from typing import Dict
+
+import numpy as np
+
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+ANIM_ENTITY_COUNT: int = 10000
+# Ticks timed per path (capped by --frames)
+ANIM_FRAMES: int = 120
+
+
+@benchmark("animation")
+def animation(config: BenchConfig) -> Dict[str, float]:
+    """Animate 10k mixed idle/walking/running sprites: shared tables vs. dicts."""
+    from src.animation import FACINGS, MOTIONS, get_animation_library
+    from src.entity_store import EntityStore
+
+    make_game()
+    library = get_animation_library()
+    sets = [library.set_id(name) for name in library.set_names]
+    rng = np.random.default_rng(18)
+    store = EntityStore(ANIM_ENTITY_COUNT)
+    for i in range(ANIM_ENTITY_COUNT):
+        store.spawn(0.0, 0.0, sets[i % len(sets)])
+    n = store.count
+    store.facing[:n] = rng.integers(0, len(FACINGS), n)
+    store.sprinting[:n] = rng.random(n) < 0.3
+    moving = rng.random(n) < 0.6
+    # Start mid-clip so every frame of every clip shows up
+    store.anim_time[:n] = rng.random(n) * 2.0
+
+    # What each sprite did before: its own motion -> facing -> frames dict
+    clips = [
+        {
+            motion: {facing: [library.frames[f] for f in library.track(int(library.motion_clips[s, m]), d)[0]]
+                     for d, facing in enumerate(FACINGS)}
+            for m, motion in enumerate(MOTIONS)
+        }
+        for s in sets
+    ]
+    fps = [[float(library.clip_fps[library.motion_clips[s, m]]) for m in range(len(MOTIONS))] for s in sets]
+    sprites = [
+        {
+            "clips": clips[int(store.sprite[row])],
+            "fps": fps[int(store.sprite[row])],
+            "facing": FACINGS[int(store.facing[row])],
+            "motion": (2 if store.sprinting[row] else 1) if moving[row] else 0,
+            "time": float(store.anim_time[row]),
+            "image": None,
+        }
+        for row in range(n)
+    ]
+
+    frames = max(2, min(config.frames, ANIM_FRAMES))
+    vectorized, per_sprite = [], []
+    for _ in range(frames):
+        start = time.perf_counter()
+        store._animate(moving, config.dt)
+        vectorized.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for sprite in sprites:
+            motion = sprite["motion"]
+            sprite["time"] += config.dt
+            frame_list = sprite["clips"][MOTIONS[motion]][sprite["facing"]]
+            sprite["image"] = frame_list[int(sprite["time"] * sprite["fps"][motion]) % len(frame_list)]
+        per_sprite.append(time.perf_counter() - start)
+
+    # Both paths must show the same surface for every sprite
+    frame_list = library.frames
+    mismatches = sum(frame_list[store.frame[row]] is not sprites[row]["image"] for row in range(n))
+    metrics: Dict[str, float] = {}
+    metrics.update(timing_metrics("vectorized", vectorized))
+    metrics.update(timing_metrics("per_sprite", per_sprite))
+    metrics["animate_speedup"] = sum(per_sprite) / sum(vectorized)
+    metrics["sprites_per_s"] = n * len(vectorized) / sum(vectorized)
+    metrics["frame_mismatches"] = mismatches
+    metrics["shared_frames"] = len(library.frames)
+    metrics["cursor_bytes_per_sprite"] = store.clip.itemsize + store.anim_time.itemsize + store.frame.itemsize
+    return metrics
@@ -0,0 +1,55 @@
+"""Entity spawning: per-instance spritesheet loads vs. the shared asset cache."""
+import time
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, make_game
+
+
+ASSET_SPAWN_COUNT: int = 500
+
+
+@benchmark("asset_cache")
+def asset_cache(config: BenchConfig) -> Dict[str, float]:
+    """Spawn many player entities: load+convert per instance vs. AssetManager."""
+    import pygame
+    from src import animation, assets
+    from src.entity import Entity
+    from src.settings import PLAYER_SPRITE_SIZE, SPRITES_DIR
+    from src.tools import Tools
+
+    game = make_game()
+    w, h = PLAYER_SPRITE_SIZE
+    sheet_path = str(SPRITES_DIR / "player.png")
+
+    # What Entity.__init__ used to do for every instance
+    start = time.perf_counter()
+    for _ in range(ASSET_SPAWN_COUNT):
+        sheet = pygame.image.load(sheet_path).convert_alpha()
+        [Tools.split_image(sheet, 0, row * h, w, h) for row in range(4)]
+    legacy_s = time.perf_counter() - start
+
+    # Fresh manager and animation library so the first spawn pays the
+    # (single) load
+    manager = assets.AssetManager()
+    assets._default_manager, previous = manager, assets._default_manager
+    animation._default_library, previous_library = None, animation._default_library
+    try:
+        start = time.perf_counter()
+        entities = [Entity(game.input) for _ in range(ASSET_SPAWN_COUNT)]
+        shared_s = time.perf_counter() - start
+        stats = manager.stats()
+        for entity in entities:
+            entity.kill()
+    finally:
+        assets._default_manager = previous
+        animation._default_library = previous_library
+
+    return {
+        "legacy_spawn_ms": legacy_s * 1000.0,
+        "shared_spawn_ms": shared_s * 1000.0,
+        "spawn_speedup": legacy_s / shared_s,
+        "loads": stats["loads"],
+        "cache_hits": stats["hits"],
+        "resident_kb": stats["resident_bytes"] / 1024.0,
+        "entities": ASSET_SPAWN_COUNT,
+    }
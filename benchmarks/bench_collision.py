@@ -0,0 +1,43 @@
+"""Collision benchmarks: per-entity swept AABB vs. the batched NumPy path."""
+import time
+from typing import Dict
+
+import numpy as np
+
+from benchmarks.harness import BenchConfig, benchmark, timing_metrics
+
+
+COLLISION_ENTITIES: int = 500
+COLLISION_GRID_SIZE: int = 256
+COLLISION_SOLID_RATIO: float = 0.2
+# Box size matching the player sprite
+BOX_SIZE = (24.0, 32.0)
+
+
+@benchmark("collision_batch")
+def collision_batch(config: BenchConfig) -> Dict[str, float]:
+    """Resolve moves of many boxes: Python loop over move() vs move_batch()."""
+    from src.collision import CollisionGrid
+
+    rng = np.random.default_rng(6)
+    solid = rng.random((COLLISION_GRID_SIZE, COLLISION_GRID_SIZE)) < COLLISION_SOLID_RATIO
+    grid = CollisionGrid(solid, (16, 16))
+    world = COLLISION_GRID_SIZE * 16 - max(BOX_SIZE)
+    positions = rng.random((COLLISION_ENTITIES, 2)) * world
+    w, h = BOX_SIZE
+    loop_samples, batch_samples = [], []
+    for _ in range(config.frames):
+        deltas = (rng.random((COLLISION_ENTITIES, 2)) - 0.5) * (220.0 * config.dt * 2)
+        start = time.perf_counter()
+        for (x, y), (dx, dy) in zip(positions.tolist(), deltas.tolist()):
+            grid.move(x, y, w, h, dx, dy)
+        loop_samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        positions = grid.move_batch(positions, BOX_SIZE, deltas)
+        batch_samples.append(time.perf_counter() - start)
+    metrics = {}
+    metrics.update(timing_metrics("loop", loop_samples))
+    metrics.update(timing_metrics("batch", batch_samples))
+    metrics["batch_speedup"] = sum(loop_samples) / sum(batch_samples)
+    metrics["entities"] = COLLISION_ENTITIES
+    return metrics
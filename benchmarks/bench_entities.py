@@ -0,0 +1,66 @@
+"""Crowd movement: per-object `Entity.update` vs. the batched `EntityStore`."""
+import time
+from typing import Dict
+
+import numpy as np
+
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+ENTITY_COUNT: int = 10000
+# Frames timed per path (capped by --frames): the object path is slow
+ENTITY_FRAMES: int = 60
+ENTITY_GRID_SIZE: int = 256
+ENTITY_SOLID_RATIO: float = 0.05
+
+
+@benchmark("entity_store")
+def entity_store(config: BenchConfig) -> Dict[str, float]:
+    """Move 10k entities diagonally, free and against tiles: objects vs. arrays."""
+    from src.collision import CollisionGrid
+    from src.entity import Entity
+    from src.entity_store import EntityStore
+
+    game = make_game()
+    # Every Entity reads the same input: hold a diagonal so the
+    # normalization and facing branches run
+    game.input.set_held_actions(("move_right", "move_down"))
+    rng = np.random.default_rng(8)
+    solid = rng.random((ENTITY_GRID_SIZE, ENTITY_GRID_SIZE)) < ENTITY_SOLID_RATIO
+    grid = CollisionGrid(solid, (16, 16))
+    start_positions = rng.random((ENTITY_COUNT, 2)) * (ENTITY_GRID_SIZE * 16 - 32)
+
+    entities = []
+    for x, y in start_positions.tolist():
+        entity = Entity(game.input)
+        entity.position = [x, y]
+        entities.append(entity)
+    store = EntityStore(ENTITY_COUNT)
+    views = [store.view(store.spawn(x, y, size=(24, 32))) for x, y in start_positions.tolist()]
+    store.intent[:store.count] = (1.0, 1.0)
+
+    frames = max(2, min(config.frames, ENTITY_FRAMES))
+    metrics: Dict[str, float] = {}
+    for mode, collision in (("free", None), ("collide", grid)):
+        for entity in entities:
+            entity.collision = collision
+        object_samples, store_samples, rect_samples = [], [], []
+        for _ in range(frames):
+            start = time.perf_counter()
+            for entity in entities:
+                entity.update(config.dt)
+            object_samples.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            store.update(config.dt, collision)
+            store_samples.append(time.perf_counter() - start)
+            # Worst case for the lazy rects: every view read after the update
+            start = time.perf_counter()
+            for view in views:
+                view.rect
+            rect_samples.append(time.perf_counter() - start)
+        metrics.update(timing_metrics(f"{mode}_objects", object_samples))
+        metrics.update(timing_metrics(f"{mode}_store", store_samples))
+        metrics.update(timing_metrics(f"{mode}_all_rects", rect_samples))
+        metrics[f"{mode}_speedup"] = sum(object_samples) / sum(store_samples)
+    metrics["entities"] = ENTITY_COUNT
+    return metrics
@@ -0,0 +1,113 @@
+"""Input: bitmask action queries, key-name tables and event handling."""
+import time
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, setup_headless
+
+
+# Entity ticks simulated for the query comparison (5 action queries each)
+INPUT_QUERY_TICKS: int = 100000
+# Key down/up event pairs handled
+INPUT_EVENT_PAIRS: int = 20000
+# Times every binding name is rebuilt (what save() does)
+INPUT_NAME_ROUNDS: int = 20
+
+
+class _LegacyQueries:
+    """The former string-set action state, for comparison."""
+
+    def __init__(self, held) -> None:
+        self._actions_held = set(held)
+
+    def is_action_active(self, action: str) -> bool:
+        return action in self._actions_held
+
+
+@benchmark("input")
+def input_queries(config: BenchConfig) -> Dict[str, float]:
+    """Per-entity movement queries: string sets vs action bits; saves; events."""
+    setup_headless()
+    import pygame
+    from src import input_manager
+    from src.input_manager import InputManager
+
+    pygame.init()
+    manager = InputManager()
+    manager.set_held_actions(("move_right", "move_down", "sprint"))
+    actions = ("move_right", "move_left", "move_down", "move_up", "sprint")
+    metrics: Dict[str, float] = {}
+
+    # What InputManager used to do: a set of held action names
+    legacy = _LegacyQueries(manager.actions_in(manager.held))
+    legacy_active = legacy.is_action_active
+    start = time.perf_counter()
+    for _ in range(INPUT_QUERY_TICKS):
+        for action in actions:
+            legacy_active(action)
+    legacy_s = time.perf_counter() - start
+    is_active = manager.is_action_active
+    start = time.perf_counter()
+    for _ in range(INPUT_QUERY_TICKS):
+        for action in actions:
+            is_active(action)
+    string_s = time.perf_counter() - start
+    # What Entity does: bits fetched once, one read of `held` per tick
+    right, left, down, up, sprint = (manager.action_bit(action) for action in actions)
+    start = time.perf_counter()
+    for _ in range(INPUT_QUERY_TICKS):
+        held = manager.held
+        held & right, held & left, held & down, held & up, held & sprint
+    bits_s = time.perf_counter() - start
+    metrics["query_legacy_ms"] = legacy_s * 1000.0
+    metrics["query_string_ms"] = string_s * 1000.0
+    metrics["query_bits_ms"] = bits_s * 1000.0
+    metrics["query_speedup"] = legacy_s / bits_s
+
+    # Binding names as save() writes them: dir(pygame) scan per key vs tables
+    codes = [
+        control
+        for bindings in manager.profile.action_bindings.values()
+        for binding in bindings
+        for control in binding
+        if isinstance(control, int)
+    ]
+
+    def scan_name(code: int) -> str:
+        for attr in dir(pygame):
+            if attr.startswith("K_") and getattr(pygame, attr) == code:
+                return attr
+        return f"K_{code}"
+
+    start = time.perf_counter()
+    for _ in range(INPUT_NAME_ROUNDS):
+        legacy_names = [scan_name(code) for code in codes]
+    scan_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(INPUT_NAME_ROUNDS):
+        names = [input_manager._key_code_to_name(code) for code in codes]
+    table_s = time.perf_counter() - start
+    metrics["key_names_legacy_ms"] = scan_s * 1000.0 / INPUT_NAME_ROUNDS
+    metrics["key_names_ms"] = table_s * 1000.0 / INPUT_NAME_ROUNDS
+    metrics["key_names_speedup"] = scan_s / table_s
+    metrics["key_name_mismatches"] = sum(a != b for a, b in zip(legacy_names, names))
+
+    # Key events through the bindings, with a chord bound as well
+    manager.set_held_actions(())
+    manager.rebind("quicksave", ["K_LCTRL+K_s"])
+    down = [pygame.event.Event(pygame.KEYDOWN, key=key) for key in (pygame.K_s, pygame.K_LCTRL, pygame.K_d)]
+    up = [pygame.event.Event(pygame.KEYUP, key=key) for key in (pygame.K_s, pygame.K_LCTRL, pygame.K_d)]
+    quicksave = manager.action_bit("quicksave")
+    chord_misses = 0
+    start = time.perf_counter()
+    for _ in range(INPUT_EVENT_PAIRS // len(down)):
+        manager.begin_frame()
+        for event in down:
+            manager.handle_event(event)
+        chord_misses += not manager.held & quicksave
+        for event in up:
+            manager.handle_event(event)
+        chord_misses += manager.held != 0
+    events_s = time.perf_counter() - start
+    metrics["events_per_s"] = 2 * len(down) * (INPUT_EVENT_PAIRS // len(down)) / events_s
+    metrics["chord_mismatches"] = chord_misses
+    return metrics
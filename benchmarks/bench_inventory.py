@@ -0,0 +1,117 @@
+"""Inventory: filtered queries, batch transactions and the cached panel."""
+import random
+import time
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+# Distinct items held by the benchmarked inventory
+INV_BENCH_ITEMS: int = 1000
+INV_BENCH_CATEGORIES: int = 8
+INV_BENCH_TAGS: int = 24
+# Changes per batch transaction, batches timed
+INV_BENCH_BATCH: int = 64
+INV_BENCH_ROUNDS: int = 200
+
+
+def build_registry(items: int = INV_BENCH_ITEMS):
+    from src.items import ItemRegistry
+
+    rng = random.Random(16)
+    registry = ItemRegistry()
+    for i in range(items):
+        registry.register(
+            f"item_{i}",
+            name=f"Item {i}",
+            category=f"category_{i % INV_BENCH_CATEGORIES}",
+            tags=rng.sample([f"tag_{t}" for t in range(INV_BENCH_TAGS)], 3),
+            max_stack=999,
+            value=rng.randrange(1, 100),
+        )
+    return registry
+
+
+@benchmark("inventory")
+def inventory(config: BenchConfig) -> Dict[str, float]:
+    """1000-item inventory: queries, transactions, opening and redrawing the panel."""
+    from src.inventory import Inventory, InventoryError
+
+    game = make_game()
+    screen = game.screen
+    registry = build_registry()
+    bag = Inventory(registry)
+    bag.add_items({item_id: 1 + item_id % 50 for item_id in range(len(registry))})
+    metrics: Dict[str, float] = {}
+
+    # Indexed category and tag lookups vs a scan of every held item
+    indexed, scanned = [], []
+    for i in range(INV_BENCH_ROUNDS):
+        category = f"category_{i % INV_BENCH_CATEGORIES}"
+        tag = f"tag_{i % INV_BENCH_TAGS}"
+        start = time.perf_counter()
+        bag.in_category(category)
+        bag.with_tag(tag)
+        indexed.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        defs = registry.defs
+        {item_id: n for item_id, n in bag.counts.items() if defs[item_id].category == category}
+        {item_id: n for item_id, n in bag.counts.items() if tag in defs[item_id].tags}
+        scanned.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("query", indexed))
+    metrics["query_speedup"] = sum(scanned) / sum(indexed)
+
+    # Batches of changes, and rejected batches that must change nothing
+    rng = random.Random(7)
+    batches, rejected, broken = [], [], 0
+    for _ in range(INV_BENCH_ROUNDS):
+        changes = [(rng.randrange(len(registry)), rng.choice((-1, 1))) for _ in range(INV_BENCH_BATCH)]
+        start = time.perf_counter()
+        try:
+            bag.apply(changes)
+        except InventoryError:
+            pass
+        batches.append(time.perf_counter() - start)
+        before, revision = dict(bag.counts), bag.revision
+        start = time.perf_counter()
+        try:
+            bag.apply(changes + [(0, -10_000)])
+            broken += 1
+        except InventoryError:
+            pass
+        rejected.append(time.perf_counter() - start)
+        broken += dict(bag.counts) != before or bag.revision != revision
+    metrics.update(timing_metrics("batch", batches))
+    metrics.update(timing_metrics("rejected_batch", rejected))
+    metrics["batch_changes_per_s"] = INV_BENCH_BATCH * len(batches) / sum(batches)
+    metrics["rollback_mismatches"] = broken
+
+    # Opening the panel: a fresh view draws the first page
+    opens = []
+    for _ in range(10):
+        bag._view = None
+        start = time.perf_counter()
+        bag.draw_inventory(screen)
+        opens.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("open", opens))
+
+    view = bag.view
+    unchanged, changed, scrolled = [], [], []
+    for i in range(INV_BENCH_ROUNDS):
+        start = time.perf_counter()
+        bag.draw_inventory(screen)
+        unchanged.append(time.perf_counter() - start)
+        # One visible count changes: only its cell is repainted
+        bag.add_item(bag.ordered()[view.scroll * view.COLUMNS + i % view.page_size])
+        start = time.perf_counter()
+        bag.draw_inventory(screen)
+        changed.append(time.perf_counter() - start)
+        view.scroll_by(1 if i % 20 < 10 else -1)
+        start = time.perf_counter()
+        bag.draw_inventory(screen)
+        scrolled.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("draw_unchanged", unchanged))
+    metrics.update(timing_metrics("draw_changed", changed))
+    metrics.update(timing_metrics("draw_scrolled", scrolled))
+    metrics["cell_redraws_per_change"] = view.cell_redraws / INV_BENCH_ROUNDS
+    return metrics
@@ -0,0 +1,38 @@
+"""Map loading benchmarks: binary cache vs. TMX parsing."""
+import time
+from typing import Dict, List
+
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+# Number of loads timed per path
+MAP_LOAD_REPEAT: int = 30
+
+
+@benchmark("map_load")
+def map_load(config: BenchConfig) -> Dict[str, float]:
+    """Map.switch_map time: pytmx, compiled cache, and prefetched map."""
+    import src.map
+    from src.settings import START_MAP
+
+    game = make_game()
+    world = game.current_state.map
+    metrics: Dict[str, float] = {}
+    for label, enabled, prefetched in (
+        ("pytmx", False, False),
+        ("cached", True, False),
+        ("prefetched", True, True),
+    ):
+        src.map.MAP_CACHE_ENABLED = enabled
+        samples: List[float] = []
+        try:
+            for _ in range(MAP_LOAD_REPEAT):
+                if not prefetched:
+                    world.loader.clear()
+                start = time.perf_counter()
+                world.switch_map(START_MAP)
+                samples.append(time.perf_counter() - start)
+        finally:
+            src.map.MAP_CACHE_ENABLED = True
+        metrics.update(timing_metrics(f"load_{label}", samples))
+    return metrics
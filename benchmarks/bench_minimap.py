@@ -0,0 +1,72 @@
+"""Minimap: overview built from tile layers vs. scaling the world each frame."""
+import time
+from typing import Dict
+
+import pygame
+
+from benchmarks.bench_world import synthetic_world
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+# Edge in tiles of the synthetic world the overview is built for
+MINIMAP_WORLD_SIZE: int = 2048
+# Frames timed for the overview, and for the smoothscale path (slow)
+MINIMAP_FRAMES: int = 240
+MINIMAP_SCALE_FRAMES: int = 30
+# Tile rects refreshed after a (simulated) edit
+MINIMAP_REFRESHES: int = 200
+
+
+@benchmark("minimap")
+def minimap(config: BenchConfig) -> Dict[str, float]:
+    """Build, refresh and draw the minimap; compare with smoothscale."""
+    from src import map_cache
+    from src.minimap import Minimap
+
+    game = make_game()
+    world = game.current_state.map
+    display = game.screen.get_display()
+    world.render(game.screen)
+    overview = world.minimap
+    metrics: Dict[str, float] = {}
+
+    # Build from the compiled layers, as the map loader does
+    start = time.perf_counter()
+    Minimap.from_map(overview.compiled, map_cache.load_tileset_pixels(overview.compiled))
+    metrics["build_map0_ms"] = (time.perf_counter() - start) * 1000.0
+    compiled = map_cache.read_cache(synthetic_world(MINIMAP_WORLD_SIZE), f"world_{MINIMAP_WORLD_SIZE}")
+    pixels = map_cache.load_tileset_pixels(compiled)
+    start = time.perf_counter()
+    Minimap.from_map(compiled, pixels)
+    metrics["build_world_ms"] = (time.perf_counter() - start) * 1000.0
+
+    # One tile changed at a time, all over the map
+    samples = []
+    for i in range(MINIMAP_REFRESHES):
+        tile = pygame.Rect(i * 7 % overview.compiled.width, i * 13 % overview.compiled.height, 1, 1)
+        start = time.perf_counter()
+        world.tiles_changed(tile)
+        samples.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("refresh", samples))
+
+    # Overview, sprite markers and view outline per frame
+    view = world.map_layer.view_rect
+    samples = []
+    for _ in range(max(2, min(config.frames, MINIMAP_FRAMES))):
+        start = time.perf_counter()
+        overview.draw(display, (0, 0), world.minimap_markers(), view)
+        samples.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("draw", samples))
+
+    # What a minimap costs without the overview: a full-size map image
+    # (prerendered here, only the scaling is timed) scaled down every frame
+    tile_width, tile_height = overview.tile_size
+    full = pygame.Surface((overview.compiled.width * tile_width, overview.compiled.height * tile_height))
+    samples = []
+    for _ in range(max(2, min(config.frames, MINIMAP_SCALE_FRAMES))):
+        start = time.perf_counter()
+        display.blit(pygame.transform.smoothscale(full, overview.surface.get_size()), (0, 0))
+        samples.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("draw_scaled", samples))
+    metrics["draw_speedup"] = metrics["draw_scaled_p50_ms"] / metrics["draw_p50_ms"]
+    return metrics
@@ -0,0 +1,127 @@
+"""Pathfinding: A* vs JPS, path cache, flow fields and the frame budget."""
+import random
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.harness import BenchConfig, benchmark, timing_metrics
+
+
+# Synthetic map edges in tiles
+NAV_MAP_SIZES = (128, 512, 1024)
+# Long path queries timed per map size
+NAV_QUERIES: int = 8
+# Agents steered through one shared flow field
+NAV_AGENTS: int = 500
+# Queued requests drained under the per-frame budget
+NAV_BUDGET_REQUESTS: int = 32
+
+
+def synthetic_solid(size: int, seed: int = 7) -> np.ndarray:
+    """Town-like layout: walled blocks with doorways, plus scattered rocks."""
+    rng = np.random.default_rng(seed)
+    solid = rng.random((size, size)) < 0.015
+    block = 24
+    for top in range(4, size - block, block + 6):
+        for left in range(4, size - block, block + 6):
+            h, w = rng.integers(8, block, size=2)
+            solid[top:top + h, left] = solid[top:top + h, left + w] = True
+            solid[top, left:left + w + 1] = solid[top + h, left:left + w + 1] = True
+            # Doorway on a random side
+            door = int(rng.integers(2, min(h, w) - 1))
+            side = int(rng.integers(4))
+            if side == 0:
+                solid[top + door, left] = False
+            elif side == 1:
+                solid[top + door, left + w] = False
+            elif side == 2:
+                solid[top, left + door] = False
+            else:
+                solid[top + h, left + door] = False
+    return solid
+
+
+def _queries(navigator, size: int, count: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Far-apart walkable start/goal pairs (opposite corners of the map)."""
+    rng = random.Random(size)
+    margin = max(4, size // 8)
+    pairs = []
+    while len(pairs) < count:
+        start = (rng.randrange(margin), rng.randrange(margin))
+        goal = (size - 1 - rng.randrange(margin), size - 1 - rng.randrange(margin))
+        if navigator.is_walkable(start) and navigator.is_walkable(goal):
+            pairs.append((start, goal))
+    return pairs
+
+
+def _time_searches(navigator, pairs, method: str) -> Tuple[List[float], List[float]]:
+    samples, costs = [], []
+    for start, goal in pairs:
+        navigator.clear()
+        begin = time.perf_counter()
+        path = navigator.find_path(start, goal, method)
+        samples.append(time.perf_counter() - begin)
+        costs.append(navigator.path_cost(path) if path else -1.0)
+    return samples, costs
+
+
+@benchmark("pathfinding")
+def pathfinding(config: BenchConfig) -> Dict[str, float]:
+    """Path searches, cached lookups and flow fields on maps up to 1024x1024."""
+    from src.collision import CollisionGrid
+    from src.navigation import Navigator
+
+    metrics: Dict[str, float] = {}
+    for size in NAV_MAP_SIZES:
+        navigator = Navigator(CollisionGrid(synthetic_solid(size), (16, 16)), flow_radius=None)
+        pairs = _queries(navigator, size, NAV_QUERIES)
+        prefix = f"m{size}"
+        astar, astar_costs = _time_searches(navigator, pairs, "astar")
+        jps, jps_costs = _time_searches(navigator, pairs, "jps")
+        metrics.update(timing_metrics(f"{prefix}_astar", astar))
+        metrics.update(timing_metrics(f"{prefix}_jps", jps))
+        metrics[f"{prefix}_jps_speedup"] = sum(astar) / sum(jps)
+        # Both searches are optimal: any difference is a bug
+        metrics[f"{prefix}_cost_mismatches"] = sum(
+            1 for a, b in zip(astar_costs, jps_costs) if abs(a - b) > 1e-6
+        )
+
+        # Cached lookups of the same pairs
+        for start, goal in pairs:
+            navigator.find_path(start, goal)
+        begin = time.perf_counter()
+        for _ in range(10):
+            for start, goal in pairs:
+                navigator.find_path(start, goal)
+        metrics[f"{prefix}_cached_query_ms"] = (time.perf_counter() - begin) * 1000.0 / (10 * len(pairs))
+
+        # Flow fields: the whole map and the default window around the goal
+        goal = pairs[0][1]
+        begin = time.perf_counter()
+        field = navigator.flow_field(goal)
+        metrics[f"{prefix}_flow_full_ms"] = (time.perf_counter() - begin) * 1000.0
+        windowed = Navigator(navigator.collision)
+        begin = time.perf_counter()
+        windowed.flow_field(goal)
+        metrics[f"{prefix}_flow_window_ms"] = (time.perf_counter() - begin) * 1000.0
+        rng = np.random.default_rng(size)
+        positions = rng.uniform(0, size * 16, size=(NAV_AGENTS, 2))
+        begin = time.perf_counter()
+        for _ in range(100):
+            field.direction_at(positions)
+        metrics[f"{prefix}_steer_{NAV_AGENTS}_ms"] = (time.perf_counter() - begin) * 10.0
+
+        # A burst of requests drained under the per-frame budget
+        navigator.clear()
+        for start, goal in _queries(navigator, size, NAV_BUDGET_REQUESTS):
+            navigator.request_path(start, goal)
+        frames, worst = 0, 0.0
+        while navigator.pending:
+            begin = time.perf_counter()
+            navigator.update()
+            worst = max(worst, time.perf_counter() - begin)
+            frames += 1
+        metrics[f"{prefix}_budget_frames"] = frames
+        metrics[f"{prefix}_budget_worst_frame_ms"] = worst * 1000.0
+    return metrics
@@ -0,0 +1,115 @@
+"""Map objects: grid index queries vs. scanning every object each frame."""
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.harness import BenchConfig, benchmark, timing_metrics
+
+
+# Synthetic object layers: object counts, map edge in pixels
+OBJECT_COUNTS = (1000, 10000)
+OBJECT_MAP_PX: int = 8192
+# Zones covering a large part of the map (kept out of the grid)
+OBJECT_ZONES: int = 4
+# Queries timed per case, and entities tracked at once
+OBJECT_QUERIES: int = 500
+OBJECT_ENTITIES: int = 2000
+OBJECT_TRACK_FRAMES: int = 60
+
+
+def synthetic_objects(count: int, seed: int = 7) -> List:
+    """Triggers, warps and spawn points (1 in 5 is a point) spread over the map."""
+    from src.map_cache import MapObject
+
+    rng = random.Random(seed)
+    objects = []
+    for i in range(count):
+        kind = ("trigger", "warp", "spawn")[i % 3]
+        point = i % 5 == 0
+        width, height = (0.0, 0.0) if point else (rng.uniform(16, 96), rng.uniform(16, 96))
+        properties = {"target_map": "map0"} if kind == "warp" else {}
+        objects.append(MapObject(i + 1, f"{kind}{i}", kind, rng.uniform(0, OBJECT_MAP_PX),
+                                 rng.uniform(0, OBJECT_MAP_PX), width, height, properties=properties))
+    for i in range(OBJECT_ZONES):
+        objects.append(MapObject(count + i + 1, f"zone{i}", "zone", 0.0, i * OBJECT_MAP_PX / OBJECT_ZONES,
+                                 OBJECT_MAP_PX, OBJECT_MAP_PX / OBJECT_ZONES))
+    return objects
+
+
+def _brute(objects, rect) -> List[int]:
+    """Rows of the objects overlapping rect (x, y, w, h), one by one."""
+    import pygame
+
+    query = pygame.Rect(rect)
+    return [row for row, obj in enumerate(objects)
+            if query.colliderect(pygame.Rect(obj.x, obj.y, max(obj.width, 1), max(obj.height, 1)))]
+
+
+@benchmark("map_objects")
+def map_objects(config: BenchConfig) -> Dict[str, float]:
+    """Build the index, query it per frame and track entities; compare with a scan."""
+    import pygame
+    from src.map_objects import ObjectIndex, ObjectTracker
+
+    rng = random.Random(11)
+    metrics: Dict[str, float] = {}
+    for count in OBJECT_COUNTS:
+        objects = synthetic_objects(count)
+        start = time.perf_counter()
+        index = ObjectIndex(objects)
+        metrics[f"build_{count}_ms"] = (time.perf_counter() - start) * 1000.0
+    # `index` and `objects` are the largest case from here on
+    rects = [(rng.randrange(OBJECT_MAP_PX), rng.randrange(OBJECT_MAP_PX), 24, 32)
+             for _ in range(OBJECT_QUERIES)]
+
+    # What a per-frame trigger check costs without an index
+    samples = []
+    for rect in rects[:OBJECT_QUERIES // 10]:
+        player = pygame.Rect(rect)
+        start = time.perf_counter()
+        for obj in objects:
+            if player.colliderect(pygame.Rect(obj.x, obj.y, max(obj.width, 1), max(obj.height, 1))):
+                pass
+        samples.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("scan", samples))
+
+    samples, mismatches = [], 0
+    for rect in rects:
+        start = time.perf_counter()
+        index.query_rect(rect)
+        samples.append(time.perf_counter() - start)
+    for rect in rects[:OBJECT_QUERIES // 10]:
+        mismatches += sorted(index.query_rect(rect).tolist()) != _brute(objects, rect)
+    metrics.update(timing_metrics("query_rect", samples))
+    metrics["query_speedup"] = metrics["scan_p50_ms"] / metrics["query_rect_p50_ms"]
+    metrics["query_mismatches"] = mismatches
+
+    samples = []
+    for x, y, _, _ in rects:
+        start = time.perf_counter()
+        index.query_point(x, y, kind="trigger")
+        samples.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("query_point", samples))
+
+    # Enter/exit events for a crowd walking across the map
+    tracker = ObjectTracker(index)
+    keys = np.arange(OBJECT_ENTITIES)
+    boxes = np.column_stack([
+        np.array([rng.uniform(0, OBJECT_MAP_PX) for _ in keys]),
+        np.array([rng.uniform(0, OBJECT_MAP_PX) for _ in keys]),
+        np.full(OBJECT_ENTITIES, 24.0), np.full(OBJECT_ENTITIES, 32.0)])
+    velocity = np.column_stack([np.array([rng.uniform(-4, 4) for _ in keys]),
+                                np.array([rng.uniform(-4, 4) for _ in keys])])
+    tracker.reset(index, keys, boxes)
+    samples, events = [], 0
+    for _ in range(OBJECT_TRACK_FRAMES):
+        boxes[:, :2] += velocity
+        start = time.perf_counter()
+        entered, exited = tracker.update(keys, boxes)
+        samples.append(time.perf_counter() - start)
+        events += len(entered) + len(exited)
+    metrics.update(timing_metrics(f"track_{OBJECT_ENTITIES}", samples))
+    metrics["track_events_per_frame"] = events / OBJECT_TRACK_FRAMES
+    return metrics
@@ -0,0 +1,77 @@
+"""Frame pacing: Clock.tick vs. FramePacer intervals, hitches and adaptation."""
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.harness import BenchConfig, benchmark, setup_headless
+
+
+# Frames paced at 60 Hz by each scheduler
+PACING_FRAMES: int = 120
+# Simulated work per frame, cycled (ms): light frames with some variation
+PACING_WORK_MS = (2.0, 5.0, 3.0, 8.0, 4.0, 6.0)
+# Long frame (window drag, blocking load) and the work of an overloaded game
+PACING_HITCH_MS: float = 500.0
+PACING_HEAVY_WORK_MS: float = 25.0
+
+
+def _work(ms: float) -> None:
+    """Busy the CPU for `ms` milliseconds, like a frame's update and render."""
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+
+def _intervals(wait, frames: int) -> List[float]:
+    """Frame start intervals (ms) of `frames` frames paced by `wait()`."""
+    wait()
+    starts = []
+    for frame in range(frames):
+        wait()
+        starts.append(time.perf_counter())
+        _work(PACING_WORK_MS[frame % len(PACING_WORK_MS)])
+    return [(b - a) * 1000.0 for a, b in zip(starts, starts[1:])]
+
+
+@benchmark("frame_pacing")
+def frame_pacing(config: BenchConfig) -> Dict[str, float]:
+    """Pace 60 Hz frames with Clock.tick and FramePacer; hitch and overload."""
+    setup_headless()
+    import pygame
+    from src.frame_pacer import FramePacer
+    from src.settings import FRAME_DT_MAX, FRAME_PACING_RATES
+
+    pygame.init()
+    period_ms = 1000.0 / 60
+    metrics: Dict[str, float] = {}
+
+    # How Screen used to pace frames
+    clock = pygame.time.Clock()
+    tick = _intervals(lambda: clock.tick(60), PACING_FRAMES)
+    pacer = FramePacer(60, adaptive=False)
+    paced = _intervals(pacer.wait, PACING_FRAMES)
+    metrics["tick_interval_sd_ms"] = statistics.pstdev(tick)
+    metrics["tick_error_ms"] = statistics.fmean(abs(t - period_ms) for t in tick)
+    metrics["paced_interval_sd_ms"] = statistics.pstdev(paced)
+    metrics["paced_error_ms"] = statistics.fmean(abs(t - period_ms) for t in paced)
+    metrics["paced_variance_ms2"] = pacer.stats()["frame_variance_ms2"]
+
+    # One long frame: dt stays under FRAME_DT_MAX
+    pacer.wait()
+    time.sleep(PACING_HITCH_MS / 1000.0)
+    hitch_dts = [pacer.wait() for _ in range(4)]
+    metrics["hitch_max_dt_ms"] = max(hitch_dts) * 1000.0
+    metrics["hitch_dt_over_max"] = sum(dt > FRAME_DT_MAX + 1e-9 for dt in hitch_dts)
+
+    # Work over the 60 and 45 Hz budgets: frames until the rate settles
+    pacer = FramePacer(60, adaptive=True)
+    pacer.wait()
+    lowest = min(rate for rate in FRAME_PACING_RATES if rate > 0)
+    frames = 0
+    while pacer.rate != lowest and frames < 1000:
+        _work(PACING_HEAVY_WORK_MS)
+        pacer.wait()
+        frames += 1
+    metrics["adapt_frames"] = frames
+    metrics["adapted_rate"] = pacer.rate
+    return metrics
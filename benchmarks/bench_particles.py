@@ -0,0 +1,93 @@
+"""Particles: array state and one blits call vs. a sprite per particle."""
+import time
+from typing import Dict
+
+import pygame
+
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+# Live particles held by the emitters (rate x mean lifetime)
+PARTICLE_TARGET: int = 50000
+PARTICLE_EMITTERS: int = 100
+# Frames timed for the particle system, and for the sprite path (slow)
+PARTICLE_FRAMES: int = 120
+PARTICLE_SPRITE_FRAMES: int = 10
+
+
+class _ParticleSprite(pygame.sprite.Sprite):
+    """What a particle costs as a sprite: its own update and rect."""
+
+    def __init__(self, image, x: float, y: float, vx: float, vy: float, lifetime: float) -> None:
+        super().__init__()
+        self.image = image
+        self.rect = image.get_rect(topleft=(x, y))
+        self.x, self.y, self.vx, self.vy = x, y, vx, vy
+        self.age, self.lifetime = 0.0, lifetime
+
+    def update(self, dt: float) -> None:
+        self.age += dt
+        if self.age >= self.lifetime:
+            self.age = 0.0
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.rect.topleft = (self.x, self.y)
+
+
+@benchmark("particles")
+def particles(config: BenchConfig) -> Dict[str, float]:
+    """Hold 50k live particles in view: update and draw per frame."""
+    game = make_game()
+    world = game.current_state.map
+    system = world.particles
+    display = game.screen.get_display()
+    world.render(game.screen)
+    view = world.map_layer.view_rect
+    spark = system.kind_id("spark")
+    lifetime = (0.8, 1.2)
+    rate = PARTICLE_TARGET / PARTICLE_EMITTERS / (sum(lifetime) / 2)
+    for i in range(PARTICLE_EMITTERS):
+        x = view.left + (i % 10 + 0.5) * view.width / 10
+        y = view.top + (i // 10 + 0.5) * view.height / 10
+        system.add_emitter(x, y, spark, rate, speed=(5.0, 20.0), lifetime=lifetime)
+    # Fill up to the steady state
+    for _ in range(int(lifetime[1] / config.dt) + 1):
+        system.update(config.dt)
+
+    update_samples, draw_samples, frame_samples = [], [], []
+    drawn = 0
+    for _ in range(max(2, min(config.frames, PARTICLE_FRAMES))):
+        start = time.perf_counter()
+        system.update(config.dt)
+        middle = time.perf_counter()
+        drawn = system.draw(display, world.map_layer, 0.5)
+        end = time.perf_counter()
+        update_samples.append(middle - start)
+        draw_samples.append(end - middle)
+        frame_samples.append(end - start)
+    metrics: Dict[str, float] = {}
+    metrics.update(timing_metrics("update", update_samples))
+    metrics.update(timing_metrics("draw", draw_samples))
+    metrics.update(timing_metrics("particles", frame_samples))
+    metrics["live_particles"] = system.count
+    metrics["drawn_particles"] = drawn
+    metrics["over_budget_frames"] = sum(1 for t in frame_samples if t > config.dt)
+
+    # The same particles as sprites in a group, with per-pixel alpha frames
+    live = system.live()
+    zoom = world.map_layer.zoom
+    source = system.frames[int(live.frame[0])]
+    image = pygame.transform.scale(source, (round(source.get_width() * zoom), round(source.get_height() * zoom)))
+    group = pygame.sprite.Group(
+        _ParticleSprite(image, (x - view.left) * zoom, (y - view.top) * zoom, vx, vy, 1.0)
+        for (x, y), (vx, vy) in zip(live.position.tolist(), live.velocity.tolist())
+    )
+    sprite_samples = []
+    for _ in range(max(2, min(config.frames, PARTICLE_SPRITE_FRAMES))):
+        start = time.perf_counter()
+        group.update(config.dt)
+        group.draw(display)
+        sprite_samples.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("sprites", sprite_samples))
+    metrics["speedup"] = (sum(sprite_samples) / len(sprite_samples)) / (sum(frame_samples) / len(frame_samples))
+    return metrics
@@ -0,0 +1,60 @@
+"""Profiler overhead: cost of a scope disabled and enabled, and on a real run."""
+import time
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, run_game_benchmark
+from benchmarks.scenarios import walk_loop_script
+
+
+# Scopes entered per micro-benchmark pass
+PROFILER_SCOPE_CALLS: int = 200_000
+
+
+def _scope_ns(profiler, calls: int) -> float:
+    """Mean cost of entering and leaving one scope, in nanoseconds."""
+    scope = profiler.scope
+    profiler.begin_frame()
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        with scope("bench"):
+            pass
+    elapsed = time.perf_counter_ns() - start
+    profiler.end_frame()
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        pass
+    empty = time.perf_counter_ns() - start
+    return max(0, elapsed - empty) / calls
+
+
+@benchmark("profiler_overhead")
+def profiler_overhead(config: BenchConfig) -> Dict[str, float]:
+    """Walk loop on map0 with the profiler off and on, plus per-scope cost."""
+    from src.profiler import Profiler, get_profiler
+
+    metrics: Dict[str, float] = {
+        "disabled_scope_ns": _scope_ns(Profiler(enabled=False), PROFILER_SCOPE_CALLS),
+        "enabled_scope_ns": _scope_ns(Profiler(enabled=True), PROFILER_SCOPE_CALLS),
+    }
+    profiler = get_profiler()
+    previous = profiler.enabled
+    try:
+        for enabled in (False, True):
+            profiler.enabled = enabled
+            profiler.clear()
+            result = run_game_benchmark(config, walk_loop_script)
+            mode = "enabled" if enabled else "disabled"
+            metrics[f"{mode}_frame_p50_ms"] = result["frame_p50_ms"]
+            metrics[f"{mode}_frame_p95_ms"] = result["frame_p95_ms"]
+        scopes = sum(len(record.events) for record in profiler.frames) / max(1, len(profiler.frames))
+    finally:
+        profiler.enabled = previous
+        profiler.clear()
+    metrics["scopes_per_frame"] = scopes
+    # Estimated cost of the instrumentation on a frame, either way
+    metrics["disabled_cost_per_frame_us"] = scopes * metrics["disabled_scope_ns"] / 1e3
+    metrics["enabled_cost_per_frame_us"] = scopes * metrics["enabled_scope_ns"] / 1e3
+    metrics["enabled_overhead_pct"] = 100.0 * (
+        metrics["enabled_frame_p50_ms"] / metrics["disabled_frame_p50_ms"] - 1.0
+    )
+    return metrics
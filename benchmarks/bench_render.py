@@ -0,0 +1,32 @@
+"""Map renderers: pre-baked zoomed chunks vs. pyscroll's BufferedRenderer."""
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, run_game_benchmark
+from benchmarks.scenarios import walk_loop_script
+
+
+RENDERERS = ("pyscroll", "baked")
+
+
+def _run(config: BenchConfig, renderer: str) -> Dict[str, float]:
+    import src.map
+
+    # Read by Map._build_renderer whenever a map is installed
+    previous = src.map.MAP_RENDERER
+    src.map.MAP_RENDERER = renderer
+    try:
+        return run_game_benchmark(config, walk_loop_script)
+    finally:
+        src.map.MAP_RENDERER = previous
+
+
+@benchmark("map_renderer")
+def map_renderer(config: BenchConfig) -> Dict[str, float]:
+    """Walk loop on map0 at CAMERA_ZOOM, rendered by each map renderer."""
+    metrics: Dict[str, float] = {}
+    for renderer in RENDERERS:
+        result = _run(config, renderer)
+        for name in ("render_p50_ms", "render_p95_ms", "frame_p50_ms"):
+            metrics[f"{renderer}_{name}"] = result[name]
+    metrics["render_speedup"] = metrics["pyscroll_render_p50_ms"] / metrics["baked_render_p50_ms"]
+    return metrics
@@ -0,0 +1,88 @@
+"""Input recording and replay: log size, playback speed and exactness."""
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from benchmarks.harness import BenchConfig, _step, benchmark, setup_headless
+from benchmarks.scenarios import walk_loop_script
+
+
+def _session_script(frame: int) -> Iterable[str]:
+    actions = list(walk_loop_script(frame))
+    # Sprint in bursts, and pause or resume every few frames (state pushes
+    # and pops must replay exactly too)
+    if (frame // 90) % 2:
+        actions.append("sprint")
+    if frame % 45 == 0:
+        actions.append("pause")
+    return actions
+
+
+def _record(path: Path, frames: int) -> Tuple[List[Tuple[float, float]], float]:
+    """Play a scripted session with recording on; return player positions.
+
+    Frames are paced by a real FramePacer at 60 Hz, so the log stores the
+    smoothed, jittering dts the game runs with.
+    """
+    import pygame
+    from src.frame_pacer import FramePacer
+    from src.game import Game
+
+    pygame.init()
+    game = Game(record_path=path)
+    play = game.current_state
+    pacer = FramePacer(60, adaptive=False)
+    pacer.wait()
+    positions = []
+    total = 0.0
+    for frame in range(frames):
+        dt = pacer.wait()
+        total += dt
+        _step(game, frame, dt, _session_script, None, None)
+        positions.append(tuple(play.player.position))
+    game.recorder.close()
+    return positions, total
+
+
+def _replay(path: Path) -> Tuple[List[Tuple[float, float]], float]:
+    """Play a log back through Game.run, uncapped; return positions and time."""
+    import pygame
+    from src.game import Game
+    from src.input_replay import InputReplay
+
+    pygame.init()
+    game = Game(replay=InputReplay(path))
+    play = game.current_state
+    positions = []
+    update = game.update
+
+    def recording_update(dt: float) -> int:
+        ticks = update(dt)
+        positions.append(tuple(play.player.position))
+        return ticks
+
+    game.update = recording_update
+    start = time.perf_counter()
+    game.run()
+    return positions, time.perf_counter() - start
+
+
+@benchmark("input_replay")
+def input_replay(config: BenchConfig) -> Dict[str, float]:
+    """Record a scripted session, then replay it headless through Game.run."""
+    setup_headless()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "session.rinp"
+        recorded, session_s = _record(path, config.frames)
+        size = path.stat().st_size
+        replayed, elapsed = _replay(path)
+    mismatches = sum(1 for a, b in zip(recorded, replayed) if a != b) + abs(len(recorded) - len(replayed))
+    return {
+        "log_bytes": size,
+        "log_bytes_per_frame": size / config.frames,
+        "mismatched_frames": mismatches,
+        "replay_fps": len(replayed) / elapsed if elapsed > 0 else 0.0,
+        # Recorded session length over replay time
+        "realtime_speedup": session_s / elapsed if elapsed > 0 else 0.0,
+    }
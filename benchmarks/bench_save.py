@@ -0,0 +1,141 @@
+"""Save snapshots: main-thread stall, background write, delta autosave, load."""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+# Size of the saved world: batched entities, visited maps, keys per map,
+# inventory entries
+SAVE_BENCH_ENTITIES: int = 5000
+SAVE_BENCH_MAPS: int = 64
+SAVE_BENCH_MAP_KEYS: int = 256
+SAVE_BENCH_ITEMS: int = 500
+# Saves timed per kind
+SAVE_BENCH_ROUNDS: int = 10
+
+
+def _populate(state) -> None:
+    from src.inventory import Inventory
+    from src.items import ItemRegistry
+    from src.map import MapState
+
+    world = state.map
+    for i in range(SAVE_BENCH_ENTITIES):
+        world.spawn_entity(32.0 + i % 100 * 8, 32.0 + i // 100 * 8, size=(16, 16))
+    for m in range(SAVE_BENCH_MAPS):
+        world.map_states[f"map{m}"] = MapState(
+            {f"chest_{k}": {"opened": k % 3 == 0, "items": ["potion"] * (k % 4)} for k in range(SAVE_BENCH_MAP_KEYS)}
+        )
+    registry = ItemRegistry()
+    for i in range(SAVE_BENCH_ITEMS):
+        registry.register(f"item_{i}", category=f"category_{i % 8}")
+    state.player.inventory = Inventory(registry)
+    state.player.inventory.add_items({f"item_{i}": i % 7 + 1 for i in range(SAVE_BENCH_ITEMS)})
+
+
+def _naive_json_save(state, path: Path) -> None:
+    """What a main-thread save would do: dump everything as JSON and fsync."""
+    world = state.map
+    store = world.entities
+    n = store.count
+    document = {
+        "map": world.current_map,
+        "player": list(state.player.position),
+        "inventory": state.player.inventory.to_dict(),
+        "maps": {name: dict(values) for name, values in world.map_states.items()},
+        "entities": {
+            "position": store.position[:n].tolist(),
+            "size": store.size[:n].tolist(),
+            "alive": store.alive[:n].tolist(),
+        },
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(document, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+@benchmark("save_snapshot")
+def save_snapshot(config: BenchConfig) -> Dict[str, float]:
+    """Full saves, delta autosaves and loads of a populated world."""
+    from src.save import DELTA, SaveManager
+    from src.settings import SAVE_AUTOSAVE_SLOT
+
+    game = make_game()
+    state = game.current_state
+    _populate(state)
+    world = state.map
+    metrics: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        json_samples = []
+        for _ in range(SAVE_BENCH_ROUNDS):
+            start = time.perf_counter()
+            _naive_json_save(state, Path(tmp) / "naive.json")
+            json_samples.append(time.perf_counter() - start)
+        metrics.update(timing_metrics("json_stall", json_samples))
+
+        saves = SaveManager(directory=tmp, autosave_interval=0.0)
+        full_stall, full_write, full_bytes = [], [], 0
+        for _ in range(SAVE_BENCH_ROUNDS):
+            start = time.perf_counter()
+            # Full saves of the autosave chain, the base of the deltas below
+            future = saves.save(state, SAVE_AUTOSAVE_SLOT)
+            full_stall.append(time.perf_counter() - start)
+            future.result()
+            full_write.append(saves.last_write_ms / 1000.0)
+            full_bytes = saves.last_bytes
+        metrics.update(timing_metrics("full_stall", full_stall))
+        metrics.update(timing_metrics("full_write", full_write))
+
+        # Autosaves after a typical stretch of play: the player and the
+        # crowds moved, one chest opened on the current map
+        delta_stall, delta_write, delta_bytes, deltas = [], [], 0, 0
+        for i in range(SAVE_BENCH_ROUNDS):
+            state.player.position[0] += 16.0
+            world.entities.position[:world.entities.count] += 1.0
+            world.state[f"chest_{i}"] = {"opened": True}
+            start = time.perf_counter()
+            future = saves.autosave(state)
+            delta_stall.append(time.perf_counter() - start)
+            future.result()
+            delta_write.append(saves.last_write_ms / 1000.0)
+            delta_bytes = saves.last_bytes
+            deltas += saves.last_kind == DELTA
+        metrics.update(timing_metrics("delta_stall", delta_stall))
+        metrics.update(timing_metrics("delta_write", delta_write))
+
+        expected_position = list(state.player.position)
+        expected_items = state.player.inventory.to_dict()
+        expected_states = {name: dict(values) for name, values in world.map_states.items()}
+        expected_entities = world.entities.position[:world.entities.count].copy()
+        load_samples = []
+        for _ in range(SAVE_BENCH_ROUNDS):
+            start = time.perf_counter()
+            saves.restore(state, SaveManager(directory=tmp).load(SAVE_AUTOSAVE_SLOT))
+            load_samples.append(time.perf_counter() - start)
+        metrics.update(timing_metrics("load", load_samples))
+        saves.close()
+
+    store = world.entities
+    alive = store.alive[:store.count]
+    restored = sorted(map(tuple, store.position[:store.count][alive]))
+    mismatches = (
+        (list(state.player.position) != expected_position)
+        + (state.player.inventory.to_dict() != expected_items)
+        + ({name: dict(values) for name, values in world.map_states.items()} != expected_states)
+        + (restored != sorted(map(tuple, expected_entities)))
+    )
+    metrics.update({
+        "full_kb": full_bytes / 1024.0,
+        "delta_kb": delta_bytes / 1024.0,
+        "delta_saves": deltas,
+        # Main-thread time of a naive JSON save over a snapshot capture
+        "stall_speedup": sum(json_samples) / sum(full_stall),
+        "roundtrip_mismatches": mismatches,
+    })
+    return metrics
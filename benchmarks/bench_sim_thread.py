@@ -0,0 +1,48 @@
+"""Simulation thread: the same crowd scenario ticked inline vs. off-thread."""
+from dataclasses import replace
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, run_game_benchmark
+from benchmarks.scenarios import walk_loop_script
+
+
+# Batched NPCs steered toward the player, with tile collision
+SIM_THREAD_NPCS: int = 4000
+# Frames per run (capped by --frames)
+SIM_THREAD_FRAMES: int = 300
+
+
+def _crowd(worlds: list):
+    def setup(game) -> None:
+        world = game.current_state.map
+        npc = world.entities.library.set_id("npc")
+        width = world.tmx_data.width * world.tmx_data.tilewidth
+        height = world.tmx_data.height * world.tmx_data.tileheight
+        rows = [
+            world.spawn_entity(float((i * 37) % (width - 32)), float((i * 53) % (height - 32)), npc, walk_speed=30.0)
+            for i in range(SIM_THREAD_NPCS)
+        ]
+        world.entities.intent[rows] = [(1.0 if i % 2 else -1.0, 1.0 if i % 3 else -1.0) for i in range(len(rows))]
+        worlds.append(game.current_state)
+
+    return setup
+
+
+@benchmark("sim_thread")
+def sim_thread(config: BenchConfig) -> Dict[str, float]:
+    """Walk loop among 4k colliding NPCs: inline ticks vs. the simulation thread."""
+    config = replace(config, frames=max(2, min(config.frames, SIM_THREAD_FRAMES)))
+    states: list = []
+    metrics: Dict[str, float] = {}
+    for prefix, threaded in (("inline", False), ("threaded", True)):
+        run = run_game_benchmark(config, walk_loop_script, setup=_crowd(states), threaded_simulation=threaded)
+        for name in ("frame_p50_ms", "frame_p95_ms", "update_p50_ms", "render_p50_ms", "sim_fps", "dropped_ticks"):
+            metrics[f"{prefix}_{name}"] = run[name]
+    metrics["fps_speedup"] = metrics["threaded_sim_fps"] / metrics["inline_sim_fps"]
+    # Every frame's input is simulated in order: both runs end identical
+    inline, threaded = states
+    mismatches = int(inline.player.position != threaded.player.position)
+    count = inline.map.entities.count
+    mismatches += int((inline.map.entities.position[:count] != threaded.map.entities.position[:count]).any(axis=1).sum())
+    metrics["state_mismatches"] = mismatches
+    return metrics
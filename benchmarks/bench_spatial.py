@@ -0,0 +1,104 @@
+"""Sprite scaling: spatial-hash culling and active region vs. the plain group."""
+import time
+from typing import Dict, List
+
+import pygame
+
+from benchmarks.bench_world import synthetic_world
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+SPRITE_COUNTS = (100, 1000, 5000, 20000)
+# Synthetic map edge in tiles (4096 px): sprites spread over a realistic area
+SPATIAL_WORLD_TILES: int = 256
+# Frames timed per sprite count and mode (capped by --frames)
+SPATIAL_FRAMES: int = 120
+# Gameplay radius queries timed per frame
+SPATIAL_QUERIES: int = 50
+
+
+class _Prop(pygame.sprite.Sprite):
+    """Small wandering sprite with the interpolation fields of an Entity."""
+
+    def __init__(self, image, x: float, y: float, vx: float, vy: float, bounds) -> None:
+        super().__init__()
+        self.image = image
+        self.rect = image.get_rect(topleft=(int(x), int(y)))
+        self.position = [x, y]
+        self.previous_position = [x, y]
+        self.velocity = [vx, vy]
+        self.bounds = bounds
+
+    def update(self, dt: float) -> None:
+        self.previous_position[:] = self.position
+        for axis in (0, 1):
+            value = self.position[axis] + self.velocity[axis] * dt
+            if not 0 <= value <= self.bounds[axis]:
+                self.velocity[axis] = -self.velocity[axis]
+                value = min(max(value, 0.0), self.bounds[axis])
+            self.position[axis] = value
+        self.rect.topleft = (int(self.position[0]), int(self.position[1]))
+
+
+def _run(count: int, culled: bool, frames: int, dt: float) -> Dict[str, List[float]]:
+    import src.map
+
+    # Read by Map._install when it builds the sprite group
+    src.map.SPRITE_CULLING_ENABLED = culled
+    try:
+        return _measure(count, frames, dt)
+    finally:
+        src.map.SPRITE_CULLING_ENABLED = True
+
+
+def _measure(count: int, frames: int, dt: float) -> Dict[str, List[float]]:
+    from src import map_cache
+    from src.map_loader import DecodedMap
+
+    game = make_game()
+    world = game.current_state.map
+    path = synthetic_world(SPATIAL_WORLD_TILES)
+    compiled = map_cache.read_cache(path, f"world_{SPATIAL_WORLD_TILES}")
+    world.load_decoded(DecodedMap(compiled.name, compiled, map_cache.load_tileset_pixels(compiled)))
+    width = compiled.width * compiled.tilewidth
+    height = compiled.height * compiled.tileheight
+    world.player.position = [width / 2, height / 2]
+    bounds = (width - 16.0, height - 16.0)
+    image = pygame.Surface((16, 16))
+    image.fill((200, 60, 60))
+    for i in range(count):
+        # Deterministic spread over the whole map
+        x = (i * 7919) % int(bounds[0])
+        y = (i * 104729) % int(bounds[1])
+        world.add_sprite(_Prop(image, float(x), float(y), 20.0 + i % 40, 15.0 + i % 30, bounds))
+    samples: Dict[str, List[float]] = {"update": [], "render": [], "query": []}
+    for _ in range(frames):
+        start = time.perf_counter()
+        game.update(dt)
+        mid = time.perf_counter()
+        game.render()
+        end = time.perf_counter()
+        center = world.player.rect.center
+        # Gameplay query around the player (e.g. interaction or aggro range)
+        for _ in range(SPATIAL_QUERIES):
+            world.sprites_in_radius(center, 96.0)
+        samples["update"].append(mid - start)
+        samples["render"].append(end - mid)
+        samples["query"].append((time.perf_counter() - end) / SPATIAL_QUERIES)
+    return samples
+
+
+@benchmark("sprite_scaling")
+def sprite_scaling(config: BenchConfig) -> Dict[str, float]:
+    """Update/render/query cost from 100 to 20k sprites, culled vs. plain group."""
+    frames = max(2, min(config.frames, SPATIAL_FRAMES))
+    metrics: Dict[str, float] = {}
+    for count in SPRITE_COUNTS:
+        totals = {}
+        for mode, culled in (("plain", False), ("culled", True)):
+            samples = _run(count, culled, frames, config.dt)
+            for phase, values in samples.items():
+                metrics.update(timing_metrics(f"n{count}_{mode}_{phase}", values))
+            totals[mode] = sum(samples["update"]) + sum(samples["render"])
+        metrics[f"n{count}_speedup"] = totals["plain"] / totals["culled"]
+    return metrics
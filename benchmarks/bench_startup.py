@@ -0,0 +1,70 @@
+"""Startup: time to first frame and to the first gameplay frame.
+
+Each run starts `main.py` in a fresh interpreter (headless) with
+`--startup-timeline --exit-after-startup` and reads the printed timeline, so
+imports and module initialization are part of the measurement.
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.harness import BenchConfig, benchmark, percentiles
+
+
+# Fresh processes started per variant
+STARTUP_RUNS: int = 5
+STARTUP_TIMEOUT_S: float = 60.0
+
+_MAIN = Path(__file__).resolve().parent.parent / "main.py"
+_MARK = re.compile(r"^\s*([\d.]+)\s+\+\s*[\d.]+\s+(.+)$")
+
+
+def _run(extra: List[str]) -> Dict[str, float]:
+    """Start the game once; return its timeline marks and the process time."""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(_MAIN), "--headless", "--startup-timeline", "--exit-after-startup", *extra],
+        capture_output=True, text=True, env=env, cwd=_MAIN.parent, timeout=STARTUP_TIMEOUT_S, check=True,
+    )
+    process_ms = (time.perf_counter() - start) * 1000.0
+    marks = {}
+    for line in result.stderr.splitlines():
+        match = _MARK.match(line)
+        if match:
+            marks[match.group(2)] = float(match.group(1))
+    marks["process"] = process_ms
+    return marks
+
+
+def _median(runs: List[Dict[str, float]], mark: str) -> float:
+    return percentiles([run[mark] for run in runs])["p50"]
+
+
+@benchmark("startup")
+def startup(config: BenchConfig) -> Dict[str, float]:
+    """Time to first frame with the loading screen, against loading up front."""
+    from src.startup import FIRST_FRAME, FIRST_GAMEPLAY_FRAME
+
+    lazy, eager = [], []
+    # Interleaved so both variants see the same machine load
+    for _ in range(STARTUP_RUNS):
+        lazy.append(_run([]))
+        eager.append(_run(["--no-loading-screen"]))
+    metrics = {
+        "ttff_ms": _median(lazy, FIRST_FRAME),
+        "gameplay_ms": _median(lazy, FIRST_GAMEPLAY_FRAME),
+        "pygame_import_ms": _median(lazy, "pygame imported"),
+        "process_ms": _median(lazy, "process"),
+        "eager_ttff_ms": _median(eager, FIRST_FRAME),
+    }
+    # Startup time of our own code: what is left after importing pygame
+    own = metrics["ttff_ms"] - metrics["pygame_import_ms"]
+    eager_own = metrics["eager_ttff_ms"] - _median(eager, "pygame imported")
+    metrics["ttff_own_ms"] = own
+    metrics["ttff_own_speedup"] = eager_own / own
+    return metrics
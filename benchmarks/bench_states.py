@@ -0,0 +1,73 @@
+"""State stack: pause/resume through the stack vs. rebuilding the play state."""
+import time
+from typing import Dict
+
+from benchmarks.harness import BenchConfig, benchmark, make_game, timing_metrics
+
+
+# Pause/resume cycles through the stack
+STATE_CYCLES: int = 200
+# Play states rebuilt (full map load each), the former way back from a menu
+STATE_REBUILDS: int = 5
+
+
+@benchmark("state_stack")
+def state_stack(config: BenchConfig) -> Dict[str, float]:
+    """Pause/resume cycles on the stack; rebuilds; trimming suspended states."""
+    from src.states.play_state import PlayState
+
+    game = make_game()
+    game.registry.preload("pause").result()
+    game.update(config.dt)
+    play = game.current_state
+    metrics: Dict[str, float] = {}
+
+    # Push the pause over the play state, draw its first frame (the world
+    # under it, shaded), pop back
+    samples, render_samples = [], []
+    lost = 0
+    for _ in range(STATE_CYCLES):
+        start = time.perf_counter()
+        play.request_push("pause")
+        game._apply_transition()
+        pushed = time.perf_counter()
+        game.render()
+        rendered = time.perf_counter()
+        game.current_state.request_pop()
+        game._apply_transition()
+        samples.append(time.perf_counter() - rendered + pushed - start)
+        render_samples.append(rendered - pushed)
+        lost += game.current_state is not play
+    metrics.update(timing_metrics("pause_cycle", samples))
+    metrics.update(timing_metrics("pause_first_frame", render_samples))
+    metrics["resumed_other_state"] = lost
+    metrics["pause_states_built"] = game.registry.built
+
+    # What leaving gameplay for another state and back used to cost
+    samples = []
+    for _ in range(STATE_REBUILDS):
+        start = time.perf_counter()
+        PlayState(game.screen, game.state_input)
+        samples.append(time.perf_counter() - start)
+    metrics.update(timing_metrics("rebuild", samples))
+    metrics["cycle_speedup"] = metrics["rebuild_p50_ms"] / (
+        metrics["pause_cycle_p50_ms"] + metrics["pause_first_frame_p50_ms"])
+
+    # Over budget while paused: the suspended play state is trimmed down
+    # to the chunks of its view
+    renderer = play.map.map_layer
+    for corner in (renderer.map_rect.topleft, renderer.map_rect.topright,
+                   renderer.map_rect.bottomleft, renderer.map_rect.bottomright):
+        for _ in renderer.bake_view(corner):
+            pass
+    game.render()
+    play.request_push("pause")
+    game._apply_transition()
+    before = game.states.suspended_bytes()
+    game.states.budget_bytes = 0
+    start = time.perf_counter()
+    game.states.enforce_budget()
+    metrics["trim_ms"] = (time.perf_counter() - start) * 1000.0
+    metrics["suspended_before_kb"] = before / 1024.0
+    metrics["suspended_after_kb"] = game.states.suspended_bytes() / 1024.0
+    return metrics
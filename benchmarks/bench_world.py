@@ -0,0 +1,94 @@
+"""Chunked streaming world benchmarks on synthetic large maps."""
+from typing import Dict
+
+import numpy as np
+
+from benchmarks.harness import BenchConfig, benchmark, run_game_benchmark
+from benchmarks.scenarios import walk_loop_script
+
+
+# Player speed while crossing the synthetic worlds (pixels per second)
+WORLD_CROSSING_SPEED: float = 1600.0
+# Streaming keeps memory flat: the 4096 world may peak at most this much
+# above the 1024 one
+WORLD_MEMORY_MARGIN: float = 1.25
+
+# peak_py_mem_kb per world size, from the runs of this process
+_peaks: Dict[int, float] = {}
+
+
+def synthetic_world(size: int):
+    """Write (once) and return the cache path of a size x size tile world.
+
+    Tiles are drawn at random from the gids used by the start map, and the
+    tileset metadata is copied from it.
+    """
+    from src import map_cache
+    from src.settings import MAPS_DIR, MAP_CACHE_DIR, START_MAP
+
+    path = MAP_CACHE_DIR / "bench" / f"world_{size}.rmap"
+    if path.exists():
+        try:
+            map_cache.read_cache_meta(path)
+            return path
+        except ValueError:
+            pass  # written by another cache format version: rebuild it
+    start_map = map_cache.load_map(MAPS_DIR / f"{START_MAP}.tmx")
+    meta, _ = map_cache.compile_tmx(MAPS_DIR / f"{START_MAP}.tmx")
+    for tileset in meta["tilesets"]:
+        if tileset["image"]:
+            # Absolute image paths: the synthetic map has no source directory
+            tileset["image"] = str((MAPS_DIR / tileset["image"]).resolve())
+    meta.update(width=size, height=size, object_layers=[])
+    meta["layers"] = meta["layers"][:1]
+    gids = np.unique(start_map.layers[0].data)
+    rng = np.random.default_rng(size)
+    layer = gids[rng.integers(0, len(gids), size=(size, size))].astype("<u2")
+    map_cache.write_cache(path, meta, [layer])
+    return path
+
+
+def _run_world(config: BenchConfig, size: int) -> Dict[str, float]:
+    from src import map_cache
+    from src.map_loader import DecodedMap
+
+    path = synthetic_world(size)
+    state = {}
+
+    def setup(game) -> None:
+        world_map = game.current_state.map
+        compiled = map_cache.read_cache(path, f"world_{size}")
+        world_map.load_decoded(DecodedMap(compiled.name, compiled, map_cache.load_tileset_pixels(compiled)))
+        player = game.current_state.player
+        player.position = [size * 8.0, size * 8.0]
+        player.walkspeed = player.sprint = WORLD_CROSSING_SPEED
+        state["map"] = world_map
+
+    metrics = run_game_benchmark(config, walk_loop_script, setup=setup)
+    metrics.update(state["map"].world.stats())
+    _peaks[size] = metrics["peak_py_mem_kb"]
+    return metrics
+
+
+@benchmark("world_chunks_1024")
+def world_chunks_1024(config: BenchConfig) -> Dict[str, float]:
+    """Fast walk across a streamed 1024x1024 tile world."""
+    return _run_world(config, 1024)
+
+
+@benchmark("world_chunks_4096")
+def world_chunks_4096(config: BenchConfig) -> Dict[str, float]:
+    """Fast walk across a streamed 4096x4096 tile world (memory should match 1024).
+
+    Raises:
+        RuntimeError: The peak memory exceeds the 1024 world's (run first if
+            it was not) by more than WORLD_MEMORY_MARGIN.
+    """
+    metrics = _run_world(config, 4096)
+    if 1024 not in _peaks:
+        _run_world(config, 1024)
+    limit = _peaks[1024] * WORLD_MEMORY_MARGIN
+    if metrics["peak_py_mem_kb"] > limit:
+        raise RuntimeError(f"world_chunks_4096 peaked at {metrics['peak_py_mem_kb']:.0f} KB, above "
+                           f"{limit:.0f} KB (1024 world x {WORLD_MEMORY_MARGIN}): memory grows with the world")
+    return metrics
@@ -0,0 +1,253 @@
+"""Benchmark harness: registry, headless game driver, stats and baselines.
+
+Benchmarks are plain functions registered with the `benchmark` decorator.
+They receive a `BenchConfig` and return a flat dict of metrics. Metric names
+encode how they are compared against the baseline:
+- suffix `_ms` or `_kb`: lower is better
+- suffix `_fps`, `_per_s` or `_speedup`: higher is better
+- anything else is informational (counts, sizes) and never fails a run
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import importlib
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+
+BASELINE_PATH: Path = Path(__file__).resolve().parent / "baseline.json"
+
+LOWER_IS_BETTER = ("_ms", "_kb")
+HIGHER_IS_BETTER = ("_fps", "_per_s", "_speedup")
+# Differences smaller than this (in ms) are treated as timer noise
+MIN_ABS_DELTA_MS: float = 0.1
+
+# Phases measured for every simulated frame, in loop order
+PHASES = ("input", "update", "render", "present")
+# Modules the game imports lazily (registered states, the map stack, the
+# TMX reader, pygame and NumPy submodules loaded on first use); imported up
+# front so no scenario pays them in its memory peak
+GAME_MODULES = ("src.game", "src.map", "src.map_loader", "src.states.play_state",
+                "src.states.pause_state", "pytmx.util_pygame", "pyscroll",
+                "pygame.surfarray", "pygame.freetype", "numpy.random", "numpy.ma")
+
+
+@dataclass
+class BenchConfig:
+    """Parameters shared by every benchmark run."""
+
+    frames: int = 600
+    dt: float = 1.0 / 60.0
+    warmup: int = 30
+    memory_frames: int = 120
+
+
+BenchFn = Callable[[BenchConfig], Dict[str, float]]
+BENCHMARKS: Dict[str, BenchFn] = {}
+
+
+def benchmark(name: str) -> Callable[[BenchFn], BenchFn]:
+    """Register a benchmark function under `name`."""
+    def decorator(fn: BenchFn) -> BenchFn:
+        if name in BENCHMARKS:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+
+# ---------- Headless game setup ----------
+def setup_headless() -> None:
+    """Select SDL dummy drivers and import the game modules (GAME_MODULES)."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    for module in GAME_MODULES:
+        importlib.import_module(module)
+
+
+def make_game(threaded_simulation: bool = False):
+    """Build a fresh Game on the dummy video driver."""
+    setup_headless()
+    import pygame
+    from src.game import Game
+
+    pygame.init()
+    # Straight into gameplay: scenarios drive the play state from frame one
+    return Game(loading_screen=False, threaded_simulation=threaded_simulation)
+
+
+# ---------- Stats ----------
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Return p50/p95/p99 of the samples (same unit as the input)."""
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def timing_metrics(prefix: str, samples_s: List[float]) -> Dict[str, float]:
+    """Convert a list of durations in seconds into `<prefix>_pXX_ms` metrics."""
+    return {
+        f"{prefix}_{name}_ms": value * 1000.0
+        for name, value in percentiles(samples_s).items()
+    }
+
+
+# ---------- Frame driver ----------
+ActionScript = Callable[[int], Iterable[str]]
+FrameHook = Callable[[object, int], None]
+
+
+def idle_script(frame: int) -> Iterable[str]:
+    """Script that never holds any action."""
+    return ()
+
+
+def _step(game, frame: int, dt: float, script: ActionScript,
+          on_frame: Optional[FrameHook], timings: Optional[Dict[str, List[float]]]) -> None:
+    """Run one frame through the same phases as `Game.run`."""
+    import pygame
+
+    profiler = game.profiler
+    t0 = time.perf_counter()
+    profiler.begin_frame()
+    # Keep SDL's event queue serviced, but feed input from the script
+    with profiler.scope("input"):
+        pygame.event.pump()
+        game.input.set_held_actions(script(frame))
+        if game.recorder is not None:
+            game.recorder.end_frame(dt)
+    t1 = time.perf_counter()
+    if on_frame is not None:
+        on_frame(game, frame)
+    with profiler.scope("update"):
+        game.update(dt)
+    game.input.end_frame()
+    t2 = time.perf_counter()
+    with profiler.scope("render"):
+        game.render()
+    t3 = time.perf_counter()
+    with profiler.scope("present"):
+        game.screen.end_frame()
+    profiler.end_frame()
+    t4 = time.perf_counter()
+    if timings is not None:
+        timings["input"].append(t1 - t0)
+        timings["update"].append(t2 - t1)
+        timings["render"].append(t3 - t2)
+        timings["present"].append(t4 - t3)
+        timings["frame"].append(t4 - t0)
+
+
+def run_game_benchmark(
+    config: BenchConfig,
+    script: ActionScript = idle_script,
+    setup: Optional[Callable[[object], None]] = None,
+    on_frame: Optional[FrameHook] = None,
+    dt: Optional[float] = None,
+    threaded_simulation: bool = False,
+) -> Dict[str, float]:
+    """Build a game, drive it with a scripted input stream and measure it.
+
+    A first pass runs under tracemalloc (setup included) to record the peak
+    Python heap; it doubles as warmup. The timed pass then runs untraced so
+    allocation hooks do not distort frame times.
+
+    Args:
+        config (BenchConfig): Frame count, fixed dt and warmup length.
+        script (ActionScript): Returns the held actions for a frame index.
+        setup (Callable): Optional hook run once on the fresh Game.
+        on_frame (FrameHook): Optional hook run before each update.
+        dt (float): Frame dt overriding `config.dt` (render rate studies).
+        threaded_simulation (bool): Tick on the simulation thread (the
+            update phase then only hands the frame over).
+
+    Returns:
+        dict[str, float]: Per-phase percentiles, throughput, peak memory,
+        and frames that took longer than dt.
+    """
+    # Import the game modules first so their one-off import cost is not
+    # attributed to the scenario's memory peak
+    setup_headless()
+    dt = config.dt if dt is None else dt
+    tracemalloc.start()
+    game = make_game(threaded_simulation)
+    if setup is not None:
+        setup(game)
+    frame = 0
+    for _ in range(max(config.warmup, config.memory_frames)):
+        _step(game, frame, dt, script, on_frame, None)
+        frame += 1
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings: Dict[str, List[float]] = {name: [] for name in PHASES + ("frame",)}
+    start = time.perf_counter()
+    for _ in range(config.frames):
+        _step(game, frame, dt, script, on_frame, timings)
+        frame += 1
+    # Frames still queued for a simulation thread count in the run
+    game.stop_simulation()
+    elapsed = time.perf_counter() - start
+
+    metrics: Dict[str, float] = {}
+    for name, samples in timings.items():
+        metrics.update(timing_metrics(name, samples))
+    metrics["sim_fps"] = config.frames / elapsed if elapsed > 0 else 0.0
+    # Frames that would miss their presentation slot at this render rate
+    metrics["over_budget_frames"] = sum(1 for t in timings["frame"] if t > dt)
+    metrics["peak_py_mem_kb"] = peak_bytes / 1024.0
+    metrics["dropped_ticks"] = game.dropped_ticks
+    return metrics
+
+
+# ---------- Baseline comparison ----------
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], path: Path = BASELINE_PATH) -> None:
+    """Merge `results` into the baseline file (other benchmarks are kept)."""
+    data = load_baseline(path)
+    data.update(results)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """Return a message for every metric that regressed beyond `tolerance`.
+
+    Args:
+        results: Fresh metrics per benchmark.
+        baseline: Stored metrics per benchmark.
+        tolerance (float): Allowed relative slowdown (0.25 means 25%).
+    """
+    regressions: List[str] = []
+    for bench, metrics in results.items():
+        reference = baseline.get(bench, {})
+        for metric, value in metrics.items():
+            base = reference.get(metric)
+            if base is None or base <= 0:
+                continue
+            if metric.endswith(LOWER_IS_BETTER):
+                if metric.endswith("_ms") and value - base < MIN_ABS_DELTA_MS:
+                    continue
+                if value > base * (1.0 + tolerance):
+                    regressions.append(
+                        f"{bench}.{metric}: {value:.3f} > baseline {base:.3f} (+{value / base - 1:.0%})"
+                    )
+            elif metric.endswith(HIGHER_IS_BETTER):
+                if value < base * (1.0 - tolerance):
+                    regressions.append(
+                        f"{bench}.{metric}: {value:.3f} < baseline {base:.3f} ({value / base - 1:.0%})"
+                    )
+    return regressions
@@ -0,0 +1,164 @@
+"""Scripted gameplay scenarios driven through the real game stack."""
+from typing import Dict, Iterable
+
+from benchmarks.harness import BenchConfig, benchmark, idle_script, run_game_benchmark
+
+
+# Number of extra entities spawned by the many_sprites scenario
+MANY_SPRITES_COUNT: int = 300
+# Frames between two map reloads in the map_switch scenario
+MAP_SWITCH_INTERVAL: int = 60
+# Wandering NPCs in view for the npcs_dirty_rects scenario
+DIRTY_RECT_NPCS: int = 4
+
+# Walk a loop across map0: right, down, left, up (frames per leg)
+_WALK_LEG_FRAMES = 120
+_WALK_LEGS = ("move_right", "move_down", "move_left", "move_up")
+
+
+def walk_loop_script(frame: int) -> Iterable[str]:
+    return (_WALK_LEGS[(frame // _WALK_LEG_FRAMES) % len(_WALK_LEGS)],)
+
+
+def sprint_diagonal_script(frame: int) -> Iterable[str]:
+    # Bounce between the two diagonals so the player stays inside the map
+    if (frame // 180) % 2 == 0:
+        return ("move_right", "move_down", "sprint")
+    return ("move_left", "move_up", "sprint")
+
+
+@benchmark("idle")
+def idle(config: BenchConfig) -> Dict[str, float]:
+    """Player standing still in the start map."""
+    return run_game_benchmark(config, idle_script)
+
+
+@benchmark("walk_map0")
+def walk_map0(config: BenchConfig) -> Dict[str, float]:
+    """Player walking a loop across map0, scrolling the camera."""
+    return run_game_benchmark(config, walk_loop_script)
+
+
+@benchmark("sprint_diagonal")
+def sprint_diagonal(config: BenchConfig) -> Dict[str, float]:
+    """Player sprinting diagonally (normalized diagonal movement)."""
+    return run_game_benchmark(config, sprint_diagonal_script)
+
+
+@benchmark("many_sprites")
+def many_sprites(config: BenchConfig) -> Dict[str, float]:
+    """Player plus many extra entities walking in the scrolling group."""
+    from src.entity import Entity
+
+    def setup(game) -> None:
+        world = game.current_state.map
+        width = world.tmx_data.width * world.tmx_data.tilewidth
+        for i in range(MANY_SPRITES_COUNT):
+            extra = Entity(game.input)
+            extra.position = [float((i * 37) % width), float((i * 53) % width)]
+            world.add_sprite(extra)
+
+    metrics = run_game_benchmark(config, walk_loop_script, setup=setup)
+    metrics["sprite_count"] = MANY_SPRITES_COUNT + 1
+    return metrics
+
+
+@benchmark("map_switch")
+def map_switch(config: BenchConfig) -> Dict[str, float]:
+    """Player walking while the current map is reloaded periodically."""
+    from src.settings import START_MAP
+
+    def on_frame(game, frame: int) -> None:
+        if frame % MAP_SWITCH_INTERVAL == 0:
+            game.current_state.map.switch_map(START_MAP)
+
+    return run_game_benchmark(config, walk_loop_script, on_frame=on_frame)
+
+
+@benchmark("map_switch_async")
+def map_switch_async(config: BenchConfig) -> Dict[str, float]:
+    """Player walking while map transitions run through Map.request_map."""
+    from src.settings import START_MAP
+
+    def on_frame(game, frame: int) -> None:
+        world = game.current_state.map
+        if frame % MAP_SWITCH_INTERVAL == MAP_SWITCH_INTERVAL // 2:
+            # Warm the loader ahead of the transition, as neighbor prefetch does
+            world.loader.clear()
+            world.loader.prefetch(START_MAP)
+        elif frame % MAP_SWITCH_INTERVAL == 0:
+            world.request_map(START_MAP)
+
+    # The loader is shared process-wide: report this run's counters only
+    start = {}
+
+    def setup(game) -> None:
+        start.update(game.current_state.map.loader.stats())
+        start["game"] = game
+
+    metrics = run_game_benchmark(config, walk_loop_script, setup=setup, on_frame=on_frame)
+    stats = start["game"].current_state.map.loader.stats()
+    metrics["prefetch_hits"] = stats["prefetch_hits"] - start["prefetch_hits"]
+    metrics["prefetch_misses"] = stats["prefetch_misses"] - start["prefetch_misses"]
+    return metrics
+
+
+@benchmark("walk_render_144hz")
+def walk_render_144hz(config: BenchConfig) -> Dict[str, float]:
+    """Walk loop rendered at 144 Hz over the fixed-rate simulation."""
+    return run_game_benchmark(config, walk_loop_script, dt=1.0 / 144.0)
+
+
+@benchmark("walk_render_30hz")
+def walk_render_30hz(config: BenchConfig) -> Dict[str, float]:
+    """Walk loop rendered at 30 Hz over the fixed-rate simulation."""
+    return run_game_benchmark(config, walk_loop_script, dt=1.0 / 30.0)
+
+
+def _dirty_rect_benchmark(config: BenchConfig, script, setup=None) -> Dict[str, float]:
+    """Run a scenario with Screen in dirty-rect mode and report presentation."""
+    games = []
+
+    def dirty_setup(game) -> None:
+        game.screen.set_dirty_rects(True)
+        if setup is not None:
+            setup(game)
+        games.append(game)
+
+    metrics = run_game_benchmark(config, script, setup=dirty_setup)
+    screen = games[0].screen
+    frames = screen.presented_frames + screen.skipped_frames
+    metrics["skipped_frames"] = screen.skipped_frames
+    # Share of display pixels pushed per frame, over the whole run
+    metrics["presented_area_pct"] = 100.0 * screen.presented_pixels / (
+        frames * screen.display.get_width() * screen.display.get_height()
+    )
+    return metrics
+
+
+@benchmark("idle_dirty_rects")
+def idle_dirty_rects(config: BenchConfig) -> Dict[str, float]:
+    """Player standing still with dirty-rect rendering (static scene)."""
+    return _dirty_rect_benchmark(config, idle_script)
+
+
+@benchmark("npcs_dirty_rects")
+def npcs_dirty_rects(config: BenchConfig) -> Dict[str, float]:
+    """Still camera while a few NPCs wander: only their areas are presented."""
+    def setup(game) -> None:
+        world = game.current_state.map
+        player = game.current_state.player
+        player.position = [400.0, 400.0]
+        player.update(0.0)
+        npc = world.entities.library.set_id("npc")
+        for i in range(DIRTY_RECT_NPCS):
+            row = world.spawn_entity(330.0 + i * 30.0, 360.0, npc, walk_speed=20.0)
+            world.entities.intent[row] = (0.0, 1.0 if i % 2 else -1.0)
+
+    return _dirty_rect_benchmark(config, idle_script, setup=setup)
+
+
+@benchmark("walk_dirty_rects")
+def walk_dirty_rects(config: BenchConfig) -> Dict[str, float]:
+    """Walk loop with dirty-rect rendering (camera moves: mostly full frames)."""
+    return _dirty_rect_benchmark(config, walk_loop_script)
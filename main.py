@@ -1,13 +1,71 @@
 """Game entry point.
 
 Initializes pygame and starts the main game loop.
+
+    python main.py                          # play
+    python main.py --record session.rinp    # play and record the input
+    python main.py --replay session.rinp    # play a recording back, uncapped
+    python main.py --replay session.rinp --headless --trace trace.json
+    python main.py --startup-timeline       # print how long each startup phase took
+    python main.py --threaded-sim           # simulate on a worker thread
 """
-import pygame
-from src.game import Game
+from src.startup import get_startup_timeline
+
+# Startup times are measured from here
+get_startup_timeline()
+
+import argparse
+import os
+from pathlib import Path
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Requiem for an Immortal Death")
+    parser.add_argument("--record", type=Path, metavar="FILE", help="record the session's input to FILE")
+    parser.add_argument("--replay", type=Path, metavar="FILE", help="play a recorded session back")
+    parser.add_argument("--realtime", action="store_true", help="keep the frame-rate cap during a replay")
+    parser.add_argument("--headless", action="store_true", help="run without a window (SDL dummy driver)")
+    parser.add_argument("--trace", type=Path, metavar="FILE",
+                        help="profile the run and write a Chrome trace to FILE on exit")
+    parser.add_argument("--startup-timeline", action="store_true",
+                        help="print the startup timeline once the first gameplay frame is shown")
+    parser.add_argument("--no-loading-screen", action="store_true",
+                        help="load the gameplay before the first frame instead of behind a loading screen")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="quit once the first gameplay frame is shown (startup measurements)")
+    parser.add_argument("--threaded-sim", action="store_true",
+                        help="simulate gameplay on a worker thread and render its snapshots")
+    return parser.parse_args(argv)
 
-pygame.init()
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    timeline = get_startup_timeline()
+    timeline.report = args.startup_timeline
+    import pygame
+    timeline.mark("pygame imported")
+    from src.game import Game
+    from src.input_replay import InputReplay
+    from src.settings import SIMULATION_THREADED, STARTUP_LOADING_SCREEN
+    timeline.mark("game modules imported")
+
+    # Only the display: fonts are initialized by their first user, the
+    # InputManager starts joysticks when gamepad controls are bound, and
+    # audio is not used (pygame.init() starts them all)
+    pygame.display.init()
+    timeline.mark("display initialized")
+    replay = InputReplay(args.replay, realtime=args.realtime) if args.replay else None
     # Create and run the game
-    game = Game()
-    game.run()
\ No newline at end of file
+    game = Game(replay=replay, record_path=args.record,
+                loading_screen=STARTUP_LOADING_SCREEN and not args.no_loading_screen,
+                threaded_simulation=SIMULATION_THREADED or args.threaded_sim)
+    game.exit_after_startup = args.exit_after_startup
+    if args.trace:
+        game.profiler.enabled = True
+        game.profiler.set_history(None)
+    game.run()
+    if args.trace:
+        print(f"Trace written to {game.profiler.export_chrome_trace(args.trace)}")
@@ -0,0 +1,231 @@
+"""Sprite animation: shared frame tables and integer clip cursors.
+
+Animation sets are declared in ANIMATIONS_FILE (read once by
+`get_animation_library()`). A set names a spritesheet, a frame size and
+clips; each clip lists, per facing, the sheet cells it plays, or mirrors
+another facing of the same clip:
+
+    {"version": 1, "sets": {"npc": {"sheet": "npc.png", "frame_size": [24, 32],
+      "clips": {"walk": {"fps": 8, "loop": true, "frames": {
+        "down": [[0, 0], [1, 0]], "up": [[0, 1], [1, 1]],
+        "right": [[0, 2], [1, 2]], "left": {"mirror": "right"}}}}}}}
+
+The first time a set is used its frames are sliced through the asset
+manager (mirrored ones flipped once) into the library's frame list, shared
+by every sprite of the process. Clips are rows of small NumPy tables: for
+each (clip, facing), the start and length of its run in `sequence`, which
+holds frame ids. An animated sprite is only a clip id, a facing and a time;
+`frame_indices` turns whole arrays of those into frame ids at once.
+
+Clips named after the motions ("idle", "walk", "run") are what moving
+entities play; `motion_clips[set, motion]` gives their ids, a missing walk
+or run falling back to idle.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+
+import numpy as np
+import pygame
+
+from src.assets import get_asset_manager
+from src.settings import ANIMATIONS_FILE, SPRITES_DIR
+
+
+logger = logging.getLogger(__name__)
+
+# Facing indices, in spritesheet row order
+FACING_DOWN, FACING_UP, FACING_RIGHT, FACING_LEFT = range(4)
+FACINGS = ("down", "up", "right", "left")
+# Motion states, and the clip name each one plays
+IDLE, WALK, RUN = range(3)
+MOTIONS = ("idle", "walk", "run")
+
+# (frame ids, fps, loop) of one clip and facing
+Track = Tuple[Tuple[int, ...], float, bool]
+# (surfaces, fps, loop) of one clip and facing
+SurfaceTrack = Tuple[Tuple[pygame.Surface, ...], float, bool]
+
+
+class AnimationLibrary:
+    """Every animation frame of the process, and the clip tables over them."""
+
+    def __init__(self, definitions: Optional[dict] = None) -> None:
+        if definitions is None:
+            definitions = json.loads(ANIMATIONS_FILE.read_text(encoding="utf-8"))
+        sets = definitions.get("sets", {})
+        # Set ids follow the file order, so they are stable across runs
+        self.set_names: List[str] = list(sets)
+        self._definitions = [sets[name] for name in self.set_names]
+        self._set_ids = {name: set_id for set_id, name in enumerate(self.set_names)}
+        self._built = [False] * len(self.set_names)
+        self.frame_sizes: List[Tuple[int, int]] = [
+            tuple(definition["frame_size"]) for definition in self._definitions
+        ]
+        # Shared surfaces, addressed by frame id
+        self.frames: List[pygame.Surface] = []
+        self.clip_names: List[str] = []
+        self._clip_ids: Dict[Tuple[int, str], int] = {}
+        # Clip tables (see the module docstring)
+        self.sequence = np.zeros(0, dtype=np.int32)
+        self.clip_start = np.zeros((0, len(FACINGS)), dtype=np.int32)
+        self.clip_length = np.zeros((0, len(FACINGS)), dtype=np.int32)
+        self.clip_fps = np.zeros(0, dtype=np.float64)
+        self.clip_loop = np.zeros(0, dtype=bool)
+        self.motion_clips = np.zeros((len(self.set_names), len(MOTIONS)), dtype=np.int32)
+        self._tracks: Dict[Tuple[int, int], Track] = {}
+        self._motion_tracks: Dict[int, Tuple[Tuple[SurfaceTrack, ...], ...]] = {}
+
+    # ---------- Sets and clips ----------
+    def set_id(self, name: str) -> int:
+        """Id of an animation set, building its frames on first use."""
+        try:
+            set_id = self._set_ids[name]
+        except KeyError:
+            raise KeyError(f"Unknown animation set {name!r}") from None
+        self.ensure(set_id)
+        return set_id
+
+    def ensure(self, set_id: int) -> None:
+        """Build the frames and clips of a set unless already done."""
+        if not self._built[set_id]:
+            self._build(set_id)
+
+    def clip_id(self, set_id: int, clip: str) -> int:
+        self.ensure(set_id)
+        try:
+            return self._clip_ids[set_id, clip]
+        except KeyError:
+            raise KeyError(f"Set {self.set_names[set_id]!r} has no clip {clip!r}") from None
+
+    def frame_size(self, set_id: int) -> Tuple[int, int]:
+        return self.frame_sizes[set_id]
+
+    # ---------- Frame lookups ----------
+    def track(self, clip: int, facing: int) -> Track:
+        """Frame ids, fps and loop flag of one clip and facing (cached)."""
+        track = self._tracks.get((clip, facing))
+        if track is None:
+            start = int(self.clip_start[clip, facing])
+            length = int(self.clip_length[clip, facing])
+            track = (
+                tuple(self.sequence[start:start + length].tolist()),
+                float(self.clip_fps[clip]),
+                bool(self.clip_loop[clip]),
+            )
+            self._tracks[clip, facing] = track
+        return track
+
+    def motion_tracks(self, set_id: int) -> Tuple[Tuple[SurfaceTrack, ...], ...]:
+        """Surfaces, fps and loop flag per motion and facing of a set (cached).
+
+        For sprites animated one at a time: `tracks[motion][facing]` is two
+        tuple lookups, with no table or dict access per tick.
+        """
+        tracks = self._motion_tracks.get(set_id)
+        if tracks is None:
+            self.ensure(set_id)
+            frames = self.frames
+            tracks = self._motion_tracks[set_id] = tuple(
+                tuple(
+                    (tuple(frames[i] for i in ids), fps, loop)
+                    for ids, fps, loop in (self.track(clip, facing) for facing in range(len(FACINGS)))
+                )
+                for clip in self.motion_clips[set_id].tolist()
+            )
+        return tracks
+
+    def frame_indices(self, clips: np.ndarray, facings: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Frame ids of many sprites at once.
+
+        Args:
+            clips (np.ndarray): Clip id per sprite.
+            facings (np.ndarray): Facing index per sprite.
+            times (np.ndarray): Seconds since each sprite's clip started.
+
+        Returns:
+            np.ndarray: Frame id per sprite, into `frames`.
+        """
+        length = self.clip_length[clips, facings]
+        step = (times * self.clip_fps[clips]).astype(np.int64)
+        offset = np.where(self.clip_loop[clips], step % length, np.minimum(step, length - 1))
+        return self.sequence[self.clip_start[clips, facings] + offset]
+
+    # ---------- Building ----------
+    def _build(self, set_id: int) -> None:
+        definition = self._definitions[set_id]
+        sheet = SPRITES_DIR / definition["sheet"]
+        width, height = self.frame_sizes[set_id]
+        assets = get_asset_manager()
+        # Frame id per (column, row, mirrored): clips reuse each other's frames
+        frame_ids: Dict[Tuple[int, int, bool], int] = {}
+
+        def frame(column: int, row: int, mirrored: bool) -> int:
+            key = (column, row, mirrored)
+            frame_id = frame_ids.get(key)
+            if frame_id is None:
+                # Held by the library for the process lifetime
+                surface = assets.acquire(sheet, (column * width, row * height, width, height))
+                if mirrored:
+                    surface = pygame.transform.flip(surface, True, False)
+                frame_id = frame_ids[key] = len(self.frames)
+                self.frames.append(surface)
+            return frame_id
+
+        sequence = self.sequence.tolist()
+        starts, lengths, fps, loops = [], [], [], []
+        for clip_name, clip in definition["clips"].items():
+            frames_by_facing = clip["frames"]
+            clip_starts, clip_lengths = [], []
+            for facing in FACINGS:
+                cells, mirrored = _resolve_cells(frames_by_facing, facing, clip_name)
+                clip_starts.append(len(sequence))
+                clip_lengths.append(len(cells))
+                sequence.extend(frame(column, row, mirrored) for column, row in cells)
+            self._clip_ids[set_id, clip_name] = len(self.clip_names)
+            self.clip_names.append(f"{self.set_names[set_id]}/{clip_name}")
+            starts.append(clip_starts)
+            lengths.append(clip_lengths)
+            fps.append(float(clip.get("fps", 8)))
+            loops.append(bool(clip.get("loop", True)))
+        if not starts:
+            raise ValueError(f"Animation set {self.set_names[set_id]!r} has no clips")
+        self.sequence = np.asarray(sequence, dtype=np.int32)
+        self.clip_start = np.concatenate([self.clip_start, np.asarray(starts, dtype=np.int32)])
+        self.clip_length = np.concatenate([self.clip_length, np.asarray(lengths, dtype=np.int32)])
+        self.clip_fps = np.concatenate([self.clip_fps, np.asarray(fps)])
+        self.clip_loop = np.concatenate([self.clip_loop, np.asarray(loops)])
+        first = self._clip_ids[set_id, next(iter(definition["clips"]))]
+        idle = self._clip_ids.get((set_id, MOTIONS[IDLE]), first)
+        for motion, name in enumerate(MOTIONS):
+            self.motion_clips[set_id, motion] = self._clip_ids.get((set_id, name), idle)
+        self._built[set_id] = True
+        logger.debug("Animation set %s: %d frames", self.set_names[set_id], len(frame_ids))
+
+
+def _resolve_cells(frames_by_facing: dict, facing: str, clip: str) -> Tuple[Sequence, bool]:
+    """Sheet cells of a facing, following (possibly chained) mirrors."""
+    mirrored = False
+    seen = set()
+    spec = frames_by_facing.get(facing)
+    while isinstance(spec, dict):
+        if facing in seen:
+            raise ValueError(f"Clip {clip!r}: mirror loop through {facing!r}")
+        seen.add(facing)
+        facing = spec["mirror"]
+        mirrored = not mirrored
+        spec = frames_by_facing.get(facing)
+    if not spec:
+        raise ValueError(f"Clip {clip!r} has no frames for {facing!r}")
+    return spec, mirrored
+
+
+_default_library: Optional[AnimationLibrary] = None
+
+
+def get_animation_library() -> AnimationLibrary:
+    """Return the process-wide animation library."""
+    global _default_library
+    if _default_library is None:
+        _default_library = AnimationLibrary()
+    return _default_library
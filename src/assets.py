@@ -0,0 +1,314 @@
+"""Shared image cache and packed sprite atlases.
+
+Every image the game draws from `SPRITES_DIR` should come from the
+`AssetManager` returned by `get_asset_manager()`. Surfaces are keyed by file
+path and slice rectangle, loaded and converted once, and refcounted: callers
+`acquire` what they use and `release` it when done. Surfaces nobody holds
+stay cached until the resident pixel count exceeds ASSET_CACHE_BUDGET_PIXELS,
+then the least recently used ones are evicted.
+
+`python -m src.assets` packs every image under SPRITES_DIR into atlas pages
+under ATLAS_DIR with a JSON index (path -> page and rectangle). When the
+index is present and up to date, sprites are served as subsurfaces of the
+atlas pages instead of being loaded one file at a time.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+import json
+import logging
+
+import pygame
+
+from src.settings import (
+    SPRITES_DIR,
+    ATLAS_DIR,
+    ATLAS_PAGE_SIZE,
+    ASSET_ATLAS_ENABLED,
+    ASSET_CACHE_BUDGET_PIXELS,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+ATLAS_INDEX_NAME = "index.json"
+ATLAS_VERSION = 1
+# Transparent gap between packed sprites so filtering never bleeds
+_ATLAS_PADDING = 1
+_IMAGE_SUFFIXES = (".png", ".bmp", ".tga", ".gif", ".jpg", ".jpeg")
+# Cache key path of atlas pages (real keys hold absolute paths)
+_ATLAS_PAGE = "<atlas>"
+
+RectTuple = Tuple[int, int, int, int]
+AssetKey = Tuple[str, Optional[RectTuple]]
+
+
+@dataclass
+class _Entry:
+    surface: pygame.Surface
+    parent: Optional[Hashable]  # key of the surface this one is a view of
+    pixels: int  # pixels owned (0 for subsurfaces)
+    nbytes: int
+    refs: int = 0
+
+
+class AssetManager:
+    """Refcounted, LRU-evicted cache of converted surfaces."""
+
+    def __init__(
+        self,
+        budget_pixels: int = ASSET_CACHE_BUDGET_PIXELS,
+        atlas_dir: Optional[Path] = ATLAS_DIR if ASSET_ATLAS_ENABLED else None,
+    ) -> None:
+        self.budget_pixels = budget_pixels
+        # Cached surfaces, least recently used first
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.resident_pixels: int = 0
+        self.resident_bytes: int = 0
+        # Counters
+        self.loads: int = 0  # image files decoded from disk
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.atlas_dir = atlas_dir
+        self._atlas: Dict[str, Tuple[int, RectTuple]] = {}
+        if atlas_dir is not None:
+            self._atlas = load_atlas_index(atlas_dir)
+
+    # ---------- Public API ----------
+    def acquire(self, path, rect: Optional[Sequence[int]] = None) -> pygame.Surface:
+        """Return the (cached) surface of an image or of a region of it.
+
+        Each call takes a reference; pair it with `release`.
+
+        Args:
+            path (str | Path): Image file.
+            rect (Sequence[int]): Optional (x, y, width, height) slice.
+
+        Returns:
+            pygame.Surface: Shared surface; do not draw onto it.
+        """
+        key = _key(path, rect)
+        if key in self._entries:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return self._acquire_key(key)
+
+    def release(self, path, rect: Optional[Sequence[int]] = None) -> None:
+        """Drop a reference taken by `acquire`."""
+        self._release_key(_key(path, rect))
+
+    def clear(self) -> None:
+        """Evict every unreferenced surface."""
+        self._evict(0)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "loads": self.loads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "referenced": sum(1 for entry in self._entries.values() if entry.refs),
+            "resident_pixels": self.resident_pixels,
+            "resident_bytes": self.resident_bytes,
+            "atlas_sprites": len(self._atlas),
+        }
+
+    # ---------- Internals ----------
+    def _acquire_key(self, key: Hashable) -> pygame.Surface:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._create(key)
+            # Referenced before storing so the budget check cannot evict it
+            entry.refs = 1
+            self._store(key, entry)
+        else:
+            self._entries.move_to_end(key)
+            entry.refs += 1
+        return entry.surface
+
+    def _create(self, key: Hashable) -> _Entry:
+        path, detail = key
+        if path == _ATLAS_PAGE:
+            self.loads += 1
+            return self._own(_load_image(self.atlas_dir / f"page{detail}.png"))
+        if detail is not None:
+            # Slice: a subsurface holding a reference on the whole image
+            parent_key = (path, None)
+            parent = self._acquire_key(parent_key)
+            return _Entry(parent.subsurface(detail), parent_key, 0, 0)
+        if path in self._atlas:
+            page, region = self._atlas[path]
+            page_key = (_ATLAS_PAGE, page)
+            return _Entry(self._acquire_key(page_key).subsurface(region), page_key, 0, 0)
+        self.loads += 1
+        return self._own(_load_image(Path(path)))
+
+    def _own(self, surface: pygame.Surface) -> _Entry:
+        pixels = surface.get_width() * surface.get_height()
+        return _Entry(surface, None, pixels, pixels * surface.get_bytesize())
+
+    def _store(self, key: Hashable, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self.resident_pixels += entry.pixels
+        self.resident_bytes += entry.nbytes
+        self._evict(self.budget_pixels)
+
+    def _release_key(self, key: Hashable) -> None:
+        entry = self._entries.get(key)
+        if entry is None or entry.refs == 0:
+            logger.warning("Asset released more often than acquired: %s", key)
+            return
+        entry.refs -= 1
+        if entry.refs == 0 and self.resident_pixels > self.budget_pixels:
+            self._evict(self.budget_pixels)
+
+    def _evict(self, budget: int) -> None:
+        """Drop unreferenced entries, oldest first, until within `budget`."""
+        while self.resident_pixels > budget:
+            victim = next((key for key, entry in self._entries.items() if entry.refs == 0), None)
+            if victim is None:
+                return
+            entry = self._entries.pop(victim)
+            self.resident_pixels -= entry.pixels
+            self.resident_bytes -= entry.nbytes
+            self.evictions += 1
+            if entry.parent is not None:
+                # Freeing a slice may make its parent evictable in turn
+                self._release_key(entry.parent)
+
+
+@lru_cache(maxsize=1024)
+def _resolve(path: str) -> str:
+    return str(Path(path).resolve())
+
+
+def _key(path, rect: Optional[Sequence[int]]) -> AssetKey:
+    return _resolve(str(path)), (tuple(int(v) for v in rect) if rect is not None else None)
+
+
+def _load_image(path: Path) -> pygame.Surface:
+    image = pygame.image.load(str(path))
+    # Conversion needs a display; headless tools keep the decoded format
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha()
+    return image
+
+
+_default_manager: Optional[AssetManager] = None
+
+
+def get_asset_manager() -> AssetManager:
+    """Return the process-wide asset manager."""
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = AssetManager()
+    return _default_manager
+
+
+# ---------- Atlas packing ----------
+def _source_images(sprites_dir: Path) -> List[Path]:
+    return sorted(p for p in Path(sprites_dir).rglob("*") if p.suffix.lower() in _IMAGE_SUFFIXES)
+
+
+def load_atlas_index(atlas_dir: Path) -> Dict[str, Tuple[int, RectTuple]]:
+    """Read an atlas index, or return {} if missing or out of date."""
+    index_path = Path(atlas_dir) / ATLAS_INDEX_NAME
+    if not index_path.exists():
+        return {}
+    try:
+        data = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("Unreadable atlas index %s, ignoring it", index_path)
+        return {}
+    if data.get("version") != ATLAS_VERSION:
+        return {}
+    sprites: Dict[str, Tuple[int, RectTuple]] = {}
+    for rel, info in data["sprites"].items():
+        source = (Path(data["source_dir"]) / rel).resolve()
+        try:
+            fresh = source.stat().st_mtime_ns == info["mtime_ns"]
+        except OSError:
+            fresh = False
+        if not fresh:
+            logger.info("Atlas is stale (%s changed); run `python -m src.assets`", rel)
+            return {}
+        sprites[str(source)] = (info["page"], tuple(info["rect"]))
+    return sprites
+
+
+def pack_atlas(
+    sprites_dir: Path = SPRITES_DIR,
+    atlas_dir: Path = ATLAS_DIR,
+    page_size: int = ATLAS_PAGE_SIZE,
+) -> Dict[str, Tuple[int, RectTuple]]:
+    """Pack every image under `sprites_dir` into atlas pages.
+
+    Images are placed tallest first on shelves (rows) of square pages;
+    images larger than a page get a page of their own.
+
+    Returns:
+        dict[str, tuple[int, tuple]]: Relative path -> (page, rect).
+    """
+    sources = _source_images(sprites_dir)
+    images = {path: pygame.image.load(str(path)) for path in sources}
+    order = sorted(sources, key=lambda p: (-images[p].get_height(), -images[p].get_width(), str(p)))
+    pad = _ATLAS_PADDING
+    placements: Dict[Path, Tuple[int, RectTuple]] = {}
+    page_sizes: List[Tuple[int, int]] = []
+    page, x, y, shelf = -1, 0, 0, 0
+    for path in order:
+        w, h = images[path].get_size()
+        if page < 0 or x + w > page_size:
+            # Next shelf
+            x, y, shelf = 0, y + shelf, 0
+        if page < 0 or y + h > page_size:
+            page += 1
+            page_sizes.append((0, 0))
+            x, y, shelf = 0, 0, 0
+        placements[path] = (page, (x, y, w, h))
+        used_w, used_h = page_sizes[page]
+        page_sizes[page] = (max(used_w, x + w), max(used_h, y + h))
+        x += w + pad
+        shelf = max(shelf, h + pad)
+
+    atlas_dir = Path(atlas_dir)
+    atlas_dir.mkdir(parents=True, exist_ok=True)
+    for stale in atlas_dir.glob("page*.png"):
+        stale.unlink()
+    pages = [pygame.Surface(size, pygame.SRCALPHA, 32) for size in page_sizes]
+    for path, (page, (px, py, _, _)) in placements.items():
+        pages[page].blit(images[path], (px, py))
+    for number, surface in enumerate(pages):
+        pygame.image.save(surface, str(atlas_dir / f"page{number}.png"))
+
+    index = {
+        "version": ATLAS_VERSION,
+        "source_dir": str(Path(sprites_dir).resolve()),
+        "pages": len(pages),
+        "sprites": {
+            path.relative_to(sprites_dir).as_posix(): {
+                "page": page,
+                "rect": list(rect),
+                "mtime_ns": path.stat().st_mtime_ns,
+            }
+            for path, (page, rect) in placements.items()
+        },
+    }
+    (atlas_dir / ATLAS_INDEX_NAME).write_text(json.dumps(index, indent=1), encoding="utf-8")
+    return {rel: (info["page"], tuple(info["rect"])) for rel, info in index["sprites"].items()}
+
+
+if __name__ == "__main__":
+    import time
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    packed = pack_atlas()
+    pages = len({page for page, _ in packed.values()})
+    print(f"Packed {len(packed)} sprite(s) into {pages} page(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
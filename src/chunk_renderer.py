@@ -0,0 +1,377 @@
+"""Map renderer drawing from pre-baked, pre-zoomed chunk surfaces.
+
+pyscroll's BufferedRenderer keeps an unzoomed buffer of the view and scales
+it to the screen every frame, which at CAMERA_ZOOM 3 on 1280x720 is the
+single most expensive step of a frame. `BakedChunkRenderer` instead renders
+square chunks of the tile layers once, already scaled by the zoom, and
+composes the view each frame with a handful of chunk blits plus the sprites
+(scaled through a small cache).
+
+Tile layers below `overlay_layer` are baked into opaque ground chunks drawn
+under the sprites; layers at or above it go into transparent overlay chunks
+drawn over them. Animated tiles are patched into the baked chunks when
+their frame changes. Chunks are baked on first use and evicted, least
+recently used first, beyond CHUNK_RENDER_BUDGET_KB. While the camera moves,
+up to CHUNK_RENDER_PREBAKE_PER_FRAME chunks of the row or column it is
+heading into are baked after each frame, so crossing a chunk edge does not
+bake a whole row in one frame.
+
+The class offers the subset of the BufferedRenderer interface used by
+PyscrollGroup and Map (`center`, `view_rect`, `get_center_offset`, `draw`,
+`zoom`, `data`, `map_rect`).
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+
+import pygame
+from pygame import Rect, Surface
+
+from src.settings import (
+    CAMERA_ZOOM,
+    CHUNK_RENDER_TILES,
+    CHUNK_RENDER_BUDGET_KB,
+    CHUNK_RENDER_PREBAKE_PER_FRAME,
+)
+
+
+ChunkKey = Tuple[int, int, int]  # band, chunk x, chunk y
+GROUND, OVERLAY = 0, 1
+# Scaled sprite images kept before the cache is reset
+_SCALED_CACHE_LIMIT = 4096
+
+
+class BakedChunkRenderer:
+    """Composes the zoomed view from cached, pre-scaled tile chunks."""
+
+    def __init__(
+        self,
+        data,
+        size: Tuple[int, int],
+        zoom: float = CAMERA_ZOOM,
+        chunk_tiles: int = CHUNK_RENDER_TILES,
+        budget_kb: int = CHUNK_RENDER_BUDGET_KB,
+        prebake: int = CHUNK_RENDER_PREBAKE_PER_FRAME,
+        overlay_layer: Optional[int] = None,
+        clear_color: Tuple[int, int, int] = (0, 0, 0),
+    ) -> None:
+        """Create a renderer for a pyscroll data source.
+
+        Args:
+            data (PyscrollDataAdapter): Map tiles (any pyscroll adapter).
+            size (tuple[int, int]): Screen area to fill, in pixels.
+            zoom (float): Scale applied to the map and sprites.
+            chunk_tiles (int): Chunk edge in tiles.
+            budget_kb (int): Memory kept in baked chunks before eviction.
+            prebake (int): Chunks baked ahead of a moving camera per frame.
+            overlay_layer (int): First tile layer drawn over sprites; None
+                draws every tile layer under them.
+            clear_color (tuple): Color shown outside the map.
+        """
+        self.data = data
+        self.chunk_tiles = chunk_tiles
+        self.budget_bytes = budget_kb * 1024
+        self.prebake = prebake
+        self.clear_color = clear_color
+        tw, th = data.tile_size
+        mw, mh = data.map_size
+        self.map_rect = Rect(0, 0, mw * tw, mh * th)
+        self.view_rect = Rect(0, 0, 0, 0)
+        layers = sorted(data.visible_tile_layers)
+        if overlay_layer is None:
+            self._bands = (tuple(layers), ())
+        else:
+            self._bands = (
+                tuple(l for l in layers if l < overlay_layer),
+                tuple(l for l in layers if l >= overlay_layer),
+            )
+        # Baked chunks (None: nothing to draw), least recently used first
+        self._chunks: "OrderedDict[ChunkKey, Optional[Surface]]" = OrderedDict()
+        self._chunk_bytes: Dict[ChunkKey, int] = {}
+        self.resident_bytes = 0
+        self._scaled_sprites: Dict[int, Tuple[Surface, Surface]] = {}
+        self._scaled_tiles: Dict[int, Tuple[Surface, Surface]] = {}
+        # Counters
+        self.chunks_baked: int = 0
+        self.evictions: int = 0
+        self.tiles_patched: int = 0
+        self.chunks_prebaked: int = 0
+        # View center at the previous draw, to tell where the camera heads
+        self._last_center: Optional[Tuple[int, int]] = None
+        self._size = tuple(size)
+        self._zoom_level = zoom
+        self._resize_view()
+
+    # ---------- Camera ----------
+    @property
+    def zoom(self) -> float:
+        return self._zoom_level
+
+    @zoom.setter
+    def zoom(self, value: float) -> None:
+        if value <= 0:
+            raise ValueError("zoom level must be positive")
+        self._zoom_level = value
+        self._resize_view()
+        self.reload()
+
+    def _resize_view(self) -> None:
+        # Round up so the scaled view always covers the whole screen area
+        center = self.view_rect.center
+        self.view_rect.size = (
+            math.ceil(self._size[0] / self._zoom_level),
+            math.ceil(self._size[1] / self._zoom_level),
+        )
+        self.view_rect.center = center
+        self._half_width = self.view_rect.width // 2
+        self._half_height = self.view_rect.height // 2
+
+    def center(self, coords: Sequence[float]) -> None:
+        """Center the view on a world pixel, keeping it inside the map."""
+        self.view_rect.center = round(coords[0]), round(coords[1])
+        self.view_rect.clamp_ip(self.map_rect)
+
+    def scroll(self, vector: Sequence[int]) -> None:
+        self.center((self.view_rect.centerx + vector[0], self.view_rect.centery + vector[1]))
+
+    def get_center_offset(self) -> Tuple[int, int]:
+        """Offset turning world coordinates into unzoomed view coordinates."""
+        return (-self.view_rect.centerx + self._half_width,
+                -self.view_rect.centery + self._half_height)
+
+    def reload(self) -> None:
+        """Forget every baked chunk (after tiles or zoom changed)."""
+        self._chunks.clear()
+        self._chunk_bytes.clear()
+        self.resident_bytes = 0
+        self._scaled_sprites.clear()
+        self._scaled_tiles.clear()
+
+    def bake_view(self, center: Sequence[float]):
+        """Bake the chunks seen from `center`, one chunk per `yield`.
+
+        Lets a map transition spread the first view's baking over its
+        budgeted steps instead of the first frame drawn after it.
+        """
+        self.center(center)
+        for band, cx, cy in self._view_keys():
+            if self._bands[band] and (band, cx, cy) not in self._chunks:
+                self._chunk(band, cx, cy)
+                yield
+
+    def _view_keys(self) -> List[ChunkKey]:
+        view = self.view_rect
+        tw, th = self.data.tile_size
+        chunk_w, chunk_h = self.chunk_tiles * tw, self.chunk_tiles * th
+        cx0, cy0 = max(view.left, 0) // chunk_w, max(view.top, 0) // chunk_h
+        cx1 = (min(view.right, self.map_rect.right) - 1) // chunk_w
+        cy1 = (min(view.bottom, self.map_rect.bottom) - 1) // chunk_h
+        return [
+            (band, cx, cy)
+            for band in (GROUND, OVERLAY)
+            for cy in range(cy0, cy1 + 1)
+            for cx in range(cx0, cx1 + 1)
+        ]
+
+    # ---------- Drawing ----------
+    def draw(self, surface: Surface, rect, surfaces: Optional[List[tuple]] = None) -> Rect:
+        """Draw the view and sprites into `rect` of `surface`.
+
+        Args:
+            surface (Surface): Destination.
+            rect (RectLike): Destination area.
+            surfaces (list): (image, rect, layer[, blendmode]) tuples with
+                rects in unzoomed view coordinates, as PyscrollGroup builds.
+
+        Returns:
+            Rect: Area drawn.
+        """
+        rect = Rect(rect)
+        zoom = self._zoom_level
+        view = self.view_rect
+        tw, th = self.data.tile_size
+        chunk_w, chunk_h = self.chunk_tiles * tw, self.chunk_tiles * th
+        cx0, cy0 = max(view.left, 0) // chunk_w, max(view.top, 0) // chunk_h
+        cx1 = (min(view.right, self.map_rect.right) - 1) // chunk_w
+        cy1 = (min(view.bottom, self.map_rect.bottom) - 1) // chunk_h
+        keys = [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+        self._patch_animations(cx0, cy0, cx1, cy1)
+
+        previous_clip = surface.get_clip()
+        surface.set_clip(rect)
+        if not self.map_rect.contains(view):
+            surface.fill(self.clear_color, rect)
+
+        def chunk_blits(band: int) -> List[tuple]:
+            blits = []
+            for cx, cy in keys:
+                chunk = self._chunk(band, cx, cy)
+                if chunk is not None:
+                    blits.append((chunk, (
+                        rect.left + round((cx * chunk_w - view.left) * zoom),
+                        rect.top + round((cy * chunk_h - view.top) * zoom),
+                    )))
+            return blits
+
+        surface.blits(chunk_blits(GROUND), doreturn=False)
+        if surfaces:
+            # Stable sort: same-layer sprites keep the group's order
+            blits = []
+            visible = Rect(0, 0, view.width, view.height).colliderect
+            surfaces = [item for item in surfaces if visible(item[1])]
+            for item in sorted(surfaces, key=lambda item: item[2]):
+                image, sprite_rect = item[0], item[1]
+                position = (rect.left + round(sprite_rect[0] * zoom), rect.top + round(sprite_rect[1] * zoom))
+                if len(item) > 3 and item[3]:
+                    blits.append((self._scaled(image, self._scaled_sprites), position, None, item[3]))
+                else:
+                    blits.append((self._scaled(image, self._scaled_sprites), position))
+            surface.blits(blits, doreturn=False)
+        if self._bands[OVERLAY]:
+            surface.blits(chunk_blits(OVERLAY), doreturn=False)
+        surface.set_clip(previous_clip)
+        self._prebake_ahead(cx0, cy0, cx1, cy1)
+        return rect
+
+    def _prebake_ahead(self, cx0: int, cy0: int, cx1: int, cy1: int) -> None:
+        """Bake a few chunks of the row/column the camera is moving into."""
+        center = self.view_rect.center
+        last, self._last_center = self._last_center, center
+        if not self.prebake or last is None:
+            return
+        sx, sy = _sign(center[0] - last[0]), _sign(center[1] - last[1])
+        if not (sx or sy):
+            return
+        tw, th = self.data.tile_size
+        columns = math.ceil(self.map_rect.width / (self.chunk_tiles * tw))
+        rows = math.ceil(self.map_rect.height / (self.chunk_tiles * th))
+        ahead = []
+        if sx:
+            cx = cx1 + 1 if sx > 0 else cx0 - 1
+            ahead.extend((cx, cy) for cy in range(cy0 - (sy < 0), cy1 + (sy > 0) + 1))
+        if sy:
+            cy = cy1 + 1 if sy > 0 else cy0 - 1
+            ahead.extend((cx, cy) for cx in range(cx0, cx1 + 1))
+        budget = self.prebake
+        for cx, cy in ahead:
+            if not (0 <= cx < columns and 0 <= cy < rows):
+                continue
+            for band in (GROUND, OVERLAY):
+                if self._bands[band] and (band, cx, cy) not in self._chunks:
+                    self._chunk(band, cx, cy)
+                    self.chunks_prebaked += 1
+                    budget -= 1
+                    if not budget:
+                        return
+
+    def _scaled(self, image: Surface, cache: Dict[int, Tuple[Surface, Surface]]) -> Surface:
+        """Return `image` scaled by the zoom, cached by surface identity."""
+        entry = cache.get(id(image))
+        if entry is not None and entry[0] is image:
+            return entry[1]
+        if len(cache) >= _SCALED_CACHE_LIMIT:
+            cache.clear()
+        w, h = image.get_size()
+        scaled = pygame.transform.scale(image, (round(w * self._zoom_level), round(h * self._zoom_level)))
+        cache[id(image)] = (image, scaled)
+        return scaled
+
+    # ---------- Chunks ----------
+    def _chunk(self, band: int, cx: int, cy: int) -> Optional[Surface]:
+        key = (band, cx, cy)
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+            return self._chunks[key]
+        chunk = self._bake(band, cx, cy)
+        self._chunks[key] = chunk
+        size = chunk.get_width() * chunk.get_height() * chunk.get_bytesize() if chunk is not None else 0
+        self._chunk_bytes[key] = size
+        self.resident_bytes += size
+        self.chunks_baked += 1
+        self._evict()
+        return chunk
+
+    def _bake(self, band: int, cx: int, cy: int) -> Optional[Surface]:
+        """Render one chunk of a band at 1x, then scale it by the zoom."""
+        layers = self._bands[band]
+        if not layers:
+            return None
+        tw, th = self.data.tile_size
+        n = self.chunk_tiles
+        x0, y0 = cx * n, cy * n
+        if band == GROUND:
+            # Built in the display's format, so the scaled chunk needs no
+            # convert() (a full copy of the zoomed chunk)
+            buffer = Surface((n * tw, n * th), 0, pygame.display.get_surface())
+            buffer.fill(self.clear_color)
+        else:
+            buffer = Surface((n * tw, n * th), pygame.SRCALPHA)
+        blits = [
+            (image, ((x - x0) * tw, (y - y0) * th))
+            for x, y, l, image in self.data.get_tile_images_by_rect((x0, y0, n, n))
+            if l in layers
+        ]
+        if not blits and band == OVERLAY:
+            return None
+        buffer.blits(blits, doreturn=False)
+        size = (round(n * tw * self._zoom_level), round(n * th * self._zoom_level))
+        return pygame.transform.scale(buffer, size)
+
+    def trim(self) -> None:
+        """Drop every baked chunk outside the current view, and scaled sprites."""
+        keep = set(self._view_keys())
+        for key in [key for key in self._chunks if key not in keep]:
+            del self._chunks[key]
+            self.resident_bytes -= self._chunk_bytes.pop(key)
+            self.evictions += 1
+        self._scaled_sprites.clear()
+
+    def _evict(self) -> None:
+        while self.resident_bytes > self.budget_bytes and len(self._chunks) > 1:
+            key, _ = self._chunks.popitem(last=False)
+            self.resident_bytes -= self._chunk_bytes.pop(key)
+            self.evictions += 1
+
+    def _patch_animations(self, cx0: int, cy0: int, cx1: int, cy1: int) -> None:
+        """Redraw, in baked chunks, the tiles whose animation frame changed."""
+        if not self.data._animation_queue:
+            return
+        n = self.chunk_tiles
+        # Positions outside this area stop being tracked until re-baked
+        tile_view = Rect(cx0 * n, cy0 * n, (cx1 - cx0 + 1) * n, (cy1 - cy0 + 1) * n)
+        changed = self.data.process_animation_queue(tile_view)
+        if not changed:
+            return
+        # Each changed cell comes back as its whole column of layers, in order
+        cells: Dict[Tuple[int, int], List[Tuple[int, Surface]]] = {}
+        for x, y, l, image in changed:
+            cells.setdefault((x, y), []).append((l, image))
+        tw, th = self.data.tile_size
+        zoom = self._zoom_level
+        cell_w, cell_h = round(tw * zoom), round(th * zoom)
+        for (x, y), column in cells.items():
+            for band, layers in enumerate(self._bands):
+                chunk = self._chunks.get((band, x // n, y // n))
+                if chunk is None:
+                    continue
+                area = Rect(round((x % n) * tw * zoom), round((y % n) * th * zoom), cell_w, cell_h)
+                chunk.fill(self.clear_color if band == GROUND else (0, 0, 0, 0), area)
+                chunk.blits([
+                    (self._scaled(image, self._scaled_tiles), area.topleft)
+                    for l, image in column if l in layers
+                ], doreturn=False)
+                self.tiles_patched += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "resident_chunks": len(self._chunks),
+            "resident_kb": self.resident_bytes // 1024,
+            "chunks_baked": self.chunks_baked,
+            "evictions": self.evictions,
+            "tiles_patched": self.tiles_patched,
+            "chunks_prebaked": self.chunks_prebaked,
+        }
+
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
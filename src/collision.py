@@ -0,0 +1,428 @@
+"""Tile-grid collisions with swept AABB movement.
+
+A `CollisionGrid` is a boolean NumPy array with one cell per map tile, built
+at map load from tile and object properties. Movement is resolved one axis at
+a time: the box is swept along the axis and stopped at the first solid
+column (or row) it would enter. The area outside the map is solid.
+
+Tiles are solid when their properties contain a truthy `solid`, `collision`
+or `collides` key, or when their type/class is one of SOLID_TYPES. Every
+non-empty tile of a layer carrying such a property is solid (hidden
+collision layers). Objects on object layers with such a type or property
+mark every tile they overlap.
+
+Streamed worlds (see world_chunks.py) use a `ChunkedCollisionGrid` instead:
+one mask per resident chunk, built when the chunk is loaded and dropped when
+it is evicted, so collision memory stays as flat as the tiles'.
+"""
+from collections import deque
+from typing import Iterable, List, Tuple
+import math
+
+import numpy as np
+
+from src import map_cache
+
+
+SOLID_PROPERTIES = ("solid", "collision", "collides")
+SOLID_TYPES = ("solid", "wall", "collision")
+# Keeps boxes resting exactly on a tile edge out of the next tile
+_EPSILON = 1e-6
+
+
+def is_solid_properties(props) -> bool:
+    """Return True when tile/object properties mark it as blocking."""
+    if not props:
+        return False
+    if any(props.get(name) in (True, "true", 1) for name in SOLID_PROPERTIES):
+        return True
+    return props.get("type") in SOLID_TYPES
+
+
+class CollisionGrid:
+    """Solidity grid over a tile map."""
+
+    def __init__(self, solid: np.ndarray, tile_size: Tuple[int, int]) -> None:
+        """Create a grid from a (height, width) boolean array.
+
+        Args:
+            solid (np.ndarray): True where a tile blocks movement.
+            tile_size (tuple[int, int]): Tile width and height in pixels.
+        """
+        self.height, self.width = np.shape(solid)
+        self.tilewidth, self.tileheight = tile_size
+        # One-cell solid border so out-of-map lookups need no bounds checks.
+        # A single byte buffer backs both views: the scalar path indexes the
+        # bytes (plain indexing beats numpy for the handful of cells a move
+        # touches), the batched path and `solid` go through numpy
+        self._stride = self.width + 2
+        self._cells = bytearray(b"\x01") * (self._stride * (self.height + 2))
+        self._padded = np.frombuffer(self._cells, dtype=bool).reshape(self.height + 2, self._stride)
+        self._padded[1:-1, 1:-1] = solid
+        self.solid = self._padded[1:-1, 1:-1]
+
+    # ---------- Construction ----------
+    @classmethod
+    def from_map(cls, tmx_data) -> "CollisionGrid":
+        """Build the grid from a CompiledMap or a pytmx TiledMap."""
+        shape = (tmx_data.height, tmx_data.width)
+        solid = np.zeros(shape, dtype=bool)
+        for gids, lut in _tile_layers(tmx_data):
+            solid |= lut[gids]
+        grid = cls(solid, (tmx_data.tilewidth, tmx_data.tileheight))
+        for obj in _solid_objects(tmx_data):
+            grid.fill_rect(obj.x, obj.y, obj.width, obj.height)
+        return grid
+
+    def _tile_span(self, x: float, y: float, width: float, height: float) -> Tuple[int, int, int, int]:
+        """Columns and rows (c0, r0, c1, r1; end excluded) a pixel rect overlaps."""
+        c0 = max(0, int(x // self.tilewidth))
+        r0 = max(0, int(y // self.tileheight))
+        c1 = min(self.width, int(math.ceil((x + max(width, 1)) / self.tilewidth)))
+        r1 = min(self.height, int(math.ceil((y + max(height, 1)) / self.tileheight)))
+        return c0, r0, c1, r1
+
+    def fill_rect(self, x: float, y: float, width: float, height: float, value: bool = True) -> None:
+        """Set every tile overlapped by a pixel rectangle."""
+        c0, r0, c1, r1 = self._tile_span(x, y, width, height)
+        self.solid[r0:r1, c0:c1] = value
+
+    # ---------- Queries ----------
+    def is_solid(self, tx: int, ty: int) -> bool:
+        """Return True for solid tiles and for tiles outside the map."""
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return bool(self.solid[ty, tx])
+        return True
+
+    def region(self, rect) -> np.ndarray:
+        """Copy of the solid flags of a tile rect (x, y, width, height).
+
+        Returns:
+            np.ndarray: (height, width) bool; tiles outside the map are solid.
+        """
+        x, y, width, height = rect
+        out = np.ones((height, width), dtype=bool)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 < x1 and y0 < y1:
+            out[y0 - y:y1 - y, x0 - x:x1 - x] = self.solid[y0:y1, x0:x1]
+        return out
+
+    def _blocked_cells(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Solidity of cells of the padded grid (tile index + 1 on both axes)."""
+        return self._padded[rows, cols]
+
+    def _column_blocked(self, col: int, row0: int, row1: int) -> bool:
+        col = min(max(col, -1), self.width) + 1
+        row0 = min(max(row0, -1), self.height) + 1
+        row1 = min(max(row1, -1), self.height) + 1
+        cells = self._cells
+        stride = self._stride
+        for index in range(row0 * stride + col, row1 * stride + col + 1, stride):
+            if cells[index]:
+                return True
+        return False
+
+    def _row_blocked(self, row: int, col0: int, col1: int) -> bool:
+        row = min(max(row, -1), self.height) + 1
+        col0 = min(max(col0, -1), self.width) + 1
+        col1 = min(max(col1, -1), self.width) + 1
+        start = row * self._stride
+        return 1 in self._cells[start + col0:start + col1 + 1]
+
+    # ---------- Single box ----------
+    def move(self, x: float, y: float, w: float, h: float, dx: float, dy: float) -> Tuple[float, float]:
+        """Move a box by (dx, dy), stopping against solid tiles.
+
+        The x axis is resolved first, then y, so boxes slide along walls.
+        Only the tiles the leading edge enters are tested, which is constant
+        time for moves shorter than a tile.
+
+        Args:
+            x (float): Box left in pixels.
+            y (float): Box top in pixels.
+            w (float): Box width in pixels.
+            h (float): Box height in pixels.
+            dx (float): Requested horizontal displacement.
+            dy (float): Requested vertical displacement.
+
+        Returns:
+            tuple[float, float]: Resolved top-left position.
+        """
+        tw, th = self.tilewidth, self.tileheight
+        if dx:
+            row0, row1 = int(y // th), int((y + h - _EPSILON) // th)
+            if dx > 0:
+                start = int((x + w - _EPSILON) // tw) + 1
+                end = int((x + dx + w - _EPSILON) // tw)
+                for col in range(start, end + 1):
+                    if self._column_blocked(col, row0, row1):
+                        dx = col * tw - w - x
+                        break
+            else:
+                start = int(x // tw) - 1
+                end = int((x + dx) // tw)
+                for col in range(start, end - 1, -1):
+                    if self._column_blocked(col, row0, row1):
+                        dx = (col + 1) * tw - x
+                        break
+            x += dx
+        if dy:
+            col0, col1 = int(x // tw), int((x + w - _EPSILON) // tw)
+            if dy > 0:
+                start = int((y + h - _EPSILON) // th) + 1
+                end = int((y + dy + h - _EPSILON) // th)
+                for row in range(start, end + 1):
+                    if self._row_blocked(row, col0, col1):
+                        dy = row * th - h - y
+                        break
+            else:
+                start = int(y // th) - 1
+                end = int((y + dy) // th)
+                for row in range(start, end - 1, -1):
+                    if self._row_blocked(row, col0, col1):
+                        dy = (row + 1) * th - y
+                        break
+            y += dy
+        return x, y
+
+    # ---------- Batched ----------
+    def move_batch(self, positions: np.ndarray, sizes: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+        """Resolve the moves of many boxes in one vectorized pass.
+
+        Moves longer than a tile are split into tile-sized substeps so each
+        substep enters at most one new column and one new row.
+
+        Args:
+            positions (np.ndarray): (N, 2) box top-left positions.
+            sizes (np.ndarray): (N, 2) box widths and heights (or a single (2,)).
+            deltas (np.ndarray): (N, 2) requested displacements.
+
+        Returns:
+            np.ndarray: (N, 2) float64 resolved positions.
+        """
+        pos = np.array(positions, dtype=np.float64, copy=True)
+        if pos.size == 0:
+            return pos
+        size = np.broadcast_to(np.asarray(sizes, dtype=np.float64), pos.shape)
+        deltas = np.asarray(deltas, dtype=np.float64)
+        longest = float(np.abs(deltas).max()) if deltas.size else 0.0
+        steps = max(1, int(math.ceil(longest / min(self.tilewidth, self.tileheight))))
+        step = deltas / steps
+        for _ in range(steps):
+            self._sweep_axis_batch(pos, size, step[:, 0], axis=0)
+            self._sweep_axis_batch(pos, size, step[:, 1], axis=1)
+        return pos
+
+    def _sweep_axis_batch(self, pos: np.ndarray, size: np.ndarray, d: np.ndarray, axis: int) -> None:
+        """Move every box along one axis by at most one tile, in place."""
+        other = 1 - axis
+        cell = float(self.tilewidth if axis == 0 else self.tileheight)
+        other_cell = float(self.tileheight if axis == 0 else self.tilewidth)
+        lead = pos[:, axis]
+        extent = size[:, axis]
+        # Cell entered by the leading edge, for each direction
+        right_old = np.floor((lead + extent - _EPSILON) / cell)
+        right_new = np.floor((lead + d + extent - _EPSILON) / cell)
+        left_old = np.floor(lead / cell)
+        left_new = np.floor((lead + d) / cell)
+        forward = d > 0
+        target = np.where(forward, right_new, left_new)
+        entering = np.where(forward, right_new > right_old, left_new < left_old)
+        # Span of cells covered on the other axis
+        span0 = np.floor(pos[:, other] / other_cell)
+        span1 = np.floor((pos[:, other] + size[:, other] - _EPSILON) / other_cell)
+        limit_main = self.width if axis == 0 else self.height
+        limit_other = self.height if axis == 0 else self.width
+        target_i = np.clip(target, -1, limit_main).astype(np.intp) + 1
+        span0_i = np.clip(span0, -1, limit_other).astype(np.intp) + 1
+        span1_i = np.clip(span1, -1, limit_other).astype(np.intp) + 1
+        blocked = np.zeros(len(d), dtype=bool)
+        idx = np.nonzero(entering)[0]
+        if idx.size:
+            widest = int((span1_i[idx] - span0_i[idx]).max()) + 1
+            hit = np.zeros(idx.size, dtype=bool)
+            for k in range(widest):
+                cells = np.minimum(span0_i[idx] + k, span1_i[idx])
+                if axis == 0:
+                    hit |= self._blocked_cells(cells, target_i[idx])
+                else:
+                    hit |= self._blocked_cells(target_i[idx], cells)
+            blocked[idx] = hit
+        stop = np.where(forward, target * cell - extent, (target + 1) * cell)
+        pos[:, axis] = np.where(blocked, stop, lead + d)
+
+
+class ChunkedCollisionGrid(CollisionGrid):
+    """Solidity of a streamed world, one mask per resident chunk.
+
+    Registered with the world's listeners: a chunk's mask is built from its
+    tiles when the world loads it, then gets the solid objects and
+    `fill_rect` changes over it, and is dropped when the world evicts it.
+    Tiles of chunks that are not loaded count as solid, so entities far
+    from the camera stop at the edge of the streamed area instead of
+    walking through walls nobody has read.
+    """
+
+    def __init__(self, tmx_data, world) -> None:
+        """Follow the chunks of `world` (a ChunkedWorld over `tmx_data`)."""
+        self.width, self.height = tmx_data.width, tmx_data.height
+        self.tilewidth, self.tileheight = tmx_data.tilewidth, tmx_data.tileheight
+        self.chunk_size = world.chunk_size
+        # Solid lookup table of each tile layer, in chunk layer order
+        self._luts = [lut for _, lut in _tile_layers(tmx_data)]
+        # Tile spans (c0, r0, c1, r1) and values applied over the tile
+        # layers of every chunk loaded: solid objects, then fill_rect calls
+        self._edits: List[Tuple[int, int, int, int, bool]] = [
+            self._tile_span(obj.x, obj.y, obj.width, obj.height) + (True,) for obj in _solid_objects(tmx_data)
+        ]
+        # Mask slot of every chunk, -1 when it is not loaded
+        self._slots = np.full((world.source.chunks_y, world.source.chunks_x), -1, dtype=np.int32)
+        # Masks of the resident chunks, grown by doubling as more are loaded
+        resident = world.resident()
+        size = self.chunk_size
+        self._masks = np.ones((max(1, len(resident)), size, size), dtype=bool)
+        # Free slots, the longest free first: a lookup on another thread
+        # may still read a slot that was just freed
+        self._free = deque(range(len(self._masks)))
+        # Masks built so far (tells a partial navigation window to rebuild)
+        self.chunk_loads: int = 0
+        for key, data in resident:
+            self.chunk_loaded(key, data)
+        world.listeners.append(self)
+
+    # ---------- Chunks ----------
+    def chunk_loaded(self, key, data: np.ndarray) -> None:
+        """Build the mask of a chunk the world just loaded."""
+        if not self._free:
+            grown = np.ones((2 * len(self._masks),) + self._masks.shape[1:], dtype=bool)
+            grown[:len(self._masks)] = self._masks
+            self._free.extend(range(len(self._masks), len(grown)))
+            self._masks = grown
+        slot = self._free.popleft()
+        mask = self._masks[slot]
+        mask[:] = False
+        for lut, gids in zip(self._luts, data):
+            mask |= lut[gids]
+        cx, cy = key
+        for span in self._edits:
+            self._apply(mask, cx, cy, *span)
+        self._slots[cy, cx] = slot
+        self.chunk_loads += 1
+
+    def chunk_evicted(self, key) -> None:
+        """Drop the mask of a chunk the world evicted."""
+        cx, cy = key
+        slot = int(self._slots[cy, cx])
+        if slot >= 0:
+            self._slots[cy, cx] = -1
+            self._free.append(slot)
+
+    def _apply(self, mask: np.ndarray, cx: int, cy: int, c0: int, r0: int, c1: int, r1: int, value: bool) -> None:
+        """Set the part of a tile span inside chunk (cx, cy)."""
+        size = self.chunk_size
+        x0, y0 = cx * size, cy * size
+        left, top = max(c0 - x0, 0), max(r0 - y0, 0)
+        right, bottom = min(c1 - x0, size), min(r1 - y0, size)
+        if left < right and top < bottom:
+            mask[top:bottom, left:right] = value
+
+    def complete(self, rect) -> bool:
+        """True when every chunk over a tile rect (x, y, width, height) is loaded."""
+        x, y, width, height = rect
+        size = self.chunk_size
+        slots = self._slots[max(y, 0) // size:(min(y + height, self.height) - 1) // size + 1,
+                            max(x, 0) // size:(min(x + width, self.width) - 1) // size + 1]
+        return bool((slots >= 0).all())
+
+    def fill_rect(self, x: float, y: float, width: float, height: float, value: bool = True) -> None:
+        """Set every tile overlapped by a pixel rectangle, loaded or not."""
+        span = self._tile_span(x, y, width, height)
+        # A later change of the same tiles replaces the earlier one
+        self._edits = [edit for edit in self._edits if edit[:4] != span]
+        self._edits.append(span + (value,))
+        c0, r0, c1, r1 = span
+        size = self.chunk_size
+        for cy in range(r0 // size, (r1 - 1) // size + 1):
+            for cx in range(c0 // size, (c1 - 1) // size + 1):
+                slot = self._slots[cy, cx]
+                if slot >= 0:
+                    self._apply(self._masks[slot], cx, cy, *span, value)
+
+    # ---------- Queries ----------
+    def is_solid(self, tx: int, ty: int) -> bool:
+        """Return True for solid tiles, tiles of unloaded chunks and outside the map."""
+        if not (0 <= tx < self.width and 0 <= ty < self.height):
+            return True
+        size = self.chunk_size
+        slot = self._slots[ty // size, tx // size]
+        return slot < 0 or bool(self._masks[slot, ty % size, tx % size])
+
+    def region(self, rect) -> np.ndarray:
+        """Copy of the solid flags of a tile rect, assembled from the loaded chunks."""
+        x, y, width, height = rect
+        out = np.ones((height, width), dtype=bool)
+        masks, size = self._masks, self.chunk_size
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        for cy in range(y0 // size, (y1 - 1) // size + 1):
+            for cx in range(x0 // size, (x1 - 1) // size + 1):
+                slot = self._slots[cy, cx]
+                if slot < 0:
+                    continue
+                left, top = max(x0, cx * size), max(y0, cy * size)
+                right, bottom = min(x1, (cx + 1) * size), min(y1, (cy + 1) * size)
+                out[top - y:bottom - y, left - x:right - x] = \
+                    masks[slot, top - cy * size:bottom - cy * size, left - cx * size:right - cx * size]
+        return out
+
+    def _column_blocked(self, col: int, row0: int, row1: int) -> bool:
+        return any(self.is_solid(col, row) for row in range(row0, row1 + 1))
+
+    def _row_blocked(self, row: int, col0: int, col1: int) -> bool:
+        return any(self.is_solid(col, row) for col in range(col0, col1 + 1))
+
+    def _blocked_cells(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        rows, cols = rows - 1, cols - 1
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        rows, cols = np.where(inside, rows, 0), np.where(inside, cols, 0)
+        masks, size = self._masks, self.chunk_size
+        slots = self._slots[rows // size, cols // size]
+        return ~inside | (slots < 0) | masks[np.maximum(slots, 0), rows % size, cols % size]
+
+
+def _solid_objects(tmx_data) -> Iterable:
+    """Objects of the object layers that block movement."""
+    for obj in tmx_data.objects:
+        props = dict(obj.properties or {})
+        props.setdefault("type", getattr(obj, "type", None))
+        if is_solid_properties(props):
+            yield obj
+
+
+def _tile_layers(tmx_data) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+    """Yield (gid array, solid lookup table) for each tile layer."""
+    if isinstance(tmx_data, map_cache.CompiledMap):
+        lut = np.zeros(tmx_data.max_gid + 1, dtype=bool)
+        for tileset in tmx_data.tilesets:
+            for local_id, props in tileset.tile_properties.items():
+                gid = tileset.firstgid + local_id
+                if gid < len(lut):
+                    lut[gid] = is_solid_properties(props)
+        layers = [(layer.data, layer.properties) for layer in tmx_data.layers]
+    else:
+        # pytmx TiledMap: layer data holds pytmx's internal gids (pytmx is
+        # only imported when maps are loaded without the cache)
+        import pytmx
+
+        lut = np.zeros(len(tmx_data.images), dtype=bool)
+        for gid in range(1, len(lut)):
+            lut[gid] = is_solid_properties(tmx_data.get_tile_properties_by_gid(gid))
+        layers = [
+            (np.asarray(layer.data, dtype=np.intp), layer.properties)
+            for layer in tmx_data.layers if isinstance(layer, pytmx.TiledTileLayer)
+        ]
+    whole_layer = np.ones_like(lut)
+    whole_layer[0] = False
+    for gids, props in layers:
+        yield gids, (whole_layer if is_solid_properties(props) else lut)
@@ -1,19 +1,23 @@
 import pygame
-from src.tools import Tools
+from src.animation import get_animation_library, FACINGS, FACING_DOWN, FACING_UP, FACING_RIGHT, FACING_LEFT, IDLE, WALK, RUN
 from src.input_manager import InputManager
+from src.inventory import Inventory
+from src.profiler import get_profiler
 import math
 from pathlib import Path
 from src.settings import (
     PLAYER_WALK_SPEED,
     PLAYER_SPRINT_SPEED,
-    PLAYER_SPRITE_SIZE,
-    SPRITES_DIR,
+    PLAYER_ANIMATION_SET,
 )
 
+profiler = get_profiler()
+
 class Entity(pygame.sprite.Sprite):
     """Movable player entity rendered in the map.
 
-    Handles input-driven movement and switches sprite based on facing direction.
+    Handles input-driven movement and plays the idle, walk or run clip of its
+    animation set for the current facing.
     """
 
     def __init__(self, input_manager: InputManager):
@@ -24,28 +28,47 @@ class Entity(pygame.sprite.Sprite):
         """
         super().__init__()
         self.input = input_manager
-        # Load player spritesheet from centralized SPRITES_DIR
-        self.spritesheet = pygame.image.load(str(SPRITES_DIR / 'player.png')).convert_alpha()
-
-        self.sprite_dimentions = [PLAYER_SPRITE_SIZE[0], PLAYER_SPRITE_SIZE[1]]
-        # Slice spritesheet into directional frames (single column, 4 rows)
-        # Order in spritesheet (top to bottom) appears: down, up, left, right
-        w, h = self.sprite_dimentions
-        self.images = {
-            'down': Tools.split_image(self.spritesheet, 0, 0 * h, w, h),
-            'up': Tools.split_image(self.spritesheet, 0, 1 * h, w, h),
-            'right': Tools.split_image(self.spritesheet, 0, 2 * h, w, h),
-            'left': Tools.split_image(self.spritesheet, 0, 3 * h, w, h),
-        }
-        self.direction = 'down'
-        self.image = self.images[self.direction]
+        # Action bits tested against `input.held` every tick
+        self._right_bit, self._left_bit, self._down_bit, self._up_bit, self._sprint_bit = (
+            input_manager.action_bit(action)
+            for action in ('move_right', 'move_left', 'move_down', 'move_up', 'sprint')
+        )
+        # Frames are shared by every instance through the animation library;
+        # the entity only holds its clip cursor
+        self.animations = get_animation_library()
+        self.animation_set = self.animations.set_id(PLAYER_ANIMATION_SET)
+        self.sprite_dimentions = list(self.animations.frame_size(self.animation_set))
+        # Frames, fps and loop flag per motion and facing
+        self.tracks = self.animations.motion_tracks(self.animation_set)
+        self.facing = FACING_DOWN
+        self.motion = IDLE
+        # Motion whose clip is playing, seconds since it started
+        self.playing = IDLE
+        self.anim_time = 0.0
+        self.animate(0.0)
 
         # World position in pixels (floats to allow subpixel movement)
         self.position: list[float] = [0.0, 0.0]
+        # Position at the start of the last tick, for render interpolation
+        self.previous_position: list[float] = [0.0, 0.0]
         self.rect = pygame.Rect(0, 0, self.sprite_dimentions[0], self.sprite_dimentions[1])
+        # Tile collision grid of the current map (assigned by Map); None = no collisions
+        self.collision = None
         # Movement speeds in pixels per second from settings
         self.walkspeed: float = PLAYER_WALK_SPEED
         self.sprint: float = PLAYER_SPRINT_SPEED
+        # Carried items, saved with the game
+        self.inventory = Inventory()
+
+    @property
+    def direction(self) -> str:
+        """Facing name ('down', 'up', 'right' or 'left')."""
+        return FACINGS[self.facing]
+
+    @direction.setter
+    def direction(self, value: str) -> None:
+        self.facing = FACINGS.index(value)
+        self.animate(0.0)
 
     def update(self, dt: float = 0.0):
         """Update entity logic every frame.
@@ -56,12 +79,16 @@ class Entity(pygame.sprite.Sprite):
 
         Moves the entity and syncs its rectangle to the world position.
         """
-        self.move(dt)
+        self.previous_position[0] = self.position[0]
+        self.previous_position[1] = self.position[1]
+        with profiler.scope("entity.move"):
+            self.move(dt)
+        self.animate(dt)
         # Ensure rect gets integer pixel coordinates
         self.rect.topleft = (int(self.position[0]), int(self.position[1]))
 
     def move(self, dt: float):
-        """Compute movement and update position and facing sprite.
+        """Compute movement and update position, facing and motion.
 
         Args:
             dt (float): Delta time in seconds used to scale movement.
@@ -73,19 +100,49 @@ class Entity(pygame.sprite.Sprite):
             if length != 0:
                 dx /= length
                 dy /= length
-        # Update direction and sprite if moving
+        # Apply walk or sprint speed (px/s scaled by dt)
+        # Sprint action
+        sprinting = self.input.held & self._sprint_bit
+        speed = self.sprint if sprinting else self.walkspeed
+        # Update facing if moving
         if dx != 0 or dy != 0:
             # Face based on dominant axis (horizontal vs vertical)
             if abs(dx) >= abs(dy):
-                self.direction = 'right' if dx > 0 else 'left'
+                self.facing = FACING_RIGHT if dx > 0 else FACING_LEFT
             else:
-                self.direction = 'down' if dy > 0 else 'up'
-            self.image = self.images[self.direction]
-        # Apply walk or sprint speed (px/s scaled by dt)
-        # Sprint action
-        speed = self.sprint if self.input.is_action_active('sprint') else self.walkspeed
-        self.position[0] += dx * speed * dt
-        self.position[1] += dy * speed * dt
+                self.facing = FACING_DOWN if dy > 0 else FACING_UP
+            self.motion = RUN if sprinting else WALK
+        else:
+            self.motion = IDLE
+        if self.collision is None:
+            self.position[0] += dx * speed * dt
+            self.position[1] += dy * speed * dt
+        elif dx != 0 or dy != 0:
+            # Swept AABB against the map's solid tiles
+            w, h = self.sprite_dimentions
+            self.position[0], self.position[1] = self.collision.move(
+                self.position[0], self.position[1], w, h, dx * speed * dt, dy * speed * dt
+            )
+
+    def animate(self, dt: float) -> None:
+        """Advance the clip of the current motion and pick its frame.
+
+        Args:
+            dt (float): Seconds elapsed since the last call.
+        """
+        motion = self.motion
+        if motion != self.playing:
+            # A new clip starts from its first frame
+            self.playing = motion
+            self.anim_time = 0.0
+        else:
+            self.anim_time += dt
+        frames, fps, loop = self.tracks[motion][self.facing]
+        if len(frames) == 1:
+            self.image = frames[0]
+            return
+        step = int(self.anim_time * fps)
+        self.image = frames[step % len(frames) if loop else min(step, len(frames) - 1)]
 
     def check_move(self):
         """Return desired movement vector based on current input.
@@ -96,14 +153,12 @@ class Entity(pygame.sprite.Sprite):
         Returns:
             tuple[float, float]: Raw direction vector before speed scaling.
         """
+        # One read of the held action bits for all four directions
+        held = self.input.held
         # Horizontal via actions
-        right = self.input.is_action_active('move_right')
-        left = self.input.is_action_active('move_left')
-        dx = (1 if right else 0) + (-1 if left else 0)
+        dx = (1 if held & self._right_bit else 0) + (-1 if held & self._left_bit else 0)
 
         # Vertical via actions
-        down = self.input.is_action_active('move_down')
-        up = self.input.is_action_active('move_up')
-        dy = (1 if down else 0) + (-1 if up else 0)
+        dy = (1 if held & self._down_bit else 0) + (-1 if held & self._up_bit else 0)
 
         return dx, dy
@@ -0,0 +1,307 @@
+"""Struct-of-arrays storage for crowds of entities.
+
+`Entity` keeps its state on a Python object, which is fine for the player but
+costs a method call and several attribute lookups per entity per tick. An
+`EntityStore` keeps every entity's position, movement intent, speeds, facing
+and animation cursor in contiguous NumPy arrays, and `update` moves and
+animates all of them in one vectorized pass (diagonal normalization and
+facing selection follow `Entity.move`, clips and frames come from the shared
+tables of `AnimationLibrary`).
+
+Each stored entity can be given an `EntityView`, a thin sprite adapter that
+reads its image from the store and has the `position`/`previous_position`
+interface of `Entity`, so crowds render through the usual `Map` group and
+render interpolation.
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pygame
+
+from src.animation import (
+    AnimationLibrary,
+    get_animation_library,
+    FACING_DOWN,
+    FACING_UP,
+    FACING_RIGHT,
+    FACING_LEFT,
+    FACINGS,
+    IDLE,
+    WALK,
+    RUN,
+)
+from src.settings import PLAYER_WALK_SPEED, PLAYER_SPRINT_SPEED
+
+
+_INITIAL_CAPACITY = 64
+
+
+class EntityStore:
+    """Contiguous per-entity arrays plus the systems that update them.
+
+    Rows are stable for an entity's lifetime; removed rows are recycled.
+    Gameplay code (AI, scripts) steers entities by writing `intent` (raw
+    direction, normalized here) and `sprinting`. An entity's `sprite` is an
+    animation set id of `library`; it plays the set's idle, walk or run clip
+    depending on how it moves.
+    """
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY, library: Optional[AnimationLibrary] = None) -> None:
+        self.capacity = 0
+        self.count = 0  # rows in use, alive or free
+        self._free: List[int] = []
+        self._library = library
+        self.views: List[Optional["EntityView"]] = []
+        # Bumped by every update that moves something; views compare it to
+        # refresh their rect lazily, on first access
+        self.generation = 0
+        # Rows moved by the last update (see crossed_cells)
+        self.moved = np.empty(0, dtype=np.intp)
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int) -> None:
+        def grow(array: Optional[np.ndarray], shape, dtype, fill=0):
+            new = np.full(shape, fill, dtype=dtype)
+            if array is not None:
+                new[:self.count] = array[:self.count]
+            return new
+
+        get = self.__dict__.get
+        self.position = grow(get("position"), (capacity, 2), np.float64)
+        self.previous_position = grow(get("previous_position"), (capacity, 2), np.float64)
+        self.intent = grow(get("intent"), (capacity, 2), np.float64)
+        self.size = grow(get("size"), (capacity, 2), np.float64)
+        self.walk_speed = grow(get("walk_speed"), (capacity,), np.float64)
+        self.sprint_speed = grow(get("sprint_speed"), (capacity,), np.float64)
+        self.sprinting = grow(get("sprinting"), (capacity,), bool)
+        self.facing = grow(get("facing"), (capacity,), np.int8)
+        self.sprite = grow(get("sprite"), (capacity,), np.int32)
+        # Animation cursor: clip playing, seconds since it started, frame id
+        self.clip = grow(get("clip"), (capacity,), np.int32)
+        self.anim_time = grow(get("anim_time"), (capacity,), np.float64)
+        self.frame = grow(get("frame"), (capacity,), np.int32)
+        self.alive = grow(get("alive"), (capacity,), bool)
+        self.views.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    @property
+    def library(self) -> AnimationLibrary:
+        """Animation tables the sprite ids refer to (loaded on first use)."""
+        if self._library is None:
+            self._library = get_animation_library()
+        return self._library
+
+    # ---------- Lifecycle ----------
+    def spawn(
+        self,
+        x: float,
+        y: float,
+        sprite: int = 0,
+        size: Optional[Sequence[float]] = None,
+        walk_speed: float = PLAYER_WALK_SPEED,
+        sprint_speed: float = PLAYER_SPRINT_SPEED,
+    ) -> int:
+        """Add an entity and return its row.
+
+        Args:
+            x (float): World x in pixels.
+            y (float): World y in pixels.
+            sprite (int): Animation set id (`library.set_id(name)`).
+            size (Sequence[float]): Collision box; defaults to the frame size.
+            walk_speed (float): Pixels per second.
+            sprint_speed (float): Pixels per second while `sprinting`.
+
+        Returns:
+            int: Row index of the entity.
+        """
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self.count == self.capacity:
+                self._allocate(self.capacity * 2)
+            row = self.count
+            self.count += 1
+        library = self.library
+        library.ensure(sprite)
+        if size is None:
+            size = library.frame_size(sprite)
+        self.position[row] = (x, y)
+        self.previous_position[row] = (x, y)
+        self.intent[row] = 0.0
+        self.size[row] = size
+        self.walk_speed[row] = walk_speed
+        self.sprint_speed[row] = sprint_speed
+        self.sprinting[row] = False
+        self.facing[row] = FACING_DOWN
+        self.sprite[row] = sprite
+        clip = library.motion_clips[sprite, IDLE]
+        self.clip[row] = clip
+        self.anim_time[row] = 0.0
+        self.frame[row] = library.track(int(clip), FACING_DOWN)[0][0]
+        self.alive[row] = True
+        return row
+
+    def despawn(self, row: int) -> None:
+        """Remove an entity; its view (if any) leaves every group."""
+        if not self.alive[row]:
+            return
+        self.alive[row] = False
+        self.intent[row] = 0.0
+        view = self.views[row]
+        if view is not None:
+            view.kill()
+            self.views[row] = None
+        self._free.append(row)
+
+    def view(self, row: int) -> "EntityView":
+        """Return (creating it once) the sprite adapter of a row."""
+        view = self.views[row]
+        if view is None:
+            view = EntityView(self, row)
+            self.views[row] = view
+        return view
+
+    def __len__(self) -> int:
+        return self.count - len(self._free)
+
+    # ---------- Systems ----------
+    def update(self, dt: float, collision=None) -> None:
+        """Move and animate every alive entity for one tick.
+
+        Args:
+            dt (float): Tick duration in seconds.
+            collision (CollisionGrid): Solid tiles to resolve moves against;
+                None moves freely.
+        """
+        n = self.count
+        if n == 0:
+            return
+        pos = self.position[:n]
+        self.previous_position[:n] = pos
+        intent = self.intent[:n]
+        dx, dy = intent[:, 0], intent[:, 1]
+        moving = ((dx != 0) | (dy != 0)) & self.alive[:n]
+        self.moved = np.nonzero(moving)[0]
+        if len(self.moved):
+            self._move(self.moved, dt, collision)
+        self._animate(moving, dt)
+
+    def crossed_cells(self, cell_size: int) -> List["EntityView"]:
+        """Views of the entities the last update moved into other grid cells.
+
+        A spatial index over the views (CulledPyscrollGroup) only needs to
+        re-bucket these after a tick to answer area queries exactly.
+        """
+        rows = self.moved
+        if not len(rows):
+            return []
+        sizes = np.asarray(self.library.frame_sizes)[self.sprite[rows]]
+        # Rect corners as the views compute them (int() truncates)
+        before = np.trunc(self.previous_position[rows])
+        after = np.trunc(self.position[rows])
+        crossed = ((before // cell_size != after // cell_size).any(axis=1)
+                   | ((before + sizes - 1) // cell_size != (after + sizes - 1) // cell_size).any(axis=1))
+        views = self.views
+        return [view for view in (views[row] for row in rows[crossed].tolist()) if view is not None]
+
+    def _move(self, rows: np.ndarray, dt: float, collision) -> None:
+        pos = self.position
+        intent = self.intent
+        self.generation += 1
+        direction = intent[rows]
+        # Normalize diagonal movement to keep constant speed
+        direction = direction / np.hypot(direction[:, 0], direction[:, 1])[:, None]
+        # Face based on dominant axis (horizontal vs vertical)
+        mx, my = direction[:, 0], direction[:, 1]
+        self.facing[rows] = np.where(
+            np.abs(mx) >= np.abs(my),
+            np.where(mx > 0, FACING_RIGHT, FACING_LEFT),
+            np.where(my > 0, FACING_DOWN, FACING_UP),
+        )
+        speed = np.where(self.sprinting[rows], self.sprint_speed[rows], self.walk_speed[rows])
+        delta = direction * (speed * dt)[:, None]
+        if collision is None:
+            pos[rows] += delta
+        else:
+            pos[rows] = collision.move_batch(pos[rows], self.size[rows], delta)
+
+    def settle(self) -> None:
+        """Show every entity idle, after columns were written directly."""
+        n = self.count
+        library = self.library
+        for sprite in np.unique(self.sprite[:n]).tolist():
+            library.ensure(sprite)
+        self._animate(np.zeros(n, dtype=bool), 0.0)
+
+    def _animate(self, moving: np.ndarray, dt: float) -> None:
+        """Advance every animation cursor and pick its frame."""
+        n = self.count
+        library = self.library
+        motion = np.where(moving, np.where(self.sprinting[:n], RUN, WALK), IDLE)
+        clip = library.motion_clips[self.sprite[:n], motion]
+        # A new clip starts from its first frame
+        restarted = clip != self.clip[:n]
+        self.clip[:n] = clip
+        times = self.anim_time[:n]
+        times += dt
+        times[restarted] = 0.0
+        self.frame[:n] = library.frame_indices(clip, self.facing[:n], times)
+
+
+class EntityView(pygame.sprite.Sprite):
+    """Sprite adapter over one `EntityStore` row.
+
+    Behaves like an `Entity` for the map group and render interpolation;
+    the store moves it, so `update` does nothing. The rect follows the
+    store's position lazily: it is refreshed when read after a store update,
+    so entities nobody looks at (off screen, outside the active region)
+    cost nothing per tick.
+    """
+
+    def __init__(self, store: EntityStore, row: int) -> None:
+        super().__init__()
+        self.store = store
+        self.row = row
+        x, y = store.position[row]
+        w, h = store.library.frame_size(store.sprite[row])
+        self._rect = pygame.Rect(int(x), int(y), int(w), int(h))
+        self._generation = store.generation
+
+    @property
+    def rect(self) -> pygame.Rect:
+        store = self.store
+        if self._generation != store.generation:
+            self._generation = store.generation
+            x, y = store.position[self.row].tolist()
+            self._rect.topleft = (int(x), int(y))
+        return self._rect
+
+    @rect.setter
+    def rect(self, value) -> None:
+        self._rect = pygame.Rect(value)
+        self._generation = self.store.generation
+
+    @property
+    def image(self) -> pygame.Surface:
+        store = self.store
+        return store.library.frames[store.frame[self.row]]
+
+    @property
+    def direction(self) -> str:
+        return FACINGS[self.store.facing[self.row]]
+
+    @property
+    def position(self) -> np.ndarray:
+        return self.store.position[self.row]
+
+    @position.setter
+    def position(self, value) -> None:
+        self.store.position[self.row] = value
+        self._rect.topleft = (int(value[0]), int(value[1]))
+
+    @property
+    def previous_position(self) -> np.ndarray:
+        return self.store.previous_position[self.row]
+
+    def update(self, dt: float = 0.0) -> None:
+        pass
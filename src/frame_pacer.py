@@ -0,0 +1,183 @@
+"""Frame pacing: deadline scheduling, dt clamping and smoothing, adaptive rate.
+
+`pygame.time.Clock.tick` sleeps with the granularity of the OS scheduler
+(1 to 15 ms depending on the platform), so frames go out unevenly, and the
+raw frame time it measures was handed to the game as dt: a window drag or a
+blocking load turned into a dt of seconds.
+
+`FramePacer.wait`, called by `Screen.begin_frame`, instead:
+- schedules frames on fixed deadlines one period (1 / target rate) apart.
+  It sleeps until FRAME_PACING_SPIN_S before the deadline and spins on
+  `time.perf_counter` for the rest, yielding the GIL (the simulation thread
+  of simulation.py keeps running). A frame that misses its deadline by more
+  than a period restarts the schedule instead of rushing catch-up frames;
+- with vsync, leaves the wait to the display flip, and only paces when the
+  adaptive mode lowered the rate;
+- cuts each frame time to FRAME_DT_MAX and returns the mean of the last
+  FRAME_DT_SMOOTHING_FRAMES as dt, rounded to FRAME_DT_QUANTUM_S (0.1 ms)
+  so input recordings store it compactly (see input_replay.py). The mean
+  lags behind but does not drift: over a run the dts add up to the (cut)
+  frame times, give or take the rounding;
+- in adaptive mode, measures the work of each frame (its time outside the
+  wait and the vsync flip) and steps the target rate down
+  FRAME_PACING_RATES when more than FRAME_PACING_OVERRUN_SHARE of the last
+  FRAME_PACING_ADAPT_FRAMES frames overran their budget, and back up when
+  the work fits in FRAME_PACING_HEADROOM of the higher rate's budget.
+
+`stats()` reports the frame times of the last FRAME_PACING_STATS_FRAMES
+frames (mean, standard deviation, variance); the profiler overlay shows them.
+"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+import logging
+import statistics
+import time
+
+from src.settings import (
+    FRAMERATE,
+    FRAME_DT_MAX,
+    FRAME_DT_QUANTUM_S,
+    FRAME_DT_SMOOTHING_FRAMES,
+    FRAME_PACING_ADAPT_FRAMES,
+    FRAME_PACING_ADAPTIVE,
+    FRAME_PACING_HEADROOM,
+    FRAME_PACING_OVERRUN_SHARE,
+    FRAME_PACING_RATES,
+    FRAME_PACING_SPIN_S,
+    FRAME_PACING_STATS_FRAMES,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def quantize_dt(dt: float, quantum: float = FRAME_DT_QUANTUM_S) -> float:
+    """Round `dt` to a whole number of `quantum` steps (0: unchanged)."""
+    return round(dt / quantum) * quantum if quantum > 0 else dt
+
+
+class FramePacer:
+    """Paces frames to a target rate and derives their dt (see module docstring)."""
+
+    def __init__(
+        self,
+        rate: int = FRAMERATE,
+        vsync: bool = False,
+        adaptive: bool = FRAME_PACING_ADAPTIVE,
+        rates: Sequence[int] = FRAME_PACING_RATES,
+    ) -> None:
+        """Create the pacer; the first `wait` returns at once.
+
+        Args:
+            rate (int): Frames per second at most (0: uncapped).
+            vsync (bool): The display flip waits for the vertical blank.
+            adaptive (bool): Lower the rate while frames overrun their budget.
+            rates (Sequence[int]): Rates the adaptive mode steps through
+                (those above `rate` are ignored).
+        """
+        self.vsync = vsync
+        self.adaptive = adaptive
+        self._rates = tuple(rates)
+        # Seconds of the current frame not counted as work (vsync flip)
+        self._excluded = 0.0
+        self._frame_start: Optional[float] = None
+        self._deadline = 0.0
+        self._frame_times: Deque[float] = deque(maxlen=max(2, FRAME_PACING_STATS_FRAMES))
+        self._dts: Deque[float] = deque(maxlen=max(1, FRAME_DT_SMOOTHING_FRAMES))
+        self.dt = 0.0
+        self.clamped_frames = 0
+        self.rate_changes = 0
+        self.set_rate(rate)
+
+    def set_rate(self, rate: int) -> None:
+        """Change the rate asked for (0: uncapped), restarting the adaptation."""
+        self.max_rate = rate
+        self.rate = rate
+        # Adaptive ladder: the rate asked for, then the lower configured ones
+        self._ladder: List[int] = [rate] + sorted((r for r in self._rates if 0 < r < rate), reverse=True)
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        self._window_frames = 0
+        self._window_work = 0.0
+        self._window_overruns = 0
+
+    def exclude(self, seconds: float) -> None:
+        """Leave time out of this frame's work (e.g. waiting for vsync)."""
+        self._excluded += seconds
+
+    def wait(self) -> float:
+        """Wait for the next frame's deadline and return its dt in seconds."""
+        now = time.perf_counter()
+        if self._frame_start is None:
+            # First frame: out as soon as it is drawn
+            self._frame_start = self._deadline = now
+            return self.dt
+        work = now - self._frame_start - self._excluded
+        self._excluded = 0.0
+        if self.rate and (not self.vsync or self.rate < self.max_rate):
+            period = 1.0 / self.rate
+            deadline = self._deadline + period
+            if now > deadline + period:
+                # Too late to keep the schedule: restart it from here
+                deadline = now
+            self._sleep_until(deadline)
+            self._deadline = deadline
+        else:
+            self._deadline = now
+        start = time.perf_counter()
+        frame_time = start - self._frame_start
+        self._frame_start = start
+        self._frame_times.append(frame_time)
+        if frame_time > FRAME_DT_MAX:
+            self.clamped_frames += 1
+        self._dts.append(min(frame_time, FRAME_DT_MAX))
+        self.dt = quantize_dt(sum(self._dts) / len(self._dts))
+        if self.adaptive and self.rate:
+            self._adapt(work)
+        return self.dt
+
+    @staticmethod
+    def _sleep_until(deadline: float) -> None:
+        """Sleep most of the way to `deadline`, then spin to it."""
+        remaining = deadline - time.perf_counter()
+        if remaining > FRAME_PACING_SPIN_S:
+            time.sleep(remaining - FRAME_PACING_SPIN_S)
+        while time.perf_counter() < deadline:
+            time.sleep(0)  # yields the GIL
+
+    def _adapt(self, work: float) -> None:
+        """Step the target rate after each window of measured frames."""
+        self._window_frames += 1
+        self._window_work += work
+        self._window_overruns += work > 1.0 / self.rate
+        if self._window_frames < FRAME_PACING_ADAPT_FRAMES:
+            return
+        index = self._ladder.index(self.rate)
+        mean_work = self._window_work / self._window_frames
+        if self._window_overruns > FRAME_PACING_OVERRUN_SHARE * self._window_frames:
+            index = min(index + 1, len(self._ladder) - 1)
+        elif index > 0 and mean_work < FRAME_PACING_HEADROOM / self._ladder[index - 1]:
+            index -= 1
+        if self._ladder[index] != self.rate:
+            logger.info("Frame rate target %d -> %d Hz (mean frame work %.1f ms)",
+                        self.rate, self._ladder[index], mean_work * 1000.0)
+            self.rate = self._ladder[index]
+            self.rate_changes += 1
+        self._reset_window()
+
+    def stats(self) -> Dict[str, float]:
+        """Frame-time statistics over the recent frames (empty before two frames)."""
+        times = self._frame_times
+        if len(times) < 2:
+            return {}
+        mean = statistics.fmean(times)
+        variance = statistics.pvariance(times, mean)
+        return {
+            "rate": float(self.rate),
+            "frame_mean_ms": mean * 1000.0,
+            "frame_stddev_ms": variance ** 0.5 * 1000.0,
+            "frame_variance_ms2": variance * 1e6,
+            "frame_max_ms": max(times) * 1000.0,
+            "dt_ms": self.dt * 1000.0,
+        }
@@ -1,65 +1,357 @@
+import logging
 import pygame
 from src.screen import Screen
-from src.input_manager import InputManager
-from src.states.play_state import PlayState
+from src.input_manager import InputManager, INPUT_EVENTS
+from src.input_replay import InputRecorder, InputReplay, default_recording_path
+from src.profiler import ProfilerOverlay, get_profiler
+from src.save import SaveManager
+from src.simulation import InputFrame, SimulationThread
+from src.startup import FIRST_FRAME, get_startup_timeline
+from src.state_stack import StateRegistry, StateStack
+from src.states.loading_state import LoadingState
+from src.settings import (
+    SIMULATION_TICK_RATE,
+    MAX_TICKS_PER_FRAME,
+    PROFILER_OVERLAY_KEY,
+    PROFILER_EXPORT_KEY,
+    INPUT_RECORDING,
+    SAVE_AUTOSAVE_INTERVAL_S,
+    SAVE_QUICKSAVE_KEY,
+    SAVE_QUICKLOAD_KEY,
+    STARTUP_LOADING_SCREEN,
+    SIMULATION_THREADED,
+)
 
 """Python Game Module (src version).
 
 Contains the main game controller class using a state machine.
 """
 
+logger = logging.getLogger(__name__)
+
 class Game:
     """Main game controller.
 
-    Sets up screen and input, manages the active state (e.g., Play, Menu),
-    runs the main loop, and routes input/events.
+    Sets up screen and input, manages the stack of states (e.g., Play with
+    Pause over it; see state_stack.py), runs the main loop, and routes
+    input/events to the top state.
     """
 
-    def __init__(self):
-        """Initialize core systems and game objects."""
+    def __init__(self, replay: InputReplay | None = None, record_path=None,
+                 loading_screen: bool = STARTUP_LOADING_SCREEN,
+                 threaded_simulation: bool = SIMULATION_THREADED):
+        """Initialize core systems and game objects.
+
+        Args:
+            replay (InputReplay): Play a recorded session back instead of
+                reading live input; the game stops at the end of the log.
+            record_path (Path): Record this session's input to this file
+                (a timestamped file is used when INPUT_RECORDING is set).
+            loading_screen (bool): Start on the loading screen and load the
+                gameplay behind it; otherwise the play state is built here.
+                Recorded and replayed sessions always build it here, so
+                their first logged frame is a gameplay frame.
+            threaded_simulation (bool): Simulate states that support it on
+                a worker thread and render their published snapshots (see
+                simulation.py).
+        """
+        self.startup = get_startup_timeline()
         self.running = True
         self.screen = Screen()
+        self.startup.mark("window")
         # Action-based input manager (rebindable)
         self.input = InputManager()
-        # State machine: start in PlayState
-        self.current_state = PlayState(self.screen, self.input)
+        # Input the states read: the same manager, or with a simulation
+        # thread one fed with `input` snapshots once per frame
+        self.threaded_simulation = threaded_simulation
+        self.state_input = self.input.follower() if threaded_simulation else self.input
+        self.startup.mark("input config")
+        # Input recording and replay
+        self.replay = replay
+        if replay is not None and not replay.realtime:
+            # Uncapped: replayed frames run as fast as they can
+            self.screen.framerate = 0
+        if record_path is None and INPUT_RECORDING:
+            record_path = default_recording_path()
+        self.recorder = InputRecorder(record_path) if record_path is not None else None
+        if self.recorder is not None:
+            self.input.attach_recorder(self.recorder)
+        # Frame profiler and its debug overlay (toggled with PROFILER_OVERLAY_KEY)
+        self.profiler = get_profiler()
+        self.profiler_overlay = ProfilerOverlay(self.profiler, pacer=self.screen.pacer)
+        self._overlay_key = getattr(pygame, PROFILER_OVERLAY_KEY)
+        self._export_key = getattr(pygame, PROFILER_EXPORT_KEY)
+        # Save slots: quick save/load keys and periodic autosaves (not while
+        # replaying, which must not touch the player's saves)
+        self.saves = SaveManager(autosave_interval=0.0 if replay is not None else SAVE_AUTOSAVE_INTERVAL_S)
+        self._quicksave_key = getattr(pygame, SAVE_QUICKSAVE_KEY)
+        self._quickload_key = getattr(pygame, SAVE_QUICKLOAD_KEY)
+        # State stack, and the states pushed by name (built ahead of use)
+        self.registry = StateRegistry(self.screen, self.state_input)
+        self.registry.register("pause", "src.states.pause_state:PauseState", preload=True)
+        self.states = StateStack(self.registry)
+        # Start on the loading screen, or in PlayState
+        if loading_screen and replay is None and self.recorder is None:
+            self.states.push(LoadingState(self.screen, self.state_input))
+        else:
+            from src.states.play_state import PlayState
+
+            self.states.push(PlayState(self.screen, self.state_input))
+        self.startup.mark(f"{type(self.current_state).__name__} created")
+        # Fixed-step simulation: frame time accumulates and is consumed in
+        # ticks of tick_dt seconds; alpha is the leftover fraction of a tick
+        # used to interpolate sprite positions when rendering.
+        self.tick_dt: float = 1.0 / SIMULATION_TICK_RATE
+        self.accumulator: float = 0.0
+        self.alpha: float = 1.0
+        self.dropped_ticks: int = 0
+        # Worker simulating the current state (threaded_simulation), and the
+        # commands for it gathered while handling this frame's events
+        self.simulation: SimulationThread | None = None
+        self._commands: list = []
+        # Last frame published by a simulation thread, and its state: what
+        # is drawn of that state while an overlay is pushed over it
+        self._last_frame = None
+        # Stop once the first gameplay frame is presented (startup benchmark)
+        self.exit_after_startup = False
 
     def run(self):
         """Main game loop.
 
-        Polls input, updates world, and refreshes the display each frame.
+        Polls input, runs 0..N fixed simulation ticks, and refreshes the
+        display each frame.
         """
+        profiler = self.profiler
         while self.running:
-            self.handle_input()  # routes to input manager and current state
-            # Start frame: clear screen and cap FPS
+            # Start frame: clear screen and pace it. The profiled frame starts
+            # after the pacing wait so it measures work only
             self.screen.begin_frame()
-            # Reset edge states for input at the start of frame
-            self.input.begin_frame()
-            # Delta time (seconds) since last frame, for framerate-independent updates
-            dt = self.screen.get_dt()
-            # Update current state
-            self.current_state.update(dt)
-            # Allow state transition requests
-            next_state = self.current_state.next_state()
-            if next_state is not None:
-                self.current_state.on_exit()
-                self.current_state = next_state
-                self.current_state.on_enter()
+            profiler.begin_frame()
+            with profiler.scope("input"):
+                self.handle_input()  # routes to input manager and current state
+                # Delta time (seconds) fed to the tick accumulator: measured
+                # since the last frame, or the recorded one when replaying
+                if self.replay is not None:
+                    dt = self.replay.step(self.input)
+                    if dt is None:
+                        break
+                else:
+                    dt = self.screen.get_dt()
+                if self.recorder is not None:
+                    self.recorder.end_frame(dt)
+            # Run the simulation ticks owed for this frame
+            with profiler.scope("update"):
+                self.update(dt)
             # End of frame: finalize input edge states if needed
             self.input.end_frame()
             # Render current state and present the frame
-            self.current_state.render(self.screen)
-            self.screen.end_frame()
+            with profiler.scope("render"):
+                self.render()
+            with profiler.scope("present"):
+                self.screen.end_frame()
+            profiler.end_frame()
+            if not self.startup.complete:
+                self._mark_startup()
+        self.stop_simulation()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.saves.close()
+        self.registry.close()
         # Clean up pygame after the loop exits
         pygame.quit()
 
+    @property
+    def current_state(self):
+        """The active state: top of the state stack."""
+        return self.states.top
+
+    def _mark_startup(self) -> None:
+        """Record the first frame, and the first gameplay frame (end of startup)."""
+        self.startup.mark_once(FIRST_FRAME)
+        if self.current_state.saveable:
+            self.startup.finish()
+            if self.exit_after_startup:
+                self.running = False
+
+    def update(self, dt: float) -> int:
+        """Simulate this frame.
+
+        Runs the owed ticks here (`simulate`), or, when the current state is
+        simulated on a worker thread, hands it the frame's input, dt and
+        commands instead.
+
+        Args:
+            dt (float): Delta time in seconds since the previous frame.
+
+        Returns:
+            int: Number of ticks simulated this frame (0 when handed over).
+        """
+        if not isinstance(self.current_state, LoadingState):
+            # Preloaded states are built here, on the main thread (not
+            # before: the loading screen's jobs come first)
+            self.registry.poll()
+        if not self.threaded_simulation:
+            return self.simulate(dt)
+        frame_input = self.input.snapshot()
+        # The edges travel with the snapshot
+        self.input.begin_frame()
+        commands, self._commands = tuple(self._commands), []
+        if self.simulation is not None and self.current_state.transition() is not None:
+            # The worker stopped ticking for a transition: run it here
+            self.stop_simulation()
+            self._apply_transition()
+        if self.simulation is None and self.current_state.supports_snapshots:
+            self.current_state.on_simulation_thread()
+            self.simulation = SimulationThread(self)
+            self.simulation.start()
+        if self.simulation is not None:
+            self.simulation.submit(InputFrame(dt, frame_input, commands))
+            return 0
+        for command, args in commands:
+            command(*args)
+        self.state_input.feed(frame_input)
+        return self.simulate(dt)
+
+    def stop_simulation(self) -> None:
+        """Finish the frames queued for the simulation thread and end it."""
+        if self.simulation is not None:
+            simulation, self.simulation = self.simulation, None
+            simulation.stop()
+            frame = simulation.buffer.latest()
+            if frame is not None:
+                self._last_frame = (self.current_state, frame)
+
+    def simulate(self, dt: float, transitions: bool = True) -> int:
+        """Consume frame time in fixed simulation ticks.
+
+        Runs as many ticks of `tick_dt` as the accumulated time allows, up to
+        MAX_TICKS_PER_FRAME. Time beyond the cap is dropped so an overloaded
+        machine slows the game down instead of falling further behind.
+
+        Args:
+            dt (float): Delta time in seconds since the previous frame.
+            transitions (bool): Switch states when the current one asks to;
+                otherwise (simulation thread) stop ticking until the caller
+                has done it.
+
+        Returns:
+            int: Number of ticks simulated this frame.
+        """
+        self.accumulator += dt
+        ticks = 0
+        # Time-budgeted work (map switch, path searches) is shared by the
+        # frame's ticks
+        self.current_state.begin_frame()
+        while self.accumulator >= self.tick_dt:
+            if ticks >= MAX_TICKS_PER_FRAME:
+                dropped = int(self.accumulator // self.tick_dt)
+                self.dropped_ticks += dropped
+                self.accumulator -= dropped * self.tick_dt
+                break
+            if not transitions and self.current_state.transition() is not None:
+                break
+            self.tick(self.tick_dt)
+            self.accumulator -= self.tick_dt
+            ticks += 1
+            if transitions:
+                self._apply_transition()
+        self.alpha = self.accumulator / self.tick_dt
+        if ticks and self.current_state.saveable:
+            # Between ticks the world is consistent: a good time to snapshot
+            self.saves.update(self.current_state, ticks * self.tick_dt)
+        return ticks
+
+    def tick(self, dt: float) -> None:
+        """Advance the current state by one fixed step.
+
+        Args:
+            dt (float): Fixed tick duration in seconds.
+        """
+        with self.profiler.scope("state.update"):
+            self.current_state.update(dt)
+        # Input edges (pressed/released) are consumed by the first tick that
+        # sees them; clear them so later ticks of the same frame do not repeat
+        self.state_input.begin_frame()
+
+    def _apply_transition(self) -> None:
+        """Push, pop or replace states as the current one asked, if it did."""
+        if self.current_state.transition() is not None:
+            with self.profiler.scope("state.transition"):
+                self.states.apply_pending()
+                self.screen.request_full_redraw()
+
+    def render(self) -> None:
+        """Draw the current state, interpolated between the last two ticks.
+
+        A state simulated on the worker thread is drawn from its latest
+        published snapshot. Under an overlay state (pause), the state below
+        is drawn first when the overlay asks for it.
+        """
+        state = self.current_state
+        if state.overlay and state.needs_backdrop():
+            below = self.states.below(state)
+            if below is not None:
+                self._render_state(below)
+        self._render_state(state)
+        if self.screen.dirty_rects_enabled and not self.current_state.supports_dirty_rects:
+            self.screen.mark_full()
+        self.profiler_overlay.draw(self.screen)
+
+    def _render_state(self, state) -> None:
+        if self.simulation is not None and state is self.current_state:
+            frame = self.simulation.latest()
+            if frame is not None:
+                self._last_frame = (state, frame)
+                state.render_snapshot(self.screen, frame.snapshot, frame.alpha)
+        elif self._last_frame is not None and self._last_frame[0] is state:
+            # Suspended since the thread stopped: its last published frame
+            frame = self._last_frame[1]
+            state.render_snapshot(self.screen, frame.snapshot, frame.alpha)
+        else:
+            state.render(self.screen, self.alpha)
+
     def handle_input(self):
-        """Process window and keyboard events and route them appropriately."""
+        """Process window, keyboard and gamepad events and route them appropriately."""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
-            elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
-                # Route key events to InputManager for action state updates
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                # The window contents were lost; repaint everything
+                self.screen.request_full_redraw()
+            elif event.type == pygame.KEYDOWN and event.key == self._overlay_key:
+                self.profiler_overlay.toggle()
+                self.screen.request_full_redraw()
+            elif event.type == pygame.KEYDOWN and event.key == self._export_key:
+                if self.profiler.frames:
+                    logger.info("Profiler trace written to %s", self.profiler.export_chrome_trace())
+            elif event.type == pygame.KEYDOWN and event.key in (self._quicksave_key, self._quickload_key):
+                self._on_state(self.quick_save_or_load, event.key == self._quicksave_key)
+            elif event.type in INPUT_EVENTS:
+                if self.replay is not None:
+                    # Replays get their input from the log only
+                    continue
+                # Route key and gamepad events to InputManager for action state updates
                 self.input.handle_event(event)
             # Always give the state a chance to consume the event
-            self.current_state.handle_event(event)
+            self._on_state(self.current_state.handle_event, event)
+
+    def _on_state(self, command, *args) -> None:
+        """Run code touching the current state, on the thread that owns it.
+
+        With a simulation thread it runs there, before this frame's ticks.
+        """
+        if self.threaded_simulation:
+            self._commands.append((command, args))
+        else:
+            command(*args)
+
+    def quick_save_or_load(self, save: bool) -> None:
+        """Save to, or restore from, the quick save slot."""
+        if not self.current_state.saveable:
+            return
+        if save:
+            self.saves.save(self.current_state)
+            logger.info("Saved (main thread: %.2f ms)", self.saves.last_capture_ms)
+        elif self.saves.exists():
+            self.saves.restore(self.current_state, self.saves.load())
+            self.screen.request_full_redraw()
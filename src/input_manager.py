@@ -1,21 +1,40 @@
 """Input Manager for rebindable actions (src version).
 
 This module provides an `InputManager` that maps abstract actions (e.g.,
-"move_left", "sprint") to one or more concrete Pygame keys. It supports:
+"move_left", "sprint") to one or more concrete controls. It supports:
 - Loading/saving JSON config from `config/controls.json`
 - Querying action states: held, pressed (edge), released (edge)
-- Handling pygame KEYDOWN/KEYUP events
+- Handling pygame keyboard and joystick events
+- Chord bindings (several controls held together, e.g. "K_LCTRL+K_s")
+- Gamepad buttons, stick directions and d-pad directions
 - Rebinding actions at runtime with persistence
+- Reporting action transitions to a recorder (see `input_replay.py`)
 
-The config format uses Pygame key constant names (e.g., "K_LEFT", "K_q").
-Internally we convert them to integer key codes for performance.
+The config format uses Pygame key constant names (e.g., "K_LEFT", "K_q")
+and, for gamepads, "JOY_BUTTON_<n>", "JOY_AXIS_<n>_NEG" / "JOY_AXIS_<n>_POS"
+(stick pushed past INPUT_AXIS_THRESHOLD) and "JOY_HAT_<n>_<UP|DOWN|LEFT|RIGHT>".
+Any gamepad counts: controls are not tied to a device. The "default"
+profile binds keys only; the "gamepad" profile adds the pad controls. The
+joystick module is started only when the active profile binds gamepad
+controls, so keyboard players never pay its startup cost.
+
+Internally every action gets a small integer id, in order of first use,
+never reassigned. The held, pressed and released states are ints with one
+bit per action (`1 << id`), so a frame's whole input is three ints
+(`snapshot()`), cheap to copy and compare. Hot paths fetch an action's bit
+once with `action_bit` and test it against `held`; the string queries
+(`is_action_active`, ...) are kept for everything else.
 """
 from dataclasses import dataclass
+import copy
+from functools import lru_cache
 from pathlib import Path
 import json
 import logging
 import pygame
-from typing import Dict, List, Set
+from typing import Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from src.settings import INPUT_AXIS_THRESHOLD
 
 
 logger = logging.getLogger(__name__)
@@ -31,11 +50,53 @@ DEFAULT_CONFIG = {
             "move_down": ["K_DOWN", "K_s"],
             "sprint": ["K_LSHIFT"],
             "pause": ["K_ESCAPE"],
-        }
+            "inventory": ["K_i", "K_TAB"],
+            "minimap": ["K_m"],
+        },
+        "gamepad": {
+            "move_left": ["K_LEFT", "K_q", "JOY_AXIS_0_NEG", "JOY_HAT_0_LEFT"],
+            "move_right": ["K_RIGHT", "K_d", "JOY_AXIS_0_POS", "JOY_HAT_0_RIGHT"],
+            "move_up": ["K_UP", "K_z", "JOY_AXIS_1_NEG", "JOY_HAT_0_UP"],
+            "move_down": ["K_DOWN", "K_s", "JOY_AXIS_1_POS", "JOY_HAT_0_DOWN"],
+            "sprint": ["K_LSHIFT", "JOY_BUTTON_1"],
+            "pause": ["K_ESCAPE", "JOY_BUTTON_7"],
+            "inventory": ["K_i", "K_TAB", "JOY_BUTTON_3"],
+            "minimap": ["K_m", "JOY_BUTTON_6"],
+        },
     },
     "active_profile": "default",
 }
 
+# Event types `handle_event` understands
+INPUT_EVENTS = frozenset((
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.JOYBUTTONDOWN,
+    pygame.JOYBUTTONUP,
+    pygame.JOYAXISMOTION,
+    pygame.JOYHATMOTION,
+    pygame.JOYDEVICEADDED,
+    pygame.JOYDEVICEREMOVED,
+))
+
+# A control is a key code (int) or a gamepad tuple:
+# ("button", n), ("axis", n, -1 | 1), ("hat", n, direction)
+Control = Hashable
+# Controls that must all be held (a single control for plain bindings)
+Binding = Tuple[Control, ...]
+
+_CHORD_SEPARATOR = "+"
+_HAT_DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+_AXIS_SIGNS = {"NEG": -1, "POS": 1}
+
+
+class InputSnapshot(NamedTuple):
+    """One frame's action states, one bit per action id."""
+
+    held: int
+    pressed: int
+    released: int
+
 
 def _project_root() -> Path:
     """Return the project root directory (one level above src)."""
@@ -46,26 +107,89 @@ def _config_path() -> Path:
     return _project_root() / "config" / "controls.json"
 
 
+@lru_cache(maxsize=1)
+def _key_tables() -> Tuple[Dict[str, int], Dict[int, str]]:
+    """Pygame key names to codes, and codes back to names (built once).
+
+    Aliases (K_KP0 / K_KP_0, ...) all parse; a code is written back under
+    its first name in alphabetical order.
+    """
+    codes: Dict[str, int] = {}
+    names: Dict[int, str] = {}
+    for attr in sorted(dir(pygame)):
+        if attr.startswith("K_"):
+            code = getattr(pygame, attr)
+            if isinstance(code, int):
+                codes[attr] = code
+                names.setdefault(code, attr)
+    return codes, names
+
+
 def _key_name_to_code(name: str) -> int | None:
     """Convert a Pygame key name like "K_LEFT" to its integer key code."""
-    if not name.startswith("K_"):
-        return None
-    code = getattr(pygame, name, None)
-    return code if isinstance(code, int) else None
+    return _key_tables()[0].get(name)
 
 
 def _key_code_to_name(code: int) -> str:
     """Convert a Pygame key code (int) back to its name string, if possible."""
-    for attr in dir(pygame):
-        if attr.startswith("K_") and getattr(pygame, attr) == code:
-            return attr
-    return f"K_{code}"
+    return _key_tables()[1].get(code, f"K_{code}")
+
+
+def _control_from_name(name: str) -> Optional[Control]:
+    """Parse one control name ("K_q", "JOY_BUTTON_0", ...); None if unknown."""
+    if name.startswith("K_"):
+        return _key_name_to_code(name)
+    parts = name.split("_")
+    if len(parts) < 3 or parts[0] != "JOY" or not parts[2].isdigit():
+        return None
+    kind, index = parts[1], int(parts[2])
+    if kind == "BUTTON" and len(parts) == 3:
+        return ("button", index)
+    if kind == "AXIS" and len(parts) == 4 and parts[3] in _AXIS_SIGNS:
+        return ("axis", index, _AXIS_SIGNS[parts[3]])
+    if kind == "HAT" and len(parts) == 4 and parts[3] in _HAT_DIRECTIONS:
+        return ("hat", index, parts[3])
+    return None
+
+
+def _control_name(control: Control) -> str:
+    if isinstance(control, int):
+        return _key_code_to_name(control)
+    kind, index = control[0], control[1]
+    if kind == "button":
+        return f"JOY_BUTTON_{index}"
+    if kind == "axis":
+        return f"JOY_AXIS_{index}_{'NEG' if control[2] < 0 else 'POS'}"
+    return f"JOY_HAT_{index}_{control[2]}"
+
+
+def _binding_from_name(name: str) -> Optional[Binding]:
+    """Parse "K_LCTRL+K_s" style names into a binding; None if any part is unknown."""
+    controls = []
+    for part in name.split(_CHORD_SEPARATOR):
+        control = _control_from_name(part.strip())
+        if control is None:
+            return None
+        controls.append(control)
+    return tuple(dict.fromkeys(controls))
+
+
+def _binding_name(binding: Binding) -> str:
+    return _CHORD_SEPARATOR.join(_control_name(control) for control in binding)
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Ids of the set bits of a mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
 
 
 @dataclass
 class Profile:
     name: str
-    action_to_keys: Dict[str, Set[int]]  # action -> set of key codes
+    action_bindings: Dict[str, List[Binding]]  # action -> bindings
 
 
 class InputManager:
@@ -73,77 +197,236 @@ class InputManager:
 
     def __init__(self) -> None:
         self.profile: Profile = self._load_or_create_default()
-        # Edge and hold states
-        self._actions_held: Set[str] = set()
-        self._actions_pressed: Set[str] = set()
-        self._actions_released: Set[str] = set()
-        # Reverse map: key -> actions
-        self._key_to_actions: Dict[int, Set[str]] = self._build_reverse_map(self.profile)
+        # Action ids: names in order of first use, and the reverse map
+        self.action_names: List[str] = []
+        self._action_ids: Dict[str, int] = {}
+        self._action_bits: Dict[str, int] = {}
+        for action in self.profile.action_bindings:
+            self.action_id(action)
+        # Action states, one bit per action id
+        self.held: int = 0
+        self.pressed: int = 0
+        self.released: int = 0
+        # Bound controls currently down, and control -> ids of actions using it
+        self._down: Set[Control] = set()
+        self._control_actions: Dict[Control, Tuple[int, ...]] = {}
+        self._bindings: Dict[int, List[Binding]] = {}
+        self._build_reverse_map()
+        # Open gamepads by instance id (pygame closes unreferenced ones)
+        self._gamepads: Dict[int, object] = {}
+        self._start_gamepads()
+        # Receives every transition while recording (InputRecorder)
+        self._recorder = None
+
+    # ---------- Action ids ----------
+    def action_id(self, action: str) -> int:
+        """Integer id of an action, assigned on first use and never reused."""
+        action_id = self._action_ids.get(action)
+        if action_id is None:
+            action_id = self._action_ids[action] = len(self.action_names)
+            self._action_bits[action] = 1 << action_id
+            self.action_names.append(action)
+        return action_id
+
+    def action_bit(self, action: str) -> int:
+        """Bit of an action in `held`/`pressed`/`released`."""
+        return 1 << self.action_id(action)
+
+    def action_mask(self, actions: Iterable[str]) -> int:
+        mask = 0
+        for action in actions:
+            mask |= 1 << self.action_id(action)
+        return mask
+
+    def actions_in(self, mask: int) -> List[str]:
+        """Names of the actions whose bits are set in `mask`."""
+        return [self.action_names[action_id] for action_id in _bits(mask)]
+
+    # ---------- Recording ----------
+    def attach_recorder(self, recorder) -> None:
+        """Report every pressed/released transition to `recorder`."""
+        self._recorder = recorder
+
+    def detach_recorder(self) -> None:
+        self._recorder = None
 
     # ---------- Frame lifecycle ----------
     def begin_frame(self) -> None:
-        self._actions_pressed.clear()
-        self._actions_released.clear()
+        self.pressed = 0
+        self.released = 0
 
     def end_frame(self) -> None:
         pass
 
+    def snapshot(self) -> InputSnapshot:
+        """This frame's held, pressed and released masks."""
+        return InputSnapshot(self.held, self.pressed, self.released)
+
+    def follower(self) -> "InputManager":
+        """A manager driven by this one's snapshots (see `feed`).
+
+        For code running on another thread (see simulation.py): it shares
+        the bindings and action ids (allocated on this manager's thread) but
+        has its own states, no devices and no recorder.
+        """
+        other = copy.copy(self)
+        other.held = other.pressed = other.released = 0
+        other._down = set()
+        other._gamepads = {}
+        other._recorder = None
+        return other
+
+    def feed(self, snapshot: InputSnapshot) -> None:
+        """Take the held actions of a snapshot and add its edges to ours."""
+        self.held = snapshot.held
+        self.pressed |= snapshot.pressed
+        self.released |= snapshot.released
+
     # ---------- Event routing ----------
     def handle_event(self, event: pygame.event.Event) -> None:
-        if event.type == pygame.KEYDOWN:
-            self._on_key_down(event.key)
-        elif event.type == pygame.KEYUP:
-            self._on_key_up(event.key)
+        kind = event.type
+        if kind == pygame.KEYDOWN:
+            self._on_control(event.key, True)
+        elif kind == pygame.KEYUP:
+            self._on_control(event.key, False)
+        elif kind == pygame.JOYBUTTONDOWN:
+            self._on_control(("button", event.button), True)
+        elif kind == pygame.JOYBUTTONUP:
+            self._on_control(("button", event.button), False)
+        elif kind == pygame.JOYAXISMOTION:
+            self._on_control(("axis", event.axis, -1), event.value <= -INPUT_AXIS_THRESHOLD)
+            self._on_control(("axis", event.axis, 1), event.value >= INPUT_AXIS_THRESHOLD)
+        elif kind == pygame.JOYHATMOTION:
+            x, y = event.value
+            self._on_control(("hat", event.hat, "LEFT"), x < 0)
+            self._on_control(("hat", event.hat, "RIGHT"), x > 0)
+            self._on_control(("hat", event.hat, "UP"), y > 0)
+            self._on_control(("hat", event.hat, "DOWN"), y < 0)
+        elif kind == pygame.JOYDEVICEADDED:
+            pad = pygame.joystick.Joystick(event.device_index)
+            self._gamepads[pad.get_instance_id()] = pad
+            logger.info("Gamepad connected: %s", pad.get_name())
+        elif kind == pygame.JOYDEVICEREMOVED:
+            self._gamepads.pop(event.instance_id, None)
+            # Nothing stays held through an unplugged pad
+            for control in [c for c in self._down if not isinstance(c, int)]:
+                self._on_control(control, False)
 
-    def _on_key_down(self, key: int) -> None:
-        actions = self._key_to_actions.get(key)
+    def _on_control(self, control: Control, down: bool) -> None:
+        actions = self._control_actions.get(control)
         if not actions:
             return
-        for action in actions:
-            if action not in self._actions_held:
-                self._actions_held.add(action)
-                self._actions_pressed.add(action)
+        if down:
+            if control in self._down:
+                return
+            self._down.add(control)
+        else:
+            if control not in self._down:
+                return
+            self._down.remove(control)
+        for action_id in actions:
+            self._refresh(action_id)
 
-    def _on_key_up(self, key: int) -> None:
-        actions = self._key_to_actions.get(key)
-        if not actions:
-            return
-        for action in actions:
-            if action in self._actions_held:
-                self._actions_held.remove(action)
-                self._actions_released.add(action)
+    def _refresh(self, action_id: int) -> None:
+        """Hold an action while any of its bindings is fully down."""
+        down = self._down
+        active = any(all(control in down for control in binding) for binding in self._bindings[action_id])
+        held = self.held >> action_id & 1
+        if active and not held:
+            self._press(action_id)
+        elif held and not active:
+            self._release(action_id)
+
+    # ---------- Direct action control (scripted input) ----------
+    def press_action(self, action: str) -> None:
+        """Mark an action as held, recording the pressed edge if it was up."""
+        action_id = self.action_id(action)
+        if not self.held >> action_id & 1:
+            self._press(action_id)
+
+    def release_action(self, action: str) -> None:
+        """Mark an action as released, recording the edge if it was held."""
+        action_id = self._action_ids.get(action)
+        if action_id is not None and self.held >> action_id & 1:
+            self._release(action_id)
+
+    def _press(self, action_id: int) -> None:
+        bit = 1 << action_id
+        self.held |= bit
+        self.pressed |= bit
+        if self._recorder is not None:
+            self._recorder.transition(self.action_names[action_id], True)
+
+    def _release(self, action_id: int) -> None:
+        bit = 1 << action_id
+        self.held &= ~bit
+        self.released |= bit
+        if self._recorder is not None:
+            self._recorder.transition(self.action_names[action_id], False)
+
+    def set_held_actions(self, actions) -> None:
+        """Replace the held action set, generating pressed/released edges.
+
+        Used by scripted input sources (benchmarks, replays) that drive the
+        manager without pygame key events.
+
+        Args:
+            actions (Iterable[str]): Actions that should be held this frame.
+        """
+        self.set_held_mask(self.action_mask(actions))
+
+    def set_held_mask(self, wanted: int) -> None:
+        """`set_held_actions` with a mask of action bits."""
+        for action_id in _bits(self.held & ~wanted):
+            self._release(action_id)
+        for action_id in _bits(wanted & ~self.held):
+            self._press(action_id)
 
     # ---------- Queries ----------
     def is_action_active(self, action: str) -> bool:
-        return action in self._actions_held
+        return self.held & self._action_bits.get(action, 0) != 0
 
     def was_action_pressed(self, action: str) -> bool:
-        return action in self._actions_pressed
+        return self.pressed & self._action_bits.get(action, 0) != 0
 
     def was_action_released(self, action: str) -> bool:
-        return action in self._actions_released
+        return self.released & self._action_bits.get(action, 0) != 0
 
     # ---------- Rebinding & persistence ----------
     def rebind(self, action: str, key_names: List[str]) -> None:
-        key_codes: Set[int] = set()
+        """Replace the bindings of an action (keys, chords, gamepad controls)."""
+        bindings: List[Binding] = []
         for name in key_names:
-            code = _key_name_to_code(name)
-            if code is None:
+            binding = _binding_from_name(name)
+            if binding is None:
                 logger.warning("Unknown key name in rebind: %s", name)
                 continue
-            key_codes.add(code)
-        self.profile.action_to_keys[action] = key_codes
-        self._key_to_actions = self._build_reverse_map(self.profile)
+            bindings.append(binding)
+        self.profile.action_bindings[action] = bindings
+        self._build_reverse_map()
+        self._start_gamepads()
+
+    def _start_gamepads(self) -> None:
+        """Start the joystick module once gamepad controls are bound."""
+        if any(not isinstance(c, int) for c in self._control_actions) and not pygame.joystick.get_init():
+            # Connected pads then arrive as JOYDEVICEADDED events
+            pygame.joystick.init()
 
     def save(self) -> None:
         cfg_path = _config_path()
         cfg_path.parent.mkdir(parents=True, exist_ok=True)
         named: Dict[str, List[str]] = {}
-        for action, codes in self.profile.action_to_keys.items():
-            named[action] = sorted(_key_code_to_name(c) for c in codes)
+        for action, bindings in self.profile.action_bindings.items():
+            named[action] = sorted(_binding_name(binding) for binding in bindings)
+        # Keep the other profiles of the file (e.g. "gamepad")
+        try:
+            profiles = json.loads(cfg_path.read_text(encoding="utf-8")).get("profiles", {})
+        except (OSError, ValueError):
+            profiles = {}
+        profiles[self.profile.name] = named
         data = {
             "version": 1,
-            "profiles": {self.profile.name: named},
+            "profiles": profiles,
             "active_profile": self.profile.name,
         }
         cfg_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
@@ -162,22 +445,29 @@ class InputManager:
         profile_name = data.get("active_profile", "default")
         profiles = data.get("profiles", {})
         profile_data = profiles.get(profile_name, profiles.get("default", {}))
-        action_to_keys: Dict[str, Set[int]] = {}
+        action_bindings: Dict[str, List[Binding]] = {}
         for action, names in profile_data.items():
-            codes: Set[int] = set()
+            bindings: List[Binding] = []
             for name in names:
-                code = _key_name_to_code(name)
-                if code is None:
+                binding = _binding_from_name(name)
+                if binding is None:
                     logger.warning("Unknown key name in config: %s", name)
                     continue
-                codes.add(code)
-            action_to_keys[action] = codes
-        return Profile(name=profile_name, action_to_keys=action_to_keys)
-
-    @staticmethod
-    def _build_reverse_map(profile: Profile) -> Dict[int, Set[str]]:
-        reverse: Dict[int, Set[str]] = {}
-        for action, codes in profile.action_to_keys.items():
-            for code in codes:
-                reverse.setdefault(code, set()).add(action)
-        return reverse
+                bindings.append(binding)
+            action_bindings[action] = bindings
+        return Profile(name=profile_name, action_bindings=action_bindings)
+
+    def _build_reverse_map(self) -> None:
+        reverse: Dict[Control, List[int]] = {}
+        self._bindings = {}
+        for action, bindings in self.profile.action_bindings.items():
+            action_id = self.action_id(action)
+            self._bindings[action_id] = bindings
+            for binding in bindings:
+                for control in binding:
+                    ids = reverse.setdefault(control, [])
+                    if action_id not in ids:
+                        ids.append(action_id)
+        self._control_actions = {control: tuple(ids) for control, ids in reverse.items()}
+        # Controls no longer bound are forgotten
+        self._down &= set(self._control_actions)
@@ -0,0 +1,250 @@
+"""Compact binary input recording and deterministic replay.
+
+`InputRecorder` receives every action transition from `InputManager` (see
+`InputManager.attach_recorder`) and writes, once per frame, the frame's
+`dt` and its ordered transitions. `InputReplay` reads such a log back and
+drives an `InputManager` frame by frame with the recorded transitions and
+`dt`, without live events, so the session plays back exactly.
+
+File layout (little endian):
+- header: magic b"RINP", format version (u16), simulation tick rate (u16)
+- records, in order:
+  - action definition: 0xFF, action id (u8), name length (u8), UTF-8 name
+  - frame: head byte, optional extended transition count (u8), dt
+    (absent when unchanged, else i8 change from the previous dt or u16, in
+    0.1 ms units, or f64 seconds), then one byte per transition: action
+    id, with 0x80 set for a press
+
+Frame head bits: 0-3 transition count (15: count in the next byte),
+bit 4: same dt as the previous frame, bit 5: dt stored as u16 0.1 ms units,
+bit 6: dt stored as its i8 change from the previous dt, in 0.1 ms units.
+The game's dt is a whole number of 0.1 ms (FRAME_DT_QUANTUM_S) and moves by
+a few units from frame to frame: a frame costs one byte when idle at a
+steady rate, two while the smoothed dt wanders. Version 1 logs stored the
+u16 dt in whole milliseconds and are still read.
+"""
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import struct
+import time
+
+from src.settings import (
+    SIMULATION_TICK_RATE,
+    INPUT_RECORDING_DIR,
+    INPUT_RECORDING_FLUSH_FRAMES,
+)
+
+
+logger = logging.getLogger(__name__)
+
+REPLAY_MAGIC = b"RINP"
+REPLAY_VERSION = 2
+_HEADER = struct.Struct("<4sHH")
+_U16 = struct.Struct("<H")
+_I8 = struct.Struct("<b")
+_F64 = struct.Struct("<d")
+
+_TAG_ACTION = 0xFF
+_COUNT_MASK = 0x0F
+_COUNT_EXTENDED = 0x0F
+_SAME_DT = 0x10
+_DT_UNITS = 0x20
+_DT_STEP = 0x40
+# Seconds per u16/i8 dt unit, by format version
+_DT_UNIT = 0.0001
+_DT_UNIT_V1 = 0.001
+_PRESS = 0x80
+_MAX_ACTIONS = 0x7F
+_MAX_TRANSITIONS = 0xFF
+
+# One recorded frame: dt in seconds and ordered (action, pressed) transitions
+ReplayFrame = Tuple[float, List[Tuple[str, bool]]]
+
+
+def default_recording_path() -> Path:
+    """Timestamped file in INPUT_RECORDING_DIR for a new recording."""
+    return INPUT_RECORDING_DIR / time.strftime("session-%Y%m%d-%H%M%S.rinp")
+
+
+class InputRecorder:
+    """Streams action transitions and frame dts to a binary log."""
+
+    def __init__(self, path: Path, flush_frames: int = INPUT_RECORDING_FLUSH_FRAMES) -> None:
+        """Create the log file and write its header.
+
+        Args:
+            path (Path): Destination file (parent folders are created).
+            flush_frames (int): Frames buffered between two writes.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_frames = max(1, flush_frames)
+        self.frames: int = 0
+        self.bytes_written: int = 0
+        self._file = open(self.path, "wb")
+        self._buffer = bytearray(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, SIMULATION_TICK_RATE))
+        self._ids: Dict[str, int] = {}
+        self._pending = bytearray()
+        self._last_dt: Optional[float] = None
+        # Previous dt in _DT_UNIT steps, when it was a whole number of them
+        self._last_units: Optional[int] = None
+
+    def transition(self, action: str, pressed: bool) -> None:
+        """Record that `action` was pressed or released in the current frame."""
+        action_id = self._ids.get(action)
+        if action_id is None:
+            action_id = len(self._ids)
+            if action_id >= _MAX_ACTIONS:
+                raise ValueError(f"Too many distinct actions to record (max {_MAX_ACTIONS})")
+            name = action.encode("utf-8")
+            if len(name) > 0xFF:
+                raise ValueError(f"Action name too long to record: {action}")
+            self._ids[action] = action_id
+            self._buffer += bytes((_TAG_ACTION, action_id, len(name))) + name
+        if len(self._pending) >= _MAX_TRANSITIONS:
+            raise ValueError(f"More than {_MAX_TRANSITIONS} input transitions in one frame")
+        self._pending.append((action_id | _PRESS) if pressed else action_id)
+
+    def end_frame(self, dt: float) -> None:
+        """Close the current frame, stamped with the `dt` the game ran it with."""
+        count = len(self._pending)
+        head = min(count, _COUNT_EXTENDED)
+        payload = b""
+        if dt == self._last_dt:
+            head |= _SAME_DT
+        else:
+            units = round(dt / _DT_UNIT)
+            # FramePacer rounds dt to 0.1 ms: units * _DT_UNIT restores it exactly
+            if 0 <= units <= 0xFFFF and units * _DT_UNIT == dt:
+                if self._last_units is not None and -0x80 <= units - self._last_units <= 0x7F:
+                    head |= _DT_STEP
+                    payload = _I8.pack(units - self._last_units)
+                else:
+                    head |= _DT_UNITS
+                    payload = _U16.pack(units)
+                self._last_units = units
+            else:
+                payload = _F64.pack(dt)
+                self._last_units = None
+            self._last_dt = dt
+        self._buffer.append(head)
+        if count >= _COUNT_EXTENDED:
+            self._buffer.append(count)
+        self._buffer += payload
+        self._buffer += self._pending
+        self._pending.clear()
+        self.frames += 1
+        if self.frames % self.flush_frames == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer and not self._file.closed:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self.bytes_written += len(self._buffer)
+            self._buffer.clear()
+
+    def close(self) -> None:
+        """Write what is buffered and close the file."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        logger.info("Recorded %d frames to %s (%d bytes)", self.frames, self.path, self.bytes_written)
+
+    def __enter__(self) -> "InputRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class InputReplay:
+    """Plays a recorded log back into an InputManager."""
+
+    def __init__(self, path: Path, realtime: bool = False) -> None:
+        """Open a log written by InputRecorder.
+
+        Args:
+            path (Path): Recorded log.
+            realtime (bool): Keep the frame-rate cap while playing back; off,
+                the game runs the frames as fast as it can (headless runs,
+                profiling workloads).
+
+        Raises:
+            ValueError: If the file is not a recording of this version.
+        """
+        self.path = Path(path)
+        self.realtime = realtime
+        self._data = self.path.read_bytes()
+        if len(self._data) < _HEADER.size:
+            raise ValueError(f"Not an input recording: {self.path}")
+        magic, version, tick_rate = _HEADER.unpack_from(self._data, 0)
+        if magic != REPLAY_MAGIC or version not in (1, REPLAY_VERSION):
+            raise ValueError(f"Not an input recording: {self.path}")
+        if tick_rate != SIMULATION_TICK_RATE:
+            logger.warning("Recording made at %d ticks/s, playing at %d: playback will diverge",
+                           tick_rate, SIMULATION_TICK_RATE)
+        self.tick_rate = tick_rate
+        self.version = version
+        self.frame: int = 0
+        self._frames = self.frames()
+
+    def frames(self) -> Iterator[ReplayFrame]:
+        """Decode the log frame by frame."""
+        data = self._data
+        offset = _HEADER.size
+        actions: Dict[int, str] = {}
+        dt = 0.0
+        units = 0
+        unit = _DT_UNIT_V1 if self.version == 1 else _DT_UNIT
+        while offset < len(data):
+            head = data[offset]
+            offset += 1
+            if head == _TAG_ACTION:
+                action_id, length = data[offset], data[offset + 1]
+                offset += 2
+                actions[action_id] = data[offset:offset + length].decode("utf-8")
+                offset += length
+                continue
+            count = head & _COUNT_MASK
+            if count == _COUNT_EXTENDED:
+                count = data[offset]
+                offset += 1
+            if not head & _SAME_DT:
+                if head & _DT_STEP:
+                    units += _I8.unpack_from(data, offset)[0]
+                    dt = units * unit
+                    offset += _I8.size
+                elif head & _DT_UNITS:
+                    units = _U16.unpack_from(data, offset)[0]
+                    dt = units / 1000.0 if self.version == 1 else units * unit
+                    offset += _U16.size
+                else:
+                    dt = _F64.unpack_from(data, offset)[0]
+                    offset += _F64.size
+            transitions = [
+                (actions[code & _MAX_ACTIONS], bool(code & _PRESS))
+                for code in data[offset:offset + count]
+            ]
+            offset += count
+            yield dt, transitions
+
+    def step(self, input_manager) -> Optional[float]:
+        """Apply the next frame's transitions and return its dt.
+
+        Returns:
+            float | None: The recorded dt, or None once the log is exhausted.
+        """
+        frame = next(self._frames, None)
+        if frame is None:
+            return None
+        dt, transitions = frame
+        for action, pressed in transitions:
+            if pressed:
+                input_manager.press_action(action)
+            else:
+                input_manager.release_action(action)
+        self.frame += 1
+        return dt
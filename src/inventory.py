@@ -1,24 +1,352 @@
+"""Item counts held by an entity, and their cached on-screen panel.
+
+`Inventory` maps integer item ids (see items.py) to counts. Held items are
+also indexed by category and by tag, so filtered queries only touch the
+matching items. `apply` checks a whole batch of changes against the counts
+and stack limits before touching anything: either every change lands or the
+inventory is left as it was.
+
+`InventoryView` draws the inventory as a grid into its own surface and keeps
+it between frames. The surface is rebuilt when items appear, disappear or
+the view scrolls; count changes repaint only the affected cells, and an
+unchanged inventory costs one blit.
+"""
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
 import pygame
 
+from src.items import ItemRef, ItemRegistry, get_item_registry
+
+
+class InventoryError(ValueError):
+    """A change would make a count negative or exceed a stack limit."""
+
+
 class Inventory:
-    def __init__(self):
-        self.items = {}
+    """Counts of held items, indexed by category and tag."""
+
+    def __init__(self, registry: Optional[ItemRegistry] = None) -> None:
+        # Resolved on first use: most entities never touch their inventory
+        self._registry = registry
+        self._counts: Dict[int, int] = {}
+        # Held item ids per category id and per tag
+        self._by_category: Dict[int, Set[int]] = {}
+        self._by_tag: Dict[str, Set[int]] = {}
+        # Bumped on every change (saves re-encode the items only then)
+        self.revision = 0
+        # Bumped when an item appears or disappears (the view re-lays out)
+        self.layout_revision = 0
+        self._order: List[int] = []
+        self._order_revision = -1
+        self._view: Optional["InventoryView"] = None
+
+    @property
+    def registry(self) -> ItemRegistry:
+        if self._registry is None:
+            self._registry = get_item_registry()
+        return self._registry
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, item: ItemRef) -> bool:
+        return self.count(item) > 0
+
+    @property
+    def counts(self) -> Mapping[int, int]:
+        """Read-only view of the held counts by item id."""
+        return MappingProxyType(self._counts)
+
+    def count(self, item: ItemRef) -> int:
+        return self._counts.get(self.registry.resolve(item), 0)
+
+    # ---------- Changes ----------
+    def add_item(self, item: ItemRef, quantity: int = 1) -> None:
+        """Add items (InventoryError beyond the stack limit)."""
+        self.apply(((item, quantity),))
+
+    def remove_item(self, item: ItemRef, quantity: int = 1) -> bool:
+        """Remove items; return False, changing nothing, if too few are held."""
+        try:
+            self.apply(((item, -quantity),))
+        except InventoryError:
+            return False
+        return True
+
+    def add_items(self, items: Mapping[ItemRef, int]) -> None:
+        self.apply(items.items())
+
+    def remove_items(self, items: Mapping[ItemRef, int]) -> None:
+        self.apply((item, -quantity) for item, quantity in items.items())
+
+    def apply(self, changes: Iterable[Tuple[ItemRef, int]]) -> None:
+        """Apply signed count changes as one transaction.
+
+        Args:
+            changes (Iterable[Tuple[ItemRef, int]]): (item, delta) pairs; an
+                item may appear several times.
+
+        Raises:
+            KeyError: If an item is not in the registry.
+            InventoryError: If a final count would be negative or above the
+                item's stack limit. Nothing is changed in either case.
+        """
+        resolve = self.registry.resolve
+        counts = self._counts
+        final: Dict[int, int] = {}
+        for item, delta in changes:
+            item_id = resolve(item)
+            final[item_id] = final.get(item_id, counts.get(item_id, 0)) + delta
+        max_stack = self.registry.max_stack
+        for item_id, count in final.items():
+            limit = max_stack[item_id]
+            if count < 0 or (limit and count > limit):
+                held = counts.get(item_id, 0)
+                raise InventoryError(
+                    f"{self.registry.defs[item_id].key}: {held} held, "
+                    f"{count - held:+d} would leave {count} (limit {limit or 'none'})"
+                )
+        for item_id, count in final.items():
+            self._set(item_id, count)
+        if final:
+            self.revision += 1
+
+    def replace(self, items: Mapping[ItemRef, int]) -> None:
+        """Replace the whole content in one transaction."""
+        emptied = [(item_id, -count) for item_id, count in self._counts.items()]
+        self.apply(chain(emptied, items.items()))
+
+    def clear(self) -> None:
+        self.replace({})
+
+    def _set(self, item_id: int, count: int) -> None:
+        counts = self._counts
+        if count:
+            if item_id not in counts:
+                self._index(item_id, True)
+            counts[item_id] = count
+        elif item_id in counts:
+            del counts[item_id]
+            self._index(item_id, False)
 
-    def add_item(self, item, quantity):
-        if item in self.items:
-            self.items[item] += quantity
+    def _index(self, item_id: int, held: bool) -> None:
+        definition = self.registry.defs[item_id]
+        buckets = [self._by_category.setdefault(self.registry.category_of[item_id], set())]
+        buckets.extend(self._by_tag.setdefault(tag, set()) for tag in definition.tags)
+        for bucket in buckets:
+            if held:
+                bucket.add(item_id)
+            else:
+                bucket.discard(item_id)
+        self.layout_revision += 1
+
+    # ---------- Queries ----------
+    def in_category(self, category: str) -> Dict[int, int]:
+        """Held counts of the items of a category, by id."""
+        category_id = self.registry.category_id(category)
+        held = self._by_category.get(category_id, ()) if category_id is not None else ()
+        return {item_id: self._counts[item_id] for item_id in held}
+
+    def with_tag(self, tag: str) -> Dict[int, int]:
+        """Held counts of the items carrying a tag, by id."""
+        return {item_id: self._counts[item_id] for item_id in self._by_tag.get(tag, ())}
+
+    def total_value(self) -> int:
+        value = self.registry.value
+        return sum(value[item_id] * count for item_id, count in self._counts.items())
+
+    def ordered(self) -> List[int]:
+        """Held item ids in display order (by category, then id)."""
+        if self._order_revision != self.layout_revision:
+            category_of = self.registry.category_of
+            self._order = sorted(self._counts, key=lambda item_id: (category_of[item_id], item_id))
+            self._order_revision = self.layout_revision
+        return self._order
+
+    def get_inventory(self) -> Mapping[int, int]:
+        return self.counts
+
+    # ---------- Persistence ----------
+    def to_dict(self) -> Dict[str, int]:
+        """Counts by item key (stable across registry changes)."""
+        defs = self.registry.defs
+        return {defs[item_id].key: count for item_id, count in self._counts.items()}
+
+    # ---------- Display ----------
+    @property
+    def view(self) -> "InventoryView":
+        if self._view is None:
+            self._view = InventoryView(self)
+        return self._view
+
+    def draw_inventory(self, screen) -> None:
+        """Draw the inventory panel on the screen wrapper."""
+        self.view.draw(screen)
+
+
+class InventoryView:
+    """Scrollable grid of item cells drawn from a cached surface."""
+
+    COLUMNS = 10
+    ROWS = 6
+    CELL = 44
+    GAP = 4
+    BACKGROUND = (16, 16, 24)
+    CELL_BACKGROUND = (40, 40, 52)
+    TEXT = (230, 230, 230)
+    SCROLLBAR = (120, 120, 140)
+    # Cell faces and count texts kept before their cache is reset
+    FACE_CACHE_SIZE = 256
+    NUMBER_CACHE_SIZE = 512
+
+    def __init__(self, inventory: Inventory, position: Optional[Tuple[int, int]] = None) -> None:
+        self.inventory = inventory
+        step = self.CELL + self.GAP
+        size = (self.COLUMNS * step + self.GAP, self.ROWS * step + self.GAP)
+        if position is None:
+            display = pygame.display.get_surface()
+            bounds = display.get_rect() if display is not None else pygame.Rect(0, 0, *size)
+            position = ((bounds.width - size[0]) // 2, (bounds.height - size[1]) // 2)
+        self.rect = pygame.Rect(position, size)
+        self.scroll = 0  # first visible row
+        self._surface: Optional[pygame.Surface] = None
+        self._font: Optional[pygame.font.Font] = None
+        # Empty grid, cell faces (background, icon and name) per item and
+        # count texts, rendered once and blitted from then on
+        self._grid: Optional[pygame.Surface] = None
+        self._empty_cell: Optional[pygame.Surface] = None
+        self._faces: Dict[int, pygame.Surface] = {}
+        self._numbers: Dict[int, pygame.Surface] = {}
+        # What the surface shows: layout, scroll, revision and visible cells
+        self._layout = -1
+        self._scroll_drawn = -1
+        self._revision = -1
+        self._cells: List[Tuple[int, int]] = []
+        # Repaint counters (benchmarks)
+        self.full_redraws = 0
+        self.cell_redraws = 0
+
+    @property
+    def page_size(self) -> int:
+        return self.COLUMNS * self.ROWS
+
+    def scroll_by(self, rows: int) -> None:
+        """Scroll by whole rows, clamped to the content."""
+        total_rows = -(-len(self.inventory) // self.COLUMNS)
+        self.scroll = max(0, min(self.scroll + rows, total_rows - self.ROWS))
+
+    def draw(self, screen) -> None:
+        """Blit the panel, repainting the cached surface only if needed."""
+        screen.get_display().blit(self.compose(), self.rect)
+        screen.mark_dirty(self.rect)
+
+    def compose(self) -> pygame.Surface:
+        """Bring the cached panel surface up to date and return it.
+
+        The surface is repainted in place: copy it to keep what it shows
+        (`full_redraws + cell_redraws` changes whenever it is repainted).
+        """
+        inventory = self.inventory
+        if (
+            self._surface is None
+            or inventory.layout_revision != self._layout
+            or self.scroll != self._scroll_drawn
+        ):
+            self._redraw()
+        elif inventory.revision != self._revision:
+            self._redraw_counts()
+        return self._surface
+
+    def _redraw(self) -> None:
+        inventory = self.inventory
+        if self._surface is None:
+            self._build_grid()
+            self._surface = self._grid.copy()
         else:
-            self.items[item] = quantity
+            self._surface.blit(self._grid, (0, 0))
+        self.scroll_by(0)
+        first = self.scroll * self.COLUMNS
+        visible = inventory.ordered()[first:first + self.page_size]
+        counts = inventory.counts
+        self._cells = [(item_id, counts[item_id]) for item_id in visible]
+        for slot in range(len(self._cells)):
+            self._draw_cell(slot)
+        self._draw_scrollbar()
+        self._layout = inventory.layout_revision
+        self._scroll_drawn = self.scroll
+        self._revision = inventory.revision
+        self.full_redraws += 1
+
+    def _redraw_counts(self) -> None:
+        counts = self.inventory.counts
+        for slot, (item_id, drawn) in enumerate(self._cells):
+            count = counts[item_id]
+            if count != drawn:
+                self._cells[slot] = (item_id, count)
+                self._draw_cell(slot)
+                self.cell_redraws += 1
+        self._revision = self.inventory.revision
+
+    def _cell_origin(self, slot: int) -> Tuple[int, int]:
+        step = self.CELL + self.GAP
+        row, column = divmod(slot, self.COLUMNS)
+        return self.GAP + column * step, self.GAP + row * step
+
+    def _build_grid(self) -> None:
+        display = pygame.display.get_surface()
+        self._empty_cell = pygame.Surface((self.CELL, self.CELL), 0, display)
+        self._empty_cell.fill(self.CELL_BACKGROUND)
+        self._grid = pygame.Surface(self.rect.size, 0, display)
+        self._grid.fill(self.BACKGROUND)
+        for slot in range(self.page_size):
+            self._grid.blit(self._empty_cell, self._cell_origin(slot))
+
+    def _draw_cell(self, slot: int) -> None:
+        item_id, count = self._cells[slot]
+        left, top = self._cell_origin(slot)
+        self._surface.blit(self._face(item_id), (left, top))
+        if count > 1:
+            number = self._number(count)
+            self._surface.blit(number, number.get_rect(bottomright=(left + self.CELL - 2, top + self.CELL - 1)))
+
+    def _draw_scrollbar(self) -> None:
+        total_rows = -(-len(self.inventory) // self.COLUMNS)
+        if total_rows <= self.ROWS:
+            return
+        height = self.rect.height - 2 * self.GAP
+        thumb = max(8, height * self.ROWS // total_rows)
+        top = self.GAP + (height - thumb) * self.scroll // (total_rows - self.ROWS)
+        self._surface.fill(self.SCROLLBAR, (self.rect.width - 3, top, 2, thumb))
 
-    def remove_item(self, item, quantity):
-        if item in self.items:
-            if self.items[item] > quantity:
-                self.items[item] -= quantity
-            elif self.items[item] == quantity:
-                del self.items[item]
+    def _get_font(self) -> pygame.font.Font:
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.Font(None, 14)
+        return self._font
 
-    def get_inventory(self):
-        return self.items
+    def _face(self, item_id: int) -> pygame.Surface:
+        face = self._faces.get(item_id)
+        if face is None:
+            if len(self._faces) >= self.FACE_CACHE_SIZE:
+                self._faces.clear()
+            definition = self.inventory.registry.defs[item_id]
+            face = self._faces[item_id] = self._empty_cell.copy()
+            face.fill(definition.color, face.get_rect().inflate(-12, -18).move(0, -4))
+            font = self._get_font()
+            name = definition.name
+            # Shorten the name until it fits the cell
+            while len(name) > 1 and font.size(name)[0] > self.CELL - 4:
+                name = name[:-1]
+            face.blit(font.render(name, True, self.TEXT), (2, 1))
+        return face
 
-    def draw_inventory(self, screen):
-        pass
\ No newline at end of file
+    def _number(self, count: int) -> pygame.Surface:
+        number = self._numbers.get(count)
+        if number is None:
+            if len(self._numbers) >= self.NUMBER_CACHE_SIZE:
+                self._numbers.clear()
+            number = self._numbers[count] = self._get_font().render(str(count), True, self.TEXT)
+        return number
@@ -0,0 +1,208 @@
+"""Item definitions: a preloaded registry with integer ids and indexes.
+
+Definitions are read once from ITEMS_FILE by `get_item_registry()`. Each item
+gets a dense integer id (its registration order) that the rest of the game
+uses; the string key only appears in data files and saves. Per-item numbers
+the inventory checks on every change (category, stack limit, value) are also
+kept in flat arrays indexed by id, and the ids of each category and tag are
+precomputed so filtered lookups do not scan the registry.
+
+ITEMS_FILE layout:
+    {"version": 1, "items": [{"key": "potion", "name": "Potion",
+      "category": "consumable", "tags": ["healing"], "max_stack": 99,
+      "value": 10, "color": [200, 50, 60]}, ...]}
+
+A `max_stack` of 0 means no limit.
+"""
+from array import array
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+import json
+import logging
+import zlib
+
+from src.settings import ITEMS_FILE
+
+
+logger = logging.getLogger(__name__)
+
+# An item given by id or by key
+ItemRef = Union[int, str]
+Color = Tuple[int, int, int]
+
+DEFAULT_CATEGORY = "misc"
+DEFAULT_MAX_STACK = 99
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+class ItemDef:
+    """Static description of one kind of item."""
+
+    __slots__ = ("id", "key", "name", "category", "tags", "max_stack", "value", "color")
+
+    def __init__(
+        self,
+        item_id: int,
+        key: str,
+        name: str,
+        category: str,
+        tags: FrozenSet[str],
+        max_stack: int,
+        value: int,
+        color: Color,
+    ) -> None:
+        self.id = item_id
+        self.key = key
+        self.name = name
+        self.category = category
+        self.tags = tags
+        self.max_stack = max_stack
+        self.value = value
+        self.color = color
+
+    def __repr__(self) -> str:
+        return f"ItemDef({self.id}, {self.key!r}, category={self.category!r})"
+
+
+def _default_color(category: str) -> Color:
+    """Stable color per category for items that do not set one."""
+    seed = zlib.crc32(category.encode("utf-8"))
+    return (80 + seed % 150, 80 + (seed >> 8) % 150, 80 + (seed >> 16) % 150)
+
+
+class ItemRegistry:
+    """All item definitions, addressed by integer id."""
+
+    def __init__(self) -> None:
+        self.defs: List[ItemDef] = []
+        self.categories: List[str] = []
+        # Per-id columns (see the module docstring)
+        self.category_of = array("H")
+        self.max_stack = array("I")
+        self.value = array("i")
+        self._ids: Dict[str, int] = {}
+        self._category_ids: Dict[str, int] = {}
+        self._by_category: Dict[str, set] = {}
+        self._by_tag: Dict[str, set] = {}
+        # Frozen copies of the index sets, built on first query
+        self._frozen: Dict[Tuple[bool, str], FrozenSet[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.defs)
+
+    def __iter__(self) -> Iterator[ItemDef]:
+        return iter(self.defs)
+
+    def __contains__(self, item: object) -> bool:
+        if isinstance(item, int):
+            return 0 <= item < len(self.defs)
+        return item in self._ids
+
+    def register(
+        self,
+        key: str,
+        name: Optional[str] = None,
+        category: str = DEFAULT_CATEGORY,
+        tags: Iterable[str] = (),
+        max_stack: int = DEFAULT_MAX_STACK,
+        value: int = 0,
+        color: Optional[Color] = None,
+    ) -> int:
+        """Add an item definition and return its id.
+
+        Raises:
+            ValueError: If the key is already registered or a number is negative.
+        """
+        if key in self._ids:
+            raise ValueError(f"Item {key!r} is already registered")
+        if max_stack < 0 or value < 0:
+            raise ValueError(f"Item {key!r}: max_stack and value must be >= 0")
+        item_id = len(self.defs)
+        category_id = self._category_ids.get(category)
+        if category_id is None:
+            category_id = self._category_ids[category] = len(self.categories)
+            self.categories.append(category)
+        tags = frozenset(tags)
+        self.defs.append(ItemDef(
+            item_id, key, name or key, category, tags, int(max_stack), int(value),
+            tuple(color) if color is not None else _default_color(category),
+        ))
+        self.category_of.append(category_id)
+        self.max_stack.append(int(max_stack))
+        self.value.append(int(value))
+        self._ids[key] = item_id
+        self._by_category.setdefault(category, set()).add(item_id)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(item_id)
+        self._frozen.clear()
+        return item_id
+
+    def load(self, path: Path = ITEMS_FILE) -> int:
+        """Register every item of a definitions file; return how many."""
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        entries = data.get("items", [])
+        for entry in entries:
+            self.register(
+                entry["key"],
+                name=entry.get("name"),
+                category=entry.get("category", DEFAULT_CATEGORY),
+                tags=entry.get("tags", ()),
+                max_stack=entry.get("max_stack", DEFAULT_MAX_STACK),
+                value=entry.get("value", 0),
+                color=entry.get("color"),
+            )
+        return len(entries)
+
+    # ---------- Lookups ----------
+    def id_of(self, key: str) -> int:
+        """Id of an item key (KeyError if unknown)."""
+        try:
+            return self._ids[key]
+        except KeyError:
+            raise KeyError(f"Unknown item {key!r}") from None
+
+    def resolve(self, item: ItemRef) -> int:
+        """Id of an item given by id or key (KeyError if unknown)."""
+        if isinstance(item, str):
+            return self.id_of(item)
+        if not 0 <= item < len(self.defs):
+            raise KeyError(f"Unknown item id {item}")
+        return item
+
+    def get(self, item: ItemRef) -> ItemDef:
+        return self.defs[self.resolve(item)]
+
+    def category_id(self, category: str) -> Optional[int]:
+        return self._category_ids.get(category)
+
+    def in_category(self, category: str) -> FrozenSet[int]:
+        """Ids of every item of a category."""
+        return self._index(False, category)
+
+    def with_tag(self, tag: str) -> FrozenSet[int]:
+        """Ids of every item carrying a tag."""
+        return self._index(True, tag)
+
+    def _index(self, is_tag: bool, name: str) -> FrozenSet[int]:
+        frozen = self._frozen.get((is_tag, name))
+        if frozen is None:
+            source = (self._by_tag if is_tag else self._by_category).get(name)
+            frozen = frozenset(source) if source else _EMPTY
+            self._frozen[(is_tag, name)] = frozen
+        return frozen
+
+
+_default_registry: Optional[ItemRegistry] = None
+
+
+def get_item_registry() -> ItemRegistry:
+    """Return the process-wide registry, loaded from ITEMS_FILE on first use."""
+    global _default_registry
+    if _default_registry is None:
+        registry = ItemRegistry()
+        try:
+            registry.load()
+        except (OSError, ValueError, KeyError) as exc:
+            logger.error("Failed to read %s, no items defined: %s", ITEMS_FILE, exc)
+        _default_registry = registry
+    return _default_registry
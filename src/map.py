@@ -1,10 +1,124 @@
+import dataclasses
+import logging
+import math
+import time
+from typing import NamedTuple, Optional, Tuple
 import pygame
-from pytmx import load_pygame
 import pyscroll
 from pathlib import Path
 
 from src.screen import Screen
-from src.settings import MAPS_DIR, START_MAP, CAMERA_ZOOM
+from src import map_cache
+from src.map_loader import DecodedMap, get_map_loader, neighbor_maps
+from src.world_chunks import ChunkSource, ChunkedWorld, ChunkedMapData
+from src.collision import ChunkedCollisionGrid, CollisionGrid
+from src.navigation import Navigator
+from src.entity_store import EntityStore
+from src.particles import ParticleFrame, ParticleSystem
+from src.minimap import Minimap, sprite_markers
+from src.map_objects import ObjectIndex, ObjectTracker
+from src.spatial import CulledPyscrollGroup
+from src.chunk_renderer import BakedChunkRenderer
+from src.profiler import get_profiler
+from src.settings import (
+    MAPS_DIR,
+    START_MAP,
+    CAMERA_ZOOM,
+    MAP_CACHE_ENABLED,
+    MAP_SWAP_BUDGET_MS,
+    NAV_SEARCH_BUDGET_MS,
+    WORLD_CHUNK_THRESHOLD_TILES,
+    SPRITE_CULLING_ENABLED,
+    MAP_RENDERER,
+)
+
+
+logger = logging.getLogger(__name__)
+profiler = get_profiler()
+
+# Group layer of sprites; tile layers from this one up are drawn over them
+SPRITE_LAYER = 7
+# Pixels added around the view when culling, so sprites drawn between two
+# simulation positions are not culled by their current rect
+_INTERPOLATION_MARGIN = 64
+
+
+class SpriteEntry(NamedTuple):
+    """One sprite as captured for a render snapshot."""
+
+    key: object  # the sprite, to track its drawn area between frames
+    image: pygame.Surface
+    layer: int
+    topleft: Tuple[int, int]
+    size: Tuple[int, int]
+    # Positions to interpolate between; None when the sprite did not move
+    previous: Optional[Tuple[float, float]]
+    position: Optional[Tuple[float, float]]
+    blendmode: Optional[int]
+
+
+class MapSnapshot(NamedTuple):
+    """What `Map.render_snapshot` needs to draw a frame, captured after a tick.
+
+    Immutable: the simulation thread may keep ticking while it is drawn.
+    """
+
+    map_layer: object
+    tmx_data: object
+    world: Optional[ChunkedWorld]
+    velocity: Tuple[float, float]
+    focus: Optional[SpriteEntry]  # the player, whom the camera follows
+    sprites: Tuple[SpriteEntry, ...]  # in draw order
+    particles: Optional[ParticleFrame]
+
+
+def _interpolated_topleft(entry: SpriteEntry, alpha: float) -> Tuple[int, int]:
+    previous, position = entry.previous, entry.position
+    if previous is None:
+        return entry.topleft
+    return (
+        int(previous[0] + (position[0] - previous[0]) * alpha),
+        int(previous[1] + (position[1] - previous[1]) * alpha),
+    )
+
+
+class MapState(dict):
+    """Mutable state of one map (opened chests, switches, ...), kept in saves.
+
+    A plain dict whose `revision` goes up on every change, so saves re-encode
+    only the maps that changed. Values should be JSON-compatible and replaced
+    rather than mutated in place (in-place edits are not seen as changes).
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.revision = 0
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.revision += 1
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self.revision += 1
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self.revision += 1
+
+    def pop(self, *args):
+        self.revision += 1
+        return super().pop(*args)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.revision += 1
+        return super().setdefault(key, default)
+
+    def clear(self) -> None:
+        super().clear()
+        self.revision += 1
+
 
 class Map:
     """Loads Tiled TMX maps and renders them with pyscroll.
@@ -21,22 +135,265 @@ class Map:
         self.tmx_data = None
         self.map_layer = None
         self.group = None
+        self.player = None
+        self.current_map = None
+        # Chunk streamer, set when the current map is large enough to stream
+        self.world = None
+        # Overview of the current map (compiled maps only; see minimap.py)
+        self.minimap = None
+        # Solid tiles of the current map, shared with every entity on it
+        self.collision = None
+        # Pathfinding over `collision`, built on first use (see navigation);
+        # on streamed worlds, set when chunks of its window were not loaded
+        self._navigation = None
+        self._navigation_partial = False
+        # Mutable state per visited map, by map name (see state)
+        self.map_states = {}
+        # Crowds (NPCs, critters) updated in batch; see spawn_entity
+        self.entities = EntityStore()
+        # Particles and emitters (sparks, dust, ...), drawn over the map
+        self.particles = ParticleSystem()
+        # Triggers, warps and spawn points of the current map, and the
+        # player's overlaps with them (see map_objects.py)
+        self.objects = ObjectIndex(())
+        self._object_tracker = ObjectTracker(self.objects)
+        self._object_events = []
+        # Spawn point (object name) to place the player at on the next install
+        self._arrival = None
+        # Decodes maps off the main thread; shared by every Map
+        self.loader = get_map_loader()
+        # Last frame drawn in dirty-rect mode: camera and sprite areas
+        self._last_camera = None
+        self._last_drawn = {}
+        self._particles_drawn = False
+        # In-flight asynchronous transition (see request_map)
+        self._pending_map = None
+        self._pending_future = None
+        self._pending_steps = None
+        # Main-thread time (s) left this frame for the transition and path
+        # searches; update runs once per tick, several times a frame
+        self._swap_budget_s = self._nav_budget_s = 0.0
+        self.begin_frame()
+        # Set when the camera, chunk streaming and drawing run on another
+        # thread than update (see capture and render_snapshot); streamed
+        # worlds replaced meanwhile are closed by that thread
+        self.render_owns_camera = False
+        self._retired_worlds = []
 
         self.switch_map(START_MAP)
-        self.player = None
 
-    def switch_map(self, map :str):
-        """Load a TMX map and set up the scrolling renderer.
+    def switch_map(self, map :str, spawn: Optional[str] = None):
+        """Load a TMX map and set up the scrolling renderer, synchronously.
+
+        With MAP_CACHE_ENABLED the map comes from its precompiled binary cache
+        (see `map_cache`) and `tmx_data` is a `CompiledMap`; otherwise the TMX
+        is parsed with pytmx and `tmx_data` is a pytmx `TiledMap`. Maps already
+        prefetched by the loader skip decoding.
+
+        Args:
+            map (str): Map basename without extension (e.g. "map0").
+            spawn (str): Name of the object to place the player on.
+        """
+        self._cancel_transition()
+        if MAP_CACHE_ENABLED:
+            self.load_decoded(self.loader.load(map), spawn)
+            return
+        self._arrival = spawn
+        from pytmx import load_pygame
+
+        tmx_data = load_pygame(str(MAPS_DIR / f'{map}.tmx'))
+        map_data = pyscroll.data.TiledMapData(tmx_data)
+        self._install(map, tmx_data, self._build_renderer(map_data))
+
+    def load_decoded(self, decoded: DecodedMap, spawn: Optional[str] = None) -> None:
+        """Install an already decoded map synchronously."""
+        self._cancel_transition()
+        self._arrival = spawn
+        if decoded.minimap is None:
+            # Blocking anyway: build it here rather than wait on the loader
+            decoded = dataclasses.replace(decoded, minimap=Minimap.from_map(decoded.compiled, decoded.pixels))
+        for _ in self._finalize_steps(decoded):
+            pass
+
+    def request_map(self, map: str, spawn: Optional[str] = None) -> None:
+        """Start a non-blocking transition to another map.
+
+        The map is decoded on the loader thread (or taken from its LRU when
+        prefetched); `update` then finishes the switch on the main thread,
+        spending at most MAP_SWAP_BUDGET_MS per frame. The current map keeps
+        rendering until the swap happens.
 
         Args:
             map (str): Map basename without extension (e.g. "map0").
+            spawn (str): Name of the object to place the player on (the
+                `target_spawn` of a warp).
+        """
+        if not MAP_CACHE_ENABLED:
+            self.switch_map(map, spawn)
+            return
+        self._cancel_transition()
+        self._arrival = spawn
+        self._pending_map = map
+        self._pending_future = self.loader.request(map)
+
+    @property
+    def is_loading(self) -> bool:
+        """True while an asynchronous map transition is in progress."""
+        return self._pending_map is not None
+
+    def _cancel_transition(self) -> None:
+        self._arrival = None
+        self._pending_map = None
+        self._pending_future = None
+        self._pending_steps = None
+
+    def begin_frame(self) -> None:
+        """Reset the per-frame budgets (MAP_SWAP_BUDGET_MS, NAV_SEARCH_BUDGET_MS).
+
+        Called once per frame before its ticks: the ticks of a frame share
+        the budgets instead of each spending them in full.
         """
-        tmx_path = MAPS_DIR / f'{map}.tmx'
-        self.tmx_data = load_pygame(str(tmx_path))
-        map_data = pyscroll.data.TiledMapData(self.tmx_data)
-        self.map_layer = pyscroll.BufferedRenderer(map_data, self.screen.get_size())
-        self.group = pyscroll.PyscrollGroup(map_layer=self.map_layer, default_layer=7)
-        self.map_layer.zoom = CAMERA_ZOOM
+        self._swap_budget_s = MAP_SWAP_BUDGET_MS / 1000.0
+        self._nav_budget_s = NAV_SEARCH_BUDGET_MS / 1000.0
+
+    def _advance_transition(self) -> None:
+        """Run finalize steps of a pending transition within the frame budget."""
+        if self._pending_map is None or self._swap_budget_s <= 0.0:
+            return
+        if self._pending_steps is None:
+            if not self._pending_future.done():
+                return
+            try:
+                decoded = self._pending_future.result()
+            except Exception:
+                logger.exception("Map transition to %s failed", self._pending_map)
+                self._cancel_transition()
+                return
+            self._pending_steps = self._finalize_steps(decoded)
+        start = time.perf_counter()
+        deadline = start + self._swap_budget_s
+        try:
+            for _ in self._pending_steps:
+                if time.perf_counter() >= deadline:
+                    return
+            self._cancel_transition()
+        finally:
+            self._swap_budget_s -= time.perf_counter() - start
+
+    def _finalize_steps(self, decoded: DecodedMap):
+        """Main-thread part of a map switch, as resumable steps.
+
+        Each `yield` is a point where the work may be resumed next frame.
+        """
+        compiled = decoded.compiled
+        minimap = decoded.minimap
+        # Maps decoded without one get it from the loader thread meanwhile
+        pending_minimap = self.loader.build_minimap(decoded) if minimap is None else None
+        images = map_cache.build_tile_images(compiled, decoded.pixels)
+        yield
+        world = None
+        if compiled.width * compiled.height >= WORLD_CHUNK_THRESHOLD_TILES and compiled.cache_path:
+            # Very large map: stream tile chunks around the camera
+            world = ChunkedWorld(ChunkSource(compiled.cache_path))
+            world.prime(self._view_tiles(compiled, self._camera_target()))
+            map_data = ChunkedMapData(compiled, world, images)
+        else:
+            map_data = map_cache.CompiledMapData(compiled, images)
+        yield
+        renderer = self._build_renderer(map_data)
+        yield
+        if isinstance(renderer, BakedChunkRenderer):
+            # Bake the arrival view over the budgeted steps, not in its first draw
+            for _ in renderer.bake_view(self._camera_target()):
+                yield
+        if pending_minimap is not None:
+            while not pending_minimap.done():
+                yield
+            minimap = pending_minimap.result()
+        self._install(decoded.name, compiled, renderer, world, minimap)
+
+    def _build_renderer(self, map_data):
+        """Create the map renderer selected by MAP_RENDERER."""
+        if MAP_RENDERER == "baked":
+            return BakedChunkRenderer(map_data, self.screen.get_size(), zoom=CAMERA_ZOOM, overlay_layer=SPRITE_LAYER)
+        if MAP_RENDERER != "pyscroll":
+            raise ValueError(f"unknown MAP_RENDERER: {MAP_RENDERER!r}")
+        # Pass the zoom up front so buffers are built once, at the zoomed size
+        return pyscroll.BufferedRenderer(map_data, self.screen.get_size(), zoom=CAMERA_ZOOM)
+
+    def _install(self, name: str, tmx_data, map_layer, world=None, minimap=None) -> None:
+        """Swap in a loaded map and prefetch the maps reachable from it."""
+        if self.world is not None:
+            if self.render_owns_camera:
+                self._retired_worlds.append(self.world)
+            else:
+                self.world.close()
+        self.world = world
+        self.particles.clear()
+        self.minimap = minimap
+        self.current_map = name
+        self.tmx_data = tmx_data
+        self.map_layer = map_layer
+        if world is not None:
+            # Solidity per resident chunk, evicted with it
+            self.collision = ChunkedCollisionGrid(tmx_data, world)
+        else:
+            self.collision = CollisionGrid.from_map(tmx_data)
+        self._navigation = None
+        # Carry existing sprites (player included) over to the new map's group
+        sprites = self.group.sprites() if self.group is not None else []
+        if SPRITE_CULLING_ENABLED:
+            self.group = CulledPyscrollGroup(map_layer=self.map_layer, default_layer=SPRITE_LAYER)
+            self.group.focus = self.player
+        else:
+            self.group = pyscroll.PyscrollGroup(map_layer=self.map_layer, default_layer=SPRITE_LAYER)
+        for sprite in sprites:
+            self.add_sprite(sprite)
+        self.objects = ObjectIndex(tmx_data.objects)
+        self._place_player(self._arrival)
+        self._arrival = None
+        if isinstance(tmx_data, map_cache.CompiledMap):
+            for neighbor in neighbor_maps(tmx_data):
+                self.loader.prefetch(neighbor)
+
+    def _place_player(self, spawn: Optional[str]) -> None:
+        """Center the player on a spawn object; arriving raises no enter events."""
+        self._object_events.clear()
+        player = self.player
+        if player is None:
+            self._object_tracker.reset(self.objects)
+            return
+        target = self.objects.named(spawn) if spawn else None
+        if target is not None:
+            x = target.x + (target.width or 0.0) / 2.0 - player.rect.width / 2.0
+            y = target.y + (target.height or 0.0) / 2.0 - player.rect.height / 2.0
+            player.position[:] = player.previous_position[:] = [x, y]
+            player.rect.topleft = (int(x), int(y))
+        elif spawn:
+            logger.warning("No spawn object %r on map %s", spawn, self.current_map)
+        self._object_tracker.reset(self.objects, [0], [tuple(player.rect)])
+
+    def take_object_events(self):
+        """Return and clear the player's object events since the last call.
+
+        Returns:
+            list[tuple[bool, object]]: (entered, object) pairs, True when the
+            player entered the object, False when it left it.
+        """
+        events, self._object_events = self._object_events, []
+        return events
+
+    def add_sprite(self, sprite):
+        """Add a sprite to the scrolling group.
+
+        Sprites with a `collision` attribute get the map's collision grid.
+
+        Args:
+            sprite (pygame.sprite.Sprite): The sprite to render and update.
+        """
+        if hasattr(sprite, 'collision'):
+            sprite.collision = self.collision
+        self.group.add(sprite)
 
     def add_player(self, player):
         """Add the player sprite to the scrolling group.
@@ -44,8 +401,128 @@ class Map:
         Args:
             player (pygame.sprite.Sprite): The player entity to render.
         """
-        self.group.add(player)
+        self.add_sprite(player)
         self.player = player
+        if isinstance(self.group, CulledPyscrollGroup):
+            self.group.focus = player
+        # Objects under the player from the start raise no enter events
+        self._object_tracker.reset(self.objects, [0], [tuple(player.rect)])
+
+    def spawn_entity(self, x: float, y: float, sprite: int = 0, **kwargs) -> int:
+        """Spawn a batched entity and add its sprite adapter to the group.
+
+        Args:
+            x (float): World x in pixels.
+            y (float): World y in pixels.
+            sprite (int): Animation set id (`entities.library.set_id(name)`).
+            **kwargs: Extra `EntityStore.spawn` arguments (size, speeds).
+
+        Returns:
+            int: Row of the entity in `entities`.
+        """
+        row = self.entities.spawn(x, y, sprite, **kwargs)
+        self.add_sprite(self.entities.view(row))
+        return row
+
+    def sprites_in_rect(self, rect) -> list:
+        """Return the sprites overlapping a world-pixel rect."""
+        if isinstance(self.group, CulledPyscrollGroup):
+            return self.group.index.query_rect(rect)
+        rect = pygame.Rect(rect)
+        return [sprite for sprite in self.group.sprites() if sprite.rect.colliderect(rect)]
+
+    def sprites_in_radius(self, center, radius: float) -> list:
+        """Return the sprites whose center lies within `radius` pixels of `center`."""
+        if isinstance(self.group, CulledPyscrollGroup):
+            return self.group.index.query_radius(center, radius)
+        cx, cy = center
+        return [
+            sprite for sprite in self.group.sprites()
+            if (sprite.rect.centerx - cx) ** 2 + (sprite.rect.centery - cy) ** 2 <= radius * radius
+        ]
+
+    @property
+    def state(self) -> MapState:
+        """Mutable state of the current map, saved with the game."""
+        state = self.map_states.get(self.current_map)
+        if state is None:
+            state = self.map_states[self.current_map] = MapState()
+        return state
+
+    @property
+    def navigation(self) -> Navigator:
+        """Pathfinding on the current map (paths, flow fields for crowds).
+
+        Built on first use: maps nobody navigates skip its per-tile arrays.
+        On streamed worlds it covers the chunks around the camera and is
+        rebuilt (failing queued searches) when they change.
+        """
+        if self.world is not None:
+            area = self.world.area(self._view_tiles(self.tmx_data, self._camera_target()))
+            stale = self._navigation is None or self._navigation.bounds != area
+            if stale or (self._navigation_partial and self.collision.complete(area)):
+                if self._navigation is not None:
+                    self._navigation.cancel()
+                self._navigation = Navigator(self.collision, window=area)
+                self._navigation_partial = not self.collision.complete(area)
+        elif self._navigation is None:
+            self._navigation = Navigator(self.collision)
+        return self._navigation
+
+    def request_path(self, start, goal, method: str = "jps"):
+        """Queue a path search between two world pixels.
+
+        The search runs within the per-frame budget of `update`; poll the
+        returned request's `done`, then read its tile waypoints.
+
+        Args:
+            start (tuple[float, float]): Start point in world pixels.
+            goal (tuple[float, float]): Goal point in world pixels.
+            method (str): "jps" or "astar".
+
+        Returns:
+            PathRequest: The (possibly already completed) request.
+        """
+        navigation = self.navigation
+        return navigation.request_path(navigation.tile_at(*start), navigation.tile_at(*goal), method)
+
+    def tiles_changed(self, rect) -> None:
+        """Update what mirrors the tile layers after their data was edited.
+
+        Args:
+            rect (RectLike): Changed tiles, in tile coordinates.
+        """
+        if self.minimap is not None:
+            self.minimap.refresh(pygame.Rect(rect))
+
+    def memory_bytes(self) -> int:
+        """Rough size of the rebuildable render caches (baked chunks, minimap)."""
+        total = getattr(self.map_layer, "resident_bytes", 0)
+        if self.minimap is not None:
+            surface = self.minimap.surface
+            total += surface.get_width() * surface.get_height() * surface.get_bytesize()
+        return total
+
+    def trim_caches(self) -> None:
+        """Drop render caches outside the current view (they rebuild on use)."""
+        trim = getattr(self.map_layer, "trim", None)
+        if trim is not None:
+            trim()
+
+    def minimap_markers(self):
+        """Minimap markers of the group's sprites (see `sprite_markers`)."""
+        return sprite_markers(self.group.sprites(), self.player)
+
+    def steer_entities(self, rows, goal) -> None:
+        """Point batched entities toward a world pixel through one flow field.
+
+        Args:
+            rows (array-like): Rows of `entities` to steer.
+            goal (tuple[float, float]): Target in world pixels (e.g. the player).
+        """
+        store = self.entities
+        centers = store.position[rows] + store.size[rows] / 2.0
+        store.intent[rows] = self.navigation.steer(centers, self.navigation.tile_at(*goal))
 
     def update(self, dt: float):
         """Update sprites and camera.
@@ -54,10 +531,254 @@ class Map:
             dt (float): Delta time in seconds since the last frame, used for
                 framerate-independent sprite updates.
         """
+        # Finish a pending map transition, a budgeted slice per frame
+        with profiler.scope("map.transition"):
+            self._advance_transition()
+        # Queued path searches, within what is left of NAV_SEARCH_BUDGET_MS
+        if self._navigation is not None and self._nav_budget_s > 0.0:
+            with profiler.scope("map.navigation"):
+                start = time.perf_counter()
+                self._navigation.update(self._nav_budget_s * 1000.0)
+                self._nav_budget_s -= time.perf_counter() - start
+        # Move every batched entity in one pass; their rects follow lazily
+        with profiler.scope("map.entities"):
+            self.entities.update(dt, self.collision)
+            if isinstance(self.group, CulledPyscrollGroup):
+                # The group updates far sprites every few ticks, but the store
+                # moved them all: keep area queries over them exact
+                self.group.reindex(self.entities.crossed_cells(self.group.index.cell_size))
         # Propagate dt to sprites; pygame sprites can accept parameters in update()
-        self.group.update(dt)
+        with profiler.scope("map.sprites"):
+            self.group.update(dt)
+        with profiler.scope("map.particles"):
+            self.particles.update(dt)
+        if self.player is not None and len(self.objects):
+            with profiler.scope("map.objects"):
+                entered, exited = self._object_tracker.update([0], [tuple(self.player.rect)])
+                objects = self.objects.objects
+                self._object_events.extend((False, objects[row]) for row in exited[:, 1])
+                self._object_events.extend((True, objects[row]) for row in entered[:, 1])
+        if self.render_owns_camera:
+            return
+        if self.world is not None:
+            # Stream chunks for where the camera is about to be, before
+            # centering makes the renderer draw newly exposed tiles
+            with profiler.scope("map.streaming"):
+                self.world.update(self._view_tiles(self.tmx_data, self.player.rect.center), self._velocity())
         self.group.center(self.player.rect.center)
 
-    def render(self, screen: Screen) -> None:
-        """Render the current map and sprites to the screen display."""
-        self.group.draw(self.screen.get_display())
+    def _camera_target(self):
+        """World pixel the camera follows (the player, or the map origin)."""
+        return self.player.rect.center if self.player is not None else (0, 0)
+
+    def _view_tiles(self, tmx_data, center) -> pygame.Rect:
+        """Tile rect seen by the camera when centered on `center` (pixels)."""
+        width, height = self.screen.get_size()
+        view = pygame.Rect(0, 0, int(width / CAMERA_ZOOM), int(height / CAMERA_ZOOM))
+        view.center = center
+        tw, th = tmx_data.tilewidth, tmx_data.tileheight
+        left, top = view.left // tw, view.top // th
+        return pygame.Rect(left, top, view.right // tw - left + 1, view.bottom // th - top + 1)
+
+    def _velocity(self):
+        """Player movement over the last tick, in pixels."""
+        return (
+            self.player.position[0] - self.player.previous_position[0],
+            self.player.position[1] - self.player.previous_position[1],
+        )
+
+    def render(self, screen: Screen, alpha: float = 1.0) -> None:
+        """Render the current map and sprites to the screen display.
+
+        Args:
+            screen (Screen): Screen wrapper to draw on.
+            alpha (float): Fraction of a tick elapsed since the last update.
+                Sprites exposing `previous_position` are drawn between their
+                previous and current positions, and the camera follows the
+                interpolated player.
+        """
+        if isinstance(self.group, CulledPyscrollGroup):
+            # Only sprites near the view can be drawn; the margin covers the
+            # gap between a sprite's rect and its interpolated position
+            if self.player is not None:
+                self.group.center(self.player.rect.center)
+            sprites = self.group.visible_sprites(margin=_INTERPOLATION_MARGIN)
+        else:
+            sprites = self.group.sprites()
+        # Temporarily move rects to their interpolated positions
+        restore = []
+        for sprite in sprites:
+            previous = getattr(sprite, 'previous_position', None)
+            if previous is None:
+                continue
+            position = sprite.position
+            if previous[0] == position[0] and previous[1] == position[1]:
+                continue
+            restore.append((sprite, sprite.rect.topleft))
+            sprite.rect.topleft = (
+                int(previous[0] + (position[0] - previous[0]) * alpha),
+                int(previous[1] + (position[1] - previous[1]) * alpha),
+            )
+        if self.player is not None:
+            self.group.center(self.player.rect.center)
+        self._report_particles(self.particles.count)
+        if not self.screen.dirty_rects_enabled or self._report_changes(
+            self.map_layer, [(sprite, sprite.image, sprite.rect) for sprite in sprites]
+        ):
+            with profiler.scope("map.draw"):
+                if isinstance(self.group, CulledPyscrollGroup):
+                    self.group.draw(self.screen.get_display(), sprites)
+                else:
+                    self.group.draw(self.screen.get_display())
+            with profiler.scope("map.particles"):
+                self.particles.draw(self.screen.get_display(), self.map_layer, alpha)
+        for sprite, topleft in restore:
+            sprite.rect.topleft = topleft
+
+    def capture(self) -> MapSnapshot:
+        """Capture what the next frames need to draw (simulation thread).
+
+        Sprites are culled around the player with the same margin as
+        `render`, since the camera is only placed when the snapshot is drawn.
+        """
+        focus = None
+        if isinstance(self.group, CulledPyscrollGroup):
+            width, height = self.screen.get_size()
+            view = pygame.Rect(0, 0, int(width / CAMERA_ZOOM), int(height / CAMERA_ZOOM))
+            view.center = self._camera_target()
+            view.inflate_ip(_INTERPOLATION_MARGIN * 2, _INTERPOLATION_MARGIN * 2)
+            order = self.group._order
+            gl = self.group.get_layer_of_sprite
+            sprites = sorted(self.group.index.query_rect(view), key=lambda s: (gl(s), order[s]))
+        else:
+            gl = self.group.get_layer_of_sprite
+            sprites = self.group.sprites()
+        entries = []
+        for sprite in sprites:
+            rect = sprite.rect
+            previous = getattr(sprite, 'previous_position', None)
+            position = None
+            if previous is not None:
+                position = sprite.position
+                if previous[0] == position[0] and previous[1] == position[1]:
+                    previous = None
+                else:
+                    previous = (previous[0], previous[1])
+                    position = (position[0], position[1])
+            entry = SpriteEntry(
+                sprite, sprite.image, gl(sprite), rect.topleft, rect.size,
+                previous, position, getattr(sprite, 'blendmode', None),
+            )
+            if sprite is self.player:
+                focus = entry
+            entries.append(entry)
+        velocity = self._velocity() if self.world is not None else (0.0, 0.0)
+        particles = self.particles.capture() if self.particles.count else None
+        return MapSnapshot(self.map_layer, self.tmx_data, self.world, velocity, focus, tuple(entries), particles)
+
+    def render_snapshot(self, screen: Screen, snapshot: MapSnapshot, alpha: float = 1.0) -> None:
+        """Draw a captured frame: camera, chunk streaming and sprites.
+
+        The thread calling this owns the renderer (see `render_owns_camera`);
+        the map itself may be ticking on another thread meanwhile.
+
+        Args:
+            screen (Screen): Screen wrapper to draw on.
+            snapshot (MapSnapshot): Frame returned by `capture`.
+            alpha (float): Fraction of a tick elapsed since that capture.
+        """
+        map_layer, world = snapshot.map_layer, snapshot.world
+        if snapshot.focus is not None:
+            # Camera on the interpolated player, streaming chunks first
+            center = pygame.Rect(_interpolated_topleft(snapshot.focus, alpha), snapshot.focus.size).center
+            if world is not None:
+                with profiler.scope("map.streaming"):
+                    world.update(self._view_tiles(snapshot.tmx_data, center), snapshot.velocity)
+            map_layer.center(center)
+        # Worlds replaced by a map switch, once no snapshot can draw them
+        retired = self._retired_worlds
+        for old in [old for old in retired if old is not world]:
+            retired.remove(old)
+            old.close()
+        placed = [(entry, pygame.Rect(_interpolated_topleft(entry, alpha), entry.size)) for entry in snapshot.sprites]
+        ox, oy = map_layer.get_center_offset()
+        view = map_layer.view_rect
+        self._report_particles(snapshot.particles is not None)
+        if not self.screen.dirty_rects_enabled or self._report_changes(
+            map_layer, [(entry.key, entry.image, rect) for entry, rect in placed]
+        ):
+            surfaces = []
+            for entry, rect in placed:
+                if rect.colliderect(view):
+                    if entry.blendmode is None:
+                        surfaces.append((entry.image, rect.move(ox, oy), entry.layer))
+                    else:
+                        surfaces.append((entry.image, rect.move(ox, oy), entry.layer, entry.blendmode))
+            with profiler.scope("map.draw"):
+                display = screen.get_display()
+                map_layer.draw(display, display.get_rect(), surfaces)
+            if snapshot.particles is not None:
+                with profiler.scope("map.particles"):
+                    self.particles.draw(display, map_layer, alpha, snapshot.particles)
+
+    def _report_particles(self, live: bool) -> None:
+        """Redraw everything while particles are shown (dirty-rect mode).
+
+        They move every frame, over the whole view: tracking their areas
+        would cost more than presenting the frame.
+        """
+        if live or self._particles_drawn:
+            self.screen.request_full_redraw()
+        self._particles_drawn = bool(live)
+
+    def _report_changes(self, map_layer, sprites) -> bool:
+        """Report this frame's changed regions to the screen (dirty-rect mode).
+
+        The whole display is dirty when the camera moved, the map changed,
+        tiles are animated or a full redraw was requested; otherwise only the
+        old and new areas of sprites whose image or position changed are.
+
+        Args:
+            map_layer: Renderer about to draw the frame, already centered.
+            sprites (list): (sprite, image, rect) about to be drawn, rects at
+                their drawn positions.
+
+        Returns:
+            bool: False for a static frame, which need not be drawn at all.
+        """
+        screen = self.screen
+        ox, oy = map_layer.get_center_offset()
+        zoom = map_layer.zoom
+        view = map_layer.view_rect
+        drawn = {}
+        for sprite, image, rect in sprites:
+            if rect.colliderect(view):
+                # Screen area covered once the zoom buffer is scaled, rounded outward
+                area = pygame.Rect(
+                    math.floor((rect.x + ox) * zoom) - 1,
+                    math.floor((rect.y + oy) * zoom) - 1,
+                    math.ceil(rect.width * zoom) + 2,
+                    math.ceil(rect.height * zoom) + 2,
+                )
+                drawn[sprite] = (image, area)
+        previous, self._last_drawn = self._last_drawn, drawn
+        camera = (id(map_layer), ox, oy)
+        animated = bool(getattr(map_layer.data, '_animation_queue', None))
+        if screen.full_redraw_pending or animated or camera != self._last_camera:
+            self._last_camera = camera
+            screen.mark_full()
+            return True
+        changed = False
+        for sprite, (image, area) in drawn.items():
+            old = previous.pop(sprite, None)
+            if old is not None and old[0] is image and old[1] == area:
+                continue
+            screen.mark_dirty(area)
+            if old is not None:
+                screen.mark_dirty(old[1])
+            changed = True
+        # Sprites that left the view or the group
+        for _, area in previous.values():
+            screen.mark_dirty(area)
+            changed = True
+        return changed
@@ -0,0 +1,752 @@
+"""Precompiled binary map cache.
+
+Parsing TMX XML with pytmx on every map switch dominates transition time on
+large maps. This module compiles each `.tmx` file once into a compact binary
+cache file and loads it back through a memory map:
+
+- Header: magic, format version, source mtime/size and SHA-1 of the source.
+- Dependencies: mtime/size/SHA-1 and path (relative to the map) of every
+  other file compiled in, i.e. external tilesets (`.tsx`), whose tile
+  properties (solid flags) and animations are copied into the metadata.
+- Metadata: JSON block (map properties, tileset metadata, object layers).
+- Tile layers: packed little-endian uint16 arrays (one gid per tile).
+
+Cache files live under MAP_CACHE_DIR and are rebuilt automatically when the
+source TMX or one of its dependencies changes. A rebuilt cache is written
+beside the old one (`<map>.1.rmap`) when that one cannot be replaced, as on
+Windows while a loaded map still has it memory-mapped. Run `python -m src.map_cache`
+to precompile every map under MAPS_DIR.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+
+import numpy as np
+import pygame
+import pyscroll
+from pyscroll.common import rect_to_bb
+
+from src.settings import MAPS_DIR, MAP_CACHE_DIR
+
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_MAGIC = b"RMAP"
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".rmap"
+# magic, version, source mtime (ns), source size, source sha1, dependency
+# table length, metadata length
+_HEADER = struct.Struct("<4sHqQ20sII")
+# Dependency table entry: path length, mtime (ns), size, sha1, then the path
+_DEPENDENCY = struct.Struct("<HqQ20s")
+
+# A source file as recorded in a cache: path, mtime (ns), size, SHA-1
+SourceStamp = Tuple[str, int, int, bytes]
+# Tiled stores flip/rotation flags in the top bits of each gid
+_GID_FLAGS_MASK = 0xE0000000
+_GID_MAX = 0xFFFF
+
+
+# ---------- Compiled data model ----------
+@dataclass
+class TilesetInfo:
+    """Tileset metadata needed to slice tile images at load time."""
+
+    firstgid: int
+    name: str
+    tilewidth: int
+    tileheight: int
+    tilecount: int
+    columns: int
+    spacing: int
+    margin: int
+    image: Optional[Path]
+    trans: Optional[str]
+    # local tile id -> properties ("type"/"class" included when set)
+    tile_properties: Dict[int, dict] = field(default_factory=dict)
+    # local tile id -> [(local frame id, duration ms), ...]
+    animations: Dict[int, List[Tuple[int, int]]] = field(default_factory=dict)
+
+
+@dataclass
+class TileLayer:
+    """A tile layer as a (height, width) uint16 array of gids (0 = empty)."""
+
+    name: str
+    visible: bool
+    data: np.ndarray
+    properties: dict = field(default_factory=dict)
+
+
+@dataclass
+class MapObject:
+    """Bounds and properties of a Tiled object (shapes reduced to bounds)."""
+
+    id: int
+    name: str
+    type: str
+    x: float
+    y: float
+    width: float
+    height: float
+    gid: int = 0
+    properties: dict = field(default_factory=dict)
+
+
+@dataclass
+class ObjectLayer:
+    name: str
+    visible: bool
+    objects: List[MapObject]
+    properties: dict = field(default_factory=dict)
+
+
+class CompiledMap:
+    """Map data loaded from the binary cache.
+
+    Exposes the subset of the pytmx `TiledMap` attributes the game relies on
+    (width, height, tilewidth, tileheight, properties) plus array-backed
+    tile layers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        meta: dict,
+        layers: List[TileLayer],
+        source: Optional[Path] = None,
+        buffer: Optional[mmap.mmap] = None,
+    ) -> None:
+        self.name = name
+        self.filename = str(source) if source else None
+        self.width: int = meta["width"]
+        self.height: int = meta["height"]
+        self.tilewidth: int = meta["tilewidth"]
+        self.tileheight: int = meta["tileheight"]
+        self.properties: dict = meta.get("properties", {})
+        base_dir = source.parent if source else Path(".")
+        self.tilesets: List[TilesetInfo] = [_tileset_from_meta(t, base_dir) for t in meta["tilesets"]]
+        self.layers: List[TileLayer] = layers
+        self.object_layers: List[ObjectLayer] = [_object_layer_from_meta(o) for o in meta["object_layers"]]
+        # Cache file this map was read from (set by read_cache)
+        self.cache_path: Optional[Path] = None
+        # Keep the memory map alive as long as the layer arrays view it
+        self._buffer = buffer
+
+    @property
+    def visible_tile_layers(self) -> List[int]:
+        return [i for i, layer in enumerate(self.layers) if layer.visible]
+
+    @property
+    def objects(self) -> Iterator[MapObject]:
+        """Iterate over the objects of every object layer."""
+        for layer in self.object_layers:
+            yield from layer.objects
+
+    def get_layer_by_name(self, name: str):
+        for layer in self.layers:
+            if layer.name == name:
+                return layer
+        for layer in self.object_layers:
+            if layer.name == name:
+                return layer
+        raise ValueError(f"Layer not found: {name}")
+
+    def get_tile_properties(self, gid: int) -> Optional[dict]:
+        """Return the properties of a tile gid, or None when it has none."""
+        tileset = self.tileset_for_gid(gid)
+        if tileset is None:
+            return None
+        return tileset.tile_properties.get(gid - tileset.firstgid)
+
+    def tileset_for_gid(self, gid: int) -> Optional[TilesetInfo]:
+        found = None
+        for tileset in self.tilesets:
+            if tileset.firstgid <= gid:
+                found = tileset
+        return found
+
+    @property
+    def max_gid(self) -> int:
+        if not self.tilesets:
+            return 0
+        last = max(self.tilesets, key=lambda t: t.firstgid)
+        return last.firstgid + last.tilecount - 1
+
+
+# ---------- TMX compilation ----------
+def _parse_properties(element: Optional[ET.Element]) -> dict:
+    props: dict = {}
+    if element is None:
+        return props
+    for prop in element.findall("property"):
+        name = prop.get("name")
+        kind = prop.get("type", "string")
+        raw = prop.get("value", prop.text or "")
+        if kind == "int":
+            value = int(raw)
+        elif kind == "float":
+            value = float(raw)
+        elif kind == "bool":
+            value = raw == "true"
+        else:
+            value = raw
+        props[name] = value
+    return props
+
+
+def _parse_tileset(element: ET.Element, base_dir: Path) -> dict:
+    firstgid = int(element.get("firstgid", 1))
+    source = element.get("source")
+    tsx_path = None
+    if source:
+        tsx_path = (base_dir / source).resolve()
+        element = ET.parse(tsx_path).getroot()
+        base_dir = tsx_path.parent
+    image = element.find("image")
+    image_path = None
+    trans = None
+    if image is not None:
+        image_path = os.path.normpath(base_dir / image.get("source"))
+        trans = image.get("trans")
+    tile_properties: Dict[str, dict] = {}
+    animations: Dict[str, list] = {}
+    for tile in element.findall("tile"):
+        local_id = tile.get("id")
+        props = _parse_properties(tile.find("properties"))
+        kind = tile.get("type") or tile.get("class")
+        if kind:
+            props.setdefault("type", kind)
+        if props:
+            tile_properties[local_id] = props
+        animation = tile.find("animation")
+        if animation is not None:
+            animations[local_id] = [
+                (int(frame.get("tileid")), int(frame.get("duration")))
+                for frame in animation.findall("frame")
+            ]
+    return {
+        "firstgid": firstgid,
+        "name": element.get("name", ""),
+        "tilewidth": int(element.get("tilewidth")),
+        "tileheight": int(element.get("tileheight")),
+        "tilecount": int(element.get("tilecount", 0)),
+        "columns": int(element.get("columns", 0)),
+        "spacing": int(element.get("spacing", 0)),
+        "margin": int(element.get("margin", 0)),
+        "image": image_path,
+        "trans": trans,
+        "tile_properties": tile_properties,
+        "animations": animations,
+        # External .tsx file the tileset was read from, if any
+        "source": str(tsx_path) if tsx_path else None,
+    }
+
+
+def _decode_layer_data(data: ET.Element, width: int, height: int) -> np.ndarray:
+    encoding = data.get("encoding")
+    compression = data.get("compression")
+    if encoding == "csv":
+        gids = np.array([int(v) for v in data.text.replace("\n", "").split(",") if v.strip()],
+                        dtype=np.uint32)
+    elif encoding == "base64":
+        raw = base64.b64decode(data.text.strip())
+        if compression == "zlib":
+            raw = zlib.decompress(raw)
+        elif compression == "gzip":
+            raw = gzip.decompress(raw)
+        elif compression:
+            raise ValueError(f"Unsupported TMX layer compression: {compression}")
+        gids = np.frombuffer(raw, dtype="<u4").astype(np.uint32)
+    else:
+        gids = np.array([int(tile.get("gid", 0)) for tile in data.findall("tile")], dtype=np.uint32)
+    if gids.size != width * height:
+        raise ValueError(f"Layer data has {gids.size} tiles, expected {width * height}")
+    if np.any(gids & _GID_FLAGS_MASK):
+        logger.warning("Flipped/rotated tiles are not supported by the map cache; flags dropped")
+        gids &= ~np.uint32(_GID_FLAGS_MASK)
+    if gids.size and int(gids.max()) > _GID_MAX:
+        raise ValueError("Tile gid exceeds uint16 range")
+    return gids.astype("<u2").reshape(height, width)
+
+
+def _parse_object(obj: ET.Element) -> dict:
+    props = _parse_properties(obj.find("properties"))
+    return {
+        "id": int(obj.get("id", 0)),
+        "name": obj.get("name", ""),
+        "type": obj.get("type") or obj.get("class") or "",
+        "x": float(obj.get("x", 0)),
+        "y": float(obj.get("y", 0)),
+        "width": float(obj.get("width", 0)),
+        "height": float(obj.get("height", 0)),
+        "gid": int(obj.get("gid", 0)) & ~_GID_FLAGS_MASK,
+        "properties": props,
+    }
+
+
+def _collect_layers(parent: ET.Element, width: int, height: int, visible: bool,
+                    tile_layers: list, object_layers: list) -> None:
+    """Walk layers in document order, flattening layer groups."""
+    for child in parent:
+        child_visible = visible and child.get("visible", "1") != "0"
+        if child.tag == "layer":
+            tile_layers.append((
+                {
+                    "name": child.get("name", ""),
+                    "visible": child_visible,
+                    "properties": _parse_properties(child.find("properties")),
+                },
+                _decode_layer_data(child.find("data"), width, height),
+            ))
+        elif child.tag == "objectgroup":
+            object_layers.append({
+                "name": child.get("name", ""),
+                "visible": child_visible,
+                "properties": _parse_properties(child.find("properties")),
+                "objects": [_parse_object(obj) for obj in child.findall("object")],
+            })
+        elif child.tag == "group":
+            _collect_layers(child, width, height, child_visible, tile_layers, object_layers)
+
+
+def compile_tmx(tmx_path: Path) -> Tuple[dict, List[np.ndarray]]:
+    """Parse a TMX file into cache metadata and packed layer arrays.
+
+    Args:
+        tmx_path (Path): Source TMX map.
+
+    Returns:
+        tuple[dict, list[np.ndarray]]: JSON-serializable metadata and one
+        (height, width) uint16 array per tile layer.
+    """
+    root = ET.parse(tmx_path).getroot()
+    if root.get("orientation", "orthogonal") != "orthogonal" or root.get("infinite", "0") != "0":
+        raise ValueError("Map cache only supports finite orthogonal maps")
+    width, height = int(root.get("width")), int(root.get("height"))
+    base_dir = tmx_path.parent
+    tile_layers: list = []
+    object_layers: list = []
+    _collect_layers(root, width, height, True, tile_layers, object_layers)
+    tilesets = []
+    for element in root.findall("tileset"):
+        tileset = _parse_tileset(element, base_dir)
+        # Store paths relative to the map so caches stay relocatable
+        for key in ("image", "source"):
+            if tileset[key]:
+                tileset[key] = Path(os.path.relpath(tileset[key], base_dir)).as_posix()
+        tilesets.append(tileset)
+    meta = {
+        "width": width,
+        "height": height,
+        "tilewidth": int(root.get("tilewidth")),
+        "tileheight": int(root.get("tileheight")),
+        "properties": _parse_properties(root.find("properties")),
+        "tilesets": tilesets,
+        "layers": [info for info, _ in tile_layers],
+        "object_layers": object_layers,
+    }
+    return meta, [array for _, array in tile_layers]
+
+
+def _tileset_from_meta(meta: dict, base_dir: Path) -> TilesetInfo:
+    return TilesetInfo(
+        firstgid=meta["firstgid"],
+        name=meta["name"],
+        tilewidth=meta["tilewidth"],
+        tileheight=meta["tileheight"],
+        tilecount=meta["tilecount"],
+        columns=meta["columns"],
+        spacing=meta["spacing"],
+        margin=meta["margin"],
+        image=Path(os.path.normpath(base_dir / meta["image"])) if meta["image"] else None,
+        trans=meta["trans"],
+        tile_properties={int(k): v for k, v in meta["tile_properties"].items()},
+        animations={int(k): [tuple(f) for f in v] for k, v in meta["animations"].items()},
+    )
+
+
+def _object_layer_from_meta(meta: dict) -> ObjectLayer:
+    return ObjectLayer(
+        name=meta["name"],
+        visible=meta["visible"],
+        objects=[MapObject(**obj) for obj in meta["objects"]],
+        properties=meta.get("properties", {}),
+    )
+
+
+# ---------- Cache files ----------
+def cache_path_for(tmx_path: Path) -> Path:
+    """Return the cache file used for a TMX source."""
+    tmx_path = Path(tmx_path).resolve()
+    try:
+        relative = tmx_path.relative_to(MAPS_DIR.resolve())
+    except ValueError:
+        digest = hashlib.sha1(str(tmx_path).encode("utf-8")).hexdigest()[:12]
+        relative = Path(f"{tmx_path.stem}-{digest}")
+    return MAP_CACHE_DIR / relative.with_suffix(CACHE_SUFFIX)
+
+
+def _beside(cache_path: Path) -> Path:
+    """Alternate cache file, written when `cache_path` cannot be replaced."""
+    return cache_path.with_name(f"{cache_path.stem}.1{cache_path.suffix}")
+
+
+def _file_sha1(path: Path) -> bytes:
+    return hashlib.sha1(path.read_bytes()).digest()
+
+
+def _stamp(path: Path, name: str) -> SourceStamp:
+    """Current mtime, size and hash of a source file, recorded as `name`."""
+    stat = path.stat()
+    return name, stat.st_mtime_ns, stat.st_size, _file_sha1(path)
+
+
+def _pack_dependencies(dependencies: List[SourceStamp]) -> bytes:
+    table = bytearray()
+    for name, mtime_ns, size, sha1 in dependencies:
+        encoded = name.encode("utf-8")
+        table += _DEPENDENCY.pack(len(encoded), mtime_ns, size, sha1) + encoded
+    return bytes(table)
+
+
+def _pack_header(source_stat: Tuple[int, int], source_sha1: bytes, dependencies: bytes, meta_len: int) -> bytes:
+    return _HEADER.pack(CACHE_MAGIC, CACHE_VERSION, source_stat[0], source_stat[1],
+                        source_sha1, len(dependencies), meta_len)
+
+
+def write_cache(path: Path, meta: dict, layers: List[np.ndarray],
+                source_stat: Tuple[int, int] = (0, 0), source_sha1: bytes = b"\0" * 20,
+                dependencies: List[SourceStamp] = ()) -> Path:
+    """Write metadata and layer arrays to a cache file atomically.
+
+    A file that is memory-mapped or open cannot be replaced on Windows; the
+    cache then goes to the alternate file beside it (see `load_map`).
+
+    Args:
+        path (Path): Destination cache file.
+        meta (dict): Map metadata as produced by `compile_tmx`.
+        layers (list[np.ndarray]): uint16 layer arrays in `meta["layers"]` order.
+        source_stat (tuple[int, int]): Source mtime (ns) and size, for invalidation.
+        source_sha1 (bytes): Source SHA-1 digest, for invalidation.
+        dependencies (list[SourceStamp]): Other files compiled in (paths
+            relative to the source's folder), for invalidation.
+
+    Returns:
+        Path: The file written: `path`, or the one beside it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = _pack_dependencies(list(dependencies))
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    # Pad so layer arrays start on an 8-byte boundary
+    padding = (-(_HEADER.size + len(table) + len(meta_bytes))) % 8
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as fh:
+        fh.write(_pack_header(source_stat, source_sha1, table, len(meta_bytes) + padding))
+        fh.write(table)
+        fh.write(meta_bytes + b" " * padding)
+        for array in layers:
+            fh.write(np.ascontiguousarray(array, dtype="<u2").tobytes())
+    for target, other in ((path, _beside(path)), (_beside(path), path)):
+        try:
+            os.replace(tmp_path, target)
+        except PermissionError:
+            continue
+        # The other file is now stale; it may still be mapped
+        try:
+            other.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return target
+    os.remove(tmp_path)
+    raise PermissionError(f"Cannot replace {path} nor the file beside it")
+
+
+def _read_header(fh) -> Optional[Tuple[SourceStamp, List[SourceStamp], int]]:
+    """Source stamp, dependency stamps and metadata length of an open cache file."""
+    raw = fh.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, mtime_ns, size, sha1, table_len, meta_len = _HEADER.unpack(raw)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+    table = fh.read(table_len)
+    if len(table) < table_len:
+        return None
+    dependencies = []
+    offset = 0
+    try:
+        while offset < table_len:
+            name_len, dep_mtime, dep_size, dep_sha1 = _DEPENDENCY.unpack_from(table, offset)
+            offset += _DEPENDENCY.size
+            dependencies.append((table[offset:offset + name_len].decode("utf-8"), dep_mtime, dep_size, dep_sha1))
+            offset += name_len
+    except (struct.error, UnicodeDecodeError):
+        return None
+    return ("", mtime_ns, size, sha1), dependencies, meta_len
+
+
+def _check_stamp(path: Path, stamp: SourceStamp) -> Optional[SourceStamp]:
+    """Compare a file with its recorded stamp.
+
+    Returns:
+        SourceStamp | None: The stamp to record from now on (the same one,
+        or the new mtime of a file touched without changes), or None when
+        the file changed or is gone.
+    """
+    name, mtime_ns, size, sha1 = stamp
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if stat.st_mtime_ns == mtime_ns and stat.st_size == size:
+        return stamp
+    if stat.st_size == size and _file_sha1(path) == sha1:
+        return name, stat.st_mtime_ns, size, sha1
+    return None
+
+
+def is_cache_fresh(tmx_path: Path, cache_path: Path) -> bool:
+    """Return True when the cache file matches the current TMX and its dependencies.
+
+    For each file the mtime and size are checked first; on mismatch the
+    content hash decides, so touching a file without changing it does not
+    force a rebuild. The header then records the new mtime, so the file is
+    not hashed again on every load.
+    """
+    if not cache_path.exists():
+        return False
+    with open(cache_path, "rb") as fh:
+        header = _read_header(fh)
+    if header is None:
+        return False
+    source, dependencies, meta_len = header
+    checked = [_check_stamp(tmx_path, source)]
+    checked += [_check_stamp(tmx_path.parent / stamp[0], stamp) for stamp in dependencies]
+    if any(stamp is None for stamp in checked):
+        return False
+    if checked != [source] + dependencies:
+        # Same contents, new mtimes: rewrite the header in place (same size)
+        _, mtime_ns, size, sha1 = checked[0]
+        table = _pack_dependencies(checked[1:])
+        try:
+            with open(cache_path, "r+b") as fh:
+                fh.write(_pack_header((mtime_ns, size), sha1, table, meta_len) + table)
+        except OSError:
+            logger.debug("Could not update the header of %s", cache_path)
+    return True
+
+
+def compile_map(tmx_path: Path, cache_path: Optional[Path] = None) -> Path:
+    """Compile a TMX file into its binary cache and return the file written."""
+    tmx_path = Path(tmx_path)
+    cache_path = cache_path or cache_path_for(tmx_path)
+    meta, layers = compile_tmx(tmx_path)
+    _, mtime_ns, size, sha1 = _stamp(tmx_path, "")
+    sources = dict.fromkeys(tileset["source"] for tileset in meta["tilesets"] if tileset.get("source"))
+    dependencies = [_stamp(tmx_path.parent / name, name) for name in sources]
+    cache_path = write_cache(cache_path, meta, layers, (mtime_ns, size), sha1, dependencies)
+    logger.info("Compiled map cache %s", cache_path)
+    return cache_path
+
+
+def read_cache_meta(cache_path: Path) -> Tuple[dict, int]:
+    """Return a cache file's metadata and the byte offset of its first layer."""
+    with open(cache_path, "rb") as fh:
+        header = _read_header(fh)
+        if header is None:
+            raise ValueError(f"Not a map cache file: {cache_path}")
+        meta_offset = fh.tell()
+        meta = json.loads(fh.read(header[2]))
+    return meta, meta_offset + header[2]
+
+
+def read_cache(cache_path: Path, name: str = "", source: Optional[Path] = None) -> CompiledMap:
+    """Memory-map a cache file and build a CompiledMap over it.
+
+    Tile layers are zero-copy numpy views into the memory map.
+    """
+    meta, offset = read_cache_meta(cache_path)
+    with open(cache_path, "rb") as fh:
+        buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    width, height = meta["width"], meta["height"]
+    layers: List[TileLayer] = []
+    for info in meta["layers"]:
+        data = np.frombuffer(buffer, dtype="<u2", count=width * height, offset=offset)
+        layers.append(TileLayer(info["name"], info["visible"], data.reshape(height, width),
+                                info.get("properties", {})))
+        offset += width * height * 2
+    compiled = CompiledMap(name or cache_path.stem, meta, layers, source, buffer)
+    compiled.cache_path = Path(cache_path)
+    return compiled
+
+
+def load_map(tmx_path: Path) -> CompiledMap:
+    """Return the compiled map for a TMX file, rebuilding a stale cache."""
+    tmx_path = Path(tmx_path)
+    cache_path = cache_path_for(tmx_path)
+    if not is_cache_fresh(tmx_path, cache_path):
+        # A rebuild may have gone beside a cache that was mapped at the time
+        beside = _beside(cache_path)
+        if beside.exists() and is_cache_fresh(tmx_path, beside):
+            cache_path = beside
+        else:
+            cache_path = compile_map(tmx_path, cache_path)
+    return read_cache(cache_path, tmx_path.stem, tmx_path)
+
+
+# ---------- Tileset images ----------
+# Decoded tileset images shared across maps: (path, mtime_ns) -> Surface
+_tileset_pixels: Dict[Tuple[str, int], pygame.Surface] = {}
+
+
+def load_tileset_pixels(compiled: CompiledMap) -> List[Optional[pygame.Surface]]:
+    """Decode each tileset image from disk (cached per file).
+
+    Returns unconverted surfaces, so this can run before (or without) the
+    display being available.
+    """
+    pixels: List[Optional[pygame.Surface]] = []
+    for tileset in compiled.tilesets:
+        if tileset.image is None:
+            pixels.append(None)
+            continue
+        key = (str(tileset.image), tileset.image.stat().st_mtime_ns)
+        image = _tileset_pixels.get(key)
+        if image is None:
+            image = pygame.image.load(str(tileset.image))
+            _tileset_pixels[key] = image
+        pixels.append(image)
+    return pixels
+
+
+def build_tile_images(
+    compiled: CompiledMap,
+    pixels: List[Optional[pygame.Surface]],
+) -> List[Optional[pygame.Surface]]:
+    """Convert tileset images for the display and slice them per gid.
+
+    Args:
+        compiled (CompiledMap): Map whose tilesets to slice.
+        pixels (list): Decoded tileset images from `load_tileset_pixels`.
+
+    Returns:
+        list[Surface | None]: Tile image per gid (index 0 is the empty tile).
+    """
+    images: List[Optional[pygame.Surface]] = [None] * (compiled.max_gid + 1)
+    for tileset, image in zip(compiled.tilesets, pixels):
+        if image is None:
+            continue
+        if tileset.trans:
+            image = image.convert()
+            image.set_colorkey(pygame.Color(f"#{tileset.trans}"))
+        else:
+            image = image.convert_alpha()
+        columns = tileset.columns or max(1, image.get_width() // tileset.tilewidth)
+        tw, th = tileset.tilewidth, tileset.tileheight
+        for local_id in range(tileset.tilecount):
+            col, row = local_id % columns, local_id // columns
+            x = tileset.margin + col * (tw + tileset.spacing)
+            y = tileset.margin + row * (th + tileset.spacing)
+            images[tileset.firstgid + local_id] = image.subsurface((x, y, tw, th))
+    return images
+
+
+# ---------- pyscroll adapter ----------
+class CompiledMapData(pyscroll.data.PyscrollDataAdapter):
+    """pyscroll data source reading tiles from a CompiledMap."""
+
+    def __init__(self, compiled: CompiledMap, images: List[Optional[pygame.Surface]]) -> None:
+        super().__init__()
+        self.compiled = compiled
+        self.images = images
+        self.reload_animations()
+
+    def reload_data(self):
+        pass
+
+    @property
+    def tile_size(self):
+        return self.compiled.tilewidth, self.compiled.tileheight
+
+    @property
+    def map_size(self):
+        return self.compiled.width, self.compiled.height
+
+    @property
+    def visible_tile_layers(self):
+        return self.compiled.visible_tile_layers
+
+    def convert_surfaces(self, parent: pygame.Surface, alpha: bool = False):
+        self.images = [
+            None if image is None else (image.convert_alpha(parent) if alpha else image.convert(parent))
+            for image in self.images
+        ]
+
+    def get_animations(self):
+        for tileset in self.compiled.tilesets:
+            for local_id, frames in tileset.animations.items():
+                yield (tileset.firstgid + local_id,
+                       [(tileset.firstgid + frame_id, duration) for frame_id, duration in frames])
+
+    def _get_tile_image(self, x: int, y: int, l: int):
+        if not (0 <= x < self.compiled.width and 0 <= y < self.compiled.height):
+            return None
+        gid = int(self.compiled.layers[l].data[y, x])
+        return self.images[gid] if gid else None
+
+    def _get_tile_image_by_id(self, id):
+        return self.images[id]
+
+    def get_tile_images_by_rect(self, rect):
+        x1, y1, x2, y2 = rect_to_bb(rect)
+        x1, y1 = max(x1, 0), max(y1, 0)
+        images = self.images
+        layers = self.compiled.layers
+        at = self._animated_tile
+        tracked_gids = self._tracked_gids
+        anim_map = self._animation_map
+        track = bool(self._animation_queue)
+
+        for l in self.visible_tile_layers:
+            rows = layers[l].data[y1:y2 + 1, x1:x2 + 1].tolist()
+            for y, row in enumerate(rows, y1):
+                for x, gid in enumerate(row, x1):
+                    if not gid:
+                        continue
+                    if track and gid in tracked_gids:
+                        anim_map[gid].positions.add((x, y, l))
+                    tile = at.get((x, y, l)) or images[gid]
+                    if tile:
+                        yield x, y, l, tile
+
+
+def compile_all(maps_dir: Path = MAPS_DIR, force: bool = False) -> List[Path]:
+    """Compile every TMX under `maps_dir` whose cache is missing or stale."""
+    compiled = []
+    for tmx_path in sorted(Path(maps_dir).rglob("*.tmx")):
+        cache_path = cache_path_for(tmx_path)
+        if force or not is_cache_fresh(tmx_path, cache_path):
+            compiled.append(compile_map(tmx_path, cache_path))
+    return compiled
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    built = compile_all(force="--force" in sys.argv)
+    print(f"Compiled {len(built)} map(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,170 @@
+"""Background map decoding with a small LRU of preloaded maps.
+
+Decoding a map (reading the compiled cache and the tileset pixels) does not
+need the display, so it runs on a worker thread. The main thread only does
+the display-dependent part: converting surfaces and building the renderer
+(see `Map.request_map`).
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+import threading
+
+import pygame
+
+from src import map_cache
+from src.minimap import Minimap
+from src.settings import MAPS_DIR, MAP_PREFETCH_CAPACITY
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DecodedMap:
+    """Map data ready for the main-thread finalize step."""
+
+    name: str
+    compiled: map_cache.CompiledMap
+    pixels: List[Optional[pygame.Surface]]
+    # Built from the tile arrays with the rest (no display needed); Map
+    # has the loader build it when missing
+    minimap: Optional[Minimap] = None
+
+
+class MapLoader:
+    """Decodes maps on a worker thread and keeps recently used ones."""
+
+    def __init__(self, capacity: int = MAP_PREFETCH_CAPACITY) -> None:
+        self.capacity = capacity
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="map-loader")
+        self._lock = threading.Lock()
+        # LRU of decoded maps, most recently used last
+        self._decoded: "OrderedDict[str, DecodedMap]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        # A request is a hit when the map was decoded or in flight beforehand
+        self.prefetch_hits: int = 0
+        self.prefetch_misses: int = 0
+
+    @staticmethod
+    def decode(name: str) -> DecodedMap:
+        """Decode a map synchronously (used by the worker thread)."""
+        compiled = map_cache.load_map(MAPS_DIR / f"{name}.tmx")
+        pixels = map_cache.load_tileset_pixels(compiled)
+        return DecodedMap(name, compiled, pixels, Minimap.from_map(compiled, pixels))
+
+    def _fresh(self, name: str) -> Optional[DecodedMap]:
+        """The decoded `name` if its sources did not change since (lock held).
+
+        A stale entry is dropped before the map is decoded again, so its
+        memory map is released by the time the cache is rebuilt.
+        """
+        decoded = self._decoded.get(name)
+        if decoded is None:
+            return None
+        compiled = decoded.compiled
+        if compiled.filename and compiled.cache_path and not map_cache.is_cache_fresh(
+                Path(compiled.filename), compiled.cache_path):
+            del self._decoded[name]
+            return None
+        self._decoded.move_to_end(name)
+        return decoded
+
+    def prefetch(self, name: str, count: bool = False) -> Future:
+        """Start decoding `name` in the background unless already available.
+
+        Args:
+            name (str): Map basename.
+            count (bool): Count a prefetch hit (decoded or in flight) or miss.
+        """
+        with self._lock:
+            decoded = self._fresh(name)
+            future = self._pending.get(name)
+            if count:
+                if decoded is not None or future is not None:
+                    self.prefetch_hits += 1
+                else:
+                    self.prefetch_misses += 1
+            if decoded is not None:
+                future = Future()
+                future.set_result(decoded)
+            elif future is None:
+                future = self._executor.submit(self._decode_and_store, name)
+                self._pending[name] = future
+            return future
+
+    def request(self, name: str) -> Future:
+        """Like `prefetch`, but counts a prefetch hit or miss for `name`."""
+        return self.prefetch(name, count=True)
+
+    def load(self, name: str) -> DecodedMap:
+        """Return a decoded map, blocking until it is available."""
+        return self.request(name).result()
+
+    def build_minimap(self, decoded: DecodedMap) -> Future:
+        """Build the minimap of a map decoded elsewhere, on the worker thread."""
+        return self._executor.submit(Minimap.from_map, decoded.compiled, decoded.pixels)
+
+    def _decode_and_store(self, name: str) -> DecodedMap:
+        try:
+            decoded = self.decode(name)
+        except Exception:
+            logger.exception("Failed to decode map %s", name)
+            with self._lock:
+                self._pending.pop(name, None)
+            raise
+        with self._lock:
+            self._pending.pop(name, None)
+            self._decoded[name] = decoded
+            self._decoded.move_to_end(name)
+            while len(self._decoded) > self.capacity:
+                self._decoded.popitem(last=False)
+        return decoded
+
+    def clear(self) -> None:
+        """Forget every decoded map (in-flight decodes still complete)."""
+        with self._lock:
+            self._decoded.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "prefetch_hits": self.prefetch_hits,
+                "prefetch_misses": self.prefetch_misses,
+                "decoded": len(self._decoded),
+                "pending": len(self._pending),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_default_loader: Optional[MapLoader] = None
+
+
+def get_map_loader() -> MapLoader:
+    """Return the process-wide loader shared by every Map."""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = MapLoader()
+    return _default_loader
+
+
+def neighbor_maps(compiled: map_cache.CompiledMap) -> List[str]:
+    """Return the maps reachable from `compiled`, for prefetching.
+
+    Sources: a comma-separated `neighbors` map property, and the
+    `target_map` property of objects (warps, doors) on object layers.
+    """
+    names: List[str] = []
+    raw = compiled.properties.get("neighbors", "")
+    names.extend(part.strip() for part in str(raw).split(",") if part.strip())
+    for obj in compiled.objects:
+        target = obj.properties.get("target_map")
+        if target:
+            names.append(str(target))
+    # Deduplicate, keep order, skip self-references
+    return [name for name in dict.fromkeys(names) if name != compiled.name]
@@ -0,0 +1,202 @@
+"""Spatial index over a map's Tiled objects: triggers, warps, spawn points.
+
+`ObjectIndex` is built once per map (`Map.objects`). Object bounds go into
+NumPy arrays (point objects count as 1x1 pixel) and a uniform grid of
+OBJECT_INDEX_CELL_SIZE pixel cells lists the objects overlapping each cell,
+stored flat: the rows of cell `i` are `items[starts[i]:starts[i + 1]]`.
+Cells of a grid row are consecutive, so a rect query reads one slice per
+cell row it spans, then tests the candidates' bounds in one vectorized
+pass. Objects spanning more than OBJECT_INDEX_MAX_CELLS cells (zones the
+size of the map) are kept out of the grid and tested by every query.
+
+Objects are grouped by type (`kind`): every query takes an optional kind,
+and `rows_of_kind` / `with_property` list the objects of a kind or with a
+property (e.g. `target_map` on warps).
+
+`ObjectTracker` turns the overlaps of moving rects into enter/exit events:
+`overlaps` pairs every rect with the objects it touches for a whole batch
+of rects at once, and the pairs are compared with the previous update's
+(integer codes, `np.setdiff1d`). `Map` tracks the player with one
+and hands the events to the play state (`BaseState.on_object_enter` and
+`on_object_exit`).
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.settings import OBJECT_INDEX_CELL_SIZE, OBJECT_INDEX_MAX_CELLS
+
+
+def _ragged(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Expand (start, count) runs: owner of each element and its position."""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    return owner, starts[owner] + np.arange(len(owner)) - first[owner]
+
+
+class ObjectIndex:
+    """Uniform grid over the bounds of a map's objects (see module docstring)."""
+
+    def __init__(self, objects: Iterable, cell_size: int = OBJECT_INDEX_CELL_SIZE,
+                 max_cells: int = OBJECT_INDEX_MAX_CELLS) -> None:
+        """Index objects.
+
+        Args:
+            objects (Iterable): `MapObject`s of a CompiledMap, or pytmx
+                objects (anything with x, y, width, height, type, name and
+                properties).
+            cell_size (int): Grid cell edge in pixels.
+            max_cells (int): Objects spanning more cells are not put in the
+                grid but tested by every query.
+        """
+        self.objects = list(objects)
+        self.cell_size = cell_size
+        count = len(self.objects)
+        # left, top, right, bottom; shapes are reduced to their bounds
+        bounds = np.zeros((count, 4), dtype=np.float64)
+        self.kinds: Dict[str, int] = {}
+        self.kind = np.zeros(count, dtype=np.int32)
+        for row, obj in enumerate(self.objects):
+            width, height = max(obj.width or 0.0, 1.0), max(obj.height or 0.0, 1.0)
+            bounds[row] = (obj.x, obj.y, obj.x + width, obj.y + height)
+            self.kind[row] = self.kinds.setdefault(getattr(obj, "type", None) or "", len(self.kinds))
+        self.bounds = bounds
+        cells = np.empty((count, 4), dtype=np.int64)
+        cells[:, :2] = np.floor(bounds[:, :2] / cell_size)
+        cells[:, 2:] = np.ceil(bounds[:, 2:] / cell_size) - 1
+        spans = (cells[:, 2] - cells[:, 0] + 1) * (cells[:, 3] - cells[:, 1] + 1)
+        self._large = np.flatnonzero(spans > max_cells)
+        small = np.flatnonzero(spans <= max_cells)
+        if len(small):
+            self._origin = cells[small, :2].min(axis=0)
+            self._grid = tuple(cells[small, 2:].max(axis=0) - self._origin + 1)
+        else:
+            self._origin = np.zeros(2, dtype=np.int64)
+            self._grid = (0, 0)
+        # Every (object, cell) pair of the gridded objects, grouped by cell
+        grid_w = self._grid[0]
+        local = cells[small] - np.concatenate([self._origin, self._origin])
+        widths = local[:, 2] - local[:, 0] + 1
+        owner, k = _ragged(np.zeros(len(small), dtype=np.int64), spans[small])
+        cell_ids = (local[owner, 1] + k // widths[owner]) * grid_w + local[owner, 0] + k % widths[owner]
+        order = np.argsort(cell_ids, kind="stable")
+        self._items = small[owner[order]].astype(np.int32)
+        self._starts = np.zeros(self._grid[0] * self._grid[1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell_ids, minlength=len(self._starts) - 1), out=self._starts[1:])
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    # ---------- Groups ----------
+    def rows_of_kind(self, kind: str) -> np.ndarray:
+        """Rows of the objects of a type."""
+        kind_id = self.kinds.get(kind)
+        return np.flatnonzero(self.kind == kind_id) if kind_id is not None else np.empty(0, dtype=np.int64)
+
+    def with_property(self, name: str) -> List[int]:
+        """Rows of the objects that have a property (e.g. "target_map")."""
+        return [row for row, obj in enumerate(self.objects) if name in (obj.properties or {})]
+
+    def named(self, name: str):
+        """First object with this name, or None."""
+        return next((obj for obj in self.objects if obj.name == name), None)
+
+    # ---------- Queries ----------
+    def _cell_rows(self, rects: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per rect and cell row it spans: rect, start and end of the row's items."""
+        size = self.cell_size
+        grid_w, grid_h = self._grid
+        x0 = np.clip(np.floor(rects[:, 0] / size).astype(np.int64) - self._origin[0], 0, grid_w - 1)
+        x1 = np.clip(np.ceil(rects[:, 2] / size).astype(np.int64) - 1 - self._origin[0], -1, grid_w - 1)
+        y0 = np.clip(np.floor(rects[:, 1] / size).astype(np.int64) - self._origin[1], 0, grid_h - 1)
+        y1 = np.clip(np.ceil(rects[:, 3] / size).astype(np.int64) - 1 - self._origin[1], -1, grid_h - 1)
+        # Rects off the grid span no row or column
+        heights = np.where(x1 >= x0, np.maximum(y1 - y0 + 1, 0), 0)
+        owner, y = _ragged(y0, heights)
+        return owner, self._starts[y * grid_w + x0[owner]], self._starts[y * grid_w + x1[owner] + 1]
+
+    def overlaps(self, rects, kind: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Pair rects with the objects they overlap, for a batch of rects.
+
+        Args:
+            rects (array-like): (n, 4) rects as x, y, width, height pixels.
+            kind (str): Only objects of this type.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Index into `rects` and object row
+            of each overlapping pair, every pair once.
+        """
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        edges = np.empty_like(rects)
+        edges[:, :2] = rects[:, :2]
+        edges[:, 2:] = rects[:, :2] + np.maximum(rects[:, 2:], 1.0)
+        owner = rows = np.empty(0, dtype=np.int64)
+        if len(self._items) and len(rects):
+            row_owner, start, end = self._cell_rows(edges)
+            item_owner, item = _ragged(start, end - start)
+            owner, rows = row_owner[item_owner], self._items[item].astype(np.int64)
+        if len(self._large):
+            # Every rect against every large object
+            owner = np.concatenate([owner, np.repeat(np.arange(len(rects)), len(self._large))])
+            rows = np.concatenate([rows, np.tile(self._large, len(rects))])
+        if kind is not None:
+            keep = self.kind[rows] == self.kinds.get(kind, -1)
+            owner, rows = owner[keep], rows[keep]
+        bounds, query = self.bounds[rows], edges[owner]
+        hit = ((bounds[:, 0] < query[:, 2]) & (query[:, 0] < bounds[:, 2])
+               & (bounds[:, 1] < query[:, 3]) & (query[:, 1] < bounds[:, 3]))
+        # An object in several cells of a rect is found once per cell
+        codes = np.unique(owner[hit] * max(1, len(self.objects)) + rows[hit])
+        return codes // max(1, len(self.objects)), codes % max(1, len(self.objects))
+
+    def query_rect(self, rect, kind: Optional[str] = None) -> np.ndarray:
+        """Rows of the objects overlapping a rect (x, y, width, height)."""
+        return self.overlaps([tuple(rect)], kind)[1]
+
+    def query_point(self, x: float, y: float, kind: Optional[str] = None) -> np.ndarray:
+        """Rows of the objects containing a point."""
+        return self.overlaps([(x, y, 1.0, 1.0)], kind)[1]
+
+
+class ObjectTracker:
+    """Enter/exit events of moving rects against an ObjectIndex."""
+
+    def __init__(self, index: ObjectIndex, kind: Optional[str] = None) -> None:
+        """Track overlaps with the objects of `index` (of a type, if given)."""
+        self.index = index
+        self.kind = kind
+        # Codes key * len(index) + row of the last update's overlaps
+        self._pairs = np.empty(0, dtype=np.int64)
+
+    def _codes(self, keys: Sequence[int], rects) -> np.ndarray:
+        owner, rows = self.index.overlaps(rects, self.kind)
+        keys = np.asarray(keys, dtype=np.int64)
+        # Pairs are unique already (distinct keys, overlaps lists each once)
+        return keys[owner] * max(1, len(self.index)) + rows
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        count = max(1, len(self.index))
+        return np.stack([codes // count, codes % count], axis=1)
+
+    def update(self, keys: Sequence[int], rects) -> Tuple[np.ndarray, np.ndarray]:
+        """Overlaps of this update compared with the previous one.
+
+        Args:
+            keys (Sequence[int]): Distinct non-negative id of each rect (e.g. entity
+                rows); keys missing since the last update exit everything.
+            rects (array-like): (n, 4) x, y, width, height pixels.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (k, 2) key and object row of the
+            overlaps that started, and of those that ended.
+        """
+        pairs = self._codes(keys, rects)
+        entered = np.setdiff1d(pairs, self._pairs, assume_unique=True)
+        exited = np.setdiff1d(self._pairs, pairs, assume_unique=True)
+        self._pairs = pairs
+        return self._decode(entered), self._decode(exited)
+
+    def reset(self, index: ObjectIndex, keys: Sequence[int] = (), rects=()) -> None:
+        """Switch to another index; rects already inside objects raise no event."""
+        self.index = index
+        self._pairs = self._codes(keys, rects) if len(keys) else np.empty(0, dtype=np.int64)
@@ -0,0 +1,226 @@
+"""Minimap: a prerendered overview of a compiled map, updated by tile rect.
+
+Scaling the world down every frame costs as much as drawing it. Instead,
+every tile of every tileset is reduced once to its average color and
+coverage (`tile_colors`, cached per tileset image), and a map's overview is
+composed straight from its gid arrays: layers are blended bottom to top,
+then blocks of `scale` x `scale` tiles are averaged into one pixel (or each
+tile is repeated over `zoom` x `zoom` pixels for small maps). Blocks of
+huge maps are averaged over an evenly spaced grid of at most
+_BLOCK_SAMPLES x _BLOCK_SAMPLES of their tiles. This needs no
+display, so the map loader builds it on its worker thread along with the
+rest of the map (`DecodedMap.minimap`), and it stays cached with the decoded
+map.
+
+When tiles change, `refresh` recomposes only the blocks covering them. The
+surface is replaced rather than modified, so a surface handed to another
+thread (see simulation.py) never changes under it.
+
+Drawing is one blit of the overview plus one `blits` call for the markers
+(sprites of the map group) and an outline of the camera view, whatever the
+map size.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from src.settings import MINIMAP_SIZE, MINIMAP_MARKER_COLORS, MINIMAP_MARKER_SIZE
+
+
+# Overview rows composed per pass, and sampled tiles per pass at most:
+# bounds the temporary arrays on huge maps
+_BAND_ROWS = 8
+_BAND_TILES = 8192
+# Tiles sampled per block edge at most
+_BLOCK_SAMPLES = 4
+# Color behind empty tiles
+_EMPTY_COLOR = (0, 0, 0)
+
+# Tileset image path -> (mtime, (tilecount, 4) mean RGB and coverage), the
+# _TILESET_COLORS_MAX most recently used; an edited image replaces its entry
+_tileset_colors: "OrderedDict[str, Tuple[int, np.ndarray]]" = OrderedDict()
+_TILESET_COLORS_MAX = 16
+
+
+def _tileset_tile_colors(tileset, image: pygame.Surface) -> np.ndarray:
+    """Mean color (premultiplied by coverage) and coverage of each tile."""
+    path, mtime_ns = str(tileset.image), tileset.image.stat().st_mtime_ns
+    cached = _tileset_colors.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        _tileset_colors.move_to_end(path)
+        return cached[1]
+    rgb = pygame.surfarray.array3d(image).astype(np.float32)  # (w, h, 3)
+    if tileset.trans:
+        trans = pygame.Color(f"#{tileset.trans}")
+        alpha = np.where((rgb == (trans.r, trans.g, trans.b)).all(axis=2), 0.0, 1.0).astype(np.float32)
+    else:
+        alpha = pygame.surfarray.array_alpha(image).astype(np.float32) / 255.0
+    columns = tileset.columns or max(1, image.get_width() // tileset.tilewidth)
+    tw, th = tileset.tilewidth, tileset.tileheight
+    colors = np.zeros((tileset.tilecount, 4), dtype=np.float32)
+    for local_id in range(tileset.tilecount):
+        col, row = local_id % columns, local_id // columns
+        x = tileset.margin + col * (tw + tileset.spacing)
+        y = tileset.margin + row * (th + tileset.spacing)
+        tile_alpha = alpha[x:x + tw, y:y + th]
+        coverage = float(tile_alpha.mean()) if tile_alpha.size else 0.0
+        if coverage > 0.0:
+            tile_rgb = rgb[x:x + tw, y:y + th]
+            colors[local_id, :3] = (tile_rgb * tile_alpha[..., None]).sum(axis=(0, 1)) / tile_alpha.size
+        colors[local_id, 3] = coverage
+    _tileset_colors[path] = (mtime_ns, colors)
+    _tileset_colors.move_to_end(path)
+    while len(_tileset_colors) > _TILESET_COLORS_MAX:
+        _tileset_colors.popitem(last=False)
+    return colors
+
+
+def tile_colors(compiled, pixels: Sequence[Optional[pygame.Surface]]) -> np.ndarray:
+    """Per-gid (max_gid + 1, 4) table: premultiplied mean RGB and coverage.
+
+    Args:
+        compiled (CompiledMap): Map whose tilesets to reduce.
+        pixels (list): Decoded tileset images from `load_tileset_pixels`.
+    """
+    table = np.zeros((compiled.max_gid + 1, 4), dtype=np.float32)
+    for tileset, image in zip(compiled.tilesets, pixels):
+        if image is None:
+            continue
+        colors = _tileset_tile_colors(tileset, image)
+        end = min(len(table), tileset.firstgid + len(colors))
+        table[tileset.firstgid:end] = colors[:end - tileset.firstgid]
+    return table
+
+
+class Minimap:
+    """Overview image of one compiled map (see module docstring)."""
+
+    def __init__(self, compiled, colors: np.ndarray, size: int = MINIMAP_SIZE) -> None:
+        """Compose the overview.
+
+        Args:
+            compiled (CompiledMap): Map to show; its visible tile layers are
+                read again by `refresh`.
+            colors (np.ndarray): Per-gid table from `tile_colors`.
+            size (int): Longest edge of the overview in pixels at most.
+        """
+        self.compiled = compiled
+        self.colors = colors
+        longest = max(compiled.width, compiled.height)
+        # Tiles per overview pixel, or overview pixels per tile
+        self.scale = max(1, -(-longest // size))
+        self.zoom = max(1, size // longest) if self.scale == 1 else 1
+        self.tile_size = (compiled.tilewidth, compiled.tileheight)
+        blocks = (-(-compiled.width // self.scale), -(-compiled.height // self.scale))
+        self.surface = pygame.Surface((blocks[0] * self.zoom, blocks[1] * self.zoom))
+        self._compose(pygame.Rect(0, 0, *blocks), self.surface)
+        self.refreshes = 0
+
+    @classmethod
+    def from_map(cls, compiled, pixels: Sequence[Optional[pygame.Surface]], size: int = MINIMAP_SIZE) -> "Minimap":
+        return cls(compiled, tile_colors(compiled, pixels), size)
+
+    def _compose(self, blocks: pygame.Rect, surface: pygame.Surface) -> None:
+        """Write the overview pixels of a rect of blocks into `surface`."""
+        compiled, scale, zoom = self.compiled, self.scale, self.zoom
+        layers = [compiled.layers[index].data for index in compiled.visible_tile_layers]
+        background = np.array(_EMPTY_COLOR, dtype=np.float32)
+        # Sampled tiles of each block (all of them up to _BLOCK_SAMPLES);
+        # blocks past the map edge repeat its last row or column
+        samples = min(scale, _BLOCK_SAMPLES)
+        offsets = np.arange(samples) * scale // samples
+        columns = (np.arange(blocks.left, blocks.right)[:, None] * scale + offsets).ravel()
+        columns = np.minimum(columns, compiled.width - 1)
+        band_rows = max(1, min(_BAND_ROWS, _BAND_TILES // (len(columns) * samples)))
+        for band_top in range(blocks.top, blocks.bottom, band_rows):
+            band_bottom = min(band_top + band_rows, blocks.bottom)
+            rows = (np.arange(band_top, band_bottom)[:, None] * scale + offsets).ravel()
+            cells = np.ix_(np.minimum(rows, compiled.height - 1), columns)
+            rgb = np.broadcast_to(background, (len(rows), len(columns), 3)).copy()
+            for data in layers:
+                # Premultiplied "over": each layer covers what is under it
+                tiles = self.colors[data[cells]]
+                rgb *= 1.0 - tiles[..., 3:]
+                rgb += tiles[..., :3]
+            if samples > 1:
+                h, w = rgb.shape[0] // samples, rgb.shape[1] // samples
+                rgb = rgb.reshape(h, samples, w, samples, 3).mean(axis=(1, 3))
+            # Zoomed as bytes: a zoomed float band is 4x larger
+            pixels = rgb.astype(np.uint8)
+            if zoom > 1:
+                pixels = pixels.repeat(zoom, axis=0).repeat(zoom, axis=1)
+            area = pygame.Rect(blocks.left * zoom, band_top * zoom, pixels.shape[1], pixels.shape[0])
+            pygame.surfarray.blit_array(surface.subsurface(area), pixels.transpose(1, 0, 2))
+
+    def refresh(self, tiles: pygame.Rect) -> None:
+        """Recompose the pixels of a changed rect of tiles."""
+        scale = self.scale
+        tiles = pygame.Rect(tiles).clip(pygame.Rect(0, 0, self.compiled.width, self.compiled.height))
+        if not tiles.width or not tiles.height:
+            return
+        left, top = tiles.left // scale, tiles.top // scale
+        blocks = pygame.Rect(left, top, (tiles.right - 1) // scale - left + 1, (tiles.bottom - 1) // scale - top + 1)
+        # A new surface: the previous one may still be drawn by another thread
+        surface = self.surface.copy()
+        self._compose(blocks, surface)
+        self.surface = surface
+        self.refreshes += 1
+
+    def world_to_minimap(self, points: np.ndarray) -> np.ndarray:
+        """Overview pixels of world pixel positions, (n, 2) -> (n, 2) int."""
+        tile = np.asarray(points, dtype=np.float64) / self.tile_size
+        return (tile * (self.zoom / self.scale)).astype(np.int32)
+
+    def draw(self, display: pygame.Surface, topleft: Tuple[int, int], markers: np.ndarray,
+             view: Optional[pygame.Rect] = None, surface: Optional[pygame.Surface] = None) -> pygame.Rect:
+        """Blit the overview, the markers and the camera view outline.
+
+        Args:
+            display (Surface): Destination.
+            topleft (tuple[int, int]): Where the overview goes.
+            markers (np.ndarray): (n, 3) world pixel x, y and index into
+                MINIMAP_MARKER_COLORS, e.g. from `sprite_markers`.
+            view (Rect): Camera view in world pixels, outlined when given.
+            surface (Surface): Overview to draw instead of the current one
+                (a `surface` captured earlier).
+
+        Returns:
+            Rect: Area drawn.
+        """
+        area = display.blit(self.surface if surface is None else surface, topleft)
+        if len(markers):
+            images = _marker_images()
+            half = MINIMAP_MARKER_SIZE // 2
+            points = self.world_to_minimap(markers[:, :2]) + (topleft[0] - half, topleft[1] - half)
+            # Clipped to the overview
+            previous_clip = display.get_clip()
+            display.set_clip(area)
+            destinations = zip(points[:, 0].tolist(), points[:, 1].tolist())
+            display.blits(zip(images[markers[:, 2].astype(np.int32)], destinations), doreturn=False)
+            display.set_clip(previous_clip)
+        if view is not None:
+            corners = self.world_to_minimap(np.array([view.topleft, view.bottomright])) + topleft
+            outline = pygame.Rect(corners[0], corners[1] - corners[0]).clip(area)
+            pygame.draw.rect(display, (255, 255, 255), outline, 1)
+        return area
+
+
+@lru_cache(maxsize=1)
+def _marker_images() -> np.ndarray:
+    """Marker squares by color index, as an object array for fancy indexing."""
+    images = np.empty(len(MINIMAP_MARKER_COLORS), dtype=object)
+    for index, color in enumerate(MINIMAP_MARKER_COLORS):
+        images[index] = pygame.Surface((MINIMAP_MARKER_SIZE, MINIMAP_MARKER_SIZE))
+        images[index].fill(color)
+    return images
+
+
+def sprite_markers(sprites, player=None) -> np.ndarray:
+    """(n, 3) marker rows for sprites: center x, y and 0 (player) or 1."""
+    markers: List[Tuple[float, float, int]] = [
+        (*sprite.rect.center, 0 if sprite is player else 1) for sprite in sprites
+    ]
+    return np.array(markers, dtype=np.float64).reshape(-1, 3)
@@ -0,0 +1,744 @@
+"""Grid pathfinding: A*/JPS paths, a path cache and flow fields for crowds.
+
+A `Navigator` works on the walkable tiles of a map's `CollisionGrid` (built
+from the TMX tile layers). Agents move in 8 directions; a diagonal step is
+allowed only when both tiles it passes between are walkable, so paths never
+cut wall corners and can be followed with `CollisionGrid.move`.
+
+- Single agents ask for a path (`find_path`, or `request_path` for a search
+  spread over frames). Jump Point Search is used by default, plain A* on
+  request; both return the same optimal cost. Paths are lists of tile
+  waypoints where the direction changes.
+- Found paths go into an LRU cache. `set_solid`/`invalidate` drop the paths
+  and fields whose area overlaps the changed tiles.
+- Pending requests are advanced by `update()` within NAV_SEARCH_BUDGET_MS of
+  main-thread time per frame, so a burst of long searches is spread over
+  several frames instead of stalling one.
+- Many agents heading to one goal (usually the player) share a `FlowField`:
+  one NumPy Dijkstra over the tiles around the goal, then a direction per
+  tile that every agent reads in a single vectorized lookup.
+- On streamed worlds a navigator covers a `window` of the map (the chunks
+  around the camera) instead of the whole of it; tiles keep their map
+  coordinates and the outside of the window is solid.
+"""
+from array import array
+from collections import OrderedDict, deque
+from heapq import heappop, heappush
+from typing import Deque, Dict, Generator, List, Optional, Sequence, Tuple
+import math
+import time
+
+import numpy as np
+import pygame
+
+from src.collision import CollisionGrid
+from src.settings import (
+    NAV_PATH_CACHE_SIZE,
+    NAV_SEARCH_BUDGET_MS,
+    NAV_FLOW_FIELD_RADIUS,
+    NAV_FLOW_FIELD_CACHE_SIZE,
+)
+
+
+Tile = Tuple[int, int]
+_SQRT2 = math.sqrt(2.0)
+# Node expansions between two budget checks of an incremental search; a
+# JPS expansion scans whole rows, so it checks more often
+_EXPAND_SLICE = 32
+_JUMP_SLICE = 4
+# Search stamps are u32; the buffer pool is rebuilt before they wrap
+_STAMP_LIMIT = 0xFFFFFFFF - 2
+# Flow field step costs (integer so Dijkstra can run bucket by bucket);
+# 7/5 approximates the diagonal's sqrt(2)
+_ORTHO_COST, _DIAG_COST = 5, 7
+_UNREACHABLE = np.iinfo(np.int32).max
+_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class PathRequest:
+    """A path search, completed at once or over several frames."""
+
+    __slots__ = ("start", "goal", "method", "path", "status", "expanded", "_search")
+
+    PENDING, DONE, FAILED = "pending", "done", "failed"
+
+    def __init__(self, start: Tile, goal: Tile, method: str) -> None:
+        self.start = start
+        self.goal = goal
+        self.method = method
+        self.path: Optional[List[Tile]] = None
+        self.status: str = self.PENDING
+        self.expanded: int = 0
+        self._search = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != self.PENDING
+
+
+class _SearchState:
+    """Per-tile scratch arrays of one search, reused from search to search.
+
+    A tile's cost and parent are valid when its mark equals the search's
+    stamp (open) or stamp + 1 (closed); older marks read as unvisited, so
+    nothing is cleared between searches and nothing is freed after one.
+    """
+
+    __slots__ = ("cost", "parent", "mark", "generation")
+
+    def __init__(self, size: int, generation: int) -> None:
+        self.cost = array("d", bytes(8 * size))
+        self.parent = array("i", bytes(4 * size))
+        self.mark = array("I", bytes(4 * size))
+        self.generation = generation
+
+
+class FlowField:
+    """Per-tile directions toward one goal over a window of the map."""
+
+    def __init__(self, goal: Tile, window: pygame.Rect, distance: np.ndarray,
+                 directions: np.ndarray, tile_size: Tuple[int, int]) -> None:
+        """Wrap a computed field (see `Navigator.flow_field`).
+
+        Args:
+            goal (tuple[int, int]): Goal tile.
+            window (pygame.Rect): Tiles covered by the field.
+            distance (np.ndarray): (h, w) step costs to the goal, in
+                _ORTHO_COST units per tile; _UNREACHABLE where no path.
+            directions (np.ndarray): (h, w, 2) unit vectors toward the goal;
+                zero at the goal and on unreachable tiles.
+            tile_size (tuple[int, int]): Tile width and height in pixels.
+        """
+        self.goal = goal
+        self.window = window
+        self.distance = distance
+        self.directions = directions
+        self.tilewidth, self.tileheight = tile_size
+
+    def _cells(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        cols = np.floor(positions[:, 0] / self.tilewidth).astype(np.int64) - self.window.left
+        rows = np.floor(positions[:, 1] / self.tileheight).astype(np.int64) - self.window.top
+        inside = (cols >= 0) & (cols < self.window.width) & (rows >= 0) & (rows < self.window.height)
+        return np.where(inside, cols, 0), np.where(inside, rows, 0), inside
+
+    def direction_at(self, positions: np.ndarray) -> np.ndarray:
+        """Unit directions for (n, 2) pixel positions; zero outside the field."""
+        cols, rows, inside = self._cells(positions)
+        out = self.directions[rows, cols]
+        out[~inside] = 0.0
+        return out
+
+    def distance_at(self, positions: np.ndarray) -> np.ndarray:
+        """Path length in tiles from (n, 2) pixel positions; inf if unreachable."""
+        cols, rows, inside = self._cells(positions)
+        steps = self.distance[rows, cols].astype(np.float64)
+        steps[~inside | (steps == _UNREACHABLE)] = np.inf
+        return steps / _ORTHO_COST
+
+
+class Navigator:
+    """Pathfinding over the walkable tiles of a collision grid."""
+
+    def __init__(
+        self,
+        collision: CollisionGrid,
+        cache_size: int = NAV_PATH_CACHE_SIZE,
+        budget_ms: float = NAV_SEARCH_BUDGET_MS,
+        flow_radius: Optional[int] = NAV_FLOW_FIELD_RADIUS,
+        flow_cache_size: int = NAV_FLOW_FIELD_CACHE_SIZE,
+        window=None,
+    ) -> None:
+        """Create a navigator for a map.
+
+        Args:
+            collision (CollisionGrid): Solid tiles of the map.
+            cache_size (int): Paths kept in the LRU cache.
+            budget_ms (float): Main-thread time `update` spends per call.
+            flow_radius (int): Tiles around the goal covered by flow fields;
+                None covers the whole map.
+            flow_cache_size (int): Flow fields kept, by goal tile.
+            window (RectLike): Tiles searched; the whole map when None.
+        """
+        self.collision = collision
+        # Tiles covered, in map coordinates; searches index them from `origin`
+        self.bounds = pygame.Rect(window if window is not None else (0, 0, collision.width, collision.height))
+        self.origin = self.bounds.topleft
+        self.width, self.height = self.bounds.size
+        self.tile_size = (collision.tilewidth, collision.tileheight)
+        self.cache_size = cache_size
+        self.budget_ms = budget_ms
+        self.flow_radius = flow_radius
+        self.flow_cache_size = flow_cache_size
+        # Walkable flags on a one-tile solid border, flattened row-major:
+        # tile (x, y) is index (y + 1) * stride + x + 1, and the border stops
+        # every scan without bounds checks
+        self._stride = self.width + 2
+        self._walkable_grid = np.zeros((self.height + 2, self.width + 2), dtype=bool)
+        np.logical_not(collision.region(self.bounds), out=self._walkable_grid[1:-1, 1:-1])
+        # One byte per tile (1: walkable), indexed like a list in the searches
+        self._walkable = bytearray(self._walkable_grid.tobytes())
+        stride = self._stride
+        # (index offset, cost, orthogonal offsets a diagonal passes between)
+        self._neighbors = [
+            (dx + dy * stride, _SQRT2 if dx and dy else 1.0,
+             dx if dx and dy else 0, dy * stride if dx and dy else 0)
+            for dx, dy in _DIRECTIONS
+        ]
+        self._paths: "OrderedDict[Tuple[Tile, Tile, str], Tuple[Optional[List[Tile]], pygame.Rect]]" = OrderedDict()
+        self._fields: "OrderedDict[Tile, FlowField]" = OrderedDict()
+        self._queue: Deque[PathRequest] = deque()
+        # Free search states; stamps go up by two per search
+        self._states: List[_SearchState] = []
+        self._stamp: int = 0
+        self._generation: int = 0
+        self._pending: Dict[Tuple[Tile, Tile, str], PathRequest] = {}
+        # Counters
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        self.searches: int = 0
+        self.expanded: int = 0
+
+    @classmethod
+    def from_map(cls, tmx_data, **kwargs) -> "Navigator":
+        """Build a navigator from a CompiledMap or a pytmx TiledMap."""
+        return cls(CollisionGrid.from_map(tmx_data), **kwargs)
+
+    # ---------- Tiles ----------
+    def tile_at(self, x: float, y: float) -> Tile:
+        """Tile containing a world pixel."""
+        return int(x // self.tile_size[0]), int(y // self.tile_size[1])
+
+    def tile_center(self, tile: Tile) -> Tuple[float, float]:
+        """World pixel at the center of a tile."""
+        tw, th = self.tile_size
+        return (tile[0] + 0.5) * tw, (tile[1] + 0.5) * th
+
+    def is_walkable(self, tile: Tile) -> bool:
+        return self.bounds.collidepoint(tile) and bool(self._walkable[self._index(tile)])
+
+    def _index(self, tile: Tile) -> int:
+        return (tile[1] - self.origin[1] + 1) * self._stride + tile[0] - self.origin[0] + 1
+
+    def _tile(self, index: int) -> Tile:
+        y, x = divmod(index, self._stride)
+        return x - 1 + self.origin[0], y - 1 + self.origin[1]
+
+    def set_solid(self, rect, solid: bool = True) -> None:
+        """Change the solidity of a tile rect and drop what it invalidates.
+
+        Args:
+            rect (RectLike): Tiles to change (x, y, width, height).
+            solid (bool): New solidity.
+        """
+        rect = pygame.Rect(rect).clip(self.bounds)
+        if not rect.width or not rect.height:
+            return
+        tw, th = self.tile_size
+        self.collision.fill_rect(rect.x * tw, rect.y * th, rect.width * tw, rect.height * th, solid)
+        local = rect.move(1 - self.origin[0], 1 - self.origin[1])
+        self._walkable_grid[local.top:local.bottom, local.left:local.right] = not solid
+        stride = self._stride
+        for y in range(local.top, local.bottom):
+            start = y * stride + local.left
+            self._walkable[start:start + rect.width] = bytes((not solid,)) * rect.width
+        self.invalidate(rect)
+
+    def invalidate(self, rect) -> None:
+        """Forget cached paths and fields near a changed tile rect.
+
+        Searches still pending restart on the new tiles.
+        """
+        # One tile of margin: a diagonal step depends on its two neighbors
+        area = pygame.Rect(rect).inflate(2, 2)
+        for key in [key for key, (_, bounds) in self._paths.items() if bounds.colliderect(area)]:
+            del self._paths[key]
+        for goal in [goal for goal, field in self._fields.items() if field.window.colliderect(area)]:
+            del self._fields[goal]
+        for request in self._queue:
+            request._search = None
+
+    def clear(self) -> None:
+        self._paths.clear()
+        self._fields.clear()
+
+    def cancel(self) -> None:
+        """Fail every queued search (the navigator is being replaced)."""
+        for request in self._queue:
+            request._search = None
+            request.status = PathRequest.FAILED
+        self._queue.clear()
+        self._pending.clear()
+
+    # ---------- Paths ----------
+    def find_path(self, start: Tile, goal: Tile, method: str = "jps") -> Optional[List[Tile]]:
+        """Return tile waypoints from `start` to `goal`, searching right away.
+
+        Args:
+            start (tuple[int, int]): Start tile.
+            goal (tuple[int, int]): Goal tile.
+            method (str): "jps" (Jump Point Search) or "astar".
+
+        Returns:
+            list[tuple[int, int]] | None: Waypoints, start and goal included,
+            at every change of direction; None when the goal is unreachable.
+        """
+        request = self._request(start, goal, method)
+        while not request.done:
+            self._advance(request, None)
+        return request.path
+
+    def request_path(self, start: Tile, goal: Tile, method: str = "jps") -> PathRequest:
+        """Queue a search that `update` completes within the frame budget.
+
+        A cached or already queued search for the same tiles is reused.
+        """
+        request = self._request(start, goal, method)
+        if not request.done and (start, goal, method) not in self._pending:
+            self._pending[(start, goal, method)] = request
+            self._queue.append(request)
+        return request
+
+    def _request(self, start: Tile, goal: Tile, method: str) -> PathRequest:
+        if method not in ("jps", "astar"):
+            raise ValueError(f"Unknown search method: {method}")
+        key = (start, goal, method)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+        request = PathRequest(start, goal, method)
+        cached = self._paths.get(key)
+        if cached is not None:
+            self._paths.move_to_end(key)
+            self.cache_hits += 1
+            request.path = list(cached[0]) if cached[0] is not None else None
+            request.status = PathRequest.DONE if cached[0] is not None else PathRequest.FAILED
+            return request
+        self.cache_misses += 1
+        if not (self.is_walkable(start) and self.is_walkable(goal)):
+            request.status = PathRequest.FAILED
+        elif start == goal:
+            request.path = [start]
+            request.status = PathRequest.DONE
+        return request
+
+    def update(self, budget_ms: Optional[float] = None) -> int:
+        """Advance queued searches for at most `budget_ms` (default NAV_SEARCH_BUDGET_MS).
+
+        Returns:
+            int: Searches completed by this call.
+        """
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        completed = 0
+        while self._queue and time.perf_counter() < deadline:
+            request = self._queue[0]
+            self._advance(request, deadline)
+            if request.done:
+                self._queue.popleft()
+                del self._pending[(request.start, request.goal, request.method)]
+                completed += 1
+        return completed
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def _advance(self, request: PathRequest, deadline: Optional[float]) -> None:
+        """Run a search until it ends or `deadline` (perf_counter) passes."""
+        if request._search is None:
+            search = self._jps if request.method == "jps" else self._astar
+            request._search = search(self._index(request.start), self._index(request.goal), request)
+        try:
+            while True:
+                next(request._search)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+        except StopIteration as stop:
+            nodes = stop.value
+        request._search = None
+        self.searches += 1
+        self.expanded += request.expanded
+        path = self._waypoints(nodes) if nodes is not None else None
+        request.path = path
+        request.status = PathRequest.DONE if path is not None else PathRequest.FAILED
+        self._cache((request.start, request.goal, request.method), path)
+
+    def _cache(self, key: Tuple[Tile, Tile, str], path: Optional[List[Tile]]) -> None:
+        tiles = path if path is not None else [key[0], key[1]]
+        xs = [x for x, _ in tiles]
+        ys = [y for _, y in tiles]
+        bounds = pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+        if path is None:
+            # A failed search may succeed after any change
+            bounds = self.bounds
+        self._paths[key] = (list(path) if path is not None else None, bounds)
+        self._paths.move_to_end(key)
+        while len(self._paths) > self.cache_size:
+            self._paths.popitem(last=False)
+
+    def _waypoints(self, nodes: List[int]) -> List[Tile]:
+        """Keep only the nodes where the direction changes."""
+        tiles = [self._tile(node) for node in nodes]
+        if len(tiles) < 3:
+            return tiles
+        waypoints = [tiles[0]]
+        for previous, current, following in zip(tiles, tiles[1:], tiles[2:]):
+            d0 = (_sign(current[0] - previous[0]), _sign(current[1] - previous[1]))
+            d1 = (_sign(following[0] - current[0]), _sign(following[1] - current[1]))
+            if d0 != d1:
+                waypoints.append(current)
+        waypoints.append(tiles[-1])
+        return waypoints
+
+    def path_cost(self, path: Sequence[Tile]) -> float:
+        """Length of a waypoint path in tiles (diagonal steps count sqrt(2))."""
+        return sum(_octile(a[0] - b[0], a[1] - b[1]) for a, b in zip(path, path[1:]))
+
+    # ---------- Searches ----------
+    def _acquire(self) -> Tuple[_SearchState, int]:
+        """Take a free search state and a fresh stamp for a new search."""
+        self._stamp += 2
+        if self._stamp >= _STAMP_LIMIT:
+            # Old marks could match new stamps: start over with zeroed states
+            self._stamp = 2
+            self._generation += 1
+            self._states.clear()
+        if self._states:
+            return self._states.pop(), self._stamp
+        return _SearchState(self._stride * (self.height + 2), self._generation), self._stamp
+
+    def _release(self, state: _SearchState) -> None:
+        if state.generation == self._generation:
+            self._states.append(state)
+
+    def _astar(self, start: int, goal: int, request: PathRequest) -> Generator[None, None, Optional[List[int]]]:
+        """A* over the 8-connected grid; yields every _EXPAND_SLICE expansions."""
+        walkable = self._walkable
+        neighbors = self._neighbors
+        stride = self._stride
+        gy, gx = divmod(goal, stride)
+        diagonal_extra = _SQRT2 - 2.0
+        state, stamp = self._acquire()
+        cost, parent, mark = state.cost, state.parent, state.mark
+        closed = stamp + 1
+        try:
+            cost[start] = 0.0
+            parent[start] = start
+            mark[start] = stamp
+            heap = [(0.0, 0.0, start)]
+            while heap:
+                node = heappop(heap)[2]
+                if node == goal:
+                    return _trace(parent, goal)
+                if mark[node] == closed:
+                    continue
+                mark[node] = closed
+                request.expanded += 1
+                if request.expanded % _EXPAND_SLICE == 0:
+                    yield
+                g = cost[node]
+                for offset, step, side_a, side_b in neighbors:
+                    neighbor = node + offset
+                    if not walkable[neighbor]:
+                        continue
+                    seen = mark[neighbor]
+                    if seen == closed:
+                        continue
+                    if side_a and not (walkable[node + side_a] and walkable[node + side_b]):
+                        continue
+                    new_cost = g + step
+                    if seen != stamp or new_cost < cost[neighbor]:
+                        cost[neighbor] = new_cost
+                        parent[neighbor] = node
+                        mark[neighbor] = stamp
+                        # Octile estimate to the goal; ties prefer deeper nodes
+                        # (negated cost), which finish sooner
+                        y, x = divmod(neighbor, stride)
+                        ax, ay = abs(x - gx), abs(y - gy)
+                        estimate = new_cost + ax + ay + diagonal_extra * (ax if ax < ay else ay)
+                        heappush(heap, (estimate, -new_cost, neighbor))
+            return None
+        finally:
+            self._release(state)
+
+    def _jps(self, start: int, goal: int, request: PathRequest) -> Generator[None, None, Optional[List[int]]]:
+        """Jump Point Search (no corner cutting); yields every _JUMP_SLICE expansions."""
+        stride = self._stride
+        gy, gx = divmod(goal, stride)
+        diagonal_extra = _SQRT2 - 2.0
+        pruned_directions = self._pruned_directions
+        jump_from = self._jump
+        state, stamp = self._acquire()
+        cost, parent, mark = state.cost, state.parent, state.mark
+        closed = stamp + 1
+        try:
+            cost[start] = 0.0
+            parent[start] = start
+            mark[start] = stamp
+            heap = [(0.0, 0.0, start)]
+            while heap:
+                node = heappop(heap)[2]
+                if node == goal:
+                    return _expand(_trace(parent, goal), stride)
+                if mark[node] == closed:
+                    continue
+                mark[node] = closed
+                request.expanded += 1
+                if request.expanded % _JUMP_SLICE == 0:
+                    yield
+                g = cost[node]
+                y, x = divmod(node, stride)
+                for dx, dy in pruned_directions(node, parent[node]):
+                    jump = jump_from(node + dx + dy * stride, dx, dy, goal)
+                    if jump is None:
+                        continue
+                    seen = mark[jump]
+                    if seen == closed:
+                        continue
+                    jy, jx = divmod(jump, stride)
+                    # Octile distances, inlined: dx + dy + (sqrt(2) - 2) * min
+                    ax, ay = abs(jx - x), abs(jy - y)
+                    new_cost = g + ax + ay + diagonal_extra * (ax if ax < ay else ay)
+                    if seen != stamp or new_cost < cost[jump]:
+                        cost[jump] = new_cost
+                        parent[jump] = node
+                        mark[jump] = stamp
+                        ax, ay = abs(jx - gx), abs(jy - gy)
+                        estimate = new_cost + ax + ay + diagonal_extra * (ax if ax < ay else ay)
+                        heappush(heap, (estimate, -new_cost, jump))
+            return None
+        finally:
+            self._release(state)
+
+    def _pruned_directions(self, node: int, parent: int) -> List[Tile]:
+        """Directions worth exploring from `node`, given where it was reached from."""
+        walkable = self._walkable
+        stride = self._stride
+        if parent == node:
+            return [
+                (dx, dy) for dx, dy in _DIRECTIONS
+                if walkable[node + dx + dy * stride]
+                and (not (dx and dy) or (walkable[node + dx] and walkable[node + dy * stride]))
+            ]
+        py, px = divmod(parent, stride)
+        y, x = divmod(node, stride)
+        dx, dy = _sign(x - px), _sign(y - py)
+        directions = []
+        if dx and dy:
+            open_y = walkable[node + dy * stride]
+            open_x = walkable[node + dx]
+            if open_y:
+                directions.append((0, dy))
+            if open_x:
+                directions.append((dx, 0))
+            if open_x and open_y:
+                directions.append((dx, dy))
+        elif dx:
+            ahead = walkable[node + dx]
+            down = walkable[node + stride]
+            up = walkable[node - stride]
+            if ahead:
+                directions.append((dx, 0))
+                if down:
+                    directions.append((dx, 1))
+                if up:
+                    directions.append((dx, -1))
+            if down:
+                directions.append((0, 1))
+            if up:
+                directions.append((0, -1))
+        else:
+            ahead = walkable[node + dy * stride]
+            right = walkable[node + 1]
+            left = walkable[node - 1]
+            if ahead:
+                directions.append((0, dy))
+                if right:
+                    directions.append((1, dy))
+                if left:
+                    directions.append((-1, dy))
+            if right:
+                directions.append((1, 0))
+            if left:
+                directions.append((-1, 0))
+        return directions
+
+    def _jump(self, node: int, dx: int, dy: int, goal: int) -> Optional[int]:
+        """Follow a direction from `node` until a jump point, the goal or a wall."""
+        walkable = self._walkable
+        stride = self._stride
+        if not (dx and dy):
+            return self._jump_straight(node, dx, dy, goal)
+        vertical = dy * stride
+        while walkable[node]:
+            if node == goal:
+                return node
+            # A straight jump point reachable from here makes this one too
+            if (self._jump_straight(node + dx, dx, 0, goal) is not None
+                    or self._jump_straight(node + vertical, 0, dy, goal) is not None):
+                return node
+            # Continuing diagonally needs both orthogonal neighbors open
+            if not (walkable[node + dx] and walkable[node + vertical]):
+                return None
+            node += dx + vertical
+        return None
+
+    def _jump_straight(self, node: int, dx: int, dy: int, goal: int) -> Optional[int]:
+        walkable = self._walkable
+        stride = self._stride
+        if dx:
+            # Moving horizontally: a side tile that opens up beside a wall
+            # behind us is a forced neighbor
+            up, down, back = -stride, stride, -dx
+            step = dx
+        else:
+            up, down, back = -1, 1, -dy * stride
+            step = dy * stride
+        while walkable[node]:
+            if node == goal:
+                return node
+            if ((walkable[node + up] and not walkable[node + back + up])
+                    or (walkable[node + down] and not walkable[node + back + down])):
+                return node
+            node += step
+        return None
+
+    # ---------- Flow fields ----------
+    def flow_field(self, goal: Tile, radius: Optional[int] = None) -> FlowField:
+        """Return the (cached) flow field toward a goal tile.
+
+        Args:
+            goal (tuple[int, int]): Goal tile.
+            radius (int): Tiles covered around the goal; defaults to the
+                navigator's flow_radius (None: the whole map).
+        """
+        field = self._fields.get(goal)
+        if field is not None:
+            self._fields.move_to_end(goal)
+            return field
+        radius = self.flow_radius if radius is None else radius
+        if radius is None:
+            window = self.bounds
+        else:
+            window = pygame.Rect(goal[0] - radius, goal[1] - radius, 2 * radius + 1, 2 * radius + 1).clip(self.bounds)
+        field = self._compute_field(goal, window)
+        self._fields[goal] = field
+        while len(self._fields) > self.flow_cache_size:
+            self._fields.popitem(last=False)
+        return field
+
+    def _compute_field(self, goal: Tile, window: pygame.Rect) -> FlowField:
+        """Bucketed Dijkstra from the goal, then the best neighbor per tile."""
+        h, w = window.height, window.width
+        # Window plus a solid one-tile border, flattened
+        walkable = np.zeros((h + 2, w + 2), dtype=bool)
+        local = window.move(1 - self.origin[0], 1 - self.origin[1])
+        walkable[1:-1, 1:-1] = self._walkable_grid[local.top:local.bottom, local.left:local.right]
+        flat = walkable.ravel()
+        stride = w + 2
+        distance = np.full(flat.size, _UNREACHABLE, dtype=np.int32)
+        offsets = np.array([dx + dy * stride for dx, dy in _DIRECTIONS])
+        steps = np.array([_DIAG_COST if dx and dy else _ORTHO_COST for dx, dy in _DIRECTIONS], dtype=np.int32)
+        # open_moves[i, cell]: the move in direction i out of cell is legal
+        # (target walkable, and for diagonals both tiles beside the step)
+        inner = np.arange(stride + 1, flat.size - stride - 1)
+        open_moves = np.zeros((len(_DIRECTIONS), flat.size), dtype=bool)
+        for i, (dx, dy) in enumerate(_DIRECTIONS):
+            legal = flat[inner + offsets[i]]
+            if dx and dy:
+                legal = legal & flat[inner + dx] & flat[inner + dy * stride]
+            open_moves[i, inner] = legal
+        # Scratch slot per tile, used to drop duplicate tiles from a band
+        slot = np.empty(flat.size, dtype=np.int64)
+        goal_index = (goal[1] - window.top + 1) * stride + goal[0] - window.left + 1
+        if 0 <= goal[0] - window.left < w and 0 <= goal[1] - window.top < h and flat[goal_index]:
+            distance[goal_index] = 0
+            # Buckets hold bands of _ORTHO_COST distances: every step costs at
+            # least that much, so the tiles of one band cannot improve each
+            # other and a whole band is settled in one vectorized pass over
+            # its tiles and all 8 moves. Steps reach the next two bands only.
+            bands: Dict[int, List[np.ndarray]] = {0: [np.array([goal_index])]}
+            band = 0
+            while bands:
+                frontier = bands.pop(band, None)
+                if frontier is not None:
+                    cells = np.concatenate(frontier)
+                    # Keep one entry per tile (the last write to its slot
+                    # wins), minus tiles improved into an earlier band since
+                    base = distance[cells]
+                    order = np.arange(cells.size)
+                    slot[cells] = order
+                    keep = (slot[cells] == order) & (base // _ORTHO_COST == band)
+                    cells, base = cells[keep], base[keep]
+                    targets = cells[None, :] + offsets[:, None]
+                    reached = base[None, :] + steps[:, None]
+                    ok = open_moves[:, cells] & (reached < distance[targets])
+                    targets, reached = targets[ok], reached[ok]
+                    if targets.size:
+                        # A tile reached from several cells keeps the lowest
+                        np.minimum.at(distance, targets, reached)
+                        target_bands = distance[targets] // _ORTHO_COST
+                        near = target_bands == band + 1
+                        bands.setdefault(band + 1, []).append(targets[near])
+                        bands.setdefault(band + 2, []).append(targets[~near])
+                band += 1
+        distance = distance.reshape(h + 2, w + 2)
+        directions = _descent_directions(distance, walkable)
+        return FlowField(goal, window, distance[1:-1, 1:-1].copy(), directions, self.tile_size)
+
+    def steer(self, positions: np.ndarray, goal: Tile) -> np.ndarray:
+        """Directions toward `goal` for (n, 2) pixel positions, from one shared field."""
+        return self.flow_field(goal).direction_at(positions)
+
+
+def _descent_directions(distance: np.ndarray, walkable: np.ndarray) -> np.ndarray:
+    """Unit vector from every inner tile to its lowest-cost allowed neighbor."""
+    h, w = distance.shape[0] - 2, distance.shape[1] - 2
+    center = distance[1:-1, 1:-1]
+    candidates = np.empty((len(_DIRECTIONS), h, w), dtype=np.int64)
+    for i, (dx, dy) in enumerate(_DIRECTIONS):
+        shifted = distance[1 + dy:1 + dy + h, 1 + dx:1 + dx + w].astype(np.int64)
+        if dx and dy:
+            blocked = ~(walkable[1:-1, 1 + dx:1 + dx + w] & walkable[1 + dy:1 + dy + h, 1:-1])
+            shifted = np.where(blocked, _UNREACHABLE, shifted)
+        candidates[i] = shifted
+    best = candidates.argmin(axis=0)
+    lowest = np.take_along_axis(candidates, best[None], axis=0)[0]
+    vectors = np.array(_DIRECTIONS, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+    directions = vectors[best]
+    directions[(lowest >= center) | (center == _UNREACHABLE)] = 0.0
+    return directions
+
+
+def _trace(parent: Sequence[int], node: int) -> List[int]:
+    nodes = [node]
+    while parent[node] != node:
+        node = parent[node]
+        nodes.append(node)
+    nodes.reverse()
+    return nodes
+
+
+def _expand(jump_points: List[int], stride: int) -> List[int]:
+    """Fill in the straight or diagonal runs between jump points."""
+    nodes = jump_points[:1]
+    for a, b in zip(jump_points, jump_points[1:]):
+        ay, ax = divmod(a, stride)
+        by, bx = divmod(b, stride)
+        step = _sign(bx - ax) + _sign(by - ay) * stride
+        node = a
+        while node != b:
+            node += step
+            nodes.append(node)
+    return nodes
+
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+def _octile(dx: int, dy: int) -> float:
+    dx, dy = abs(dx), abs(dy)
+    return max(dx, dy) + (_SQRT2 - 1.0) * min(dx, dy)
@@ -0,0 +1,388 @@
+"""Batched particles: struct-of-arrays state, vectorized update, one blit call.
+
+Particles (sparks, dust, smoke) are far too many to be sprites in the map
+group. A `ParticleSystem` keeps every particle in preallocated NumPy arrays
+(position, velocity, age, lifetime, kind) and recycles dead rows through a
+free list, so spawning and dying never allocate. Emitters live in arrays
+too: each has a position, a rate and the parameters of what it spawns, and
+`update` spawns, moves, ages and kills everything in one vectorized step.
+
+A kind is a short flipbook of surfaces played once over a particle's life
+(the built-in ones shrink and fade). `draw` culls the live particles
+against the camera view, maps them to screen pixels under the renderer's
+zoom and submits them with a single `Surface.blits` call, after the map
+and its sprites.
+
+With tens of thousands of tiny blits, per-pixel alpha is what costs: frames
+are scaled once per zoom into display-format surfaces with a color key and
+one alpha for the whole frame (run-length encoded), which blit about three
+times faster. A frame's alpha is the mean alpha of its visible pixels.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import math
+
+import numpy as np
+import pygame
+
+from src.settings import PARTICLE_CAPACITY, PARTICLE_MAX_EMITTERS, PARTICLE_SEED
+
+
+# Transparent color of the scaled frames
+_COLORKEY = (255, 0, 255)
+# Built-in kinds: (color, diameter in world pixels, frames)
+_BUILTIN_KINDS: Dict[str, Tuple[Tuple[int, int, int], int, int]] = {
+    "spark": ((255, 214, 102), 3, 4),
+    "dust": ((176, 152, 120), 4, 4),
+    "smoke": ((120, 120, 128), 6, 6),
+}
+
+
+class ParticleFrame(NamedTuple):
+    """Live particles as `draw` needs them (see `ParticleSystem.capture`)."""
+
+    position: np.ndarray  # (n, 2) world pixels
+    velocity: np.ndarray  # (n, 2) pixels per second
+    frame: np.ndarray  # (n,) frame ids
+    dt: float  # length of the last update, for interpolation
+
+
+def _fading_frames(color: Tuple[int, int, int], diameter: int, count: int) -> List[pygame.Surface]:
+    """Disc frames shrinking and fading out."""
+    frames = []
+    for step in range(count):
+        left = 1.0 - step / count
+        surface = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
+        radius = max(1.0, diameter / 2 * (0.5 + 0.5 * left))
+        pygame.draw.circle(surface, (*color, round(255 * left)), (diameter // 2, diameter // 2), radius)
+        frames.append(surface)
+    return frames
+
+
+def _blit_ready(image: pygame.Surface) -> pygame.Surface:
+    """Color-keyed, whole-surface alpha version of a frame (see module docstring)."""
+    if pygame.display.get_surface() is None:
+        return image
+    alpha = 255
+    if image.get_flags() & pygame.SRCALPHA:
+        pixels = pygame.surfarray.array_alpha(image)
+        shown = pixels[pixels > 0]
+        alpha = int(shown.mean()) if len(shown) else 0
+        mask = pygame.mask.from_surface(image, 0)
+        opaque = image.copy()
+        opaque.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_MAX)
+        image = pygame.Surface(image.get_size())
+        image.fill(_COLORKEY)
+        image.blit(opaque, (0, 0))
+        # Pixels that were fully transparent stay keyed out
+        mask.invert()
+        mask.to_surface(image, setcolor=_COLORKEY, unsetcolor=None)
+    image = image.convert()
+    image.set_colorkey(_COLORKEY, pygame.RLEACCEL)
+    if alpha < 255:
+        image.set_alpha(alpha, pygame.RLEACCEL)
+    return image
+
+
+class ParticleSystem:
+    """Every particle and emitter of a map, in fixed-size arrays."""
+
+    def __init__(
+        self,
+        capacity: int = PARTICLE_CAPACITY,
+        max_emitters: int = PARTICLE_MAX_EMITTERS,
+        seed: Optional[int] = PARTICLE_SEED,
+    ) -> None:
+        self.capacity = capacity
+        self.max_emitters = max_emitters
+        # Particles and emitters, allocated at full size by the first spawn
+        # or emitter (maps without particles cost nothing); particle rows at
+        # or past `_high` are unused
+        self._allocate(0, 0)
+        self.count = 0
+        self._high = 0
+        self._rng = np.random.default_rng(seed)
+        # Kinds: flipbooks laid end to end in `frames`
+        self.frames: List[pygame.Surface] = []
+        self.kind_start = np.zeros(0, dtype=np.int32)
+        self.kind_length = np.zeros(0, dtype=np.int32)
+        self._kind_ids: Dict[str, int] = {}
+        self._margin = 0  # largest frame edge, for culling
+        # Frames scaled for the last zoom drawn, as an object array for
+        # fancy indexing by frame id
+        self._scaled_zoom: Optional[float] = None
+        self._scaled = np.zeros(0, dtype=object)
+        self._last_dt = 0.0
+        # Particles spawned while the arrays were full (counters)
+        self.dropped = 0
+
+    def _allocate(self, capacity: int, emitters: int) -> None:
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.gravity = np.zeros(capacity, dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.ones(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Free rows, lowest on top so live rows stay packed under `_high`
+        self._free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self._free_count = capacity
+        self.emitter_active = np.zeros(emitters, dtype=bool)
+        self.emitter_position = np.zeros((emitters, 2), dtype=np.float32)
+        self.emitter_rate = np.zeros(emitters, dtype=np.float32)  # particles per second
+        self.emitter_carry = np.zeros(emitters, dtype=np.float32)  # fraction of a particle owed
+        self.emitter_kind = np.zeros(emitters, dtype=np.int32)
+        self.emitter_speed = np.zeros((emitters, 2), dtype=np.float32)  # min, max
+        self.emitter_angle = np.zeros((emitters, 2), dtype=np.float32)  # direction, spread (radians)
+        self.emitter_lifetime = np.ones((emitters, 2), dtype=np.float32)  # min, max
+        self.emitter_gravity = np.zeros(emitters, dtype=np.float32)
+
+    def _ensure_allocated(self) -> None:
+        if len(self.alive) < self.capacity:
+            self._allocate(self.capacity, self.max_emitters)
+
+    # ---------- Kinds ----------
+    def add_kind(self, name: str, frames: Sequence[pygame.Surface]) -> int:
+        """Register a flipbook played over a particle's life; returns its id."""
+        kind = len(self.kind_start)
+        self.kind_start = np.append(self.kind_start, len(self.frames)).astype(np.int32)
+        self.kind_length = np.append(self.kind_length, len(frames)).astype(np.int32)
+        self.frames.extend(frames)
+        self._kind_ids[name] = kind
+        self._margin = max([self._margin] + [max(frame.get_size()) for frame in frames])
+        return kind
+
+    def kind_id(self, name: str) -> int:
+        """Id of a kind, building the built-in ones on first use."""
+        kind = self._kind_ids.get(name)
+        if kind is None:
+            if name not in _BUILTIN_KINDS:
+                raise KeyError(f"unknown particle kind: {name!r}")
+            kind = self.add_kind(name, _fading_frames(*_BUILTIN_KINDS[name]))
+        return kind
+
+    # ---------- Spawning ----------
+    def add_emitter(
+        self,
+        x: float,
+        y: float,
+        kind: int,
+        rate: float,
+        speed: Tuple[float, float] = (10.0, 30.0),
+        direction: float = -math.pi / 2,
+        spread: float = math.pi,
+        lifetime: Tuple[float, float] = (0.5, 1.0),
+        gravity: float = 0.0,
+    ) -> int:
+        """Start an emitter; returns its id (see `remove_emitter`).
+
+        Args:
+            x (float): World x in pixels.
+            y (float): World y in pixels.
+            kind (int): Kind id of what it spawns (see `kind_id`).
+            rate (float): Particles per second.
+            speed (tuple[float, float]): Initial speed range, pixels/second.
+            direction (float): Mean direction in radians (screen axes: -pi/2
+                is up).
+            spread (float): Width of the direction range in radians.
+            lifetime (tuple[float, float]): Lifetime range in seconds.
+            gravity (float): Downward acceleration, pixels/second².
+        """
+        self._ensure_allocated()
+        free = np.flatnonzero(~self.emitter_active)
+        if not len(free):
+            raise RuntimeError("too many particle emitters")
+        emitter = int(free[0])
+        self.emitter_active[emitter] = True
+        self.emitter_position[emitter] = (x, y)
+        self.emitter_rate[emitter] = rate
+        self.emitter_carry[emitter] = 0.0
+        self.emitter_kind[emitter] = kind
+        self.emitter_speed[emitter] = speed
+        self.emitter_angle[emitter] = (direction, spread)
+        self.emitter_lifetime[emitter] = lifetime
+        self.emitter_gravity[emitter] = gravity
+        return emitter
+
+    def move_emitter(self, emitter: int, x: float, y: float) -> None:
+        self.emitter_position[emitter] = (x, y)
+
+    def remove_emitter(self, emitter: int) -> None:
+        """Stop an emitter; its particles live on."""
+        self.emitter_active[emitter] = False
+
+    def burst(
+        self,
+        x: float,
+        y: float,
+        kind: int,
+        count: int,
+        speed: Tuple[float, float] = (20.0, 60.0),
+        direction: float = 0.0,
+        spread: float = 2 * math.pi,
+        lifetime: Tuple[float, float] = (0.3, 0.8),
+        gravity: float = 0.0,
+    ) -> None:
+        """Spawn `count` particles at once (arguments as `add_emitter`)."""
+        self._spawn(
+            np.full((count, 2), (x, y), dtype=np.float32),
+            np.full(count, kind, dtype=np.int32),
+            np.full((count, 2), speed, dtype=np.float32),
+            np.full((count, 2), (direction, spread), dtype=np.float32),
+            np.full((count, 2), lifetime, dtype=np.float32),
+            np.full(count, gravity, dtype=np.float32),
+        )
+
+    def _spawn(self, position, kind, speed, angle, lifetime, gravity) -> None:
+        """Fill free rows from per-particle parameter arrays."""
+        count = len(position)
+        self._ensure_allocated()
+        if count > self._free_count:
+            self.dropped += count - self._free_count
+            count = self._free_count
+        if not count:
+            return
+        rows = self._free[self._free_count - count:self._free_count][::-1]
+        self._free_count -= count
+        random = self._rng.random((3, count), dtype=np.float32)
+        theta = angle[:count, 0] + (random[0] - 0.5) * angle[:count, 1]
+        magnitude = speed[:count, 0] + random[1] * (speed[:count, 1] - speed[:count, 0])
+        self.position[rows] = position[:count]
+        self.velocity[rows, 0] = np.cos(theta) * magnitude
+        self.velocity[rows, 1] = np.sin(theta) * magnitude
+        self.lifetime[rows] = lifetime[:count, 0] + random[2] * (lifetime[:count, 1] - lifetime[:count, 0])
+        self.age[rows] = 0.0
+        self.gravity[rows] = gravity[:count]
+        self.kind[rows] = kind[:count]
+        self.alive[rows] = True
+        self.count += count
+        self._high = max(self._high, int(rows.max()) + 1)
+
+    def clear(self) -> None:
+        """Kill every particle and stop every emitter."""
+        self.alive[:] = False
+        self.emitter_active[:] = False
+        self.count = 0
+        self._high = 0
+        self._free[:] = np.arange(len(self._free) - 1, -1, -1, dtype=np.int32)
+        self._free_count = len(self._free)
+
+    # ---------- Update ----------
+    def update(self, dt: float) -> None:
+        """Spawn from emitters, then move, age and recycle every particle."""
+        self._last_dt = dt
+        self._emit(dt)
+        high = self._high
+        if not self.count or not high:
+            return
+        alive = self.alive[:high]
+        velocity = self.velocity[:high]
+        # Dead rows are moved too: cheaper than masking, and never read
+        velocity[:, 1] += self.gravity[:high] * dt
+        self.position[:high] += velocity * dt
+        age = self.age[:high]
+        age += dt
+        dying = np.flatnonzero(alive & (age >= self.lifetime[:high])).astype(np.int32)
+        if len(dying):
+            alive[dying] = False
+            self._free[self._free_count:self._free_count + len(dying)] = dying[::-1]
+            self._free_count += len(dying)
+            self.count -= len(dying)
+            if not self.count:
+                self._high = 0
+                # Restore the packed order for the next spawns
+                self._free[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+
+    def _emit(self, dt: float) -> None:
+        emitters = np.flatnonzero(self.emitter_active)
+        if not len(emitters):
+            return
+        carry = self.emitter_carry[emitters] + self.emitter_rate[emitters] * dt
+        counts = carry.astype(np.int64)
+        self.emitter_carry[emitters] = carry - counts
+        if not counts.any():
+            return
+        source = np.repeat(emitters, counts)
+        self._spawn(
+            self.emitter_position[source],
+            self.emitter_kind[source],
+            self.emitter_speed[source],
+            self.emitter_angle[source],
+            self.emitter_lifetime[source],
+            self.emitter_gravity[source],
+        )
+
+    # ---------- Drawing ----------
+    def _frame_ids(self, rows: np.ndarray) -> np.ndarray:
+        kind = self.kind[rows]
+        length = self.kind_length[kind]
+        step = (self.age[rows] / self.lifetime[rows] * length).astype(np.int32)
+        return self.kind_start[kind] + np.minimum(step, length - 1)
+
+    def live(self) -> ParticleFrame:
+        """Views of the live particles (valid until the next update)."""
+        rows = np.flatnonzero(self.alive[:self._high])
+        return ParticleFrame(self.position[rows], self.velocity[rows], self._frame_ids(rows), self._last_dt)
+
+    def capture(self) -> ParticleFrame:
+        """Copy of the live particles, for drawing on another thread."""
+        return self.live()  # fancy indexing already copies
+
+    def draw(self, surface: pygame.Surface, map_layer, alpha: float = 1.0,
+             frame: Optional[ParticleFrame] = None) -> int:
+        """Blit the particles in view over the map.
+
+        Args:
+            surface (Surface): Display the map was drawn on.
+            map_layer: Centered map renderer (`view_rect`, `zoom`).
+            alpha (float): Fraction of a tick elapsed since the last update;
+                particles are drawn that far along their last step.
+            frame (ParticleFrame): Particles to draw (`capture`); the live
+                ones by default.
+
+        Returns:
+            int: Particles drawn.
+        """
+        if frame is None:
+            if not self.count:
+                return 0
+            frame = self.live()
+        if not len(frame.frame):
+            return 0
+        view = map_layer.view_rect
+        zoom = map_layer.zoom
+        margin = self._margin
+        # Where the particles were `1 - alpha` of a step ago
+        position = frame.position + frame.velocity * ((alpha - 1.0) * frame.dt)
+        x, y = position[:, 0], position[:, 1]
+        visible = np.flatnonzero(
+            (x > view.left - margin) & (x < view.right) & (y > view.top - margin) & (y < view.bottom)
+        )
+        if not len(visible):
+            return 0
+        if self._scaled_zoom != zoom or len(self._scaled) < len(self.frames):
+            self._scale_frames(zoom)
+        screen = ((position[visible] - (view.left, view.top)) * zoom).astype(np.int32)
+        # Columns of plain ints and nested zips: zip reuses its tuples once
+        # blits has released them, so no per-particle containers are
+        # allocated (tens of thousands of lists would wake the GC up)
+        destinations = zip(screen[:, 0].tolist(), screen[:, 1].tolist())
+        surface.blits(zip(self._scaled[frame.frame[visible]], destinations), doreturn=False)
+        return len(visible)
+
+    def _scale_frames(self, zoom: float) -> None:
+        scaled = np.empty(len(self.frames), dtype=object)
+        for frame_id, image in enumerate(self.frames):
+            w, h = image.get_size()
+            scaled[frame_id] = _blit_ready(
+                pygame.transform.scale(image, (max(1, round(w * zoom)), max(1, round(h * zoom))))
+            )
+        self._scaled = scaled
+        self._scaled_zoom = zoom
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "live": self.count,
+            "high_water": self._high,
+            "emitters": int(self.emitter_active.sum()),
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,341 @@
+"""Frame profiler: nestable named scopes, recent-frame history and trace export.
+
+Code marks the work it wants measured with scopes, which nest freely:
+
+    from src.profiler import get_profiler
+
+    with get_profiler().scope("map.update"):
+        ...
+
+`Game.run` opens and closes one frame per loop iteration. Closed frames are
+kept in a ring buffer of PROFILER_HISTORY_FRAMES records, shown by
+`ProfilerOverlay` (frame-time graph with spike markers) and written by
+`Profiler.export_chrome_trace` as Chrome trace JSON, which loads in
+chrome://tracing or https://ui.perfetto.dev.
+
+While the profiler is disabled `scope` returns a shared no-op context
+manager, so instrumented code only pays an attribute test and a call.
+Scopes are recorded for the main thread only (the thread that created the
+profiler); on other threads, such as the simulation thread of
+simulation.py, `scope` returns the no-op context manager.
+"""
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+import json
+import threading
+import time
+
+import pygame
+
+from src.settings import (
+    PROFILER_ENABLED,
+    PROFILER_HISTORY_FRAMES,
+    PROFILER_SPIKE_MS,
+    PROFILER_TRACE_DIR,
+)
+
+
+# name, nesting depth, start and end (perf_counter_ns)
+ScopeEvent = Tuple[str, int, int, int]
+
+
+class FrameRecord:
+    """Timings of one profiled frame."""
+
+    __slots__ = ("index", "start_ns", "end_ns", "events")
+
+    def __init__(self, index: int, start_ns: int, end_ns: int, events: List[ScopeEvent]) -> None:
+        self.index = index
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.events = events
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def totals_ms(self) -> Dict[str, float]:
+        """Time spent in each scope name this frame, in milliseconds."""
+        totals: Dict[str, float] = {}
+        for name, _, start, end in self.events:
+            totals[name] = totals.get(name, 0.0) + (end - start) / 1e6
+        return totals
+
+
+class _NullScope:
+    """Context manager that does nothing (profiler disabled)."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    """Named scope; one instance per name, re-entrant through the profiler stack."""
+
+    __slots__ = ("_profiler", "name")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self._profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self._profiler._stack.append(time.perf_counter_ns())
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter_ns()
+        stack = self._profiler._stack
+        start = stack.pop()
+        self._profiler._events.append((self.name, len(stack), start, end))
+
+
+class Profiler:
+    """Collects scope timings per frame into a ring buffer."""
+
+    def __init__(
+        self,
+        enabled: bool = PROFILER_ENABLED,
+        history: int = PROFILER_HISTORY_FRAMES,
+        spike_ms: float = PROFILER_SPIKE_MS,
+    ) -> None:
+        """Create a profiler.
+
+        Args:
+            enabled (bool): Record scopes and frames.
+            history (int): Frames kept in the ring buffer.
+            spike_ms (float): Frames longer than this are reported as spikes.
+        """
+        self.spike_ms = spike_ms
+        self.frames: Deque[FrameRecord] = deque(maxlen=history)
+        self.frame_index: int = 0
+        self._enabled = enabled
+        self._scopes: Dict[str, _Scope] = {}
+        self._stack: List[int] = []
+        self._events: List[ScopeEvent] = []
+        self._frame_start: Optional[int] = None
+        self._thread = threading.get_ident()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self._enabled = value
+        # A frame or scope left open across the switch is discarded
+        self._frame_start = None
+        self._stack.clear()
+        self._events = []
+
+    def scope(self, name: str):
+        """Return a context manager timing the enclosed block as `name`."""
+        if not self._enabled or threading.get_ident() != self._thread:
+            return _NULL_SCOPE
+        scope = self._scopes.get(name)
+        if scope is None:
+            scope = self._scopes[name] = _Scope(self, name)
+        return scope
+
+    def begin_frame(self) -> None:
+        """Start recording a frame."""
+        if not self._enabled:
+            return
+        self._stack.clear()
+        self._events = []
+        self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self) -> Optional[FrameRecord]:
+        """Close the current frame and push it into the ring buffer.
+
+        Returns:
+            FrameRecord | None: The recorded frame, None when not recording.
+        """
+        if not self._enabled or self._frame_start is None:
+            return None
+        record = FrameRecord(self.frame_index, self._frame_start, time.perf_counter_ns(), self._events)
+        self.frames.append(record)
+        self.frame_index += 1
+        self._events = []
+        self._frame_start = None
+        return record
+
+    @property
+    def last_frame(self) -> Optional[FrameRecord]:
+        return self.frames[-1] if self.frames else None
+
+    def is_spike(self, record: FrameRecord) -> bool:
+        return record.duration_ms > self.spike_ms
+
+    def summary(self) -> Dict[str, float]:
+        """Mean time per frame spent in each scope over the ring buffer (ms)."""
+        if not self.frames:
+            return {}
+        totals: Dict[str, float] = {}
+        for record in self.frames:
+            for name, value in record.totals_ms().items():
+                totals[name] = totals.get(name, 0.0) + value
+        count = len(self.frames)
+        return {name: value / count for name, value in totals.items()}
+
+    def clear(self) -> None:
+        self.frames.clear()
+
+    def set_history(self, frames: Optional[int]) -> None:
+        """Resize the ring buffer; None keeps every frame (whole-run traces)."""
+        self.frames = deque(self.frames, maxlen=frames)
+
+    # ---------- Export ----------
+    def chrome_trace(self) -> Dict[str, list]:
+        """Return the ring buffer as a Chrome trace event dictionary."""
+        events: List[dict] = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "main"}},
+        ]
+        if not self.frames:
+            return {"traceEvents": events, "displayTimeUnit": "ms"}
+        origin = self.frames[0].start_ns
+
+        def span(name: str, category: str, start: int, end: int, args=None) -> dict:
+            event = {
+                "name": name, "cat": category, "ph": "X", "pid": 1, "tid": 1,
+                "ts": (start - origin) / 1e3, "dur": (end - start) / 1e3,
+            }
+            if args:
+                event["args"] = args
+            return event
+
+        for record in self.frames:
+            events.append(span("frame", "frame", record.start_ns, record.end_ns, {"index": record.index}))
+            for name, depth, start, end in record.events:
+                events.append(span(name, "scope", start, end, {"depth": depth}))
+            if self.is_spike(record):
+                events.append({
+                    "name": "spike", "cat": "frame", "ph": "i", "s": "t", "pid": 1, "tid": 1,
+                    "ts": (record.end_ns - origin) / 1e3,
+                    "args": {"index": record.index, "duration_ms": record.duration_ms},
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: Optional[Path] = None) -> Path:
+        """Write the ring buffer as Chrome trace JSON.
+
+        Args:
+            path (Path): Destination; defaults to a timestamped file in
+                PROFILER_TRACE_DIR.
+
+        Returns:
+            Path: The file written.
+        """
+        if path is None:
+            path = PROFILER_TRACE_DIR / time.strftime("trace-%Y%m%d-%H%M%S.json")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+        return path
+
+
+_default_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Profiler:
+    """Return the process-wide profiler."""
+    global _default_profiler
+    if _default_profiler is None:
+        _default_profiler = Profiler()
+    return _default_profiler
+
+
+# ---------- Overlay ----------
+class ProfilerOverlay:
+    """On-screen panel: frame-time graph with spike markers and top scopes."""
+
+    SIZE = (300, 146)
+    GRAPH_HEIGHT = 64
+    # Frames between two refreshes of the text lines
+    TEXT_INTERVAL = 15
+    BACKGROUND = (16, 16, 24)
+    BAR = (90, 200, 120)
+    SPIKE = (230, 70, 60)
+    BUDGET = (220, 200, 80)
+    TEXT = (230, 230, 230)
+
+    def __init__(self, profiler: Profiler, position: Tuple[int, int] = (8, 8), pacer=None) -> None:
+        self.profiler = profiler
+        # FramePacer whose frame-time spread is shown under the frame line
+        self.pacer = pacer
+        self.rect = pygame.Rect(position, self.SIZE)
+        self.visible = False
+        self._font: Optional[pygame.font.Font] = None
+        self._lines: List[pygame.Surface] = []
+        self._text_frame = -self.TEXT_INTERVAL
+        self._was_enabled = profiler.enabled
+
+    def toggle(self) -> None:
+        """Show or hide the panel; showing it turns recording on."""
+        self.visible = not self.visible
+        if self.visible:
+            self._was_enabled = self.profiler.enabled
+            self.profiler.enabled = True
+        else:
+            self.profiler.enabled = self._was_enabled
+
+    def draw(self, screen) -> None:
+        """Draw the panel on the screen wrapper (reported as dirty)."""
+        if not self.visible:
+            return
+        surface = screen.get_display()
+        surface.fill(self.BACKGROUND, self.rect)
+        self._draw_graph(surface)
+        if self.profiler.frame_index - self._text_frame >= self.TEXT_INTERVAL:
+            self._refresh_text()
+        y = self.rect.top + self.GRAPH_HEIGHT + 8
+        for line in self._lines:
+            surface.blit(line, (self.rect.left + 6, y))
+            y += line.get_height()
+        screen.mark_dirty(self.rect)
+
+    def _draw_graph(self, surface: pygame.Surface) -> None:
+        graph = pygame.Rect(self.rect.left + 4, self.rect.top + 4, self.rect.width - 8, self.GRAPH_HEIGHT)
+        # The budget line sits at half height; longer frames are clipped
+        scale = graph.height / (2.0 * self.profiler.spike_ms)
+        frames = list(self.profiler.frames)[-graph.width // 2:]
+        x = graph.right - 2 * len(frames)
+        for record in frames:
+            height = min(graph.height, max(1, int(record.duration_ms * scale)))
+            color = self.SPIKE if self.profiler.is_spike(record) else self.BAR
+            surface.fill(color, (x, graph.bottom - height, 2, height))
+            if color is self.SPIKE:
+                surface.fill(self.SPIKE, (x, graph.top, 2, 3))
+            x += 2
+        budget_y = graph.bottom - int(self.profiler.spike_ms * scale)
+        surface.fill(self.BUDGET, (graph.left, budget_y, graph.width, 1))
+
+    def _refresh_text(self) -> None:
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.Font(None, 18)
+        self._text_frame = self.profiler.frame_index
+        frames = self.profiler.frames
+        if not frames:
+            self._lines = [self._font.render("profiler: waiting for frames", True, self.TEXT)]
+            return
+        durations = sorted(record.duration_ms for record in frames)
+        spikes = sum(1 for record in frames if self.profiler.is_spike(record))
+        lines = [
+            f"frame {durations[len(durations) // 2]:.2f} ms p50, "
+            f"{durations[-1]:.2f} max, {spikes} spikes",
+        ]
+        pacing = self.pacer.stats() if self.pacer is not None else {}
+        if pacing:
+            lines.append(f"pacing {pacing['rate']:.0f} Hz, interval sd {pacing['frame_stddev_ms']:.2f} ms")
+        top = sorted(self.profiler.summary().items(), key=lambda item: -item[1])[:3]
+        lines.extend(f"{name}: {value:.2f} ms" for name, value in top)
+        self._lines = [self._font.render(line, True, self.TEXT) for line in lines]
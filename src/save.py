@@ -0,0 +1,456 @@
+"""Binary save snapshots, written in the background, with delta autosaves.
+
+A save is a set of named sections, each encoded to bytes on its own:
+
+- "meta": current map and save time
+- "player": position and facing of the player
+- "inventory": the player's item counts, by item key
+- "entities": the batched entities of `Map.entities`
+- "map/<name>": the mutable state of each visited map (`Map.state`)
+
+`SaveManager.save` captures a snapshot on the main thread. Sections whose
+owner did not change since the previous capture (same `revision`) reuse the
+bytes encoded then, and entity columns are copied as raw array bytes, so the
+capture stays cheap. Compression, the write and fsync run on a worker
+thread. Autosaves go to their own slot (SAVE_AUTOSAVE_SLOT), never to the
+quick save: `autosave` writes only the sections that differ from that
+slot's last full save, to a separate delta file, and the names of the
+sections gone since (in a REMOVED_SECTION section). Loading reads the full
+save and overlays the delta.
+
+File layout (little endian):
+- header: magic b"RSAV", format version (u16), kind (u8: 0 full, 1 delta),
+  generation (u64), base generation (u64: for a delta, the full save it
+  applies to), section count (u16)
+- section table: name length (u8), UTF-8 name, raw length (u32), stored
+  length (u32), CRC-32 of the raw bytes (u32)
+- section payloads, zlib-compressed, in table order
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from src.entity_store import FACINGS
+from src.settings import (
+    SAVE_DIR,
+    SAVE_SLOT,
+    SAVE_AUTOSAVE_SLOT,
+    SAVE_AUTOSAVE_INTERVAL_S,
+    SAVE_COMPRESSION_LEVEL,
+    SAVE_DELTA_MAX_RATIO,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SAVE_MAGIC = b"RSAV"
+SAVE_VERSION = 1
+SAVE_SUFFIX = ".rsav"
+DELTA_SUFFIX = ".delta.rsav"
+FULL, DELTA = 0, 1
+MAP_SECTION_PREFIX = "map/"
+# Delta section listing, as JSON, the base's sections the delta removes
+REMOVED_SECTION = "~removed"
+_HEADER = struct.Struct("<4sHBQQH")
+_SECTION = struct.Struct("<III")
+_PLAYER = struct.Struct("<ddB")
+_COUNT = struct.Struct("<I")
+# EntityStore columns saved per row, in file order: name, dtype, width
+_ENTITY_COLUMNS = (
+    ("position", "<f8", 2),
+    ("size", "<f8", 2),
+    ("walk_speed", "<f8", 1),
+    ("sprint_speed", "<f8", 1),
+    ("facing", "i1", 1),
+    ("sprite", "<i4", 1),
+    ("alive", "?", 1),
+)
+
+# Section name -> (CRC-32, raw length)
+SectionIndex = Dict[str, Tuple[int, int]]
+
+
+class Snapshot:
+    """Encoded, uncompressed sections of the game at one tick."""
+
+    __slots__ = ("slot", "sections", "capture_ms")
+
+    def __init__(self, slot: str, sections: Dict[str, bytes], capture_ms: float) -> None:
+        self.slot = slot
+        self.sections = sections
+        self.capture_ms = capture_ms
+
+
+class SaveData:
+    """Sections read back from a slot, decoded on demand."""
+
+    def __init__(self, generation: int, sections: Dict[str, bytes]) -> None:
+        self.generation = generation
+        self.sections = sections
+
+    @property
+    def map_name(self) -> str:
+        return json.loads(self.sections["meta"])["map"]
+
+    def player(self) -> Tuple[float, float, str]:
+        """Player position and facing."""
+        x, y, facing = _PLAYER.unpack(self.sections["player"])
+        return x, y, FACINGS[facing]
+
+    def inventory(self) -> Dict[str, int]:
+        return json.loads(self.sections["inventory"])
+
+    def map_states(self) -> Dict[str, dict]:
+        return {
+            name[len(MAP_SECTION_PREFIX):]: json.loads(data)
+            for name, data in self.sections.items() if name.startswith(MAP_SECTION_PREFIX)
+        }
+
+    def entities(self) -> Dict[str, np.ndarray]:
+        """Saved EntityStore columns, one row per saved entity."""
+        data = self.sections["entities"]
+        count = _COUNT.unpack_from(data, 0)[0]
+        offset = _COUNT.size
+        columns = {}
+        for name, dtype, width in _ENTITY_COLUMNS:
+            column = np.frombuffer(data, dtype=dtype, count=count * width, offset=offset)
+            columns[name] = column.reshape(count, width) if width > 1 else column
+            offset += column.nbytes
+        return columns
+
+
+class SaveManager:
+    """Captures snapshots on the main thread and writes them on a worker."""
+
+    def __init__(
+        self,
+        directory: Path = SAVE_DIR,
+        compression: int = SAVE_COMPRESSION_LEVEL,
+        delta_max_ratio: float = SAVE_DELTA_MAX_RATIO,
+        autosave_interval: float = SAVE_AUTOSAVE_INTERVAL_S,
+    ) -> None:
+        """Create a save manager.
+
+        Args:
+            directory (Path): Folder holding the save slots.
+            compression (int): zlib level of section payloads.
+            delta_max_ratio (float): An autosave whose changed sections
+                exceed this share of the snapshot's bytes is written full.
+            autosave_interval (float): Game seconds between autosaves from
+                `update`; 0 disables them.
+        """
+        self.directory = Path(directory)
+        self.compression = compression
+        self.delta_max_ratio = delta_max_ratio
+        self.autosave_interval = autosave_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save-writer")
+        # Bytes encoded at the last capture, reused while the owner's revision
+        # is unchanged: section -> (owner, revision, bytes)
+        self._encoded: Dict[str, Tuple[object, int, bytes]] = {}
+        # Per slot, the generation and section index of the last full save
+        self._lock = threading.Lock()
+        self._bases: Dict[str, Tuple[int, SectionIndex]] = {}
+        self._generation: int = 0
+        self._pending: Optional[Future] = None
+        self._since_autosave: float = 0.0
+        # Last save: main-thread capture time, worker time, file size, kind
+        self.last_capture_ms: float = 0.0
+        self.last_write_ms: float = 0.0
+        self.last_bytes: int = 0
+        self.last_kind: Optional[int] = None
+
+    def path_for(self, slot: str, kind: int = FULL) -> Path:
+        return self.directory / f"{slot}{DELTA_SUFFIX if kind == DELTA else SAVE_SUFFIX}"
+
+    # ---------- Saving ----------
+    def capture(self, state, slot: str = SAVE_SLOT) -> Snapshot:
+        """Encode the saved parts of a play state (main thread).
+
+        Args:
+            state (PlayState): State owning the map and the player.
+            slot (str): Slot the snapshot is meant for.
+        """
+        start = time.perf_counter()
+        world = state.map
+        player = state.player
+        sections = {
+            "meta": json.dumps({"map": world.current_map, "saved_at": time.time()}).encode("utf-8"),
+            "player": _PLAYER.pack(player.position[0], player.position[1], FACINGS.index(player.direction)),
+            "inventory": self._reuse("inventory", player.inventory, lambda inventory: _encode_json(inventory.to_dict())),
+            "entities": _encode_entities(world.entities),
+        }
+        for name, map_state in world.map_states.items():
+            key = MAP_SECTION_PREFIX + name
+            sections[key] = self._reuse(key, map_state, _encode_json)
+        capture_ms = (time.perf_counter() - start) * 1000.0
+        self.last_capture_ms = capture_ms
+        return Snapshot(slot, sections, capture_ms)
+
+    def _reuse(self, key: str, owner, encode: Callable[[object], bytes]) -> bytes:
+        """Bytes of `owner`, encoded again only when its revision changed."""
+        entry = self._encoded.get(key)
+        if entry is not None and entry[0] is owner and entry[1] == owner.revision:
+            return entry[2]
+        data = encode(owner)
+        self._encoded[key] = (owner, owner.revision, data)
+        return data
+
+    def save(self, state, slot: str = SAVE_SLOT) -> Future:
+        """Capture a full save now and write it in the background.
+
+        Returns:
+            Future: Resolves to the path written.
+        """
+        return self._submit(self.capture(state, slot), full=True)
+
+    def autosave(self, state, slot: str = SAVE_AUTOSAVE_SLOT) -> Future:
+        """Like `save`, but write only the sections changed since the last
+        full save of the slot (a full save when there is none yet).
+
+        The slot defaults to the autosave slot: a delta always applies to a
+        full save of its own chain, and the quick save is never replaced.
+        """
+        return self._submit(self.capture(state, slot), full=False)
+
+    def _submit(self, snapshot: Snapshot, full: bool) -> Future:
+        self._since_autosave = 0.0
+        self._pending = self._executor.submit(self._write, snapshot, full)
+        return self._pending
+
+    def update(self, state, dt: float) -> None:
+        """Autosave every `autosave_interval` game seconds.
+
+        A new autosave waits until the previous write has finished.
+        """
+        if self.autosave_interval <= 0:
+            return
+        self._since_autosave += dt
+        if self._since_autosave >= self.autosave_interval and not self.busy:
+            self.autosave(state)
+
+    @property
+    def busy(self) -> bool:
+        """True while a save is being written."""
+        return self._pending is not None and not self._pending.done()
+
+    def wait(self) -> None:
+        """Block until the pending write (if any) is on disk."""
+        if self._pending is not None:
+            self._pending.result()
+
+    def close(self) -> None:
+        """Finish pending writes and stop the worker."""
+        self._executor.shutdown(wait=True)
+
+    def _write(self, snapshot: Snapshot, full: bool) -> Path:
+        """Compress and write a snapshot (worker thread)."""
+        start = time.perf_counter()
+        sections = snapshot.sections
+        index = {name: (zlib.crc32(data), len(data)) for name, data in sections.items()}
+        with self._lock:
+            base = self._bases.get(snapshot.slot)
+            self._generation = max(self._generation + 1, time.time_ns())
+            generation = self._generation
+        kind = FULL
+        if not full and base is not None:
+            changed = {name: data for name, data in sections.items() if base[1].get(name) != index[name]}
+            removed = sorted(set(base[1]) - set(sections))
+            if removed:
+                changed[REMOVED_SECTION] = _encode_json(removed)
+            total = sum(len(data) for data in sections.values())
+            if sum(len(data) for data in changed.values()) <= self.delta_max_ratio * total:
+                kind, sections = DELTA, changed
+                if removed:
+                    index = dict(index)
+                    index[REMOVED_SECTION] = (zlib.crc32(changed[REMOVED_SECTION]), len(changed[REMOVED_SECTION]))
+        path = self.path_for(snapshot.slot, kind)
+        size = _write_file(path, kind, generation, base[0] if kind == DELTA else generation,
+                           sections, index, self.compression)
+        if kind == FULL:
+            with self._lock:
+                self._bases[snapshot.slot] = (generation, index)
+            # A delta against the previous full save no longer applies
+            self.path_for(snapshot.slot, DELTA).unlink(missing_ok=True)
+        self.last_write_ms = (time.perf_counter() - start) * 1000.0
+        self.last_bytes = size
+        self.last_kind = kind
+        return path
+
+    # ---------- Loading ----------
+    def exists(self, slot: str = SAVE_SLOT) -> bool:
+        return self.path_for(slot).exists()
+
+    def load(self, slot: str = SAVE_SLOT) -> SaveData:
+        """Read a slot: its full save plus the autosave delta, when current.
+
+        Raises:
+            FileNotFoundError: If the slot has no full save.
+            ValueError: If the full save is not a valid save file.
+        """
+        self.wait()
+        _, generation, _, sections, index = _read_file(self.path_for(slot))
+        with self._lock:
+            self._bases[slot] = (generation, index)
+        delta_path = self.path_for(slot, DELTA)
+        if delta_path.exists():
+            try:
+                kind, _, base, changed, _ = _read_file(delta_path)
+            except ValueError:
+                logger.warning("Ignoring unreadable autosave %s", delta_path)
+            else:
+                if kind == DELTA and base == generation:
+                    for name in json.loads(changed.pop(REMOVED_SECTION, b"[]")):
+                        sections.pop(name, None)
+                    sections.update(changed)
+                else:
+                    logger.info("Ignoring autosave %s made against another save", delta_path)
+        return SaveData(generation, sections)
+
+    def restore(self, state, data: SaveData) -> None:
+        """Apply loaded save data to a play state (main thread)."""
+        from src.map import MapState
+
+        world = state.map
+        if data.map_name != world.current_map:
+            world.switch_map(data.map_name)
+        player = state.player
+        x, y, facing = data.player()
+        player.position[:] = [x, y]
+        player.previous_position[:] = [x, y]
+        player.rect.topleft = (int(x), int(y))
+        player.direction = facing
+        items = data.inventory()
+        known = {key: count for key, count in items.items() if key in player.inventory.registry}
+        if len(known) != len(items):
+            logger.warning("Dropped unknown items from the save: %s", sorted(set(items) - set(known)))
+        player.inventory.replace(known)
+        world.map_states = {name: MapState(values) for name, values in data.map_states().items()}
+        self._restore_entities(world, data.entities())
+
+    @staticmethod
+    def _restore_entities(world, columns: Dict[str, np.ndarray]) -> None:
+        store = world.entities
+        saved_alive = columns["alive"]
+        n = min(store.count, len(saved_alive))
+        # Rows alive both now and in the save keep their sprite views: their
+        # columns are overwritten in bulk; only the others spawn or despawn
+        kept = np.zeros(store.count, dtype=bool)
+        kept[:n] = store.alive[:n] & saved_alive[:n]
+        rows = np.flatnonzero(kept)
+        for name, _, _ in _ENTITY_COLUMNS:
+            if name != "alive":
+                getattr(store, name)[rows] = columns[name][rows]
+        store.previous_position[rows] = columns["position"][rows]
+        store.intent[rows] = 0.0
+        store.sprinting[rows] = False
+        store.generation += 1
+        for row in np.flatnonzero(store.alive[:store.count] & ~kept):
+            store.despawn(int(row))
+        spawned = np.ones(len(saved_alive), dtype=bool)
+        spawned[:n] = ~kept[:n]
+        for i in np.flatnonzero(saved_alive & spawned):
+            row = world.spawn_entity(
+                *columns["position"][i], sprite=int(columns["sprite"][i]), size=columns["size"][i],
+                walk_speed=float(columns["walk_speed"][i]), sprint_speed=float(columns["sprint_speed"][i]),
+            )
+            store.facing[row] = columns["facing"][i]
+        store.settle()
+
+
+def _encode_json(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_entities(store) -> bytes:
+    """Raw bytes of the used rows of every saved EntityStore column."""
+    count = store.count
+    parts = [_COUNT.pack(count)]
+    for name, dtype, _ in _ENTITY_COLUMNS:
+        parts.append(np.ascontiguousarray(getattr(store, name)[:count], dtype=dtype).tobytes())
+    return b"".join(parts)
+
+
+def _write_file(path: Path, kind: int, generation: int, base: int, sections: Dict[str, bytes],
+                index: SectionIndex, compression: int) -> int:
+    """Write a save file atomically and durably; return its size."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = bytearray(_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, kind, generation, base, len(sections)))
+    payloads = []
+    for name, data in sections.items():
+        stored = zlib.compress(data, compression)
+        encoded_name = name.encode("utf-8")
+        table.append(len(encoded_name))
+        table += encoded_name
+        table += _SECTION.pack(len(data), len(stored), index[name][0])
+        payloads.append(stored)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as fh:
+        fh.write(table)
+        for stored in payloads:
+            fh.write(stored)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(path.parent)
+    return len(table) + sum(len(stored) for stored in payloads)
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Make a rename durable (POSIX; not supported on Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _read_file(path: Path) -> Tuple[int, int, int, Dict[str, bytes], SectionIndex]:
+    """Read and check a save file.
+
+    Returns:
+        tuple: kind, generation, base generation, sections, section index.
+
+    Raises:
+        ValueError: If the file is not a save of this version or is corrupt.
+    """
+    data = Path(path).read_bytes()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"Not a save file: {path}")
+    magic, version, kind, generation, base, count = _HEADER.unpack_from(data, 0)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION:
+        raise ValueError(f"Not a save file: {path}")
+    offset = _HEADER.size
+    table = []
+    try:
+        for _ in range(count):
+            length = data[offset]
+            name = data[offset + 1:offset + 1 + length].decode("utf-8")
+            offset += 1 + length
+            table.append((name,) + _SECTION.unpack_from(data, offset))
+            offset += _SECTION.size
+        sections: Dict[str, bytes] = {}
+        index: SectionIndex = {}
+        for name, raw_length, stored_length, crc in table:
+            raw = zlib.decompress(data[offset:offset + stored_length])
+            offset += stored_length
+            if len(raw) != raw_length or zlib.crc32(raw) != crc:
+                raise ValueError(f"Corrupt section {name!r} in {path}")
+            sections[name] = raw
+            index[name] = (crc, raw_length)
+    except (IndexError, struct.error, zlib.error) as error:
+        raise ValueError(f"Truncated or corrupt save file: {path}") from error
+    return kind, generation, base, sections, index
@@ -1,5 +1,12 @@
+import logging
+import time
+
 import pygame
-from src.settings import SCREEN_SIZE, WINDOW_TITLE, FRAMERATE
+from src.frame_pacer import FramePacer
+from src.settings import SCREEN_SIZE, WINDOW_TITLE, FRAMERATE, DIRTY_RECT_RENDERING, FRAME_PACING_VSYNC
+
+
+logger = logging.getLogger(__name__)
 
 class Screen:
     """Wrapper around the pygame display and frame timing."""
@@ -7,28 +14,114 @@ class Screen:
     def __init__(self) -> None:
         """Create the main window and configure frame timing."""
 
-        self.display = pygame.display.set_mode(SCREEN_SIZE)
+        self.display, vsync = self._set_mode(FRAME_PACING_VSYNC)
         pygame.display.set_caption(WINDOW_TITLE)
 
-        self.clock = pygame.time.Clock()
-        self.framerate = FRAMERATE
+        # Frame deadlines and dt (see frame_pacer.py); the first frame is
+        # not capped: it goes out as soon as it is drawn
+        self.pacer = FramePacer(FRAMERATE, vsync=vsync)
         # Delta time (seconds) elapsed since last frame. Updated in begin_frame().
         self.dt: float = 0.0
 
+        # Dirty-rect mode: the display is not cleared between frames and
+        # only regions reported with mark_dirty()/mark_full() are presented.
+        # A frame that reports nothing is not presented at all.
+        self.dirty_rects_enabled: bool = DIRTY_RECT_RENDERING
+        self._dirty: list[pygame.Rect] = []
+        self._full: bool = False
+        # Set when the whole display must be redrawn (first frame, window
+        # exposed, mode switched); drawing code reads full_redraw_pending
+        self._redraw_requested: bool = True
+        # Presentation counters
+        self.presented_frames: int = 0
+        self.skipped_frames: int = 0
+        self.presented_pixels: int = 0
+
+    @staticmethod
+    def _set_mode(vsync: bool):
+        """Open the window, with vsync when asked and available.
+
+        Returns:
+            tuple[Surface, bool]: The display and whether vsync is on.
+        """
+        if vsync:
+            try:
+                # SDL only syncs the presentation of renderer-backed windows
+                return pygame.display.set_mode(SCREEN_SIZE, pygame.SCALED, vsync=1), True
+            except pygame.error as exc:
+                logger.warning("Vsync unavailable (%s), pacing frames by timer", exc)
+        return pygame.display.set_mode(SCREEN_SIZE), False
+
+    @property
+    def framerate(self) -> int:
+        """Frames per second asked for (0: uncapped)."""
+        return self.pacer.max_rate
+
+    @framerate.setter
+    def framerate(self, rate: int) -> None:
+        self.pacer.set_rate(rate)
+
     def begin_frame(self):
-        """Start a new frame: cap FPS and clear the screen before drawing.
+        """Start a new frame: pace it and clear the screen before drawing.
 
         Also updates the delta time (seconds) since the previous frame, which
-        is used to make movement and animations framerate-independent.
+        is used to make movement and animations framerate-independent. The
+        pacer cuts it to FRAME_DT_MAX and smooths it over a few frames.
         """
-        self.clock.tick(self.framerate)
-        # Convert milliseconds to seconds for dt
-        self.dt = self.clock.get_time() / 1000.0
-        self.display.fill((0, 0, 0))
+        self.dt = self.pacer.wait()
+        if not self.dirty_rects_enabled:
+            self.display.fill((0, 0, 0))
 
     def end_frame(self):
-        """Finish the frame: present the backbuffer to the screen."""
-        pygame.display.update()
+        """Finish the frame: present the backbuffer to the screen.
+
+        In dirty-rect mode only the reported regions are pushed, and nothing
+        is when no region was reported (static scene).
+        """
+        # A vsync flip waits for the display: that is not the frame's work
+        start = time.perf_counter() if self.pacer.vsync else None
+        if not self.dirty_rects_enabled or self._full:
+            pygame.display.update()
+            self._count_present(self.display.get_width() * self.display.get_height())
+        elif self._dirty:
+            bounds = self.display.get_rect()
+            rects = [rect.clip(bounds) for rect in self._dirty]
+            pygame.display.update(rects)
+            self._count_present(sum(rect.width * rect.height for rect in rects))
+        else:
+            self.skipped_frames += 1
+        if start is not None:
+            self.pacer.exclude(time.perf_counter() - start)
+        self._dirty.clear()
+        self._full = False
+
+    def _count_present(self, pixels: int) -> None:
+        self.presented_frames += 1
+        self.presented_pixels += pixels
+
+    # ---------- Dirty-rect mode ----------
+    def set_dirty_rects(self, enabled: bool) -> None:
+        """Switch dirty-rect mode on or off; the next frame is redrawn in full."""
+        self.dirty_rects_enabled = enabled
+        self.request_full_redraw()
+
+    def mark_dirty(self, rect) -> None:
+        """Report a display region (screen pixels) changed this frame."""
+        self._dirty.append(pygame.Rect(rect))
+
+    def mark_full(self) -> None:
+        """Report that the whole display changed this frame."""
+        self._full = True
+        self._redraw_requested = False
+
+    def request_full_redraw(self) -> None:
+        """Ask drawing code to repaint everything next frame (e.g. window exposed)."""
+        self._redraw_requested = True
+
+    @property
+    def full_redraw_pending(self) -> bool:
+        """True until some drawing code reports a full frame with mark_full()."""
+        return self._redraw_requested
 
     def get_dt(self) -> float:
         """Return the last computed delta time in seconds.
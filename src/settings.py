@@ -16,6 +16,25 @@ SCREEN_SIZE: tuple[int, int] = (1280, 720)
 WINDOW_TITLE: str = "Requiem for an Immortal Death"
 FRAMERATE: int = 60
 
+# Frame pacing (see frame_pacer.py)
+FRAME_PACING_VSYNC: bool = False  # present on vertical blank (falls back to timed pacing if unavailable)
+FRAME_PACING_SPIN_S: float = 0.002  # end of a frame wait spent spinning instead of sleeping
+FRAME_DT_MAX: float = 0.1  # longest dt handed to the game (seconds); longer hitches are cut
+FRAME_DT_SMOOTHING_FRAMES: int = 4  # dt is the mean of this many frame times (1: raw)
+FRAME_DT_QUANTUM_S: float = 0.0001  # dt is rounded to this step (input recordings store it in 2 bytes or less)
+FRAME_PACING_STATS_FRAMES: int = 120  # frame times kept for the variance metric
+FRAME_PACING_ADAPTIVE: bool = True  # lower the target rate while frames overrun their budget
+FRAME_PACING_RATES: tuple[int, ...] = (60, 45, 30)  # target rates the adaptive mode steps through
+FRAME_PACING_ADAPT_FRAMES: int = 90  # frames measured before the target rate changes
+FRAME_PACING_OVERRUN_SHARE: float = 0.25  # share of frames over budget that lowers the rate
+FRAME_PACING_HEADROOM: float = 0.7  # work under this share of the higher rate's budget raises it
+
+# Fixed-step simulation (independent from the render rate)
+SIMULATION_TICK_RATE: int = 60  # simulation ticks per second
+MAX_TICKS_PER_FRAME: int = 5  # spiral-of-death cap; extra ticks are dropped
+SIMULATION_THREADED: bool = False  # tick on a worker thread, render snapshots (see simulation.py)
+SIMULATION_THREAD_QUEUE: int = 2  # frames the render loop may run ahead of the simulation
+
 # World and camera
 CAMERA_ZOOM: float = 3.0
 START_MAP: str = "map0"
@@ -24,9 +43,89 @@ START_MAP: str = "map0"
 PLAYER_WALK_SPEED: float = 140.0  # pixels per second
 PLAYER_SPRINT_SPEED: float = 220.0  # pixels per second
 PLAYER_SPRITE_SIZE: tuple[int, int] = (24, 32)
+PLAYER_ANIMATION_SET: str = "player"  # animation set of ANIMATIONS_FILE used by the player
 
 # Asset directories
 ASSETS_DIR: Path = PROJECT_ROOT / "assets"
 SPRITES_DIR: Path = ASSETS_DIR / "sprites"
 MAPS_DIR: Path = ASSETS_DIR / "maps"
 TILES_DIR: Path = ASSETS_DIR / "tiles"
+
+# Compiled map cache (binary, rebuilt automatically when a .tmx changes)
+MAP_CACHE_ENABLED: bool = True
+MAP_CACHE_DIR: Path = PROJECT_ROOT / "cache" / "maps"
+# Background map loading
+MAP_PREFETCH_CAPACITY: int = 4  # decoded maps kept in the loader's LRU
+MAP_SWAP_BUDGET_MS: float = 4.0  # main-thread time per frame for finishing a map switch
+# Chunked streaming for very large maps
+WORLD_CHUNK_THRESHOLD_TILES: int = 512 * 512  # maps at least this large stream in chunks
+WORLD_CHUNK_SIZE: int = 64  # chunk edge in tiles
+WORLD_CHUNK_BUDGET_KB: int = 2048  # resident chunk memory before LRU eviction
+WORLD_CHUNK_LOADS_PER_FRAME: int = 4  # chunks streamed in per update at most
+WORLD_CHUNK_LOOKAHEAD: int = 2  # extra chunk rows/columns loaded ahead of movement
+# Sprite broadphase (see spatial.py)
+SPRITE_CULLING_ENABLED: bool = True  # draw only sprites inside the camera view
+SPATIAL_CELL_SIZE: int = 64  # spatial hash cell edge in pixels
+SPRITE_ACTIVE_RADIUS: float | None = 640.0  # pixels around the player updated every tick; None updates all
+SPRITE_INACTIVE_UPDATE_INTERVAL: int = 4  # ticks between updates of far sprites; 0 freezes them
+# Map object index: triggers, warps, spawn points (see map_objects.py)
+OBJECT_INDEX_CELL_SIZE: int = 128  # grid cell edge in pixels
+OBJECT_INDEX_MAX_CELLS: int = 64  # objects spanning more cells are tested by every query instead
+# Shared image cache and sprite atlas (see assets.py)
+ASSET_CACHE_BUDGET_PIXELS: int = 4096 * 4096  # unreferenced surfaces are evicted (LRU) past this
+ASSET_ATLAS_ENABLED: bool = True  # serve sprites from packed pages when the atlas is up to date
+ATLAS_DIR: Path = PROJECT_ROOT / "cache" / "atlas"
+ATLAS_PAGE_SIZE: int = 2048  # atlas page edge in pixels
+# Dirty-rect rendering: present only changed regions, skip static frames
+DIRTY_RECT_RENDERING: bool = False
+# Map renderer: "baked" draws pre-zoomed chunks (see chunk_renderer.py),
+# "pyscroll" uses pyscroll's BufferedRenderer
+MAP_RENDERER: str = "baked"
+CHUNK_RENDER_TILES: int = 16  # baked chunk edge in tiles
+CHUNK_RENDER_BUDGET_KB: int = 32 * 1024  # baked chunk memory before LRU eviction
+CHUNK_RENDER_PREBAKE_PER_FRAME: int = 1  # chunks baked ahead of a moving camera per frame
+# Frame profiler (see profiler.py)
+PROFILER_ENABLED: bool = False  # record scopes from startup; the overlay key also turns it on
+PROFILER_HISTORY_FRAMES: int = 300  # frames kept in the ring buffer
+PROFILER_SPIKE_MS: float = 1000.0 / FRAMERATE  # frames longer than this are marked as spikes
+PROFILER_OVERLAY_KEY: str = "K_F3"  # show/hide the frame-time overlay
+PROFILER_EXPORT_KEY: str = "K_F4"  # write the ring buffer as Chrome trace JSON
+PROFILER_TRACE_DIR: Path = PROJECT_ROOT / "cache" / "profiles"
+# Gamepad sticks count as pressed past this deflection (see input_manager.py)
+INPUT_AXIS_THRESHOLD: float = 0.5
+# Input recording and replay (see input_replay.py)
+INPUT_RECORDING: bool = False  # record every session's input to INPUT_RECORDING_DIR
+INPUT_RECORDING_DIR: Path = PROJECT_ROOT / "cache" / "recordings"
+INPUT_RECORDING_FLUSH_FRAMES: int = 60  # frames buffered between two writes
+# Pathfinding (see navigation.py)
+NAV_PATH_CACHE_SIZE: int = 256  # paths kept in the LRU cache
+NAV_SEARCH_BUDGET_MS: float = 2.0  # main-thread time per frame for queued path searches
+NAV_FLOW_FIELD_RADIUS: int | None = 48  # tiles around the goal covered by a flow field; None: whole map
+NAV_FLOW_FIELD_CACHE_SIZE: int = 4  # flow fields kept, by goal tile
+# Save snapshots (see save.py)
+SAVE_DIR: Path = PROJECT_ROOT / "saves"
+SAVE_SLOT: str = "quicksave"  # slot written and read by the quick save/load keys
+SAVE_AUTOSAVE_SLOT: str = "autosave"  # slot of periodic autosaves: a full save and its delta
+SAVE_AUTOSAVE_INTERVAL_S: float = 120.0  # game seconds between autosaves; 0 disables them
+SAVE_COMPRESSION_LEVEL: int = 6  # zlib level of section payloads
+SAVE_DELTA_MAX_RATIO: float = 0.5  # autosaves changing more than this share of the bytes write a full save
+SAVE_QUICKSAVE_KEY: str = "K_F5"
+SAVE_QUICKLOAD_KEY: str = "K_F9"
+# Startup (see startup.py and states/loading_state.py)
+STARTUP_LOADING_SCREEN: bool = True  # draw a loading screen first, load the gameplay behind it
+# State stack (see state_stack.py)
+STATE_CACHE_SIZE: int = 2  # popped registry states kept for their next push
+STATE_SUSPENDED_BUDGET_KB: int = 48 * 1024  # suspended and cached states' memory before they are trimmed
+# Particles (see particles.py)
+PARTICLE_CAPACITY: int = 65536  # live particles per map; spawns beyond are dropped
+PARTICLE_MAX_EMITTERS: int = 256
+PARTICLE_SEED: int | None = 21  # seed of the spawn randomness; None: random each run
+# Minimap (see minimap.py)
+MINIMAP_SIZE: int = 192  # longest edge of the overview in pixels at most
+MINIMAP_MARGIN: int = 8  # pixels between the overview and the window's top-right corner
+MINIMAP_MARKER_SIZE: int = 3
+MINIMAP_MARKER_COLORS: tuple = ((255, 255, 255), (220, 60, 60))  # player, other sprites
+# Sprite animation clips (see animation.py)
+ANIMATIONS_FILE: Path = PROJECT_ROOT / "config" / "animations.json"
+# Item definitions and inventory (see items.py, inventory.py)
+ITEMS_FILE: Path = PROJECT_ROOT / "config" / "items.json"
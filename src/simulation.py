@@ -0,0 +1,171 @@
+"""Simulation on a worker thread, rendering from published snapshots.
+
+With SIMULATION_THREADED (or `Game(threaded_simulation=True)`), states that
+support it (`BaseState.supports_snapshots`) are simulated on a
+`SimulationThread` while the main thread pumps events and renders:
+
+    main thread                         simulation thread
+    -----------                         -----------------
+    events -> InputManager
+    submit(dt, input snapshot, cmds) -> run commands, feed input,
+                                        fixed ticks (Game.simulate),
+    render latest snapshot          <-  publish state.capture_render()
+
+Ownership rules:
+- The main thread owns the window, `Game.input` (devices, recorder,
+  replay), the profiler and whatever renders: the map renderer's camera,
+  chunk streaming and baking (see `Map.render_snapshot`).
+- The simulation thread owns the state and everything it updates (map,
+  entities, inventory, saves captures) and reads input only from
+  `Game.state_input`, fed once per frame with the main thread's
+  `InputSnapshot`. Edges (pressed/released) accumulate until a tick sees
+  them, as on the main thread.
+- Anything else the main thread wants from the state (its events, quick
+  save/load) travels with the frame as a command run before its ticks.
+- Map switches run on the simulation thread; the snapshot names the
+  renderer to draw with, and streamed worlds replaced by a switch are
+  closed by the main thread once no snapshot uses them.
+- State transitions are not run here: the thread stops ticking once the
+  state asks for one, and the main thread stops the thread, switches
+  states and starts a new thread if the next state supports snapshots.
+
+Snapshots are immutable and published into a two-slot buffer: the thread
+fills the back slot and swaps, the main thread renders the front one. At
+most SIMULATION_THREAD_QUEUE frames may wait for the thread, so rendering
+runs at most that many frames ahead of the simulation; every frame's input
+and dt is simulated in order, which keeps recordings and replays exact.
+"""
+from queue import Full, Queue
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+import logging
+import threading
+
+from src.input_manager import InputSnapshot
+from src.settings import SIMULATION_THREAD_QUEUE
+
+
+logger = logging.getLogger(__name__)
+
+# Callable and arguments run on the simulation thread before a frame's ticks
+Command = Tuple[Callable[..., Any], tuple]
+
+
+class InputFrame(NamedTuple):
+    """What the main thread hands over for one frame."""
+
+    dt: float
+    input: InputSnapshot
+    commands: Tuple[Command, ...]
+
+
+class RenderFrame(NamedTuple):
+    """What the simulation publishes after a frame's ticks."""
+
+    snapshot: Any  # state.capture_render()
+    alpha: float  # fraction of a tick left in the accumulator
+    frame: int  # input frames simulated so far
+    ticks: int  # ticks run for that frame
+
+
+class SnapshotBuffer:
+    """Two slots: the writer fills the back one and swaps it to the front."""
+
+    def __init__(self) -> None:
+        self._slots: List[Optional[RenderFrame]] = [None, None]
+        self._front = 0
+        self._changed = threading.Condition()
+        self.published = 0
+        self.closed = False
+
+    def publish(self, frame: RenderFrame) -> None:
+        back = 1 - self._front
+        self._slots[back] = frame
+        with self._changed:
+            self._front = back
+            self.published += 1
+            self._changed.notify_all()
+
+    def close(self) -> None:
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    def latest(self, timeout: Optional[float] = None) -> Optional[RenderFrame]:
+        """Front frame, waiting for the first one if none was published yet."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.published or self.closed, timeout)
+            return self._slots[self._front]
+
+
+class SimulationThread:
+    """Runs a game's fixed ticks off the main thread (see module docstring)."""
+
+    def __init__(self, game, queue_size: int = SIMULATION_THREAD_QUEUE) -> None:
+        """Create the thread (not started).
+
+        Args:
+            game (Game): Game whose `simulate`, `state_input` and
+                `current_state` the thread drives.
+            queue_size (int): Frames that may wait for the thread before
+                `submit` blocks.
+        """
+        self.game = game
+        self.buffer = SnapshotBuffer()
+        self.frames = 0
+        self.error: Optional[BaseException] = None
+        self._inputs: "Queue[Optional[InputFrame]]" = Queue(maxsize=max(1, queue_size))
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, frame: InputFrame) -> None:
+        """Queue a frame; blocks while the thread is too far behind."""
+        while True:
+            self._check()
+            try:
+                self._inputs.put(frame, timeout=0.1)
+                return
+            except Full:
+                pass
+
+    def latest(self) -> Optional[RenderFrame]:
+        """Most recent published frame (main thread)."""
+        frame = self.buffer.latest()
+        self._check()
+        return frame
+
+    def stop(self) -> None:
+        """Simulate what is queued, then end the thread."""
+        if self._thread.is_alive():
+            self._inputs.put(None)
+            self._thread.join()
+        self._check()
+
+    def _check(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("Simulation thread failed") from error
+
+    def _run(self) -> None:
+        game = self.game
+        try:
+            while True:
+                frame = self._inputs.get()
+                if frame is None:
+                    return
+                for command, args in frame.commands:
+                    command(*args)
+                game.state_input.feed(frame.input)
+                ticks = game.simulate(frame.dt, transitions=False)
+                self.frames += 1
+                state = game.current_state
+                self.buffer.publish(RenderFrame(state.capture_render(), game.alpha, self.frames, ticks))
+        except BaseException as exc:
+            logger.exception("Simulation thread failed")
+            self.error = exc
+            # Unblock a main thread waiting in submit() or latest()
+            while not self._inputs.empty():
+                self._inputs.get_nowait()
+        finally:
+            self.buffer.close()
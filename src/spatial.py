@@ -0,0 +1,221 @@
+"""Uniform-grid spatial index and a culling sprite group for pyscroll.
+
+`SpatialHash` buckets sprites by the grid cells their rect overlaps and
+answers rect, radius and point queries in time proportional to the cells
+touched. `CulledPyscrollGroup` keeps such an index in sync with its sprites
+so that only sprites inside the camera view are drawn and, optionally, only
+sprites near a focus sprite (the player) are updated every tick.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pygame
+import pyscroll
+
+from src.settings import (
+    SPATIAL_CELL_SIZE,
+    SPRITE_ACTIVE_RADIUS,
+    SPRITE_INACTIVE_UPDATE_INTERVAL,
+)
+
+
+CellRange = Tuple[int, int, int, int]
+
+
+class SpatialHash:
+    """Uniform grid mapping cells to the sprites overlapping them."""
+
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[pygame.sprite.Sprite]] = {}
+        self._ranges: Dict[pygame.sprite.Sprite, CellRange] = {}
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def __contains__(self, sprite) -> bool:
+        return sprite in self._ranges
+
+    def _cell_range(self, rect: pygame.Rect) -> CellRange:
+        size = self.cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            (rect.right - 1) // size if rect.width else rect.left // size,
+            (rect.bottom - 1) // size if rect.height else rect.top // size,
+        )
+
+    def insert(self, sprite, rect: pygame.Rect) -> None:
+        cells = self._cell_range(rect)
+        self._ranges[sprite] = cells
+        x0, y0, x1, y1 = cells
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                self._cells.setdefault((cx, cy), set()).add(sprite)
+
+    def remove(self, sprite) -> None:
+        cells = self._ranges.pop(sprite, None)
+        if cells is None:
+            return
+        x0, y0, x1, y1 = cells
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = self._cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.discard(sprite)
+                    if not bucket:
+                        del self._cells[(cx, cy)]
+
+    def update(self, sprite, rect: pygame.Rect) -> None:
+        """Re-bucket a sprite; cheap when it stays within the same cells."""
+        if self._ranges.get(sprite) == self._cell_range(rect):
+            return
+        self.remove(sprite)
+        self.insert(sprite, rect)
+
+    def _candidates(self, cells: CellRange) -> Set[pygame.sprite.Sprite]:
+        x0, y0, x1, y1 = cells
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._ranges):
+            # Visiting the cells would cost more than scanning every sprite
+            return set(self._ranges)
+        found: Set[pygame.sprite.Sprite] = set()
+        get = self._cells.get
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = get((cx, cy))
+                if bucket:
+                    found |= bucket
+        return found
+
+    def query_rect(self, rect: pygame.Rect) -> List[pygame.sprite.Sprite]:
+        """Sprites whose rect overlaps `rect`."""
+        rect = pygame.Rect(rect)
+        return [s for s in self._candidates(self._cell_range(rect)) if s.rect.colliderect(rect)]
+
+    def query_radius(self, center: Tuple[float, float], radius: float) -> List[pygame.sprite.Sprite]:
+        """Sprites whose rect center lies within `radius` of `center`."""
+        cx, cy = center
+        box = pygame.Rect(int(cx - radius), int(cy - radius), int(radius * 2) + 1, int(radius * 2) + 1)
+        limit = radius * radius
+        result = []
+        for sprite in self._candidates(self._cell_range(box)):
+            sx, sy = sprite.rect.center
+            if (sx - cx) ** 2 + (sy - cy) ** 2 <= limit:
+                result.append(sprite)
+        return result
+
+    def query_point(self, point: Tuple[float, float]) -> List[pygame.sprite.Sprite]:
+        """Sprites whose rect contains `point`."""
+        x, y = int(point[0]), int(point[1])
+        bucket = self._cells.get((x // self.cell_size, y // self.cell_size), ())
+        return [s for s in bucket if s.rect.collidepoint(x, y)]
+
+
+class CulledPyscrollGroup(pyscroll.PyscrollGroup):
+    """PyscrollGroup that draws only visible sprites and throttles far ones.
+
+    Sprites within `active_radius` pixels of `focus` are updated every tick.
+    Farther sprites are updated every `inactive_interval` ticks with the
+    accumulated dt (0 freezes them until they come back into range).
+    """
+
+    def __init__(
+        self,
+        map_layer,
+        *args,
+        cell_size: int = SPATIAL_CELL_SIZE,
+        active_radius: Optional[float] = SPRITE_ACTIVE_RADIUS,
+        inactive_interval: int = SPRITE_INACTIVE_UPDATE_INTERVAL,
+        **kwargs,
+    ) -> None:
+        self.index = SpatialHash(cell_size)
+        # Insertion order, used to keep draw order stable for visible subsets
+        self._order: Dict[pygame.sprite.Sprite, int] = {}
+        self._next_order = 0
+        self.focus: Optional[pygame.sprite.Sprite] = None
+        self.active_radius = active_radius
+        self.inactive_interval = inactive_interval
+        self._tick = 0
+        self._inactive_dt = 0.0
+        super().__init__(map_layer, *args, **kwargs)
+
+    # ---------- Membership ----------
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self._order[sprite] = self._next_order
+        self._next_order += 1
+        self.index.insert(sprite, sprite.rect)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._order.pop(sprite, None)
+        self.index.remove(sprite)
+
+    def reindex(self, sprites: Optional[Iterable[pygame.sprite.Sprite]] = None) -> None:
+        """Sync the index with sprite rects (all sprites by default)."""
+        update = self.index.update
+        for sprite in (self.sprites() if sprites is None else sprites):
+            update(sprite, sprite.rect)
+
+    # ---------- Update ----------
+    def update(self, *args, **kwargs) -> None:
+        """Update active sprites every call and the rest at a lower rate."""
+        if self.focus is None or self.active_radius is None:
+            super().update(*args, **kwargs)
+            self.reindex()
+            return
+        dt = args[0] if args else kwargs.get("dt", 0.0)
+        self._tick += 1
+        self._inactive_dt += dt
+        active = self.index.query_radius(self.focus.rect.center, self.active_radius)
+        if self.focus not in self.index:
+            active.append(self.focus)
+        run_inactive = self.inactive_interval > 0 and self._tick % self.inactive_interval == 0
+        if run_inactive:
+            active_set = set(active)
+            inactive = [s for s in self.sprites() if s not in active_set]
+            for sprite in inactive:
+                sprite.update(self._inactive_dt)
+            self._inactive_dt = 0.0
+            self.reindex(inactive)
+        for sprite in active:
+            sprite.update(*args, **kwargs)
+        self.reindex(active)
+
+    # ---------- Queries ----------
+    def visible_sprites(self, margin: int = 0) -> List[pygame.sprite.Sprite]:
+        """Sprites overlapping the camera view (grown by `margin` pixels), in draw order."""
+        view = self.view.inflate(margin * 2, margin * 2)
+        order = self._order
+        gl = self.get_layer_of_sprite
+        return sorted(self.index.query_rect(view), key=lambda s: (gl(s), order[s]))
+
+    # ---------- Draw ----------
+    def draw(self, surface: pygame.Surface, sprites: Optional[List[pygame.sprite.Sprite]] = None):
+        """Draw the map and the visible sprites onto the surface.
+
+        Args:
+            surface (pygame.Surface): Surface to draw to.
+            sprites (list): Pre-culled sprites in draw order; queried from
+                the index when omitted.
+        """
+        ox, oy = self._map_layer.get_center_offset()
+        draw_area = surface.get_rect()
+        view_rect = self.view
+        if sprites is None:
+            sprites = self.visible_sprites()
+
+        new_surfaces = []
+        spritedict = self.spritedict
+        gl = self.get_layer_of_sprite
+        for spr in sprites:
+            if spr.rect.colliderect(view_rect):
+                new_rect = spr.rect.move(ox, oy)
+                blendmode = getattr(spr, "blendmode", None)
+                if blendmode is None:
+                    new_surfaces.append((spr.image, new_rect, gl(spr)))
+                else:
+                    new_surfaces.append((spr.image, new_rect, gl(spr), blendmode))
+                spritedict[spr] = new_rect
+
+        self.lostsprites = []
+        return self._map_layer.draw(surface, draw_area, new_surfaces)
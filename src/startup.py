@@ -0,0 +1,74 @@
+"""Startup timeline: when each startup phase finished, from process start.
+
+`main.py` creates the timeline before importing pygame, so every mark is in
+milliseconds since the entry point started running. The game marks its
+phases (display, input, each loading step, first frame, first gameplay
+frame); `python main.py --startup-timeline` prints them once the first
+gameplay frame is on screen.
+
+This module must stay cheap to import: it is loaded before everything else.
+"""
+from typing import List, Optional, Tuple
+import sys
+import time
+
+
+FIRST_FRAME = "first frame"
+FIRST_GAMEPLAY_FRAME = "first gameplay frame"
+
+
+class StartupTimeline:
+    """Named marks in milliseconds since an origin."""
+
+    def __init__(self, origin: Optional[float] = None) -> None:
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks: List[Tuple[str, float]] = []
+        # Print the timeline to stderr when startup completes
+        self.report = False
+        self.complete = False
+
+    def mark(self, name: str) -> float:
+        """Record that a phase just finished; return its time in ms."""
+        elapsed = (time.perf_counter() - self.origin) * 1000.0
+        self.marks.append((name, elapsed))
+        return elapsed
+
+    def mark_once(self, name: str) -> None:
+        if self.get(name) is None:
+            self.mark(name)
+
+    def get(self, name: str) -> Optional[float]:
+        """Time of a mark in ms, or None if it was not reached."""
+        for mark, elapsed in self.marks:
+            if mark == name:
+                return elapsed
+        return None
+
+    def finish(self) -> None:
+        """Mark the first gameplay frame; startup is over."""
+        if self.complete:
+            return
+        self.mark(FIRST_GAMEPLAY_FRAME)
+        self.complete = True
+        if self.report:
+            print(self.format(), file=sys.stderr)
+
+    def format(self) -> str:
+        """One line per mark: time since start, time since the previous mark."""
+        lines = ["startup timeline (ms since start):"]
+        previous = 0.0
+        for name, elapsed in self.marks:
+            lines.append(f"  {elapsed:8.1f}  +{elapsed - previous:7.1f}  {name}")
+            previous = elapsed
+        return "\n".join(lines)
+
+
+_default_timeline: Optional[StartupTimeline] = None
+
+
+def get_startup_timeline() -> StartupTimeline:
+    """Return the process-wide timeline (its origin is its first use)."""
+    global _default_timeline
+    if _default_timeline is None:
+        _default_timeline = StartupTimeline()
+    return _default_timeline
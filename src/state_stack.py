@@ -0,0 +1,242 @@
+"""State stack: push/pop/replace transitions, a preloading registry, memory policy.
+
+`Game` ticks and draws the top state of a `StateStack`. States ask for a
+transition from `update` (`BaseState.request_push`, `request_pop`,
+`request_replace`) and the game applies it between ticks:
+
+- push: the top state is suspended (`on_suspend`) and keeps everything it
+  loaded; the new one enters (`on_enter`);
+- pop: the top state exits (`on_exit`) and the one under it resumes
+  (`on_resume`) as it was left, without reloading anything;
+- replace: the top state exits and the new one enters in its place.
+
+States pushed by name come from a `StateRegistry`. Its entries are
+"module:Class" paths. For an entry registered with `preload=True`, the
+first `poll()` (once per frame, from the end of the loading screen on)
+imports its module and runs its class's `preload` hook on a worker thread,
+and a later `poll()` builds the instance on the main thread, where
+surfaces and fonts are created, before anything asks for it. Popped
+registry states go back to the registry, which keeps the last
+STATE_CACHE_SIZE of them for their next push: pausing and resuming only
+moves references.
+
+Memory: after each transition, when the suspended and cached states hold
+more than STATE_SUSPENDED_BUDGET_KB (`BaseState.memory_bytes`), the registry
+drops its least recently used cached states, then suspended states are
+asked to `trim()` caches they can rebuild, bottom of the stack first. The
+top state is never trimmed.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Union
+import importlib
+import logging
+
+from src.settings import STATE_CACHE_SIZE, STATE_SUSPENDED_BUDGET_KB
+from src.states.base_state import POP, PUSH, REPLACE, BaseState
+
+
+logger = logging.getLogger(__name__)
+
+
+class StateRegistry:
+    """Named states, preloaded in the background and cached once popped."""
+
+    def __init__(self, screen, input_manager, cache_size: int = STATE_CACHE_SIZE) -> None:
+        """Create an empty registry.
+
+        Args:
+            screen (Screen): Passed to the states built.
+            input_manager (InputManager): Passed to the states built.
+            cache_size (int): Popped states kept for their next push.
+        """
+        self.screen = screen
+        self.input = input_manager
+        self.cache_size = cache_size
+        self._paths: Dict[str, str] = {}
+        self._classes: Dict[str, Future] = {}
+        # Preloaded entries poll() still has to build
+        self._warm: Set[str] = set()
+        # Built states nobody uses, least recently used first
+        self._idle: "OrderedDict[str, BaseState]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="states")
+        # Counters
+        self.built = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def register(self, name: str, path: str, preload: bool = False) -> None:
+        """Add a state class by "module:Class" path.
+
+        Args:
+            name (str): Name states push it by.
+            path (str): Where the class lives, imported on first use.
+            preload (bool): Import and build it ahead of its first push
+                (from the next `poll`).
+        """
+        self._paths[name] = path
+        if preload:
+            self._warm.add(name)
+
+    def preload(self, name: str) -> Future:
+        """Import the class of `name` on the worker thread (once)."""
+        future = self._classes.get(name)
+        if future is None:
+            future = self._classes[name] = self._executor.submit(self._load_class, self._paths[name])
+        return future
+
+    @staticmethod
+    def _load_class(path: str) -> type:
+        module_name, _, class_name = path.partition(":")
+        cls = getattr(importlib.import_module(module_name), class_name)
+        cls.preload()
+        return cls
+
+    def poll(self) -> None:
+        """Start preloads, and build the states whose classes are ready (main thread)."""
+        for name in [name for name in self._warm if self.preload(name).done()]:
+            self._warm.discard(name)
+            if name not in self._idle:
+                self._idle[name] = self._build(name, self._classes[name].result())
+
+    def get(self, name: str) -> BaseState:
+        """A state for `name`: the cached one, or built now (main thread)."""
+        state = self._idle.pop(name, None)
+        if state is not None:
+            self.reused += 1
+            return state
+        self._warm.discard(name)
+        return self._build(name, self.preload(name).result())
+
+    def _build(self, name: str, cls: type) -> BaseState:
+        state = cls(self.screen, self.input)
+        state.registry_name = name
+        self.built += 1
+        return state
+
+    def release(self, state: BaseState) -> None:
+        """Take back a state that left the stack, if it came from here."""
+        if state.registry_name is None or state.registry_name not in self._paths:
+            return
+        self._idle[state.registry_name] = state
+        self._idle.move_to_end(state.registry_name)
+        while len(self._idle) > self.cache_size:
+            self.evict_one()
+
+    def evict_one(self) -> bool:
+        """Drop the least recently used cached state; False if none."""
+        if not self._idle:
+            return False
+        name, _ = self._idle.popitem(last=False)
+        self.evicted += 1
+        logger.debug("Dropped cached state %s", name)
+        return True
+
+    def idle_bytes(self) -> int:
+        return sum(state.memory_bytes() for state in self._idle.values())
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class StateStack:
+    """Active state on top, suspended states under it (see module docstring)."""
+
+    def __init__(self, registry: Optional[StateRegistry] = None,
+                 budget_kb: int = STATE_SUSPENDED_BUDGET_KB) -> None:
+        """Create an empty stack.
+
+        Args:
+            registry (StateRegistry): Resolves states pushed by name and
+                takes popped ones back.
+            budget_kb (int): Memory of suspended and cached states before
+                they are trimmed.
+        """
+        self.registry = registry
+        self.budget_bytes = budget_kb * 1024
+        self.states: List[BaseState] = []
+        self.trims = 0
+
+    @property
+    def top(self) -> BaseState:
+        return self.states[-1]
+
+    def below(self, state: BaseState) -> Optional[BaseState]:
+        """The state under `state`, if any."""
+        index = self.states.index(state)
+        return self.states[index - 1] if index > 0 else None
+
+    def _resolve(self, state: Union[BaseState, str]) -> BaseState:
+        if isinstance(state, str):
+            if self.registry is None:
+                raise KeyError(f"no registry to build state {state!r}")
+            return self.registry.get(state)
+        return state
+
+    def push(self, state: Union[BaseState, str]) -> BaseState:
+        state = self._resolve(state)
+        if self.states:
+            self.top.on_suspend()
+        self.states.append(state)
+        state.on_enter()
+        return state
+
+    def pop(self) -> BaseState:
+        if len(self.states) < 2:
+            raise RuntimeError("cannot pop the last state")
+        state = self.states.pop()
+        state.on_exit()
+        self._retire(state)
+        self.top.on_resume()
+        return state
+
+    def replace(self, state: Union[BaseState, str]) -> BaseState:
+        state = self._resolve(state)
+        previous = self.states.pop()
+        previous.on_exit()
+        self._retire(previous)
+        self.states.append(state)
+        state.on_enter()
+        return state
+
+    def apply_pending(self) -> bool:
+        """Apply the transition the top state asked for; False if none."""
+        transition = self.top.take_transition()
+        if transition is None:
+            return False
+        if transition.kind == PUSH:
+            self.push(transition.state)
+        elif transition.kind == POP:
+            self.pop()
+        elif transition.kind == REPLACE:
+            self.replace(transition.state)
+        else:
+            raise ValueError(f"unknown transition: {transition.kind!r}")
+        self.enforce_budget()
+        return True
+
+    def _retire(self, state: BaseState) -> None:
+        if self.registry is not None:
+            self.registry.release(state)
+
+    def suspended_bytes(self) -> int:
+        """Memory of the suspended states and of the registry's cached ones."""
+        used = sum(state.memory_bytes() for state in self.states[:-1])
+        if self.registry is not None:
+            used += self.registry.idle_bytes()
+        return used
+
+    def enforce_budget(self) -> None:
+        """Drop cached states, then trim suspended ones, down to the budget."""
+        used = self.suspended_bytes()
+        while used > self.budget_bytes and self.registry is not None and self.registry.evict_one():
+            used = self.suspended_bytes()
+        for state in self.states[:-1]:
+            if used <= self.budget_bytes:
+                break
+            before = state.memory_bytes()
+            state.trim()
+            self.trims += 1
+            used -= before - state.memory_bytes()
+            logger.info("Trimmed suspended %s: %d KB released", type(state).__name__,
+                        (before - state.memory_bytes()) // 1024)
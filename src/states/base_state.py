@@ -8,19 +8,73 @@ and renders to the provided Screen wrapper.
 
 import pygame
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import NamedTuple, Optional, Union
+
+
+PUSH, POP, REPLACE = "push", "pop", "replace"
+
+
+class Transition(NamedTuple):
+    """A change of the state stack asked for by its top state (see state_stack.py)."""
+
+    kind: str  # PUSH, POP or REPLACE
+    # State to push or to replace the top with, or the registry name of one
+    state: Union["BaseState", str, None] = None
 
 
 class BaseState(ABC):
     """Abstract base class for a game state."""
 
+    # States that report what they redraw (Screen.mark_dirty / mark_full)
+    # set this; others get their whole frame presented in dirty-rect mode
+    supports_dirty_rects: bool = False
+    # States holding a world the save manager can capture and restore
+    # (`map` and `player`) set this
+    saveable: bool = False
+    # States that can be simulated on the simulation thread (see
+    # simulation.py) set this and implement capture_render/render_snapshot
+    supports_snapshots: bool = False
+    # States drawn over the state below them (pause, menus) set this; that
+    # state is rendered first whenever needs_backdrop() says so
+    overlay: bool = False
+    # Name of the StateRegistry entry this state was built from, if any
+    registry_name: Optional[str] = None
+
     def __init__(self) -> None:
-        self._next_state: Optional[BaseState] = None
+        self._transition: Optional[Transition] = None
+
+    @classmethod
+    def preload(cls) -> None:
+        """Prepare what instances need, on the registry's worker thread.
+
+        Runs before the first instance is built; no surfaces or fonts here
+        (they are created on the main thread).
+        """
+        pass
 
-    def next_state(self) -> Optional["BaseState"]:
-        """Return a state to switch to at end of frame, if any."""
-        return self._next_state
+    # ---------- Transitions (applied by the game between ticks) ----------
+    def transition(self) -> Optional[Transition]:
+        """Return the stack change this state asked for, if any."""
+        return self._transition
 
+    def take_transition(self) -> Optional[Transition]:
+        """Return and clear the stack change this state asked for."""
+        transition, self._transition = self._transition, None
+        return transition
+
+    def request_push(self, state: Union["BaseState", str]) -> None:
+        """Suspend this state under `state` (an instance or a registry name)."""
+        self._transition = Transition(PUSH, state)
+
+    def request_pop(self) -> None:
+        """Leave this state and resume the one under it."""
+        self._transition = Transition(POP)
+
+    def request_replace(self, state: Union["BaseState", str]) -> None:
+        """Leave this state for `state` (an instance or a registry name)."""
+        self._transition = Transition(REPLACE, state)
+
+    # ---------- Lifecycle ----------
     def on_enter(self) -> None:
         """Called when the state becomes active."""
         pass
@@ -29,17 +83,75 @@ class BaseState(ABC):
         """Called before the state is deactivated."""
         pass
 
+    def on_suspend(self) -> None:
+        """Called when another state is pushed over this one (it keeps its resources)."""
+        pass
+
+    def on_resume(self) -> None:
+        """Called when the state over this one was popped."""
+        pass
+
+    # ---------- Map objects (see map_objects.py) ----------
+    def on_object_enter(self, entity, obj) -> None:
+        """Called when `entity` starts overlapping a map object (trigger, warp)."""
+        pass
+
+    def on_object_exit(self, entity, obj) -> None:
+        """Called when `entity` stops overlapping a map object."""
+        pass
+
+    def needs_backdrop(self) -> bool:
+        """For overlay states: whether the state below must be drawn this frame."""
+        return True
+
+    # ---------- Memory (see StateStack's budget) ----------
+    def memory_bytes(self) -> int:
+        """Rough size of what the state keeps loaded while suspended."""
+        return 0
+
+    def trim(self) -> None:
+        """Release caches the state can rebuild (it is suspended meanwhile)."""
+        pass
+
     @abstractmethod
     def handle_event(self, event: pygame.event.Event) -> None:
         """Process a single pygame event (keyboard, window, etc.)."""
         raise NotImplementedError
 
+    def begin_frame(self) -> None:
+        """Called once per frame before its simulation ticks (per-frame budgets)."""
+        pass
+
     @abstractmethod
     def update(self, dt: float) -> None:
         """Advance the simulation by dt seconds (framerate-independent)."""
         raise NotImplementedError
 
     @abstractmethod
-    def render(self, screen) -> None:
-        """Draw the current state to the screen wrapper."""
+    def render(self, screen, alpha: float = 1.0) -> None:
+        """Draw the current state to the screen wrapper.
+
+        `alpha` in [0, 1) is how far the render time lies between the last
+        two simulation ticks, for interpolating moving objects.
+
+        When `screen.dirty_rects_enabled` is set the display keeps the last
+        frame: states with `supports_dirty_rects` redraw only what changed
+        and report it, and report nothing for a static frame.
+        """
+        raise NotImplementedError
+
+    def on_simulation_thread(self) -> None:
+        """Called before the state is first ticked on the simulation thread."""
+        pass
+
+    def capture_render(self):
+        """Capture what rendering needs, after a tick (simulation thread).
+
+        The result must not change afterwards: it is drawn by the main thread
+        while the next ticks run.
+        """
+        raise NotImplementedError
+
+    def render_snapshot(self, screen, snapshot, alpha: float = 1.0) -> None:
+        """Draw a `capture_render` result, like `render` (main thread)."""
         raise NotImplementedError
@@ -0,0 +1,87 @@
+"""Loading state: first screen of the game.
+
+Shows a title and a progress bar from the very first frame. Meanwhile a
+background job imports the gameplay modules (map, renderers, pyscroll) and
+the map loader decodes the start map on its own thread; the main thread only
+keeps the loading screen drawn. When both are done the play state is built
+on the main thread and takes over.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import pygame
+
+from src.screen import Screen
+from src.input_manager import InputManager
+from src.startup import get_startup_timeline
+from src.settings import START_MAP, MAP_CACHE_ENABLED, WINDOW_TITLE
+from .base_state import BaseState
+
+
+class LoadingState(BaseState):
+    """Splash screen that loads the play state in the background."""
+
+    BACKGROUND = (12, 12, 18)
+    TEXT = (230, 230, 230)
+    BAR = (90, 200, 120)
+    BAR_BACKGROUND = (40, 40, 52)
+    BAR_SIZE = (360, 8)
+
+    def __init__(self, screen: Screen, input_manager: InputManager) -> None:
+        super().__init__()
+        self.screen = screen
+        self.input = input_manager
+        self.timeline = get_startup_timeline()
+        # Finished loading steps, for the progress bar
+        self.progress = 0
+        self.total_steps = 4 if MAP_CACHE_ENABLED else 2
+        self._title: Optional[pygame.Surface] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup")
+        self._job: Future = self._executor.submit(self._load)
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        pass
+
+    def update(self, dt: float) -> None:
+        if self._transition is not None or not self._job.done():
+            return
+        self._executor.shutdown(wait=False)
+        # Surfaces and sprites are created on the main thread
+        play_state = self._job.result()
+        self.request_replace(play_state(self.screen, self.input))
+        self._step_done("play state ready")
+
+    def _load(self) -> type:
+        """Background part of the loading; returns the play state class."""
+        future = None
+        if MAP_CACHE_ENABLED:
+            from src.map_loader import get_map_loader
+
+            # Decoded on the loader thread while the modules below import
+            future = get_map_loader().prefetch(START_MAP)
+            self._step_done("map loader started")
+        from .play_state import PlayState
+
+        self._step_done("gameplay modules imported")
+        if future is not None:
+            future.result()
+            self._step_done("start map decoded")
+        return PlayState
+
+    def _step_done(self, name: str) -> None:
+        self.progress += 1
+        self.timeline.mark(name)
+
+    def render(self, screen: Screen, alpha: float = 1.0) -> None:
+        surface = screen.get_display()
+        surface.fill(self.BACKGROUND)
+        if self._title is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._title = pygame.font.Font(None, 48).render(WINDOW_TITLE, True, self.TEXT)
+        bounds = surface.get_rect()
+        surface.blit(self._title, self._title.get_rect(center=(bounds.centerx, bounds.centery - 32)))
+        bar = pygame.Rect((0, 0), self.BAR_SIZE)
+        bar.center = (bounds.centerx, bounds.centery + 24)
+        surface.fill(self.BAR_BACKGROUND, bar)
+        surface.fill(self.BAR, (bar.left, bar.top, bar.width * self.progress // self.total_steps, bar.height))
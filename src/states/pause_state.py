@@ -0,0 +1,71 @@
+"""Pause state: pushed over the gameplay by the "pause" action.
+
+The play state under it stays suspended with everything it loaded, so
+resuming is a pop. The frame under the pause is drawn once, shaded and
+kept; later frames blit that copy (and in dirty-rect mode present nothing
+until the window needs a full redraw).
+"""
+from typing import Optional
+
+import pygame
+
+from src.screen import Screen
+from src.input_manager import InputManager
+from .base_state import BaseState
+
+
+class PauseState(BaseState):
+    """Shaded, frozen gameplay with a title; "pause" again resumes."""
+
+    supports_dirty_rects = True
+    overlay = True
+
+    SHADE = (0, 0, 0, 150)
+    TEXT = (230, 230, 230)
+
+    def __init__(self, screen: Screen, input_manager: InputManager) -> None:
+        super().__init__()
+        self.screen = screen
+        self.input = input_manager
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self._title = pygame.font.Font(None, 64).render("Pause", True, self.TEXT)
+        self._shade = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+        self._shade.fill(self.SHADE)
+        # Shaded copy of the frame under the pause, taken by its first render
+        self._backdrop: Optional[pygame.Surface] = None
+
+    def on_enter(self) -> None:
+        self._backdrop = None
+
+    def on_exit(self) -> None:
+        self._backdrop = None
+
+    def needs_backdrop(self) -> bool:
+        return self._backdrop is None
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        pass
+
+    def update(self, dt: float) -> None:
+        if self.input.was_action_pressed("pause"):
+            self.request_pop()
+
+    def render(self, screen: Screen, alpha: float = 1.0) -> None:
+        display = screen.get_display()
+        if self._backdrop is None:
+            # The state below was just drawn: shade it once and keep it
+            display.blit(self._shade, (0, 0))
+            bounds = display.get_rect()
+            display.blit(self._title, self._title.get_rect(center=bounds.center))
+            self._backdrop = display.copy()
+        elif screen.dirty_rects_enabled and not screen.full_redraw_pending:
+            return
+        else:
+            display.blit(self._backdrop, (0, 0))
+        screen.mark_full()
+
+    def memory_bytes(self) -> int:
+        if self._backdrop is None:
+            return 0
+        return self._backdrop.get_width() * self._backdrop.get_height() * self._backdrop.get_bytesize()
@@ -6,18 +6,37 @@ It owns the Map and the Player Entity and uses the action-based InputManager
 """
 
 
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
 import pygame
 
 from src.screen import Screen
 from src.input_manager import InputManager
-from src.map import Map
+from src.map import Map, MapSnapshot
+from src.minimap import Minimap
 from src.entity import Entity
+from src.settings import MINIMAP_MARGIN
 from .base_state import BaseState
 
 
+class PlaySnapshot(NamedTuple):
+    """A frame of gameplay as captured for the render thread."""
+
+    map: MapSnapshot
+    # Copy of the inventory panel and where it goes, when it is open
+    panel: Optional[Tuple[pygame.Surface, pygame.Rect]]
+    # Minimap, its overview surface and markers, when it is shown
+    minimap: Optional[Tuple[Minimap, pygame.Surface, np.ndarray]]
+
+
 class PlayState(BaseState):
     """Active gameplay state."""
 
+    supports_dirty_rects = True
+    saveable = True
+    supports_snapshots = True
+
     def __init__(self, screen: Screen, input_manager: InputManager) -> None:
         super().__init__()
         self.screen = screen
@@ -26,17 +45,105 @@ class PlayState(BaseState):
         self.map = Map(self.screen)
         self.player = Entity(self.input)
         self.map.add_player(self.player)
+        # Inventory panel, toggled with the "inventory" action
+        self.inventory_open = False
+        # Minimap in the top-right corner, toggled with the "minimap" action
+        self.minimap_open = False
+        # Last panel copy handed to the render thread, and the repaint
+        # count it was copied at; overlays (panel, minimap) of the last
+        # snapshot drawn
+        self._panel_copy = None
+        self._panel_repaints = -1
+        self._overlays_drawn = (False, False)
 
     def handle_event(self, event: pygame.event.Event) -> None:
-        # Example: detect pause action edge here later if needed
-        # if event.type == pygame.KEYDOWN and self.input.was_action_pressed("pause"):
-        #     self._next_state = PauseState(...)
-        pass
+        if event.type == pygame.MOUSEWHEEL and self.inventory_open:
+            self.player.inventory.view.scroll_by(-event.y)
+
+    def begin_frame(self) -> None:
+        self.map.begin_frame()
 
     def update(self, dt: float) -> None:
+        if self.input.was_action_pressed("pause"):
+            # Suspended under the pause screen with the world kept as is
+            self.request_push("pause")
+            return
+        if self.input.was_action_pressed("inventory"):
+            self.inventory_open = not self.inventory_open
+            if not self.inventory_open and not self.map.render_owns_camera:
+                # Uncover the world under the panel (render_snapshot does it
+                # when another thread draws)
+                self.screen.request_full_redraw()
+        if self.input.was_action_pressed("minimap"):
+            self.minimap_open = not self.minimap_open
+            if not self.minimap_open and not self.map.render_owns_camera:
+                self.screen.request_full_redraw()
         # Update world with dt. Map update moves sprites and centers camera.
         self.map.update(dt)
+        for entered, obj in self.map.take_object_events():
+            if entered:
+                self.on_object_enter(self.player, obj)
+            else:
+                self.on_object_exit(self.player, obj)
+
+    def on_object_enter(self, entity, obj) -> None:
+        target = (obj.properties or {}).get("target_map")
+        if target and not self.map.is_loading:
+            # Warp: the map is swapped over the next frames
+            self.map.request_map(str(target), spawn=(obj.properties or {}).get("target_spawn"))
+
+    def render(self, screen: Screen, alpha: float = 1.0) -> None:
+        # Draw world, interpolating sprites between the last two ticks
+        self.map.render(screen, alpha)
+        if self.minimap_open and self.map.minimap is not None:
+            self._draw_minimap(screen, self.map.minimap, self.map.minimap.surface,
+                               self.map.minimap_markers(), self.map.map_layer.view_rect)
+        if self.inventory_open:
+            self.player.inventory.draw_inventory(screen)
+
+    @staticmethod
+    def _draw_minimap(screen: Screen, minimap: Minimap, surface: pygame.Surface, markers, view) -> None:
+        display = screen.get_display()
+        topleft = (display.get_width() - surface.get_width() - MINIMAP_MARGIN, MINIMAP_MARGIN)
+        screen.mark_dirty(minimap.draw(display, topleft, markers, view, surface))
+
+    def memory_bytes(self) -> int:
+        return self.map.memory_bytes()
+
+    def trim(self) -> None:
+        self.map.trim_caches()
+
+    def on_simulation_thread(self) -> None:
+        # The camera and chunk streaming follow the snapshots drawn
+        self.map.render_owns_camera = True
+
+    def capture_render(self) -> PlaySnapshot:
+        panel = None
+        if self.inventory_open:
+            view = self.player.inventory.view
+            surface = view.compose()
+            repaints = view.full_redraws + view.cell_redraws
+            if self._panel_copy is None or repaints != self._panel_repaints:
+                # The panel surface is repainted in place: hand over a copy
+                self._panel_copy = surface.copy()
+                self._panel_repaints = repaints
+            panel = (self._panel_copy, view.rect.copy())
+        minimap = None
+        if self.minimap_open and self.map.minimap is not None:
+            minimap = (self.map.minimap, self.map.minimap.surface, self.map.minimap_markers())
+        return PlaySnapshot(self.map.capture(), panel, minimap)
 
-    def render(self, screen: Screen) -> None:
-        # Draw world
-        self.map.render(screen)
+    def render_snapshot(self, screen: Screen, snapshot: PlaySnapshot, alpha: float = 1.0) -> None:
+        overlays = (snapshot.panel is not None, snapshot.minimap is not None)
+        if any(drawn and not shown for drawn, shown in zip(self._overlays_drawn, overlays)):
+            # Uncover the world under a panel or minimap that closed
+            screen.request_full_redraw()
+        self._overlays_drawn = overlays
+        self.map.render_snapshot(screen, snapshot.map, alpha)
+        if snapshot.minimap is not None:
+            minimap, surface, markers = snapshot.minimap
+            self._draw_minimap(screen, minimap, surface, markers, snapshot.map.map_layer.view_rect)
+        if snapshot.panel is not None:
+            surface, rect = snapshot.panel
+            screen.get_display().blit(surface, rect)
+            screen.mark_dirty(rect)
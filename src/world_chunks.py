@@ -0,0 +1,301 @@
+"""Chunked streaming world for maps too large to keep resident.
+
+The compiled map cache (see `map_cache`) is read in fixed-size square chunks
+of tiles. Each resident chunk is a (layers, size, size) uint16 array; chunks
+around the camera are streamed in ahead of the player's movement and the
+least recently used ones are evicted once the memory budget is exceeded, so
+memory stays flat whatever the world size. Data derived per chunk (collision
+masks, see `ChunkedCollisionGrid`) follows the same lifetime through the
+world's `listeners`.
+
+Chunks are read with plain file reads rather than through the memory map so
+the pages of far-away regions never become resident.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import math
+
+import numpy as np
+import pygame
+import pyscroll
+from pyscroll.common import rect_to_bb
+
+from src import map_cache
+from src.settings import (
+    WORLD_CHUNK_SIZE,
+    WORLD_CHUNK_BUDGET_KB,
+    WORLD_CHUNK_LOADS_PER_FRAME,
+    WORLD_CHUNK_LOOKAHEAD,
+)
+
+
+ChunkKey = Tuple[int, int]
+
+
+class ChunkSource:
+    """Reads tile chunks straight from a compiled map cache file."""
+
+    def __init__(self, cache_path: Path, chunk_size: int = WORLD_CHUNK_SIZE) -> None:
+        meta, self._data_offset = map_cache.read_cache_meta(cache_path)
+        self.width: int = meta["width"]
+        self.height: int = meta["height"]
+        self.layer_count: int = len(meta["layers"])
+        self.chunk_size = chunk_size
+        self.chunks_x = math.ceil(self.width / chunk_size)
+        self.chunks_y = math.ceil(self.height / chunk_size)
+        self._file = open(cache_path, "rb")
+
+    def read(self, cx: int, cy: int) -> np.ndarray:
+        """Read chunk (cx, cy); tiles past the map edge are 0 (empty)."""
+        size = self.chunk_size
+        chunk = np.zeros((self.layer_count, size, size), dtype="<u2")
+        x0, y0 = cx * size, cy * size
+        w = min(size, self.width - x0)
+        h = min(size, self.height - y0)
+        if w <= 0 or h <= 0:
+            return chunk
+        layer_bytes = self.width * self.height * 2
+        fh = self._file
+        for layer in range(self.layer_count):
+            base = self._data_offset + layer * layer_bytes
+            for row in range(h):
+                fh.seek(base + ((y0 + row) * self.width + x0) * 2)
+                fh.readinto(memoryview(chunk[layer, row, :w]).cast("B"))
+        return chunk
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ChunkedWorld:
+    """LRU set of resident tile chunks streamed around the camera."""
+
+    def __init__(
+        self,
+        source: ChunkSource,
+        budget_kb: int = WORLD_CHUNK_BUDGET_KB,
+        loads_per_frame: int = WORLD_CHUNK_LOADS_PER_FRAME,
+        lookahead: int = WORLD_CHUNK_LOOKAHEAD,
+    ) -> None:
+        self.source = source
+        self.chunk_size = source.chunk_size
+        chunk_bytes = source.layer_count * self.chunk_size * self.chunk_size * 2
+        self.max_chunks = max(1, budget_kb * 1024 // max(1, chunk_bytes))
+        self.loads_per_frame = loads_per_frame
+        self.lookahead = lookahead
+        # Resident chunks, most recently used last
+        self._chunks: "OrderedDict[ChunkKey, np.ndarray]" = OrderedDict()
+        # Told of every chunk loaded (`chunk_loaded(key, data)`) and evicted
+        # (`chunk_evicted(key)`)
+        self.listeners: List = []
+        # Counters
+        self.chunk_loads: int = 0
+        self.evictions: int = 0
+        self.load_stalls: int = 0  # chunk needed by the renderer before it was streamed in
+        self.peak_resident: int = 0
+
+    @property
+    def resident_chunks(self) -> int:
+        return len(self._chunks)
+
+    def chunk(self, cx: int, cy: int) -> np.ndarray:
+        """Return a chunk, loading it synchronously (a stall) if not resident."""
+        key = (cx, cy)
+        data = self._chunks.get(key)
+        if data is None:
+            self.load_stalls += 1
+            data = self._load(key)
+        else:
+            self._chunks.move_to_end(key)
+        return data
+
+    def _load(self, key: ChunkKey) -> np.ndarray:
+        data = self.source.read(*key)
+        self._chunks[key] = data
+        self.chunk_loads += 1
+        self.peak_resident = max(self.peak_resident, len(self._chunks))
+        for listener in self.listeners:
+            listener.chunk_loaded(key, data)
+        return data
+
+    def resident(self) -> List[Tuple[ChunkKey, np.ndarray]]:
+        """Resident chunks and their tiles, least recently used first."""
+        return list(self._chunks.items())
+
+    def area(self, view: pygame.Rect) -> pygame.Rect:
+        """Tiles of the chunks kept around `view` (those `prime` loads)."""
+        keys = self.wanted_chunks(view, (0.0, 0.0))
+        if not keys:
+            return pygame.Rect(0, 0, 0, 0)
+        size = self.chunk_size
+        x1, y1 = min(key[0] for key in keys) * size, min(key[1] for key in keys) * size
+        x2 = min((max(key[0] for key in keys) + 1) * size, self.source.width)
+        y2 = min((max(key[1] for key in keys) + 1) * size, self.source.height)
+        return pygame.Rect(x1, y1, x2 - x1, y2 - y1)
+
+    def wanted_chunks(self, view: pygame.Rect, velocity: Tuple[float, float]) -> List[ChunkKey]:
+        """Chunks covering the view (plus a margin) and ahead of the motion.
+
+        Args:
+            view (pygame.Rect): Visible world area in tiles.
+            velocity (tuple[float, float]): Movement direction of the camera.
+
+        Returns:
+            list[tuple[int, int]]: Chunk keys, most urgent first.
+        """
+        size = self.chunk_size
+        x1, y1 = view.left // size - 1, view.top // size - 1
+        x2, y2 = (view.right - 1) // size + 1, (view.bottom - 1) // size + 1
+        keys = [(cx, cy) for cy in range(y1, y2 + 1) for cx in range(x1, x2 + 1)]
+        # Stream further in the direction of travel
+        sx = (velocity[0] > 0) - (velocity[0] < 0)
+        sy = (velocity[1] > 0) - (velocity[1] < 0)
+        if sx or sy:
+            for step in range(2, self.lookahead + 2):
+                if sx:
+                    edge = x2 + step - 1 if sx > 0 else x1 - step + 1
+                    keys.extend((edge, cy) for cy in range(y1, y2 + 1))
+                if sy:
+                    edge = y2 + step - 1 if sy > 0 else y1 - step + 1
+                    keys.extend((cx, edge) for cx in range(x1, x2 + 1))
+        return [
+            key for key in dict.fromkeys(keys)
+            if 0 <= key[0] < self.source.chunks_x and 0 <= key[1] < self.source.chunks_y
+        ]
+
+    def update(self, view: pygame.Rect, velocity: Tuple[float, float] = (0.0, 0.0)) -> None:
+        """Stream in wanted chunks (capped per frame) and evict far ones.
+
+        Args:
+            view (pygame.Rect): Visible world area in tiles.
+            velocity (tuple[float, float]): Camera movement this tick.
+        """
+        wanted = self.wanted_chunks(view, velocity)
+        loads = 0
+        for key in wanted:
+            if key in self._chunks:
+                self._chunks.move_to_end(key)
+            elif loads < self.loads_per_frame:
+                self._load(key)
+                loads += 1
+        self._evict(set(wanted))
+
+    def prime(self, view: pygame.Rect) -> None:
+        """Load every chunk around `view` at once (used right after a map load)."""
+        for key in self.wanted_chunks(view, (0.0, 0.0)):
+            if key not in self._chunks:
+                self._load(key)
+
+    def _evict(self, keep: Set[ChunkKey]) -> None:
+        if len(self._chunks) <= self.max_chunks:
+            return
+        for key in list(self._chunks):
+            if len(self._chunks) <= self.max_chunks:
+                break
+            if key not in keep:
+                del self._chunks[key]
+                self.evictions += 1
+                for listener in self.listeners:
+                    listener.chunk_evicted(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "resident_chunks": self.resident_chunks,
+            "peak_resident_chunks": self.peak_resident,
+            "max_chunks": self.max_chunks,
+            "chunk_loads": self.chunk_loads,
+            "evictions": self.evictions,
+            "load_stalls": self.load_stalls,
+        }
+
+    def close(self) -> None:
+        for key in list(self._chunks):
+            for listener in self.listeners:
+                listener.chunk_evicted(key)
+        self._chunks.clear()
+        self.source.close()
+
+
+class ChunkedMapData(pyscroll.data.PyscrollDataAdapter):
+    """pyscroll data source reading tiles from a ChunkedWorld."""
+
+    def __init__(
+        self,
+        compiled: map_cache.CompiledMap,
+        world: ChunkedWorld,
+        images: List[Optional[pygame.Surface]],
+    ) -> None:
+        super().__init__()
+        self.compiled = compiled
+        self.world = world
+        self.images = images
+        self.reload_animations()
+
+    def reload_data(self):
+        pass
+
+    @property
+    def tile_size(self):
+        return self.compiled.tilewidth, self.compiled.tileheight
+
+    @property
+    def map_size(self):
+        return self.compiled.width, self.compiled.height
+
+    @property
+    def visible_tile_layers(self):
+        return self.compiled.visible_tile_layers
+
+    def convert_surfaces(self, parent: pygame.Surface, alpha: bool = False):
+        self.images = [
+            None if image is None else (image.convert_alpha(parent) if alpha else image.convert(parent))
+            for image in self.images
+        ]
+
+    def get_animations(self):
+        for tileset in self.compiled.tilesets:
+            for local_id, frames in tileset.animations.items():
+                yield (tileset.firstgid + local_id,
+                       [(tileset.firstgid + frame_id, duration) for frame_id, duration in frames])
+
+    def _get_tile_image(self, x: int, y: int, l: int):
+        if not (0 <= x < self.compiled.width and 0 <= y < self.compiled.height):
+            return None
+        size = self.world.chunk_size
+        gid = int(self.world.chunk(x // size, y // size)[l, y % size, x % size])
+        return self.images[gid] if gid else None
+
+    def _get_tile_image_by_id(self, id):
+        return self.images[id]
+
+    def get_tile_images_by_rect(self, rect) -> Iterator:
+        x1, y1, x2, y2 = rect_to_bb(rect)
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.compiled.width - 1), min(y2, self.compiled.height - 1)
+        if x1 > x2 or y1 > y2:
+            return
+        size = self.world.chunk_size
+        images = self.images
+        at = self._animated_tile
+        tracked_gids = self._tracked_gids
+        anim_map = self._animation_map
+        track = bool(self._animation_queue)
+
+        for l in self.visible_tile_layers:
+            for cy in range(y1 // size, y2 // size + 1):
+                for cx in range(x1 // size, x2 // size + 1):
+                    chunk = self.world.chunk(cx, cy)
+                    ox, oy = cx * size, cy * size
+                    lx1, ly1 = max(x1 - ox, 0), max(y1 - oy, 0)
+                    lx2, ly2 = min(x2 - ox, size - 1), min(y2 - oy, size - 1)
+                    rows = chunk[l, ly1:ly2 + 1, lx1:lx2 + 1].tolist()
+                    for y, row in enumerate(rows, oy + ly1):
+                        for x, gid in enumerate(row, ox + lx1):
+                            if not gid:
+                                continue
+                            if track and gid in tracked_gids:
+                                anim_map[gid].positions.add((x, y, l))
+                            tile = at.get((x, y, l)) or images[gid]
+                            if tile:
+                                yield x, y, l, tile